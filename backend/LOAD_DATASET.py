@@ -0,0 +1,161 @@
+"""
+ADATHALMAZ BETÖLTÉS - staging / terheléses teszt példány gyors felállítása
+FONTOS: A backend (és a külön worker) legyen LEÁLLÍTVA a futtatás alatt.
+         A cél adatbázis nem létezhet (--force: a régi <db>.before-load
+         néven félrekerül). A betöltés naplózás nélkül fut: megszakítás
+         esetén a félkész adatbázis törlődik, a fájlok maradhatnak.
+
+Két mód:
+    seed    - szintetikus háztartások generálása (indexek a betöltés után,
+              tömeges PRAGMA-k, a képek / dokumentumok hard linkkel);
+              csak külön adatbázisba és külön média könyvtárba: az élő
+              DATABASE_URL fájlt és a backend munkakönyvtárát elutasítja
+              (a szintetikus adatbázis mellett az orphan GC az éles
+              feltöltéseket törölné)
+    restore - mentés archívum(ok) visszaállítása (GET /api/admin/backup);
+              --link-from: egy meglévő média könyvtár, ahonnan az azonos
+              fájlok kicsomagolás helyett hard linkkel kerülnek át
+
+Használat:
+    python LOAD_DATASET.py --database /srv/staging/home_inventory.db [--force]
+                           seed --media-dir /srv/staging --items 1000000 [--households 50000]
+                                [--images-per-item 0.5] [--documents-per-item 0.1] [--copy] [--workers 16]
+    python LOAD_DATASET.py [--database home_inventory.db] [--force]
+                           restore leltar-backup-X.tar.gz [...] [--media-dir .] [--link-from /srv/leltar]
+"""
+
+import argparse
+import logging
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.utils import backup, bulk_load
+
+
+def move_aside(database_target: str, force: bool) -> bool:
+    if not os.path.exists(database_target):
+        return True
+    if not force:
+        print(f"   ❌ Az adatbázis már létezik: {database_target} (felülíráshoz: --force)")
+        return False
+    os.replace(database_target, database_target + ".before-load")
+    print(f"   ℹ️  A régi adatbázis: {database_target}.before-load")
+    return True
+
+
+def seed_targets(args):
+    """
+    Seed cél adatbázis és média könyvtár - az élő példány soha
+    """
+    if not args.database:
+        print("   ❌ Seed csak külön adatbázisba: --database megadása kötelező")
+        return None
+    database_target = os.path.abspath(args.database)
+    try:
+        live_database = backup.database_path()
+    except ValueError:
+        live_database = None
+    if live_database and os.path.realpath(database_target) == os.path.realpath(live_database):
+        print(f"   ❌ Ez az élő adatbázis (DATABASE_URL): {database_target}")
+        return None
+
+    media_dir = os.path.realpath(args.media_dir)
+    live_roots = {os.path.realpath(os.getcwd()), os.path.realpath(os.path.dirname(os.path.abspath(__file__)))}
+    if media_dir in live_roots:
+        print(f"   ❌ Ez az élő backend munkakönyvtára (média könyvtárak): {media_dir}")
+        return None
+    return database_target, media_dir
+
+
+def seed(args) -> bool:
+    targets = seed_targets(args)
+    if targets is None or not move_aside(targets[0], args.force):
+        return False
+    database_target, media_dir = targets
+
+    # A média könyvtárak (uploads/, documents/) a munkakönyvtárhoz relatívak
+    os.makedirs(media_dir, exist_ok=True)
+    os.chdir(media_dir)
+    print(f"   📁 Média könyvtár: {media_dir}")
+
+    print(f"   🌱 {args.items} tárgy, {args.households} háztartás -> {database_target} ...")
+    try:
+        result = bulk_load.seed_households(
+            database_target, args.households, args.items, images_per_item=args.images_per_item,
+            documents_per_item=args.documents_per_item, link=not args.copy, workers=args.workers,
+        )
+    except (ValueError, OSError) as e:
+        print(f"   ❌ Hiba: {e}")
+        return False
+
+    files = result["files"]
+    print(f"   ✅ {result['users']} felhasználó, {result['locations']} helyszín, {result['items']} tárgy, "
+          f"{result['images']} kép, {result['documents']} dokumentum, {result['stock_movements']} készletmozgás")
+    print(f"   ⏱️  Adatbázis: {result['database_seconds']}s (ebből betöltés {result['load_seconds']}s), "
+          f"fájlok: {files['linked']} link + {files['copied']} másolat {files['seconds']}s, "
+          f"összesen {result['seconds']}s")
+    return True
+
+
+def restore(args) -> bool:
+    database_target = args.database or backup.database_path()
+    if not move_aside(database_target, args.force):
+        return False
+
+    for index, archive in enumerate(args.archives):
+        print(f"   📦 {archive} ...")
+        try:
+            # Az első archívum után már a most visszaállított adatbázist írjuk felül
+            result = backup.restore_archive(archive, args.media_dir, database_target, overwrite=index > 0,
+                                            link_from=args.link_from)
+        except (ValueError, OSError) as e:
+            print(f"   ❌ Hiba: {e}")
+            return False
+
+        print(f"   ✅ Mentés {result['backup']}: {result['files']} fájl ({result['bytes'] / 1024 / 1024:.1f} MB), "
+              f"{result['linked']} linkelve, {result['skipped']} már megvolt, {result['seconds']}s")
+    return True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Nagy adathalmaz gyors betöltése")
+    parser.add_argument("--database", default=None,
+                        help="Cél adatbázis fájl (restore: alapértelmezés DATABASE_URL; seed: kötelező, nem az élő)")
+    parser.add_argument("--force", action="store_true", help="Létező adatbázis félretétele")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    seed_parser = commands.add_parser("seed", help="Szintetikus háztartások generálása (külön --database)")
+    seed_parser.add_argument("--media-dir", required=True,
+                             help="Külön média könyvtár (uploads/, documents/ szülője) - nem az élő backend mappa")
+    seed_parser.add_argument("--items", type=int, default=100_000)
+    seed_parser.add_argument("--households", type=int, default=None, help="Alapértelmezés: tárgyak / 20")
+    seed_parser.add_argument("--images-per-item", type=float, default=0.5)
+    seed_parser.add_argument("--documents-per-item", type=float, default=0.1)
+    seed_parser.add_argument("--copy", action="store_true", help="Hard link helyett másolás")
+    seed_parser.add_argument("--workers", type=int, default=None, help="Fájl szálak (BULK_LOAD_FILE_WORKERS)")
+
+    restore_parser = commands.add_parser("restore", help="Mentés archívum(ok) visszaállítása")
+    restore_parser.add_argument("archives", nargs="+", help="Archívumok (teljes, majd inkrementálisak sorban)")
+    restore_parser.add_argument("--media-dir", default=".", help="A média könyvtárak szülője (backend munkakönyvtár)")
+    restore_parser.add_argument("--link-from", default=None, help="Meglévő média könyvtár hard linkekhez")
+
+    args = parser.parse_args()
+    if args.command == "seed" and args.households is None:
+        args.households = max(1, args.items // 20)
+
+    logging.basicConfig(level=logging.WARNING)
+
+    print("=" * 60)
+    print(" ADATHALMAZ BETÖLTÉS")
+    print("=" * 60)
+    print()
+
+    success = seed(args) if args.command == "seed" else restore(args)
+
+    print()
+    print("=" * 60)
+    print(" KÉSZ! Most indítsd el a backend-et!" if success else " Sikertelen betöltés!")
+    print("=" * 60)
+    sys.exit(0 if success else 1)
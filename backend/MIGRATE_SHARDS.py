@@ -0,0 +1,79 @@
+"""
+FÁJL MIGRÁCIÓ - Lapos könyvtárak shardolása
+FONTOS: A script futó backend mellett is biztonságosan futtatható.
+         A fájlokat batch-enként, atomikusan helyezi át a kétszintű
+         hash-előtag szerinti alkönyvtárakba (pl. uploads/ab/cd/kep.jpg).
+         A régi URL-ek a migráció alatt és után is működnek.
+
+Használat:
+    python MIGRATE_SHARDS.py [--batch-size 500] [--pause 0.05]
+"""
+
+import argparse
+import logging
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.utils import blob_store, image_handler, document_handler, qr_handler
+
+
+def shard_directories():
+    """
+    Migrálandó könyvtárak (a backend munkakönyvtárához képest)
+    """
+    return [
+        image_handler.UPLOAD_DIR,
+        image_handler.THUMBNAIL_DIR,
+        image_handler.VARIANT_DIR,
+        image_handler.ROTATED_DIR,
+        document_handler.DOCUMENT_DIR,
+        qr_handler.QR_DIR,
+    ]
+
+
+def migrate(batch_size: int, pause: float) -> bool:
+    total_moved = 0
+    total_remaining = 0
+
+    for directory in shard_directories():
+        if not os.path.isdir(directory):
+            print(f"   ℹ️  Nem létezik, kihagyva: {directory}")
+            continue
+        if blob_store.is_migrated(directory):
+            print(f"   ℹ️  Már shardolt: {directory}")
+            continue
+
+        print(f"   📂 {directory} ...")
+        result = blob_store.migrate_flat_files(directory, batch_size=batch_size, pause=pause)
+        print(f"   ✅ {result['moved']} áthelyezve, {result['skipped']} duplikátum, {result['remaining']} maradt")
+        total_moved += result["moved"]
+        total_remaining += result["remaining"]
+
+    print(f"\n📦 Összesen áthelyezve: {total_moved}")
+    if total_remaining:
+        print(f"⚠️  {total_remaining} fájl maradt (futtasd újra a scriptet)")
+    return total_remaining == 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Lapos fájl könyvtárak shardolása")
+    parser.add_argument("--batch-size", type=int, default=500, help="Fájlok száma batch-enként")
+    parser.add_argument("--pause", type=float, default=0.05, help="Szünet batch-ek között (mp)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    print("=" * 60)
+    print(" FÁJL MIGRÁCIÓ - Shardolt könyvtárszerkezet")
+    print("=" * 60)
+    print()
+
+    success = migrate(args.batch_size, args.pause)
+
+    print()
+    print("=" * 60)
+    print(" KÉSZ!" if success else " Részleges migráció - futtasd újra!")
+    print("=" * 60)
+    sys.exit(0 if success else 1)
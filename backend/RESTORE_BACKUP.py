@@ -0,0 +1,63 @@
+"""
+MENTÉS VISSZAÁLLÍTÁS - a GET /api/admin/backup archívumaiból
+FONTOS: A backend (és a külön worker) legyen LEÁLLÍTVA a futtatás alatt.
+         Több archívum esetén előbb a teljes, utána az inkrementálisak
+         (letöltési sorrendben). A felülírt adatbázis <db>.before-restore
+         néven megmarad; a már meglévő, azonos méretű fájlok kimaradnak.
+
+Használat:
+    python RESTORE_BACKUP.py leltar-backup-X.tar.gz [leltar-backup-Y-inc.tar.gz ...]
+                             [--media-dir .] [--database home_inventory.db] [--force]
+"""
+
+import argparse
+import logging
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.utils import backup
+
+
+def restore(archives, media_dir: str, database_target: str, force: bool) -> bool:
+    for index, archive in enumerate(archives):
+        print(f"   📦 {archive} ...")
+        try:
+            # Az első után már a most visszaállított adatbázist írjuk felül
+            result = backup.restore_archive(archive, media_dir, database_target, overwrite=force or index > 0)
+        except FileExistsError as e:
+            print(f"   ❌ {e} (felülíráshoz: --force)")
+            return False
+        except (ValueError, OSError) as e:
+            print(f"   ❌ Hiba: {e}")
+            return False
+
+        base = f" (alap: {result['base']})" if result["base"] else ""
+        print(f"   ✅ Mentés {result['backup']}{base}: {result['files']} fájl "
+              f"({result['bytes'] / 1024 / 1024:.1f} MB), {result['skipped']} már megvolt, {result['seconds']}s")
+    return True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mentés archívum visszaállítása")
+    parser.add_argument("archives", nargs="+", help="Archívumok (teljes, majd inkrementálisak sorban)")
+    parser.add_argument("--media-dir", default=".", help="A média könyvtárak szülője (backend munkakönyvtár)")
+    parser.add_argument("--database", default=None, help="Cél adatbázis fájl (alapértelmezés: DATABASE_URL)")
+    parser.add_argument("--force", action="store_true", help="Létező adatbázis felülírása")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    print("=" * 60)
+    print(" MENTÉS VISSZAÁLLÍTÁS")
+    print("=" * 60)
+    print()
+
+    success = restore(args.archives, args.media_dir, args.database, args.force)
+
+    print()
+    print("=" * 60)
+    print(" KÉSZ! Most indítsd újra a backend-et!" if success else " Sikertelen visszaállítás!")
+    print("=" * 60)
+    sys.exit(0 if success else 1)
@@ -0,0 +1,61 @@
+"""
+HÁTTÉR WORKER - Képfeldolgozás, forgatás és QR renderelés külön folyamatban
+FONTOS: Ugyanazt az adatbázist és fájl könyvtárakat kell látnia, mint a
+         backendnek (ugyanabból a munkakönyvtárból indítsd). Ha külön worker
+         fut, a backend saját workerei a JOB_WORKERS=0 beállítással kikapcsolhatók.
+         Több worker folyamat is futhat egyszerre - a feladat foglalás atomi.
+
+Használat:
+    python RUN_WORKER.py [--workers 2] [--drain]
+"""
+
+import argparse
+import logging
+import os
+import signal
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import jobs  # noqa: F401  (a feladat handlerek regisztrálása)
+from app.database import init_db
+from app.utils import job_queue
+
+
+def run(workers: int) -> None:
+    threads = job_queue.start_workers(workers)
+    print(f"👷 {len(threads)} worker fut (leállítás: Ctrl+C)")
+
+    # docker stop (SIGTERM) ugyanúgy álljon le, mint a Ctrl+C
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+
+    print("\n⏳ Leállítás: a futó feladatok befejezése...")
+    job_queue.stop_workers()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Háttér feladat worker")
+    parser.add_argument("--workers", type=int, default=max(job_queue.WORKERS, 1), help="Worker szálak száma")
+    parser.add_argument("--drain", action="store_true", help="Esedékes feladatok lefuttatása, majd kilépés")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    init_db()
+
+    print("=" * 60)
+    print(" HÁTTÉR WORKER")
+    print("=" * 60)
+    print()
+
+    if args.drain:
+        done = job_queue.run_pending(worker_id=f"drain:{os.getpid()}")
+        print(f"✅ {done} feladat lefuttatva")
+    else:
+        run(args.workers)
@@ -4,10 +4,14 @@ Backend Developer: Maria Rodriguez
 JAVÍTVA: quantity mezők kezelése, jobb hibakezelés
 """
 
-from sqlalchemy.orm import Session
-from sqlalchemy import or_
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy import delete, insert, or_, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from . import models, schemas
-from typing import List, Optional
+from .utils import blob_store, qr_handler, qr_index, stock_ledger
+from typing import Dict, List, Optional, Tuple
+from datetime import datetime
 
 
 def _normalize_images(images):
@@ -21,21 +25,28 @@ def _normalize_images(images):
         filename = None
         original_filename = None
         orientation = None
+        variants = None
 
         if isinstance(image, dict):
             filename = image.get("filename") or image.get("image_filename")
             original_filename = image.get("original_filename") or filename  # JAVÍTVA: original_filename hozzáadva
             orientation = image.get("orientation")
+            variants = image.get("variants")
         else:
             filename = getattr(image, "filename", None) or getattr(image, "image_filename", None)
             original_filename = getattr(image, "original_filename", None) or filename  # JAVÍTVA: original_filename hozzáadva
             orientation = getattr(image, "orientation", None)
+            variants = getattr(image, "variants", None)
+
+        if variants:
+            variants = [v if isinstance(v, dict) else v.model_dump() for v in variants]
 
         if filename:
             normalized.append({
                 "filename": filename,
                 "original_filename": original_filename or filename,  # JAVÍTVA: ha nincs original_filename, használjuk a filename-t
-                "orientation": orientation
+                "orientation": orientation,
+                "variants": variants or None
             })
 
     return normalized
@@ -103,9 +114,9 @@ def create_item(db: Session, item: schemas.ItemCreate) -> models.Item:
     if "quantity" not in item_data or item_data["quantity"] is None:
         item_data["quantity"] = 1
     
-    # Győződj meg róla hogy legalább 1
-    if item_data["quantity"] < 1:
-        item_data["quantity"] = 1
+    # Nem lehet negatív (0 = elfogyott)
+    if item_data["quantity"] < 0:
+        item_data["quantity"] = 0
     
     # Hozd létre az item-et
     images = _normalize_images(item_data.pop("images", []))
@@ -117,7 +128,8 @@ def create_item(db: Session, item: schemas.ItemCreate) -> models.Item:
             models.ItemImage(
                 filename=image["filename"],
                 original_filename=image.get("original_filename") or image["filename"],  # JAVÍTVA: original_filename hozzáadva
-                orientation=image.get("orientation")
+                orientation=image.get("orientation"),
+                variants=image.get("variants")
             )
         )
 
@@ -146,8 +158,10 @@ def update_item(db: Session, item_id: int, item_update: schemas.ItemUpdate) -> O
     
     # KRITIKUS: quantity validáció
     if "quantity" in update_data:
-        if update_data["quantity"] is None or update_data["quantity"] < 1:
+        if update_data["quantity"] is None:
             update_data["quantity"] = 1
+        elif update_data["quantity"] < 0:
+            update_data["quantity"] = 0
     
     # JAVÍTVA: Logoljuk az images mezőt
     if "images" in update_data:
@@ -179,7 +193,8 @@ def update_item(db: Session, item_id: int, item_update: schemas.ItemUpdate) -> O
                 models.ItemImage(
                     filename=image["filename"],
                     original_filename=image.get("original_filename") or image["filename"],  # JAVÍTVA: original_filename hozzáadva
-                    orientation=image.get("orientation")
+                    orientation=image.get("orientation"),
+                    variants=image.get("variants")
                 )
             )
         logger.info(f"✅ {len(images)} kép hozzáadva az itemhez")
@@ -205,6 +220,216 @@ def delete_item(db: Session, item_id: int) -> bool:
     return True
 
 
+# ============= TÖMEGES ITEM MŰVELETEK =============
+
+_REQUIRED_ITEM_FIELDS = ("name", "category")
+
+
+def _validate_bulk_operations(db: Session, operations: List[schemas.BulkItemOperation]) -> Tuple[List[Dict], Dict[int, tuple]]:
+    """
+    A teljes köteg ellenőrzése írás előtt, műveletenként egy lekérdezés helyett
+    azonosítónként egy-egy IN lekérdezéssel (tárgyak, felhasználók, helyszínek)
+
+    Returns:
+        (hibák [{index, op, error}], meglévő tárgyak {id: (quantity, image_filename)})
+    """
+    errors = []
+    target_ids = [op.id for op in operations if op.op != "create" and op.id is not None]
+    existing = {
+        row.id: (row.quantity, row.image_filename)
+        for row in db.query(models.Item.id, models.Item.quantity, models.Item.image_filename)
+        .filter(models.Item.id.in_(target_ids))
+    } if target_ids else {}
+
+    payloads = [op.item if op.op == "create" else op.changes for op in operations]
+    user_ids = {p.user_id for p in payloads if p is not None and p.user_id is not None}
+    location_ids = {p.location_id for p in payloads if p is not None and p.location_id is not None}
+    users = {row.id for row in db.query(models.User.id).filter(models.User.id.in_(user_ids))} if user_ids else set()
+    locations = {row.id for row in db.query(models.Location.id).filter(models.Location.id.in_(location_ids))} if location_ids else set()
+
+    seen = set()
+    for index, op in enumerate(operations):
+        payload = payloads[index]
+        if op.op == "create":
+            error = None if op.item is not None else "Hiányzó item"
+        elif op.id is None:
+            error = "Hiányzó id"
+        elif op.id not in existing:
+            error = f"Item #{op.id} nem található"
+        elif op.id in seen:
+            error = f"Item #{op.id} többször szerepel a kötegben"
+        elif op.op == "update" and (op.changes is None or not op.changes.model_fields_set):
+            error = "Hiányzó módosítás (changes)"
+        elif op.op == "update" and any(
+            field in op.changes.model_fields_set and getattr(op.changes, field) is None for field in _REQUIRED_ITEM_FIELDS
+        ):
+            error = "A name és category nem lehet üres"
+        else:
+            error = None
+        if op.op != "create" and op.id is not None:
+            seen.add(op.id)
+
+        if error is None and payload is not None:
+            if payload.user_id is not None and payload.user_id not in users:
+                error = f"Felhasználó #{payload.user_id} nem található"
+            elif payload.location_id is not None and payload.location_id not in locations:
+                error = f"Helyszín #{payload.location_id} nem található"
+        if error:
+            errors.append({"index": index, "op": op.op, "id": op.id, "error": error})
+
+    return errors, existing
+
+
+def _image_rows(item_id: int, images) -> List[Dict]:
+    return [
+        {
+            "item_id": item_id,
+            "filename": image["filename"],
+            "original_filename": image.get("original_filename") or image["filename"],
+            "orientation": image.get("orientation"),
+            "variants": image.get("variants"),
+        }
+        for image in _normalize_images(images)
+    ]
+
+
+def insert_items(db: Session, items: List[schemas.ItemCreate]) -> List[int]:
+    """
+    Tárgyak beszúrása egy többsoros INSERT ... RETURNING utasítással (commit nélkül)
+
+    A create_item ORM eseményeinek megfelelő mellékhatások (kezdő készletmozgás,
+    képek, blob hivatkozások, QR scan index) is itt, tömegesen íródnak.
+
+    Returns:
+        Az új ID-k a bemenet sorrendjében
+    """
+    rows = []
+    for item in items:
+        row = item.model_dump(exclude={"images"})
+        row["quantity"] = 1 if row.get("quantity") is None else row["quantity"]
+        rows.append(row)
+    # Core INSERT a session kapcsolatán: az ORM bulk insert a soronként eltérő
+    # None mezők miatt sok kis utasításra bomlana
+    connection = db.connection()
+    table = models.Item.__table__
+    new_ids = connection.execute(
+        insert(table).returning(table.c.id, sort_by_parameter_order=True), rows
+    ).scalars().all()
+
+    stock_ledger.record_many(connection, [(item_id, row["quantity"], row["quantity"]) for item_id, row in zip(new_ids, rows)], "initial")
+    image_rows = [image for item_id, item in zip(new_ids, items) for image in _image_rows(item_id, item.images)]
+    if image_rows:
+        db.execute(insert(models.ItemImage), image_rows)
+    for filename in [row["image_filename"] for row in rows] + [image["filename"] for image in image_rows]:
+        blob_store.adjust_refs(connection, filename, +1)
+    # A Core INSERT az ORM eseményeket is megkerüli: a QR kóddal érkező sorok commit után az indexbe kerülnek
+    qr_index.mark_items(db, [item_id for item_id, row in zip(new_ids, rows) if row.get("qr_code")])
+    return new_ids
+
+
+def bulk_item_operations(db: Session, operations: List[schemas.BulkItemOperation]) -> Dict:
+    """
+    Vegyes create / update / delete műveletek egyetlen tranzakcióban
+
+    Előbb a teljes köteg ellenőrzése; ha bármely művelet hibás, semmi nem
+    íródik ("errors" a válaszban). Utána:
+    - create: egy többsoros INSERT ... RETURNING (a képek szintén egy INSERT-tel),
+    - update: azonos mezőkészletű módosítások executemany UPDATE-ként,
+    - delete: ORM törlés egy flush-ban (a cascade-ek és a blob / napló / QR
+      index események így érvényesülnek).
+    Az ORM események helyett a tömeges utasítások mellékhatásait (készletnapló,
+    blob hivatkozások) itt, ugyanabban a tranzakcióban kezeljük.
+
+    Returns:
+        {"created", "updated", "deleted", "results", "errors", "removed"} - a
+        removed a törölt tárgyak (id, image_filename, qr_code) listája a
+        commit utáni fájl takarításhoz
+    """
+    errors, existing = _validate_bulk_operations(db, operations)
+    if errors:
+        return {"created": 0, "updated": 0, "deleted": 0, "results": [], "errors": errors, "removed": []}
+
+    creates = [(index, op) for index, op in enumerate(operations) if op.op == "create"]
+    updates = [(index, op) for index, op in enumerate(operations) if op.op == "update"]
+    deletes = [(index, op) for index, op in enumerate(operations) if op.op == "delete"]
+    results: List[Optional[Dict]] = [None] * len(operations)
+    removed = []
+
+    try:
+        # --- Létrehozás: egy többsoros INSERT, a generált ID-k a kérés sorrendjében
+        if creates:
+            new_ids = insert_items(db, [op.item for _, op in creates])
+            for (index, _), item_id in zip(creates, new_ids):
+                results[index] = {"index": index, "op": "create", "id": item_id, "status": "created"}
+
+        # --- Módosítás: azonos mezőkészletű sorok egy executemany UPDATE-ben
+        if updates:
+            groups: Dict[tuple, List[Dict]] = {}
+            movements, ref_changes, replaced_images = [], [], {}
+            for index, op in updates:
+                changes = op.changes.model_dump(exclude_unset=True)
+                previous_quantity, previous_image = existing[op.id]
+                if "images" in changes:
+                    replaced_images[op.id] = changes.pop("images")
+                if "quantity" in changes:
+                    changes["quantity"] = 1 if changes["quantity"] is None else changes["quantity"]
+                    movements.append((op.id, changes["quantity"] - previous_quantity, changes["quantity"]))
+                if "image_filename" in changes and changes["image_filename"] != previous_image:
+                    ref_changes += [(previous_image, -1), (changes["image_filename"], +1)]
+                if changes:
+                    groups.setdefault(tuple(sorted(changes)), []).append({"id": op.id, **changes})
+                results[index] = {"index": index, "op": "update", "id": op.id, "status": "updated"}
+
+            for rows in groups.values():
+                db.execute(update(models.Item), rows)
+
+            if replaced_images:
+                # A képlista cseréje: régi sorok törlése, újak egy INSERT-tel
+                replaced_ids = list(replaced_images)
+                ref_changes += [
+                    (filename, -1) for (filename,) in
+                    db.query(models.ItemImage.filename).filter(models.ItemImage.item_id.in_(replaced_ids))
+                ]
+                db.execute(delete(models.ItemImage).where(models.ItemImage.item_id.in_(replaced_ids)))
+                image_rows = [image for item_id, images in replaced_images.items() for image in _image_rows(item_id, images)]
+                if image_rows:
+                    db.execute(insert(models.ItemImage), image_rows)
+                ref_changes += [(image["filename"], +1) for image in image_rows]
+
+            connection = db.connection()
+            stock_ledger.record_many(connection, movements, "edit")
+            for filename, delta in ref_changes:
+                blob_store.adjust_refs(connection, filename, delta)
+
+        # --- Törlés: egy lekérdezés a kapcsolatokkal, egy flush
+        if deletes:
+            delete_ids = [op.id for _, op in deletes]
+            items = db.query(models.Item).options(
+                selectinload(models.Item.images), selectinload(models.Item.documents),
+                selectinload(models.Item.stock_alerts), selectinload(models.Item.stock_forecast)
+            ).filter(models.Item.id.in_(delete_ids)).all()
+            for item in items:
+                removed.append((item.id, item.image_filename, item.qr_code))
+                db.delete(item)
+            db.flush()
+            for index, op in deletes:
+                results[index] = {"index": index, "op": "delete", "id": op.id, "status": "deleted"}
+
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    return {
+        "created": len(creates),
+        "updated": len(updates),
+        "deleted": len(deletes),
+        "results": results,
+        "errors": [],
+        "removed": removed,
+    }
+
+
 def get_low_stock_items(db: Session) -> List[models.Item]:
     """
     Alacsony készletű tárgyak - JAVÍTVA
@@ -215,6 +440,122 @@ def get_low_stock_items(db: Session) -> List[models.Item]:
     ).all()
 
 
+def adjust_stock(db: Session, item_id: int, delta: int, reason: str = "adjust") -> Optional[dict]:
+    """
+    Készlet növelése / csökkentése egyetlen atomi UPDATE ... RETURNING utasítással
+
+    Nincs olvasás-módosítás-írás: a párhuzamos módosítások nem írják felül
+    egymást, és a `quantity + delta >= 0` feltétel az SQL-ben biztosítja, hogy
+    a készlet ne menjen 0 alá. A mozgás a naplóba kerül (reason), és ha a
+    módosítás átlépi a min_quantity küszöböt, StockAlert sor is keletkezik -
+    mindkettő ugyanabban a tranzakcióban.
+
+    Returns:
+        Az új állapot, vagy None, ha a tárgy nem létezik
+
+    Raises:
+        ValueError: Nincs elég készlet a csökkentéshez
+    """
+    # Közvetlenül a kapcsolaton: nincs ORM betöltés / refresh, és a QR index sem érintett
+    connection = db.connection()
+    row = connection.execute(
+        update(models.Item)
+        .where(models.Item.id == item_id, models.Item.quantity + delta >= 0)
+        .values(quantity=models.Item.quantity + delta)
+        .returning(models.Item.quantity, models.Item.min_quantity)
+    ).first()
+
+    if row is None:
+        db.rollback()
+        current = db.query(models.Item.quantity).filter(models.Item.id == item_id).scalar()
+        if current is None:
+            return None
+        raise ValueError(f"Nincs elég készlet: {current} db, módosítás: {delta}")
+
+    quantity, min_quantity = row
+    previous = quantity - delta
+    # A napló rögzíti a küszöb átlépést is (StockAlert)
+    stock_ledger.record(connection, item_id, delta, quantity, reason, min_quantity=min_quantity)
+    db.commit()
+
+    return {
+        "item_id": item_id,
+        "quantity": quantity,
+        "previous_quantity": previous,
+        "delta": delta,
+        "min_quantity": min_quantity,
+        "low_stock": min_quantity is not None and quantity <= min_quantity,
+        "alert": stock_ledger.threshold_alert(previous, quantity, min_quantity),
+    }
+
+
+def get_stock_alerts(db: Session, after_id: int = 0, limit: int = 100) -> List[models.StockAlert]:
+    """
+    Készlet riasztások növekvő ID szerint - a kliens az utolsó látott ID-tól kérdez
+    """
+    return db.query(models.StockAlert).filter(
+        models.StockAlert.id > after_id
+    ).order_by(models.StockAlert.id).limit(limit).all()
+
+
+def assign_qr_codes(db: Session, item_ids: Optional[List[int]] = None) -> Tuple[List[Tuple[int, str]], int]:
+    """
+    QR kód stringek kiosztása egyetlen tranzakcióban
+
+    Args:
+        item_ids: Tárgy ID-k; None esetén az összes még QR kód nélküli tárgy
+
+    Returns:
+        ([(item_id, qr_code), ...] ID szerint rendezve, újonnan kiosztott kódok száma)
+    """
+    query = db.query(models.Item.id, models.Item.qr_code)
+    if item_ids is None:
+        query = query.filter(models.Item.qr_code.is_(None))
+    else:
+        query = query.filter(models.Item.id.in_(item_ids))
+    rows = query.order_by(models.Item.id).all()
+
+    missing = [item_id for item_id, qr_code in rows if not qr_code]
+    for _ in range(3):
+        codes = set()
+        while len(codes) < len(missing):
+            codes.add(qr_handler.new_code_string())
+        assigned = dict(zip(missing, codes))
+        try:
+            if assigned:
+                db.execute(update(models.Item), [{"id": item_id, "qr_code": code} for item_id, code in assigned.items()])
+            db.commit()
+            break
+        except IntegrityError:
+            # Ütközés egy már létező kóddal (8 hex jegy) - új kódokkal újra
+            db.rollback()
+    else:
+        raise ValueError("QR kód kiosztási hiba: ismételt ütközés")
+
+    return [(item_id, qr_code or assigned[item_id]) for item_id, qr_code in rows], len(assigned)
+
+
+def get_qr_labels(db: Session, item_ids: Optional[List[int]] = None, category: Optional[str] = None) -> List[Tuple[str, str]]:
+    """
+    Címke nyomtatáshoz: [(qr_code, név), ...] - a hiányzó QR kódokat kiosztja
+
+    Args:
+        item_ids: Tárgy ID-k a nyomtatási sorrendben; None esetén a kategória
+                  (vagy az összes) tárgya név szerint rendezve
+    """
+    if item_ids is None:
+        query = db.query(models.Item.id)
+        if category:
+            query = query.filter(models.Item.category == category)
+        item_ids = [item_id for (item_id,) in query.order_by(models.Item.name, models.Item.id)]
+    if not item_ids:
+        return []
+
+    codes = dict(assign_qr_codes(db, item_ids)[0])
+    names = dict(db.query(models.Item.id, models.Item.name).filter(models.Item.id.in_(codes)).all())
+    return [(codes[item_id], names[item_id]) for item_id in dict.fromkeys(item_ids) if item_id in codes]
+
+
 # ============= CATEGORIES CRUD =============
 
 def get_categories(db: Session) -> List[models.Category]:
@@ -488,13 +829,22 @@ def get_item_images(db: Session, item_id: int) -> List[models.ItemImage]:
     return db.query(models.ItemImage).filter(models.ItemImage.item_id == item_id).order_by(models.ItemImage.order_index, models.ItemImage.id).all()
 
 
+def get_item_image(db: Session, image_id: int) -> Optional[models.ItemImage]:
+    """
+    Egy kép lekérése ID alapján
+    """
+    return db.query(models.ItemImage).filter(models.ItemImage.id == image_id).first()
+
+
 def create_item_image(
     db: Session,
     item_id: int,
     filename: str,
     original_filename: str,
     rotation: int = 0,
-    is_primary: bool = False
+    is_primary: bool = False,
+    orientation: Optional[str] = None,
+    variants: Optional[List[dict]] = None
 ) -> models.ItemImage:
     """
     Új kép létrehozása egy tárgyhoz
@@ -512,7 +862,9 @@ def create_item_image(
         original_filename=original_filename,
         rotation=rotation,
         is_primary=is_primary,
-        order_index=max_order
+        order_index=max_order,
+        orientation=orientation,
+        variants=variants
     )
     db.add(db_image)
     db.commit()
@@ -532,3 +884,225 @@ def reorder_item_images(db: Session, item_id: int, image_ids: List[int]) -> List
     
     db.commit()
     return get_item_images(db, item_id)
+
+
+def update_item_image(db: Session, image_id: int, **fields) -> Optional[models.ItemImage]:
+    """
+    Kép mezőinek frissítése (pl. rotation, is_primary, rendered_rotation)
+    """
+    db_image = get_item_image(db, image_id)
+    if not db_image:
+        return None
+
+    # Egy tárgynak csak egy elsődleges képe lehet
+    if fields.get("is_primary"):
+        db.query(models.ItemImage).filter(
+            models.ItemImage.item_id == db_image.item_id,
+            models.ItemImage.id != image_id
+        ).update({"is_primary": False})
+
+    for field, value in fields.items():
+        setattr(db_image, field, value)
+
+    db.commit()
+    db.refresh(db_image)
+    return db_image
+
+
+def delete_item_image(db: Session, image_id: int) -> bool:
+    """
+    Kép törlése
+    """
+    db_image = get_item_image(db, image_id)
+    if not db_image:
+        return False
+
+    db.delete(db_image)
+    db.commit()
+    return True
+
+
+# ============= STOCKTAKE CRUD =============
+
+def create_stocktake(db: Session, stocktake: schemas.StocktakeCreate) -> models.Stocktake:
+    """
+    Új leltár munkamenet
+    """
+    db_stocktake = models.Stocktake(**stocktake.model_dump(), status="open", created_at=datetime.now())
+    db.add(db_stocktake)
+    db.commit()
+    db.refresh(db_stocktake)
+    return db_stocktake
+
+
+def get_stocktake(db: Session, stocktake_id: int) -> Optional[models.Stocktake]:
+    return db.get(models.Stocktake, stocktake_id)
+
+
+def get_stocktakes(db: Session, status: Optional[str] = None) -> List[models.Stocktake]:
+    query = db.query(models.Stocktake)
+    if status:
+        query = query.filter(models.Stocktake.status == status)
+    return query.order_by(models.Stocktake.id.desc()).all()
+
+
+def add_stocktake_scans(db: Session, stocktake: models.Stocktake, scans: List[schemas.StocktakeScan], mode: str = "add") -> int:
+    """
+    Beolvasások tömeges rögzítése egy utasítással (INSERT ... ON CONFLICT DO UPDATE)
+
+    Args:
+        mode: "add" - a darabszám hozzáadódik a kód eddigi számlálásához
+              (tárgyanként egy beolvasás); "set" - felülírja azt
+
+    Returns:
+        A kötegben szereplő különböző QR kódok száma
+    """
+    if stocktake.status != "open":
+        raise ValueError(f"A leltár már nem nyitott ({stocktake.status})")
+
+    # Kötegen belül kódonként összevonva: egy sor / kód
+    totals = {}
+    counts = {}
+    for scan in scans:
+        if mode == "add":
+            totals[scan.qr_code] = totals.get(scan.qr_code, 0) + scan.quantity
+        else:
+            totals[scan.qr_code] = scan.quantity
+        counts[scan.qr_code] = counts.get(scan.qr_code, 0) + 1
+
+    now = datetime.now()
+    insert = sqlite_insert(models.StocktakeCount)
+    counted = models.StocktakeCount.counted_quantity
+    statement = insert.on_conflict_do_update(
+        index_elements=["stocktake_id", "qr_code"],
+        set_={
+            "counted_quantity": counted + insert.excluded.counted_quantity if mode == "add" else insert.excluded.counted_quantity,
+            "scans": models.StocktakeCount.scans + insert.excluded.scans,
+            "updated_at": insert.excluded.updated_at,
+        }
+    )
+    db.execute(statement, [
+        {"stocktake_id": stocktake.id, "qr_code": code, "counted_quantity": total, "scans": counts[code], "updated_at": now}
+        for code, total in totals.items()
+    ])
+    db.commit()
+    return len(totals)
+
+
+def stocktake_diff(db: Session, stocktake: models.Stocktake) -> dict:
+    """
+    Eltérés jelentés: a számlálások és az Item.quantity összevetése egyetlen joinnal
+
+    Hatókörös (helyszín / kategória) leltárnál a hatókörbe eső, de be nem
+    olvasott tárgyak is megjelennek (not_scanned).
+    """
+    rows = db.query(
+        models.StocktakeCount.qr_code,
+        models.StocktakeCount.counted_quantity,
+        models.Item.id,
+        models.Item.name,
+        models.Item.quantity
+    ).outerjoin(
+        models.Item, models.Item.qr_code == models.StocktakeCount.qr_code
+    ).filter(
+        models.StocktakeCount.stocktake_id == stocktake.id
+    ).order_by(models.StocktakeCount.qr_code).all()
+
+    lines = []
+    summary = {"counted_codes": len(rows), "matched": 0, "over": 0, "under": 0, "unknown": 0, "not_scanned": 0}
+    for qr_code, counted, item_id, name, expected in rows:
+        if item_id is None:
+            status, delta = "unknown", None
+        else:
+            delta = counted - expected
+            status = "matched" if delta == 0 else "over" if delta > 0 else "under"
+        summary[status] += 1
+        lines.append({
+            "qr_code": qr_code, "item_id": item_id, "name": name,
+            "expected": expected, "counted": counted, "delta": delta, "status": status
+        })
+
+    not_scanned = []
+    if stocktake.location_id is not None or stocktake.category:
+        counted_codes = db.query(models.StocktakeCount.qr_code).filter(models.StocktakeCount.stocktake_id == stocktake.id)
+        query = db.query(models.Item.id, models.Item.name, models.Item.qr_code, models.Item.quantity).filter(
+            or_(models.Item.qr_code.is_(None), models.Item.qr_code.not_in(counted_codes))
+        )
+        if stocktake.location_id is not None:
+            query = query.filter(models.Item.location_id == stocktake.location_id)
+        if stocktake.category:
+            query = query.filter(models.Item.category == stocktake.category)
+        not_scanned = [
+            {"item_id": item_id, "name": name, "qr_code": qr_code, "expected": expected}
+            for item_id, name, qr_code, expected in query.order_by(models.Item.id)
+        ]
+        summary["not_scanned"] = len(not_scanned)
+
+    return {"stocktake_id": stocktake.id, "status": stocktake.status, "summary": summary, "lines": lines, "not_scanned": not_scanned}
+
+
+def apply_stocktake(db: Session, stocktake: models.Stocktake, zero_missing: bool = False) -> dict:
+    """
+    Eltérések alkalmazása egyetlen tranzakcióban
+
+    A leltár lezárása feltételes UPDATE (status='open'), így két párhuzamos
+    alkalmazásból csak az egyik fut le. A jelentést ugyanebben a tranzakcióban
+    számoljuk újra, a tárgyak mennyiségét egy tömeges UPDATE állítja be, a
+    mozgásnapló sorai egy tömeges INSERT-tel kerülnek mellé.
+
+    Args:
+        zero_missing: Hatókörös leltárnál a be nem olvasott tárgyak mennyisége 0 lesz
+    """
+    now = datetime.now()
+    closed = db.query(models.Stocktake).filter(
+        models.Stocktake.id == stocktake.id,
+        models.Stocktake.status == "open"
+    ).update({"status": "applied", "applied_at": now}, synchronize_session=False)
+    if not closed:
+        db.rollback()
+        raise ValueError("A leltár már nem nyitott")
+
+    report = stocktake_diff(db, stocktake)
+    adjustments = [
+        {"id": line["item_id"], "quantity": line["counted"]}
+        for line in report["lines"] if line["delta"]
+    ]
+    movements = [(line["item_id"], line["delta"], line["counted"]) for line in report["lines"] if line["delta"]]
+    zeroed = []
+    if zero_missing:
+        missing = [item for item in report["not_scanned"] if item["expected"]]
+        zeroed = [{"id": item["item_id"], "quantity": 0} for item in missing]
+        movements += [(item["item_id"], -item["expected"], 0) for item in missing]
+
+    try:
+        if adjustments or zeroed:
+            db.execute(update(models.Item), adjustments + zeroed)
+            stock_ledger.record_many(db.connection(), movements, "stocktake")
+        db.query(models.Stocktake).filter(models.Stocktake.id == stocktake.id).update(
+            {"adjusted_count": len(adjustments) + len(zeroed)}, synchronize_session=False
+        )
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    db.refresh(stocktake)
+
+    return {
+        "stocktake_id": stocktake.id,
+        "adjusted": len(adjustments),
+        "zeroed": len(zeroed),
+        "unknown": report["summary"]["unknown"],
+    }
+
+
+def cancel_stocktake(db: Session, stocktake: models.Stocktake) -> models.Stocktake:
+    """
+    Nyitott leltár elvetése (a számlálások törlődnek)
+    """
+    if stocktake.status != "open":
+        raise ValueError(f"A leltár már nem nyitott ({stocktake.status})")
+    db.query(models.StocktakeCount).filter(models.StocktakeCount.stocktake_id == stocktake.id).delete()
+    stocktake.status = "cancelled"
+    db.commit()
+    db.refresh(stocktake)
+    return stocktake
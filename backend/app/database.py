@@ -39,6 +39,16 @@ def get_db():
         db.close()
 
 
+# Utólag hozzáadott oszlopok: (tábla, oszlop, SQL típus)
+ADDED_COLUMNS = [
+    ("item_images", "orientation", "VARCHAR(20)"),
+    ("item_images", "variants", "JSON"),
+    ("item_images", "rendered_rotation", "INTEGER DEFAULT 0"),
+    ("item_images", "processing_status", "VARCHAR(20) DEFAULT 'ready'"),
+    ("jobs", "lock_key", "VARCHAR(200)"),
+]
+
+
 def init_db():
     """
     Adatbázis táblák inicializálása
@@ -46,10 +56,20 @@ def init_db():
     # Biztosítsuk, hogy az új mezők (pl. orientation az item_images táblában) is
     # megjelenjenek a meglévő SQLite adatbázisokban.
     with engine.begin() as conn:
-        columns = [row[1] for row in conn.execute(text("PRAGMA table_info(item_images);"))]
-        # Ha a tábla még nem létezik, a PRAGMA üres listát ad vissza; ilyenkor a
-        # create_all hozza létre a megfelelő sémát. Csak meglévő táblán futtatunk ALTER-t.
-        if columns and "orientation" not in columns:
-            conn.execute(text("ALTER TABLE item_images ADD COLUMN orientation VARCHAR(20)"))
+        existing = {}
+        for table, column, column_type in ADDED_COLUMNS:
+            if table not in existing:
+                existing[table] = [row[1] for row in conn.execute(text(f"PRAGMA table_info({table});"))]
+            columns = existing[table]
+            # Ha a tábla még nem létezik, a PRAGMA üres listát ad vissza; ilyenkor a
+            # create_all hozza létre a megfelelő sémát. Csak meglévő táblán futtatunk ALTER-t.
+            if columns and column not in columns:
+                conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {column_type}"))
+                columns.append(column)
 
     Base.metadata.create_all(bind=engine)
+
+    # A create_all meglévő táblára nem hoz létre indexet - az utólag felvett indexek pótlása
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
@@ -0,0 +1,149 @@
+"""
+Háttér feladatok - a job_queue handlerei
+
+- image.process: feltöltött kép feldolgozása (EXIF normalizálás, méretezés,
+  variánsok, thumbnail), majd az ItemImage rekordok frissítése
+- image.rotate: elforgatott fő kép és thumbnail renderelése
+- qr.render: QR kód PNG renderelése
+- stock.forecast: készlet előrejelzés újraszámolása
+"""
+
+import logging
+
+from . import crud, database, models
+from .utils import image_handler, qr_handler, job_queue, stock_forecast
+
+logger = logging.getLogger(__name__)
+
+
+def _image_lock(filename: str) -> str:
+    # Egy képfájl feldolgozása és forgatásai sorosítva futnak (a worker folyamatok között is)
+    return f"image:{filename}"
+
+
+# ============= SORBA ÁLLÍTÁS =============
+
+def enqueue_image_processing(db, filename: str):
+    return job_queue.enqueue(
+        db, "image.process", {"filename": filename},
+        dedupe_key=f"image.process:{filename}", lock_key=_image_lock(filename)
+    )
+
+
+def enqueue_rotation(db, image_id: int, filename: str):
+    return job_queue.enqueue(
+        db, "image.rotate", {"image_id": image_id},
+        dedupe_key=f"image.rotate:{image_id}", lock_key=_image_lock(filename)
+    )
+
+
+def enqueue_qr_render(db, item_id: int, qr_code: str, size: str):
+    return job_queue.enqueue(
+        db, "qr.render", {"item_id": item_id, "qr_code": qr_code, "size": size},
+        dedupe_key=f"qr.render:{item_id}:{size}"
+    )
+
+
+def enqueue_stock_forecast(db):
+    return job_queue.enqueue(db, "stock.forecast", {}, dedupe_key="stock.forecast")
+
+
+# ============= HANDLEREK =============
+
+def render_image_rotation(image_id: int) -> None:
+    """
+    Az ItemImage aktuális (DB-ben tárolt) forgatásához tartozó elforgatott
+    fő kép és thumbnail előállítása - az image.process / image.rotate
+    feladatokból, amelyeket a fájlonkénti lock_key sorosít
+    """
+    db = database.SessionLocal()
+    try:
+        db_image = crud.get_item_image(db, image_id)
+        if not db_image or db_image.processing_status == "processing":
+            # Törölt kép, vagy a feldolgozás végén úgyis renderelődik
+            return
+
+        rotation = db_image.rotation or 0
+        if (db_image.rendered_rotation or 0) == rotation:
+            return
+
+        # Deduplikált blob: a többi, ugyanezt a fájlt használó sor kész forgatásai maradnak
+        in_use = {
+            rendered for (rendered,) in db.query(models.ItemImage.rendered_rotation).filter(
+                models.ItemImage.filename == db_image.filename,
+                models.ItemImage.id != image_id,
+            ).distinct()
+            if rendered
+        }
+        image_handler.render_rotation(db_image.filename, rotation, keep=in_use)
+        crud.update_item_image(db, image_id, rendered_rotation=rotation)
+        logger.info(f"✅ Forgatás kész: kép #{image_id} ({rotation}°)")
+    finally:
+        db.close()
+
+
+def _mark_processing_failed(payload, error) -> None:
+    db = database.SessionLocal()
+    try:
+        db.query(models.ItemImage).filter(
+            models.ItemImage.filename == payload["filename"]
+        ).update({"processing_status": "failed"})
+        db.commit()
+    finally:
+        db.close()
+
+
+@job_queue.handler("image.process", on_failure=_mark_processing_failed)
+def process_image(payload):
+    filename = payload["filename"]
+    meta = image_handler.process_pending_image(filename)
+
+    db = database.SessionLocal()
+    try:
+        images = db.query(models.ItemImage).filter(models.ItemImage.filename == filename).all()
+        for db_image in images:
+            db_image.orientation = meta.get("orientation")
+            db_image.variants = meta.get("variants")
+            db_image.processing_status = "ready"
+        db.commit()
+        to_rotate = [db_image.id for db_image in images if not db_image.rotation_ready]
+    finally:
+        db.close()
+
+    for image_id in to_rotate:
+        render_image_rotation(image_id)
+
+    return {
+        "filename": filename,
+        "orientation": meta.get("orientation"),
+        "width": meta.get("width"),
+        "height": meta.get("height"),
+        "variants": len(meta.get("variants") or []),
+        "item_images": len(images)
+    }
+
+
+@job_queue.handler("image.rotate")
+def rotate_image(payload):
+    render_image_rotation(payload["image_id"])
+    return {"image_id": payload["image_id"]}
+
+
+@job_queue.handler("qr.render")
+def render_qr(payload):
+    db = database.SessionLocal()
+    try:
+        item = crud.get_item(db, payload["item_id"])
+        if not item or item.qr_code != payload["qr_code"]:
+            logger.info(f"ℹ️  QR renderelés kihagyva, a tárgy megváltozott: #{payload['item_id']}")
+            return None
+    finally:
+        db.close()
+
+    qr_info = qr_handler.generate_qr_code(payload["item_id"], payload["qr_code"], payload["size"])
+    return {"filename": qr_info["filename"], "url": qr_info["url"]}
+
+
+@job_queue.handler("stock.forecast")
+def compute_stock_forecast(payload):
+    return stock_forecast.compute()
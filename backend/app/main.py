@@ -4,22 +4,28 @@ Backend Developer: Maria Rodriguez
 JAVÍTVA: Teljes hibaellenőrzés, jobb logging, quantity kezelés
 """
 
-from fastapi import FastAPI, Depends, HTTPException, UploadFile, File, Query, Form
+from fastapi import FastAPI, Depends, HTTPException, UploadFile, File, Query, Form, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
-from fastapi.staticfiles import StaticFiles
 from sqlalchemy.orm import Session
 from typing import List, Optional
+from datetime import datetime
 import os
 import shutil
+import asyncio
 import logging
 
-from . import models, schemas, crud
+from . import models, schemas, crud, jobs  # jobs: háttér feladat handlerek regisztrálása
 from .database import engine, get_db, init_db
-from .utils import image_handler, document_handler, qr_handler
+from .utils import image_handler, document_handler, qr_handler, derivative_cache, blob_store, orphan_gc, media_response, upload_sessions, job_queue, qr_index, stock_ledger, stock_forecast
 from .routes import users_router, locations_router, qr_router
 from .routes.notifications_stats import router as notif_stats_router
 from .routes.images import router as images_router
+from .routes.admin import router as admin_router
+from .routes.uploads import router as uploads_router
+from .routes.jobs import router as jobs_router
+from .routes.stocktakes import router as stocktakes_router
+from .routes.imports import router as imports_router
+from .routes.exports import router as exports_router
 
 # Logging beállítása
 logging.basicConfig(level=logging.INFO)
@@ -60,15 +66,18 @@ app.add_middleware(
 # Statikus fájlok (képek) kiszolgálása
 logger.info("Upload könyvtárak létrehozása...")
 image_handler.create_upload_dir()
-app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
+app.mount("/uploads", media_response.ShardedStaticFiles(directory="uploads"), name="uploads")
 
 # Dokumentumok kiszolgálása
 document_handler.create_document_dir()
-app.mount("/documents", StaticFiles(directory="documents"), name="documents")
+app.mount("/documents", media_response.ShardedStaticFiles(directory="documents"), name="documents")
 
 # QR kódok kiszolgálása
 qr_handler.create_qr_dir()
-app.mount("/qr_codes", StaticFiles(directory="qr_codes"), name="qr_codes")
+app.mount("/qr_codes", media_response.ShardedStaticFiles(
+    directory="qr_codes",
+    cache_control=media_response.REVALIDATE_CACHE_CONTROL  # újragenerálható, Last-Modified alapján ellenőrizzük
+), name="qr_codes")
 
 # API Routers
 app.include_router(users_router)
@@ -76,6 +85,12 @@ app.include_router(locations_router)
 app.include_router(qr_router)
 app.include_router(notif_stats_router)
 app.include_router(images_router)  # JAVÍTVA: images router hozzáadva
+app.include_router(admin_router)
+app.include_router(uploads_router)
+app.include_router(jobs_router)
+app.include_router(stocktakes_router)
+app.include_router(imports_router)
+app.include_router(exports_router)
 
 logger.info("✅ Backend inicializálva")
 
@@ -92,11 +107,33 @@ async def startup_event():
     db = next(get_db())
     crud.init_default_categories(db)
     
+    derivative_cache.init_cache()
+    blob_store.collect_garbage()
+    upload_sessions.init_sessions()
+    await asyncio.to_thread(qr_index.load)
+    if orphan_gc.ENABLED:
+        asyncio.create_task(orphan_gc.run_forever())
+    if stock_forecast.ENABLED:
+        asyncio.create_task(stock_forecast.run_forever())
+    if stock_ledger.SNAPSHOT_ENABLED:
+        asyncio.create_task(stock_ledger.run_forever())
+    if job_queue.WORKERS > 0:
+        job_queue.start_workers(job_queue.WORKERS)
+    
     logger.info("✅ Backend elindult!")
     logger.info("📚 API dokumentáció: http://localhost:8000/api/docs")
     logger.info("🌐 Frontend: http://localhost:3000")
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """
+    Leállításkor a háttér workerek befejezik a futó feladatot
+    """
+    await asyncio.to_thread(job_queue.stop_workers)
+    qr_handler.shutdown_pool()
+
+
 # ============= HEALTH CHECK =============
 
 @app.get("/", tags=["Health"])
@@ -184,7 +221,7 @@ async def create_item(item: schemas.ItemCreate, db: Session = Depends(get_db)):
     
     try:
         # Quantity validáció
-        if item.quantity is None or item.quantity < 1:
+        if item.quantity is None or item.quantity < 0:
             logger.warning(f"⚠️  Hibás quantity érték: {item.quantity}, beállítva 1-re")
             item.quantity = 1
         
@@ -198,6 +235,36 @@ async def create_item(item: schemas.ItemCreate, db: Session = Depends(get_db)):
         raise HTTPException(status_code=400, detail=f"Hiba az item létrehozásakor: {str(e)}")
 
 
+@app.post("/api/items/bulk", response_model=schemas.BulkItemResponse, tags=["Items"])
+async def bulk_items(data: schemas.BulkItemRequest, db: Session = Depends(get_db)):
+    """
+    Tömeges létrehozás / módosítás / törlés egyetlen tranzakcióban
+
+    A teljes köteg előre ellenőrzésre kerül; ha bármely művelet hibás, semmi
+    nem íródik, és a válasz (422) műveletenként sorolja a hibákat. Siker
+    esetén a results a kérés sorrendjében adja vissza az érintett ID-kat.
+    """
+    logger.info(f"POST /api/items/bulk - {len(data.operations)} művelet")
+
+    result = await asyncio.to_thread(crud.bulk_item_operations, db, data.operations)
+    if result["errors"]:
+        logger.warning(f"❌ Tömeges művelet elutasítva: {len(result['errors'])} hibás művelet")
+        raise HTTPException(status_code=422, detail={"message": "Hibás műveletek a kötegben", "errors": result["errors"]})
+
+    # Fájl takarítás a commit után, ahogy az egyedi törlésnél
+    for item_id, image_filename, qr_code in result["removed"]:
+        try:
+            if image_filename:
+                image_handler.delete_image(image_filename)
+            if qr_code:
+                qr_handler.delete_qr_files(item_id)
+        except Exception as e:
+            logger.warning(f"   ⚠️  Fájl törlési hiba (item #{item_id}): {e}")
+
+    logger.info(f"✅ Tömeges művelet: {result['created']} új, {result['updated']} módosított, {result['deleted']} törölt")
+    return result
+
+
 @app.put("/api/items/{item_id}", response_model=schemas.ItemResponse, tags=["Items"])
 async def update_item(
     item_id: int,
@@ -226,6 +293,57 @@ async def update_item(
         raise HTTPException(status_code=400, detail=f"Hiba az item frissítésekor: {str(e)}")
 
 
+@app.post("/api/items/{item_id}/stock", response_model=schemas.StockAdjustResponse, tags=["Items"])
+async def adjust_item_stock(
+    item_id: int,
+    data: schemas.StockAdjust,
+    db: Session = Depends(get_db)
+):
+    """
+    Készlet növelése / csökkentése (delta) atomi módon
+
+    Több eszköz egyidejű módosítása sem veszít el frissítést; a készlet nem
+    mehet 0 alá (409). A min_quantity küszöb átlépésekor készlet riasztás
+    keletkezik (lásd /api/notifications/stock-alerts).
+    """
+    logger.info(f"POST /api/items/{item_id}/stock (delta={data.delta})")
+    
+    try:
+        result = await asyncio.to_thread(crud.adjust_stock, db, item_id, data.delta, data.reason)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    
+    if result is None:
+        logger.warning(f"❌ Item #{item_id} nem található")
+        raise HTTPException(status_code=404, detail="Item nem található")
+    
+    if result["alert"] == "LOW_STOCK":
+        logger.warning(f"⚠️ Alacsony készlet: item #{item_id}, {result['quantity']} db / min. {result['min_quantity']} db")
+    return result
+
+
+@app.get("/api/items/{item_id}/stock-history", response_model=schemas.StockHistoryResponse, tags=["Items"])
+async def get_item_stock_history(
+    item_id: int,
+    start: Optional[datetime] = Query(None, description="Alapértelmezés: az első mozgás"),
+    end: Optional[datetime] = Query(None, description="Alapértelmezés: most"),
+    points: int = Query(100, ge=1, le=stock_ledger.MAX_HISTORY_POINTS),
+    db: Session = Depends(get_db)
+):
+    """
+    Készlet idősor a mozgásnaplóból, points egyenlő szakaszra mintavételezve
+
+    Szakaszonként a záró mennyiség és a fogyás / bevételezés; az időszak
+    összesített fogyása és napi fogyási rátája pillanatképekből számolódik.
+    """
+    if not crud.get_item(db, item_id):
+        raise HTTPException(status_code=404, detail="Item nem található")
+    try:
+        return await asyncio.to_thread(stock_ledger.history, db, item_id, start, end, points)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 @app.delete("/api/items/{item_id}", tags=["Items"])
 async def delete_item(item_id: int, db: Session = Depends(get_db)):
     """
@@ -296,13 +414,45 @@ async def upload_image(file: UploadFile = File(...)):
 
 
 @app.get("/api/images/{filename}", tags=["Images"])
-async def get_image(filename: str, thumbnail: bool = Query(False)):
+async def get_image(
+    request: Request,
+    filename: str,
+    thumbnail: bool = Query(False),
+    w: Optional[int] = Query(None, ge=1, le=image_handler.MAX_DIMENSION, description="Cél szélesség (px)"),
+    h: Optional[int] = Query(None, ge=1, le=image_handler.MAX_DIMENSION, description="Cél magasság (px)"),
+    fit: str = Query("contain", pattern="^(contain|cover|fill)$"),
+    rotate: int = Query(0, description="Forgatás óramutató szerint: 0, 90, 180, 270")
+):
     """
     Kép lekérése
+
+    Az Accept fejléc alapján AVIF/WebP változatot ad vissza, ha a kliens
+    támogatja és elérhető; egyébként az eredeti JPEG-et.
+
+    w/h/fit/rotate megadásakor a származékot igény szerint rendereljük az
+    eredetiből, és LRU lemez cache-ből szolgáljuk ki.
     """
-    logger.info(f"GET /api/images/{filename} - thumbnail={thumbnail}")
+    logger.info(f"GET /api/images/{filename} - thumbnail={thumbnail}, w={w}, h={h}, fit={fit}, rotate={rotate}")
     
     try:
+        if w or h or rotate:
+            fmt = derivative_cache.choose_format(request.headers.get("accept"))
+            try:
+                derivative_path = await derivative_cache.get_derivative(filename, w, h, fit, rotate, fmt)
+            except FileNotFoundError:
+                logger.warning(f"❌ Kép nem található: {filename}")
+                raise HTTPException(status_code=404, detail="Kép nem található")
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+            
+            return media_response.file_response(
+                derivative_path,
+                media_type=derivative_cache.media_type_for(fmt),
+                headers={"Vary": "Accept"},
+                request_headers=request.headers,
+                cache="immutable" if blob_store.is_content_addressed(filename) else None
+            )
+        
         if thumbnail:
             file_path = image_handler.get_thumbnail_path(filename)
         else:
@@ -312,7 +462,15 @@ async def get_image(filename: str, thumbnail: bool = Query(False)):
             logger.warning(f"❌ Kép nem található: {filename}")
             raise HTTPException(status_code=404, detail="Kép nem található")
         
-        return FileResponse(file_path)
+        served_path, media_type = image_handler.negotiate_image(file_path, request.headers.get("accept"))
+        
+        return media_response.file_response(
+            served_path,
+            media_type=media_type,
+            headers={"Vary": "Accept"},
+            request_headers=request.headers,
+            cache="immutable" if blob_store.is_content_addressed(filename) else None
+        )
     
     except HTTPException:
         raise
@@ -513,7 +671,7 @@ async def get_document(document_id: int, db: Session = Depends(get_db)):
 
 
 @app.get("/api/documents/{document_id}/download", tags=["Documents"])
-async def download_document(document_id: int, db: Session = Depends(get_db)):
+async def download_document(document_id: int, request: Request, db: Session = Depends(get_db)):
     """
     Dokumentum letöltése
     """
@@ -525,17 +683,19 @@ async def download_document(document_id: int, db: Session = Depends(get_db)):
             logger.warning(f"❌ Dokumentum #{document_id} nem található")
             raise HTTPException(status_code=404, detail="Dokumentum nem található")
         
-        file_path = os.path.join("documents", document.filename)
+        file_path = document_handler.get_document_path(document.filename)
         
         if not os.path.exists(file_path):
             logger.warning(f"❌ Fájl nem található: {file_path}")
             raise HTTPException(status_code=404, detail="Fájl nem található")
         
         logger.info(f"✅ Dokumentum letöltve: {document.filename}")
-        return FileResponse(
+        return media_response.file_response(
             file_path,
             media_type=document.mime_type,
-            filename=document.original_filename
+            filename=document.original_filename,
+            request_headers=request.headers,
+            cache="immutable" if blob_store.is_content_addressed(document.filename) else None
         )
     
     except HTTPException:
@@ -591,11 +751,11 @@ async def delete_document(document_id: int, db: Session = Depends(get_db)):
             logger.warning(f"❌ Dokumentum #{document_id} nem található")
             raise HTTPException(status_code=404, detail="Dokumentum nem található")
         
-        # Fájl törlése
-        file_path = os.path.join("documents", document.filename)
-        if os.path.exists(file_path):
-            os.remove(file_path)
-            logger.info(f"   Fájl törölve: {document.filename}")
+        # Fájl törlése (megosztott blob esetén a GC végzi, ha már nincs rá hivatkozás)
+        try:
+            document_handler.delete_document(document.filename)
+        except FileNotFoundError:
+            logger.warning(f"   ⚠️  Fájl már nem létezik: {document.filename}")
         
         # DB bejegyzés törlése
         success = crud.delete_document(db, document_id)
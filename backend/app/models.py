@@ -4,10 +4,12 @@ Backend Developer: Maria Rodriguez
 JAVÍTVA: quantity és min_quantity mezők hozzáadva
 """
 
-from sqlalchemy import Column, Integer, String, Text, Float, DateTime, Date, ForeignKey, Boolean
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Text, Float, DateTime, Date, ForeignKey, Boolean, JSON, Index, UniqueConstraint
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, column_property, relationship, object_session
 from sqlalchemy.sql import func
 from .database import Base
+from .utils import image_handler, blob_store, qr_index, stock_ledger
 
 
 class User(Base):
@@ -94,10 +96,13 @@ class Item(Base):
     purchase_price = Column(Float, nullable=True)
     purchase_date = Column(Date, nullable=True)
     notes = Column(Text, nullable=True)
-    image_filename = Column(String(300), nullable=True)
+    # active_history: lejárt (commit utáni) objektumon is betöltődik a régi fájlnév,
+    # különben az after_update history-ból hiányozna a csökkentendő blob hivatkozás
+    image_filename = column_property(Column(String(300), nullable=True), active_history=True)
     
     # JAVÍTVA: quantity mezők
-    quantity = Column(Integer, default=1, nullable=False)  # Mennyiség (kötelező, min 1)
+    # active_history: a régi mennyiség lejárt (commit utáni) objektumon is betöltődik a naplóhoz
+    quantity = column_property(Column(Integer, default=1, nullable=False), active_history=True)  # Mennyiség (kötelező, min 0)
     min_quantity = Column(Integer, nullable=True)  # Minimum készlet (opcionális)
     
     # Foreign keys
@@ -116,6 +121,8 @@ class Item(Base):
     location = relationship("Location", back_populates="items")
     documents = relationship("Document", back_populates="item", cascade="all, delete-orphan")
     images = relationship("ItemImage", back_populates="item", cascade="all, delete-orphan")
+    stock_alerts = relationship("StockAlert", cascade="all, delete-orphan")
+    stock_forecast = relationship("StockForecast", uselist=False, cascade="all, delete-orphan")
 
     def __repr__(self):
         return f"<Item(id={self.id}, name='{self.name}', quantity={self.quantity})>"
@@ -171,11 +178,345 @@ class ItemImage(Base):
     original_filename = Column(String(300), nullable=False)  # JAVÍTVA: hozzáadva
     orientation = Column(String(20), nullable=True)  # portrait, landscape, square
     rotation = Column(Integer, default=0, nullable=True)  # 0, 90, 180, 270
+    rendered_rotation = Column(Integer, default=0, nullable=True)  # ehhez a forgatáshoz készültek el a fájlok
     order_index = Column(Integer, default=0, nullable=True)
     is_primary = Column(Boolean, default=False, nullable=True)
+    variants = Column(JSON, nullable=True)  # [{"width", "height", "filename", "url"}, ...]
+    processing_status = Column(String(20), default="ready", nullable=True)  # processing | ready | failed
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
+    # Tárgyankénti képek sorrendben, táblaolvasás nélkül (betöltés, export)
+    __table_args__ = (Index("ix_item_images_item_order", "item_id", "order_index"),)
+
     item = relationship("Item", back_populates="images")
 
+    @property
+    def rotation_ready(self):
+        """Elkészültek-e már az elforgatott fájlok"""
+        return not self.rotation or self.rendered_rotation == self.rotation
+
+    @property
+    def url(self):
+        """Kiszolgálási URL - a pixelek már a tárolt forgatás szerint állnak"""
+        if not self.rotation:
+            return f"/uploads/{self.filename}"
+        if self.rotation_ready:
+            return f"/uploads/rotated/{image_handler.get_rotated_filename(self.filename, self.rotation)}"
+        # Amíg a háttér worker dolgozik, az igény szerinti végpont forgat
+        return f"/api/images/{self.filename}?rotate={self.rotation}"
+
+    @property
+    def thumbnail_url(self):
+        """Thumbnail URL (forgatással együtt)"""
+        if not self.rotation:
+            return f"/uploads/thumbnails/thumb_{self.filename}"
+        if self.rotation_ready:
+            return f"/uploads/thumbnails/thumb_{image_handler.get_rotated_filename(self.filename, self.rotation)}"
+        width, height = image_handler.THUMBNAIL_SIZE
+        return f"/api/images/{self.filename}?w={width}&h={height}&rotate={self.rotation}"
+
+    @property
+    def srcset(self):
+        """srcset attribútum a variánsokból (kicsitől a nagyig)"""
+        if not self.variants:
+            return None
+        ordered = sorted(self.variants, key=lambda v: v["width"])
+        if self.rotation:
+            # Elforgatott képnél a kisebb variánsokat az igény szerinti végpont adja;
+            # 90/270 foknál a megjelenő szélesség az eredeti magasság
+            swap = self.rotation in (90, 270)
+            entries = [
+                f"/api/images/{self.filename}?w={v['height'] if swap else v['width']}&rotate={self.rotation}"
+                f" {v['height'] if swap else v['width']}w"
+                for v in ordered[:-1]
+            ]
+            largest = ordered[-1]
+            entries.append(f"{self.url} {largest['height'] if swap else largest['width']}w")
+            return ", ".join(entries)
+        return ", ".join(f"{v['url']} {v['width']}w" for v in ordered)
+
     def __repr__(self):
         return f"<ItemImage(id={self.id}, filename='{self.filename}', orientation='{self.orientation}')>"
+
+
+class Blob(Base):
+    """
+    Tartalom alapú tárolt fájl (kép vagy dokumentum) hivatkozás számlálással
+    """
+    __tablename__ = "blobs"
+
+    digest = Column(String(64), primary_key=True)  # SHA-256 hex
+    kind = Column(String(20), nullable=False)  # image | document
+    filename = Column(String(300), nullable=False)
+    size = Column(Integer, nullable=False)
+    ref_count = Column(Integer, default=0, nullable=False)
+    meta = Column(JSON, nullable=True)  # képnél: orientation, width, height, variants
+    released_at = Column(DateTime, nullable=True, index=True)  # mikor lett 0 hivatkozású
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    def __repr__(self):
+        return f"<Blob(digest='{self.digest[:12]}', refs={self.ref_count})>"
+
+
+class Job(Base):
+    """
+    Háttér feladat (képfeldolgozás, forgatás, QR renderelés) - tartós sor
+    """
+    __tablename__ = "jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String(50), nullable=False, index=True)  # pl. image.process, image.rotate, qr.render
+    payload = Column(JSON, nullable=False)
+    dedupe_key = Column(String(200), nullable=True, index=True)  # azonos várakozó feladat csak egyszer
+    lock_key = Column(String(200), nullable=True)  # azonos kulcsú feladatok nem futnak egyszerre
+    status = Column(String(20), default="queued", nullable=False)  # queued | running | succeeded | failed
+    attempts = Column(Integer, default=0, nullable=False)
+    max_attempts = Column(Integer, default=3, nullable=False)
+    run_after = Column(DateTime, nullable=False)  # újrapróbálásnál a backoff vége
+    locked_by = Column(String(100), nullable=True)
+    locked_at = Column(DateTime, nullable=True)
+    last_error = Column(Text, nullable=True)
+    result = Column(JSON, nullable=True)
+    created_at = Column(DateTime, nullable=False)
+    finished_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (Index("ix_jobs_status_run_after", "status", "run_after"),)
+
+    def __repr__(self):
+        return f"<Job(id={self.id}, kind='{self.kind}', status='{self.status}')>"
+
+
+class Stocktake(Base):
+    """
+    Leltár munkamenet: beolvasott darabszámok összevetése a nyilvántartással
+    """
+    __tablename__ = "stocktakes"
+
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String(200), nullable=False)
+    status = Column(String(20), default="open", nullable=False)  # open | applied | cancelled
+    # Opcionális hatókör: a hatókörbe eső, de be nem olvasott tárgyak is megjelennek az eltérésekben
+    location_id = Column(Integer, ForeignKey("locations.id"), nullable=True)
+    category = Column(String(100), nullable=True)
+    adjusted_count = Column(Integer, nullable=True)  # alkalmazáskor módosított tárgyak
+    created_at = Column(DateTime, nullable=False)
+    applied_at = Column(DateTime, nullable=True)
+
+    counts = relationship("StocktakeCount", cascade="all, delete-orphan")
+
+    def __repr__(self):
+        return f"<Stocktake(id={self.id}, name='{self.name}', status='{self.status}')>"
+
+
+class StocktakeCount(Base):
+    """
+    Egy QR kódra összesített számlálás a leltárban
+    """
+    __tablename__ = "stocktake_counts"
+
+    id = Column(Integer, primary_key=True)
+    stocktake_id = Column(Integer, ForeignKey("stocktakes.id", ondelete="CASCADE"), nullable=False)
+    qr_code = Column(String(50), nullable=False)
+    counted_quantity = Column(Integer, default=0, nullable=False)
+    scans = Column(Integer, default=0, nullable=False)  # beolvasások száma
+    updated_at = Column(DateTime, nullable=False)
+
+    __table_args__ = (UniqueConstraint("stocktake_id", "qr_code", name="uq_stocktake_counts_code"),)
+
+
+class StockAlert(Base):
+    """
+    Készlet küszöb átlépés (a min_quantity alá csökkenés, ill. fölé töltés) -
+    a készlet módosításkor, ugyanabban a tranzakcióban keletkezik
+    """
+    __tablename__ = "stock_alerts"
+
+    id = Column(Integer, primary_key=True, index=True)
+    item_id = Column(Integer, ForeignKey("items.id", ondelete="CASCADE"), nullable=False, index=True)
+    kind = Column(String(20), nullable=False)  # LOW_STOCK | RESTOCKED
+    quantity = Column(Integer, nullable=False)  # a módosítás utáni mennyiség
+    min_quantity = Column(Integer, nullable=False)
+    created_at = Column(DateTime, nullable=False)
+
+    def __repr__(self):
+        return f"<StockAlert(item_id={self.item_id}, kind='{self.kind}', quantity={self.quantity})>"
+
+
+class StockMovement(Base):
+    """
+    Készletmozgás napló (csak hozzáfűzés): minden mennyiség változás egy sor
+    """
+    __tablename__ = "stock_movements"
+
+    id = Column(Integer, primary_key=True)
+    item_id = Column(Integer, ForeignKey("items.id", ondelete="CASCADE"), nullable=False)
+    delta = Column(Integer, nullable=False)
+    quantity_after = Column(Integer, nullable=False)  # "mennyiség X időpontban" egy index kereséssel
+    reason = Column(String(30), nullable=False)  # initial | edit | adjust | stocktake | ...
+    created_at = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        Index("ix_stock_movements_item_time", "item_id", "created_at"),
+        # Fedő index az időablakos kötegelt olvasáshoz (stock_forecast): nincs táblaolvasás
+        Index("ix_stock_movements_time", "created_at", "item_id", "delta"),
+    )
+
+
+class StockSnapshot(Base):
+    """
+    Tárgyankénti pillanatkép egy mozgásig: mennyiség és kumulált fogyás / bevételezés
+    """
+    __tablename__ = "stock_snapshots"
+
+    id = Column(Integer, primary_key=True)
+    item_id = Column(Integer, ForeignKey("items.id", ondelete="CASCADE"), nullable=False)
+    movement_id = Column(Integer, nullable=False)  # az utolsó beszámított mozgás
+    taken_at = Column(DateTime, nullable=False)  # az utolsó beszámított mozgás időpontja
+    quantity = Column(Integer, nullable=False)
+    consumed = Column(Integer, nullable=False)
+    received = Column(Integer, nullable=False)
+
+    __table_args__ = (Index("ix_stock_snapshots_item_time", "item_id", "taken_at"),)
+
+
+class StockForecast(Base):
+    """
+    Tárgyankénti fogyási ráta (a stock_forecast kötegelt számítás eredménye) -
+    a kifogyásig hátralévő napok kiszolgáláskor, a jelenlegi mennyiségből számolódnak
+    """
+    __tablename__ = "stock_forecasts"
+
+    item_id = Column(Integer, ForeignKey("items.id", ondelete="CASCADE"), primary_key=True)
+    rate_per_day = Column(Float, nullable=False)
+    movements = Column(Integer, nullable=False)  # a becslés alapjául szolgáló fogyás mozgások
+    fitted = Column(Boolean, nullable=False)  # regresszió (True) vagy időszakos átlag (False)
+    computed_at = Column(DateTime, nullable=False)
+
+
+# ============= BLOB HIVATKOZÁS SZÁMLÁLÁS =============
+# Az ORM események minden kódúton (cascade törlés, képek cseréje update_item-ben)
+# lefutnak, a számlálót a flush saját tranzakciójában módosítjuk.
+
+@event.listens_for(ItemImage, "after_insert")
+@event.listens_for(Document, "after_insert")
+def _blob_ref_insert(mapper, connection, target):
+    blob_store.adjust_refs(connection, target.filename, +1)
+
+
+@event.listens_for(ItemImage, "after_delete")
+@event.listens_for(Document, "after_delete")
+def _blob_ref_delete(mapper, connection, target):
+    blob_store.adjust_refs(connection, target.filename, -1)
+
+
+@event.listens_for(Item, "after_insert")
+def _item_image_ref_insert(mapper, connection, target):
+    blob_store.adjust_refs(connection, target.image_filename, +1)
+
+
+@event.listens_for(Item, "after_update")
+def _item_image_ref_update(mapper, connection, target):
+    history = inspect(target).attrs.image_filename.history
+    for filename in history.deleted or ():
+        blob_store.adjust_refs(connection, filename, -1)
+    for filename in history.added or ():
+        blob_store.adjust_refs(connection, filename, +1)
+
+
+@event.listens_for(Item, "after_delete")
+def _item_image_ref_delete(mapper, connection, target):
+    blob_store.adjust_refs(connection, target.image_filename, -1)
+
+
+# ============= KÉSZLETMOZGÁS NAPLÓ =============
+# Az ORM úton (create_item, update_item) történő mennyiség változásokat itt
+# naplózzuk; a közvetlen SQL módosítások (atomi készlet módosítás, leltár)
+# maguk hívják a stock_ledger.record*() függvényeket.
+
+@event.listens_for(Item, "after_insert")
+def _stock_ledger_insert(mapper, connection, target):
+    if target.quantity:
+        stock_ledger.record(connection, target.id, target.quantity, target.quantity, "initial")
+
+
+@event.listens_for(Item, "after_update")
+def _stock_ledger_update(mapper, connection, target):
+    history = inspect(target).attrs.quantity.history
+    if history.deleted and history.added:
+        stock_ledger.record(connection, target.id, history.added[0] - history.deleted[0], history.added[0], "edit")
+
+
+@event.listens_for(Item, "after_delete")
+def _stock_ledger_delete(mapper, connection, target):
+    # Gyűjtve, flush végén egy utasítással (tömeges törlésnél nem tárgyanként két DELETE)
+    object_session(target).info.setdefault("stock_ledger_deleted", set()).add(target.id)
+
+
+@event.listens_for(Session, "after_flush")
+def _stock_ledger_flush(session, flush_context):
+    deleted = session.info.pop("stock_ledger_deleted", None)
+    if deleted:
+        stock_ledger.delete_item_history(session.connection(), deleted)
+
+
+@event.listens_for(Session, "after_rollback")
+def _stock_ledger_after_rollback(session):
+    session.info.pop("stock_ledger_deleted", None)
+
+
+# ============= QR INDEX KARBANTARTÁS =============
+# Az érintett sorokat a session-ben jegyezzük fel, az index csak sikeres commit
+# után frissül (lásd utils/qr_index.py).
+
+_QR_INDEX_FIELDS = ("qr_code", "name", "location_id")
+
+
+@event.listens_for(Item, "after_insert")
+def _qr_index_item_insert(mapper, connection, target):
+    if target.qr_code:
+        qr_index.mark_items(object_session(target), [target.id])
+
+
+@event.listens_for(Item, "after_update")
+def _qr_index_item_update(mapper, connection, target):
+    state = inspect(target)
+    if any(state.attrs[field].history.has_changes() for field in _QR_INDEX_FIELDS):
+        qr_index.mark_items(object_session(target), [target.id])
+
+
+@event.listens_for(Item, "after_delete")
+def _qr_index_item_delete(mapper, connection, target):
+    qr_index.mark_items(object_session(target), [target.id])
+
+
+@event.listens_for(Location, "after_insert")
+@event.listens_for(Location, "after_update")
+@event.listens_for(Location, "after_delete")
+def _qr_index_location_change(mapper, connection, target):
+    qr_index.mark_location(object_session(target), target.id)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _qr_index_bulk_statement(orm_execute_state):
+    # Tömeges ORM utasítások (update(Item) / query.update / insert) nem futtatnak mapper eseményt
+    if orm_execute_state.bind_mapper is not inspect(Item) or orm_execute_state.is_select:
+        return
+    params = orm_execute_state.parameters
+    rows = params if isinstance(params, list) else [params] if params else []
+    if orm_execute_state.is_insert:
+        if any("qr_code" in row for row in rows):
+            qr_index.mark_reload(orm_execute_state.session)
+    elif rows and all("id" in row for row in rows):
+        qr_index.mark_items(orm_execute_state.session, [row["id"] for row in rows])
+    else:
+        qr_index.mark_reload(orm_execute_state.session)
+
+
+@event.listens_for(Session, "after_commit")
+def _qr_index_after_commit(session):
+    qr_index.apply_committed(session)
+
+
+@event.listens_for(Session, "after_rollback")
+def _qr_index_after_rollback(session):
+    qr_index.discard(session)
@@ -0,0 +1,80 @@
+"""
+Adminisztrációs API routes - karbantartási műveletek
+"""
+
+import asyncio
+from typing import Dict, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+import logging
+
+from ..database import get_db
+from ..utils import backup, blob_store, orphan_gc, upload_sessions, job_queue, media_response
+
+router = APIRouter(prefix="/api/admin", tags=["Admin"])
+logger = logging.getLogger(__name__)
+
+
+# ============= GARBAGE COLLECTION =============
+
+@router.get("/gc", response_model=Dict)
+async def get_gc_status():
+    """
+    GC állapot: utolsó futás jelentése és összesített felszabadított tárhely
+    """
+    return orphan_gc.status()
+
+
+@router.post("/gc", response_model=Dict)
+async def run_gc(
+    full: bool = Query(False, description="Teljes kör az összes könyvtáron (különben egy inkrementális lépés)"),
+    db: Session = Depends(get_db)
+):
+    """
+    GC futtatása azonnal: hivatkozás nélküli blobok + árva fájlok
+    """
+    logger.info(f"POST /api/admin/gc - full={full}")
+
+    blob_report = await asyncio.to_thread(blob_store.collect_garbage)
+    if full:
+        report = await asyncio.to_thread(orphan_gc.run_full_cycle, db)
+    else:
+        report = await asyncio.to_thread(orphan_gc.run_once, db)
+
+    report["blobs"] = blob_report
+    report["upload_sessions"] = await asyncio.to_thread(upload_sessions.expire_sessions)
+    report["pruned_jobs"] = await asyncio.to_thread(job_queue.prune_finished)
+    return report
+
+
+# ============= MENTÉS =============
+
+@router.get("/backup")
+async def download_backup(
+    compression: str = Query("gzip", pattern="^(none|gzip|zstd)$"),
+    since: Optional[str] = Query(None, description="Inkrementális: csak az ezen mentés (X-Backup-Id) óta változott fájlok"),
+):
+    """
+    Teljes mentés letöltése: konzisztens adatbázis pillanatkép + hivatkozott
+    képek, dokumentumok, QR kódok egy streamelt tar archívumban
+
+    Az írók közben is dolgozhatnak. A válasz X-Backup-Id fejléce a következő
+    inkrementális mentés `since` paramétere. Visszaállítás: RESTORE_BACKUP.py
+    """
+    logger.info(f"GET /api/admin/backup - compression={compression}, since={since}")
+    try:
+        backup_id, chunks = backup.open_stream(compression, since)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    extension, media_type = backup.COMPRESSIONS[compression]
+    filename = f"leltar-backup-{backup_id}{'-inc' if since else ''}{extension}"
+    return StreamingResponse(
+        chunks,
+        media_type=media_type,
+        headers={"Content-Disposition": media_response.content_disposition(filename), "X-Backup-Id": backup_id}
+    )
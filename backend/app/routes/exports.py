@@ -0,0 +1,36 @@
+"""
+Leltár export API routes (NDJSON / CSV, opcionálisan gzip)
+"""
+
+from datetime import datetime
+
+from fastapi import APIRouter, Query
+from fastapi.responses import StreamingResponse
+import logging
+
+from ..utils import item_export, media_response
+
+router = APIRouter(prefix="/api/export", tags=["Export"])
+logger = logging.getLogger(__name__)
+
+
+@router.get("")
+async def export_items(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    gzip: bool = Query(False, description="Gzip tömörített letöltés (.gz)"),
+):
+    """
+    A teljes leltár letöltése streamelve
+
+    NDJSON: soronként egy tárgy (felhasználó, helyszín, képek listája).
+    CSV: ";" elválasztó, UTF-8 BOM, az /api/import által visszatölthető fejléc.
+    A szerver soha nem tartja memóriában a teljes táblát.
+    """
+    logger.info(f"GET /api/export - format={format}, gzip={gzip}")
+
+    filename = f"leltar-{datetime.now():%Y%m%d-%H%M}.{format}" + (".gz" if gzip else "")
+    return StreamingResponse(
+        item_export.stream(format, gzip),
+        media_type="application/gzip" if gzip else item_export.FORMATS[format],
+        headers={"Content-Disposition": media_response.content_disposition(filename)}
+    )
@@ -11,7 +11,7 @@ from sqlalchemy.orm import Session
 from typing import List, Optional
 import logging
 
-from .. import crud, schemas
+from .. import crud, jobs, schemas
 from ..database import get_db
 from ..utils import image_handler
 
@@ -19,6 +19,49 @@ router = APIRouter(prefix="/api/items/{item_id}/images", tags=["Item Images"])
 logger = logging.getLogger(__name__)
 
 
+def attach_item_image(db: Session, item, result: dict, original_filename: str, rotation: int,
+                      is_primary: bool):
+    """
+    Feltöltött kép (image_handler.store_uploaded_file / save_uploaded_file
+    eredménye) hozzárendelése egy tárgyhoz: ItemImage rekord, első képnél
+    item.image_filename, és a feldolgozás / forgatás háttér feladatának sorba állítása
+    """
+    filename = result["filename"]
+    processing = result.get("status") == "processing"
+    
+    # ItemImage rekord létrehozása
+    db_image = crud.create_item_image(
+        db=db,
+        item_id=item.id,
+        filename=filename,
+        original_filename=result.get("original_filename") or original_filename,
+        rotation=rotation,
+        is_primary=is_primary,
+        orientation=result.get("orientation"),
+        variants=result.get("variants") or None
+    )
+    if processing:
+        db_image = crud.update_item_image(db, db_image.id, processing_status="processing")
+    
+    # Backward compatibility: ha ez az első kép, mentsd az item.image_filename-be is
+    existing_images = crud.get_item_images(db, item.id)
+    if len(existing_images) == 1:  # Ez az első kép
+        item.image_filename = filename
+        db.commit()
+    
+    # A feldolgozás végén a forgatás is elkészül, külön feladat csak kész képhez kell
+    job = None
+    if processing:
+        job = jobs.enqueue_image_processing(db, filename)
+    elif rotation:
+        job = jobs.enqueue_rotation(db, db_image.id, db_image.filename)
+    db_image.job_id = job.id if job else None
+    
+    logger.info(f"✅ Kép feltöltve: {db_image.filename} ({db_image.processing_status})")
+    
+    return db_image
+
+
 @router.get("", response_model=List[schemas.ItemImageResponse])
 async def get_item_images(item_id: int, db: Session = Depends(get_db)):
     """
@@ -34,10 +77,6 @@ async def get_item_images(item_id: int, db: Session = Depends(get_db)):
         
         images = crud.get_item_images(db, item_id)
         
-        # URL hozzáadása
-        for img in images:
-            img.url = f"/uploads/{img.filename}"
-        
         logger.info(f"✅ {len(images)} kép lekérve")
         
         return images
@@ -60,6 +99,9 @@ async def upload_item_image(
     """
     Új kép feltöltése egy tárgyhoz
     
+    A kép átvétele után azonnal válaszol (processing_status="processing",
+    job_id); a thumbnail, variánsok és a forgatás háttér feladatként készülnek.
+    
     Args:
         item_id: Tárgy ID
         file: Kép fájl
@@ -78,32 +120,9 @@ async def upload_item_image(
         if rotation not in [0, 90, 180, 270]:
             raise HTTPException(status_code=400, detail="Forgatás csak 0, 90, 180, 270 lehet")
         
-        # ✅ JAVÍTVA: save_uploaded_file() használata (async)
-        result = await image_handler.save_uploaded_file(file)
-        filename = result["filename"]
-        
-        # ItemImage rekord létrehozása
-        db_image = crud.create_item_image(
-            db=db,
-            item_id=item_id,
-            filename=filename,
-            original_filename=result.get("original_filename") or file.filename,
-            rotation=rotation,
-            is_primary=is_primary
-        )
-        
-        # Backward compatibility: ha ez az első kép, mentsd az item.image_filename-be is
-        existing_images = crud.get_item_images(db, item_id)
-        if len(existing_images) == 1:  # Ez az első kép
-            item.image_filename = filename
-            db.commit()
-        
-        # URL hozzáadása
-        db_image.url = f"/uploads/{db_image.filename}"
+        result = await image_handler.store_uploaded_file(file)
         
-        logger.info(f"✅ Kép feltöltve: {db_image.filename}")
-        
-        return db_image
+        return attach_item_image(db, item, result, file.filename, rotation, is_primary)
     
     except HTTPException:
         raise
@@ -122,6 +141,10 @@ async def rotate_image(
     """
     Kép forgatása
     
+    A forgatást szerver oldalon alkalmazzuk: az elforgatott fő képet és
+    thumbnailt háttérben állítjuk elő (JPEG esetén veszteségmentesen, ha lehet).
+    Addig a válasz url mezője az igény szerinti forgató végpontra mutat.
+    
     Args:
         rotation: Új forgatás (0, 90, 180, 270)
     """
@@ -129,11 +152,10 @@ async def rotate_image(
     
     try:
         # Rotation validáció
-        if rotation not in [0, 90, 180, 270]:
+        if rotation not in image_handler.ALLOWED_ROTATIONS:
             raise HTTPException(status_code=400, detail="Forgatás csak 0, 90, 180, 270 lehet")
         
-        # Kép frissítése
-        db_image = crud.update_item_image(db, image_id, rotation=rotation)
+        db_image = crud.get_item_image(db, image_id)
         if not db_image:
             raise HTTPException(status_code=404, detail="Kép nem található")
         
@@ -141,8 +163,11 @@ async def rotate_image(
         if db_image.item_id != item_id:
             raise HTTPException(status_code=400, detail="Kép nem ehhez a tárgyhoz tartozik")
         
-        # URL hozzáadása
-        db_image.url = f"/uploads/{db_image.filename}"
+        # Kép frissítése
+        db_image = crud.update_item_image(db, image_id, rotation=rotation)
+        
+        if not db_image.rotation_ready and db_image.processing_status != "processing":
+            db_image.job_id = jobs.enqueue_rotation(db, image_id, db_image.filename).id
         
         logger.info(f"✅ Kép elforgatva: {rotation}°")
         
@@ -167,8 +192,7 @@ async def set_primary_image(
     logger.info(f"PUT /api/items/{item_id}/images/{image_id}/primary")
     
     try:
-        # Kép frissítése
-        db_image = crud.update_item_image(db, image_id, is_primary=True)
+        db_image = crud.get_item_image(db, image_id)
         if not db_image:
             raise HTTPException(status_code=404, detail="Kép nem található")
         
@@ -176,15 +200,15 @@ async def set_primary_image(
         if db_image.item_id != item_id:
             raise HTTPException(status_code=400, detail="Kép nem ehhez a tárgyhoz tartozik")
         
+        # Kép frissítése
+        db_image = crud.update_item_image(db, image_id, is_primary=True)
+        
         # Backward compatibility: frissítsd az item.image_filename-t is
         item = crud.get_item(db, item_id)
         if item:
             item.image_filename = db_image.filename
             db.commit()
         
-        # URL hozzáadása
-        db_image.url = f"/uploads/{db_image.filename}"
-        
         logger.info(f"✅ Elsődleges kép beállítva")
         
         return db_image
@@ -219,10 +243,6 @@ async def reorder_images(
         # Átrendezés
         reordered = crud.reorder_item_images(db, item_id, image_ids)
         
-        # URL hozzáadása
-        for img in reordered:
-            img.url = f"/uploads/{img.filename}"
-        
         logger.info(f"✅ {len(reordered)} kép átrendezve")
         
         return reordered
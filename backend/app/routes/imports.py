@@ -0,0 +1,58 @@
+"""
+Tárgy import API routes (CSV / XLSX táblázat)
+
+A válasz NDJSON stream, soronként egy esemény:
+    {"event": "error", "row": 17, "errors": ["quantity: ..."]}
+    {"event": "progress", "rows": 2000, "imported": 1998, "failed": 2, ...}
+    {"event": "done", "rows": ..., "imported": ..., "failed": ..., "dry_run": false}
+    {"event": "failed", "error": "..."}  (pl. hiányzó kötelező oszlop)
+"""
+
+from fastapi import APIRouter, File, HTTPException, Query, UploadFile
+from fastapi.responses import StreamingResponse
+import asyncio
+import shutil
+import tempfile
+import logging
+
+from ..utils import item_import
+
+router = APIRouter(prefix="/api/import", tags=["Import"])
+logger = logging.getLogger(__name__)
+
+COPY_CHUNK = 1024 * 1024
+
+
+def _spool(source) -> str:
+    with tempfile.NamedTemporaryFile(prefix="import_", delete=False) as target:
+        shutil.copyfileobj(source, target, COPY_CHUNK)
+        return target.name
+
+
+@router.post("")
+async def import_items(
+    file: UploadFile = File(...),
+    dry_run: bool = Query(False, description="Csak ellenőrzés, semmi nem íródik"),
+):
+    """
+    Tárgyak importálása táblázatból (CSV: , ; vagy tab elválasztó; XLSX: első munkalap)
+
+    Oszlopok (magyar vagy angol fejléc): név, kategória, leírás, mennyiség,
+    minimum mennyiség, beszerzési ár, vásárlás dátuma, megjegyzés,
+    felhasználó (felhasználónév vagy teljes név), helyszín ("Város, cím").
+    Az ismeretlen kategóriák létrejönnek; ismeretlen felhasználó / helyszín
+    soronkénti hiba. A helyes sorok darabonként (IMPORT_BATCH_SIZE) kerülnek be.
+    """
+    logger.info(f"POST /api/import - file='{file.filename}', dry_run={dry_run}")
+    try:
+        fmt = item_import.detect_format(file.filename, file.content_type)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # Saját ideiglenes fájlba másolva: a feldolgozás a válasz streamelése alatt fut
+    path = await asyncio.to_thread(_spool, file.file)
+    return StreamingResponse(
+        item_import.stream_ndjson(path, fmt, dry_run),
+        media_type="application/x-ndjson",
+        headers={"X-Import-Format": fmt}
+    )
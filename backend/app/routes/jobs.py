@@ -0,0 +1,66 @@
+"""
+Háttér feladatok API routes
+"""
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from typing import List, Optional
+import logging
+
+from .. import models, schemas
+from ..database import get_db
+from ..utils import job_queue
+
+router = APIRouter(prefix="/api/jobs", tags=["Jobs"])
+logger = logging.getLogger(__name__)
+
+
+@router.get("", response_model=List[schemas.JobResponse])
+async def list_jobs(
+    status: Optional[str] = Query(None, pattern="^(queued|running|succeeded|failed)$"),
+    kind: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=500),
+    db: Session = Depends(get_db)
+):
+    """
+    Feladatok listája (legújabb elöl), állapot és típus szerint szűrhető
+    """
+    query = db.query(models.Job)
+    if status:
+        query = query.filter(models.Job.status == status)
+    if kind:
+        query = query.filter(models.Job.kind == kind)
+    return query.order_by(models.Job.id.desc()).limit(limit).all()
+
+
+@router.get("/stats", response_model=schemas.JobStatsResponse)
+async def get_job_stats(db: Session = Depends(get_db)):
+    """
+    Feladatok száma állapotonként
+    """
+    return {**job_queue.stats(db), "workers": job_queue.worker_count()}
+
+
+@router.get("/{job_id}", response_model=schemas.JobResponse)
+async def get_job(job_id: int, db: Session = Depends(get_db)):
+    """
+    Egy feladat állapota (pl. feltöltés után a kép feldolgozása)
+    """
+    job = db.get(models.Job, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Feladat nem található")
+    return job
+
+
+@router.post("/{job_id}/retry", response_model=schemas.JobResponse)
+async def retry_job(job_id: int, db: Session = Depends(get_db)):
+    """
+    Sikertelen feladat újraindítása
+    """
+    logger.info(f"POST /api/jobs/{job_id}/retry")
+    try:
+        return job_queue.retry(db, job_id)
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
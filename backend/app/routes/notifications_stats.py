@@ -3,15 +3,16 @@
 Backend Developer: Maria Rodriguez
 """
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 from typing import List, Dict
 from datetime import datetime, timedelta
 import logging
 
-from .. import crud, models, schemas
+from .. import crud, jobs, models, schemas
 from ..database import get_db
+from ..utils import stock_forecast
 
 router = APIRouter(tags=["Notifications & Stats"])
 logger = logging.getLogger(__name__)
@@ -26,6 +27,7 @@ async def get_notifications(db: Session = Depends(get_db)):
     
     Típusok:
     - LOW_STOCK: Alacsony készlet riasztás
+    - STOCK_FORECAST: Fogyási ráta alapján hamarosan elfogyó tárgy
     - NO_IMAGE: Kép nélküli tárgyak
     - OLD_PURCHASE: Régen vásárolt tárgyak (1+ év)
     - NO_LOCATION: Helyszín nélküli tárgyak
@@ -49,6 +51,22 @@ async def get_notifications(db: Session = Depends(get_db)):
                 "created_at": datetime.now().isoformat()
             })
         
+        # 1/b. Várható kifogyás (a tárolt fogyási rátákból, a már alacsony készletűek nélkül)
+        for item, forecast, days_left in stock_forecast.due_soon(db):
+            if item.min_quantity is not None and item.quantity <= item.min_quantity:
+                continue
+            notifications.append({
+                "id": f"stock_forecast_{item.id}",
+                "type": "STOCK_FORECAST",
+                "severity": "warning",
+                "title": "⏳ Hamarosan elfogy",
+                "message": f"{item.name}: kb. {days_left:.0f} nap múlva fogy el ({forecast.rate_per_day:.2f} db/nap)",
+                "item_id": item.id,
+                "item_name": item.name,
+                "days_left": round(days_left, 1),
+                "created_at": datetime.now().isoformat()
+            })
+        
         # 2. Kép nélküli tárgyak
         items_without_image = db.query(models.Item).filter(
             models.Item.image_filename == None
@@ -143,6 +161,58 @@ async def get_notifications(db: Session = Depends(get_db)):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/api/notifications/stock-alerts", response_model=List[schemas.StockAlertResponse])
+async def get_stock_alerts(
+    after_id: int = Query(0, ge=0, description="Az utolsó már látott riasztás ID-ja"),
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_db)
+):
+    """
+    Készlet riasztások inkrementálisan: csak az after_id utáni (új) bejegyzések
+
+    A riasztások a készlet módosításakor keletkeznek (POST /api/items/{id}/stock),
+    így a kliensnek nem kell a teljes értesítés listát újraszámoltatnia.
+    """
+    return crud.get_stock_alerts(db, after_id, limit)
+
+
+@router.get("/api/notifications/stock-forecast", response_model=List[schemas.StockForecastResponse])
+async def get_stock_forecast(
+    within_days: float = Query(stock_forecast.HORIZON_DAYS, gt=0, le=3650),
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_db)
+):
+    """
+    Várható kifogyás: a within_days napon belül elfogyó tárgyak, a legsürgősebb elöl
+
+    A fogyási rátát a háttérben futó kötegelt számítás tárolja, a hátralévő
+    napok a jelenlegi mennyiségből számolódnak.
+    """
+    today = datetime.now().date()
+    return [
+        {
+            "item_id": item.id,
+            "item_name": item.name,
+            "quantity": item.quantity,
+            "min_quantity": item.min_quantity,
+            "rate_per_day": forecast.rate_per_day,
+            "days_left": days_left,
+            "runs_out_on": today + timedelta(days=int(days_left)),
+            "fitted": forecast.fitted,
+            "computed_at": forecast.computed_at,
+        }
+        for item, forecast, days_left in stock_forecast.due_soon(db, within_days, limit)
+    ]
+
+
+@router.post("/api/notifications/stock-forecast/refresh", response_model=schemas.JobResponse, status_code=202)
+async def refresh_stock_forecast(db: Session = Depends(get_db)):
+    """
+    Előrejelzés újraszámolása háttér feladatként (pl. nagy importálás után)
+    """
+    return jobs.enqueue_stock_forecast(db)
+
+
 # ============= ÉRINTETT TÁRGYAK LEKÉRÉSE =============
 
 @router.get("/api/notifications/{notification_type}/items", response_model=List[Dict])
@@ -155,6 +225,7 @@ async def get_notification_items(notification_type: str, db: Session = Depends(g
     - NO_LOCATION: Helyszín nélküli tárgyak
     - OLD_PURCHASE: Régen vásárolt tárgyak (1+ év)
     - LOW_STOCK: Alacsony készletű tárgyak
+    - STOCK_FORECAST: Hamarosan elfogyó tárgyak
     """
     logger.info(f"GET /api/notifications/{notification_type}/items")
     
@@ -185,6 +256,8 @@ async def get_notification_items(notification_type: str, db: Session = Depends(g
             ).all()
         elif notification_type == "LOW_STOCK":
             db_items = crud.get_low_stock_items(db)
+        elif notification_type == "STOCK_FORECAST":
+            db_items = [item for item, _, _ in stock_forecast.due_soon(db)]
         else:
             raise HTTPException(status_code=400, detail=f"Ismeretlen típus: {notification_type}")
         
@@ -3,16 +3,18 @@ QR kód API routes - JAVÍTOTT VERZIÓ
 Backend Developer: Maria Rodriguez
 """
 
-from fastapi import APIRouter, Depends, HTTPException, Query
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import Response, StreamingResponse
 from sqlalchemy.orm import Session
 from typing import List
-import os
+import asyncio
+import json
+import time
 import logging
 
-from .. import crud, schemas
+from .. import crud, jobs, models, schemas
 from ..database import get_db
-from ..utils import qr_handler
+from ..utils import qr_handler, qr_index, media_response, label_sheet
 
 router = APIRouter(prefix="/api/qr", tags=["QR Codes"])
 logger = logging.getLogger(__name__)
@@ -21,7 +23,7 @@ logger = logging.getLogger(__name__)
 @router.post("/generate/{item_id}", response_model=schemas.QRCodeResponse)
 async def generate_qr_code(
     item_id: int,
-    size: str = Query("medium", regex="^(small|medium|large)$"),
+    size: str = Query("medium", pattern="^(small|medium|large)$"),
     db: Session = Depends(get_db)
 ):
     """
@@ -31,6 +33,9 @@ async def generate_qr_code(
     - small: 3x3 cm (300 DPI)
     - medium: 5x5 cm (300 DPI) 
     - large: 8x8 cm (300 DPI)
+    
+    A PNG renderelése háttér feladat (status="processing", job_id); a
+    letöltési végpont a feladat elkészülte után adja vissza a fájlt.
     """
     logger.info(f"POST /api/qr/generate/{item_id}?size={size}")
     
@@ -43,8 +48,7 @@ async def generate_qr_code(
         
         # QR kód string - ha nincs még, generálj egyet
         if not item.qr_code:
-            import uuid
-            qr_code_str = f"ITM-{uuid.uuid4().hex[:8].upper()}"
+            qr_code_str = qr_handler.new_code_string()
             
             # Mentsd el az adatbázisba
             item.qr_code = qr_code_str
@@ -56,16 +60,18 @@ async def generate_qr_code(
             qr_code_str = item.qr_code
             logger.info(f"   Meglévő QR kód: {qr_code_str}")
         
-        # QR kép generálása
-        qr_info = qr_handler.generate_qr_code(item_id, qr_code_str, size)
+        # QR kép renderelése háttérben
+        job = jobs.enqueue_qr_render(db, item_id, qr_code_str, size)
         
-        logger.info(f"✅ QR kód generálva: {qr_info['filename']}")
+        logger.info(f"✅ QR kód renderelés sorban: #{job.id}")
         
         return {
             "item_id": item_id,
             "qr_code": qr_code_str,
-            "qr_url": qr_info["url"],
-            "size": size
+            "qr_url": f"/qr_codes/{qr_handler.get_qr_filename(item_id, size)}",
+            "size": size,
+            "status": "processing",
+            "job_id": job.id
         }
     
     except HTTPException:
@@ -75,18 +81,114 @@ async def generate_qr_code(
         raise HTTPException(status_code=500, detail=f"QR generálási hiba: {str(e)}")
 
 
+@router.post("/generate-batch")
+async def generate_qr_batch(data: schemas.QRBatchRequest, db: Session = Depends(get_db)):
+    """
+    Tömeges QR generálás sok tárgyhoz
+
+    - item_ids: a megadott tárgyak, vagy
+    - all_missing: az összes még QR kód nélküli tárgy
+
+    A hiányzó kódokat egy tranzakcióban osztjuk ki, a PNG-ket process poolban
+    rendereljük (tárgyanként egyszer építve a mátrixot). A válasz NDJSON
+    stream: "start", majd darabonként "progress", végül "done" esemény.
+    """
+    logger.info(f"POST /api/qr/generate-batch (items={len(data.item_ids or [])}, all_missing={data.all_missing})")
+
+    if (data.item_ids is None) == (not data.all_missing):
+        raise HTTPException(status_code=400, detail="Adj meg item_ids listát VAGY all_missing=true-t")
+
+    try:
+        entries, assigned = await asyncio.to_thread(crud.assign_qr_codes, db, data.item_ids)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+    found = {item_id for item_id, _ in entries}
+    not_found = sorted(set(data.item_ids or []) - found)
+
+    async def progress():
+        started = time.perf_counter()
+        yield _ndjson({"event": "start", "total": len(entries), "assigned": assigned, "not_found": not_found})
+
+        done = 0
+        failed = []
+        async for results in qr_handler.render_batch(entries, data.sizes):
+            done += len(results)
+            failed.extend(r for r in results if "error" in r)
+            yield _ndjson({"event": "progress", "done": done, "total": len(entries)})
+
+        elapsed = time.perf_counter() - started
+        logger.info(f"✅ Tömeges QR: {done - len(failed)}/{len(entries)} tárgy, {elapsed:.1f}s")
+        yield _ndjson({
+            "event": "done",
+            "rendered": done - len(failed),
+            "failed": failed,
+            "sizes": data.sizes,
+            "seconds": round(elapsed, 3)
+        })
+
+    return StreamingResponse(progress(), media_type="application/x-ndjson")
+
+
+def _ndjson(event: dict) -> bytes:
+    return (json.dumps(event) + "\n").encode()
+
+
+@router.post("/sheet")
+async def generate_label_sheet(data: schemas.QRSheetRequest, db: Session = Depends(get_db)):
+    """
+    Nyomtatható címke ív (QR kód + tárgy név) sok tárgyhoz
+
+    - format=pdf: egy PDF, oldalanként streamelve
+    - format=png: page megadásával egy oldal PNG, különben az összes oldal ZIP-ben
+
+    A még QR kód nélküli tárgyak kódot kapnak. A rácsot a layout adja meg
+    (A4 vagy etikett ív); a skip a részben felhasznált első ívhez való.
+    """
+    logger.info(f"POST /api/qr/sheet (items={len(data.item_ids or [])}, layout={data.layout}, format={data.format})")
+
+    try:
+        labels = await asyncio.to_thread(crud.get_qr_labels, db, data.item_ids, data.category)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    if not labels:
+        raise HTTPException(status_code=404, detail="Nincs nyomtatható tárgy")
+
+    pages = label_sheet.page_count(len(labels), data.layout, data.skip)
+    headers = {"X-Total-Pages": str(pages), "X-Total-Labels": str(len(labels))}
+    logger.info(f"✅ Címke ív: {len(labels)} címke, {pages} oldal")
+
+    if data.format == "png" and data.page is not None:
+        content = await asyncio.to_thread(label_sheet.render_png_page, labels, data.layout, data.page, data.skip)
+        if content is None:
+            raise HTTPException(status_code=404, detail=f"Nincs ilyen oldal (összesen {pages})")
+        return Response(content=content, media_type=label_sheet.FORMATS["png"], headers=headers)
+
+    if data.format == "pdf":
+        chunks, media_type, filename = label_sheet.iter_pdf(labels, data.layout, data.skip), label_sheet.FORMATS["pdf"], "qr_labels.pdf"
+    else:
+        chunks, media_type, filename = label_sheet.iter_png_zip(labels, data.layout, data.skip), label_sheet.FORMATS["zip"], "qr_labels.zip"
+    headers["Content-Disposition"] = media_response.content_disposition(filename)
+
+    # Szinkron generátor: a Starlette szálban iterálja, oldalanként küldve
+    return StreamingResponse(chunks, media_type=media_type, headers=headers)
+
+
 @router.get("/download/{item_id}/{size}")
 async def download_qr_label(
     item_id: int,
     size: str,
+    request: Request,
+    format: str = Query("png", pattern="^(png|svg)$"),
     db: Session = Depends(get_db)
 ):
     """
-    QR kód címke letöltése
+    QR kód címke letöltése (PNG vagy SVG)
     
-    JAVÍTVA: Helyes paraméterek a get_qr_path()-hoz
+    A címke a tárgy QR kódjából közvetlenül renderelődik (memória cache),
+    nem kell hozzá előzetesen generált fájl.
     """
-    logger.info(f"GET /api/qr/download/{item_id}/{size}")
+    logger.info(f"GET /api/qr/download/{item_id}/{size}?format={format}")
     
     try:
         # Méret validáció
@@ -99,25 +201,25 @@ async def download_qr_label(
             logger.warning(f"❌ Item #{item_id} nem található")
             raise HTTPException(status_code=404, detail="Tárgy nem található")
         
-        # JAVÍTVA: item_id ÉS size paraméter
-        file_path = qr_handler.get_qr_path(item_id, size)
-        
-        if not os.path.exists(file_path):
-            logger.warning(f"❌ QR fájl nem létezik: {file_path}")
+        if not item.qr_code:
+            logger.warning(f"❌ Item #{item_id}: nincs QR kód")
             raise HTTPException(
                 status_code=404, 
                 detail="QR kód még nem lett generálva. Először generáld le!"
             )
         
-        logger.info(f"✅ QR letöltés: {file_path}")
+        content = await asyncio.to_thread(qr_handler.render_qr, item.qr_code, size, format)
         
-        # QR kód fájlnév
-        filename = qr_handler.get_qr_filename(item_id, size)
+        logger.info(f"✅ QR letöltés: {item.qr_code} ({size}, {format})")
         
-        return FileResponse(
-            file_path,
-            media_type="image/png",
-            filename=filename
+        # A tárgy kódja megváltozhat: ETag alapú újraellenőrzés
+        return media_response.bytes_response(
+            content,
+            media_type=qr_handler.FORMATS[format],
+            etag=qr_handler.render_etag(item.qr_code, size, format),
+            filename=qr_handler.get_qr_filename(item_id, size, format),
+            request_headers=request.headers,
+            cache="revalidate"
         )
     
     except HTTPException:
@@ -127,23 +229,59 @@ async def download_qr_label(
         raise HTTPException(status_code=500, detail=f"QR letöltési hiba: {str(e)}")
 
 
+@router.get("/image/{qr_code}")
+async def get_qr_image(
+    qr_code: str,
+    request: Request,
+    size: str = Query("medium", pattern="^(small|medium|large)$"),
+    format: str = Query("png", pattern="^(png|svg)$"),
+    db: Session = Depends(get_db)
+):
+    """
+    QR kép a kód alapján - a kimenet csak (qr_code, size, format) függvénye,
+    ezért immutable cache-elhető. Csak létező tárgy kódjához renderelünk.
+    """
+    exists = db.query(models.Item.id).filter(models.Item.qr_code == qr_code).first()
+    if not exists:
+        raise HTTPException(status_code=404, detail="Tárgy nem található ezzel a QR kóddal")
+
+    content = await asyncio.to_thread(qr_handler.render_qr, qr_code, size, format)
+    return media_response.bytes_response(
+        content,
+        media_type=qr_handler.FORMATS[format],
+        etag=qr_handler.render_etag(qr_code, size, format),
+        request_headers=request.headers,
+        cache="immutable"
+    )
+
+
 @router.get("/scan/{qr_code}", response_model=schemas.ItemResponse)
-async def scan_qr_code(qr_code: str, db: Session = Depends(get_db)):
+async def scan_qr_code(
+    qr_code: str,
+    compact: bool = Query(False, description="Csak id, név, QR kód és helyszín (szkennereknek)"),
+    db: Session = Depends(get_db)
+):
     """
     QR kód beolvasása és tárgy lekérése
+
+    A kód feloldása a memóriában tartott indexből történik. compact=true esetén
+    a válasz {"id", "name", "qr_code", "location_id", "location"} - ehhez nincs
+    adatbázis művelet és ItemResponse szerializálás.
     """
-    logger.info(f"GET /api/qr/scan/{qr_code}")
-    
     try:
-        # Keresés QR kód alapján
-        item = db.query(crud.models.Item).filter(
-            crud.models.Item.qr_code == qr_code
-        ).first()
+        entry = qr_index.lookup(qr_code)
         
-        if not item:
+        if not entry:
             logger.warning(f"❌ Tárgy nem található QR kóddal: {qr_code}")
             raise HTTPException(status_code=404, detail="Tárgy nem található ezzel a QR kóddal")
         
+        if compact:
+            return Response(content=json.dumps(entry, ensure_ascii=False), media_type="application/json")
+        
+        item = crud.get_item(db, entry["id"])
+        if not item:
+            raise HTTPException(status_code=404, detail="Tárgy nem található ezzel a QR kóddal")
+        
         logger.info(f"✅ Tárgy megtalálva: #{item.id} - {item.name}")
         
         return item
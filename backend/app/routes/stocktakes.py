@@ -0,0 +1,120 @@
+"""
+Leltár (stocktake) API routes
+
+Menet: leltár nyitása -> beolvasások kötegekben -> eltérés jelentés ->
+alkalmazás (minden mennyiség módosítás egy tranzakcióban).
+"""
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from typing import List, Optional
+import asyncio
+import logging
+
+from .. import crud, models, schemas
+from ..database import get_db
+
+router = APIRouter(prefix="/api/stocktakes", tags=["Stocktakes"])
+logger = logging.getLogger(__name__)
+
+
+def _get_or_404(db: Session, stocktake_id: int) -> models.Stocktake:
+    stocktake = crud.get_stocktake(db, stocktake_id)
+    if not stocktake:
+        raise HTTPException(status_code=404, detail="Leltár nem található")
+    return stocktake
+
+
+@router.post("", response_model=schemas.StocktakeResponse, status_code=201)
+async def create_stocktake(data: schemas.StocktakeCreate, db: Session = Depends(get_db)):
+    """
+    Új leltár nyitása
+    """
+    logger.info(f"POST /api/stocktakes ({data.name})")
+    if data.location_id is not None and not crud.get_location(db, data.location_id):
+        raise HTTPException(status_code=404, detail="Helyszín nem található")
+    return crud.create_stocktake(db, data)
+
+
+@router.get("", response_model=List[schemas.StocktakeResponse])
+async def list_stocktakes(
+    status: Optional[str] = Query(None, pattern="^(open|applied|cancelled)$"),
+    db: Session = Depends(get_db)
+):
+    """
+    Leltárak listája (legújabb elöl)
+    """
+    return crud.get_stocktakes(db, status)
+
+
+@router.get("/{stocktake_id}", response_model=schemas.StocktakeResponse)
+async def get_stocktake(stocktake_id: int, db: Session = Depends(get_db)):
+    return _get_or_404(db, stocktake_id)
+
+
+@router.post("/{stocktake_id}/scans", response_model=schemas.StocktakeScanResult)
+async def add_scans(stocktake_id: int, data: schemas.StocktakeScanBatch, db: Session = Depends(get_db)):
+    """
+    Beolvasások kötegének rögzítése
+
+    A szkenner offline gyűjtheti a beolvasásokat és egyben küldheti el;
+    az ismeretlen QR kódok is rögzülnek, a jelentésben "unknown" státusszal.
+    """
+    stocktake = _get_or_404(db, stocktake_id)
+    try:
+        codes = await asyncio.to_thread(crud.add_stocktake_scans, db, stocktake, data.scans, data.mode)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+    logger.info(f"✅ Leltár #{stocktake_id}: {len(data.scans)} beolvasás ({codes} kód, {data.mode})")
+    return {"received": len(data.scans), "codes": codes}
+
+
+@router.get("/{stocktake_id}/diff", response_model=schemas.StocktakeDiffResponse)
+async def get_diff(
+    stocktake_id: int,
+    only_changes: bool = Query(False, description="Csak az eltérő és ismeretlen sorok"),
+    db: Session = Depends(get_db)
+):
+    """
+    Eltérés jelentés: megszámolt vs nyilvántartott mennyiség tárgyanként
+    """
+    stocktake = _get_or_404(db, stocktake_id)
+    report = await asyncio.to_thread(crud.stocktake_diff, db, stocktake)
+    if only_changes:
+        report["lines"] = [line for line in report["lines"] if line["status"] != "matched"]
+    return report
+
+
+@router.post("/{stocktake_id}/apply", response_model=schemas.StocktakeApplyResponse)
+async def apply_stocktake(
+    stocktake_id: int,
+    data: Optional[schemas.StocktakeApplyRequest] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    Eltérések alkalmazása: minden mennyiség egy tranzakcióban kerül beállításra,
+    a leltár lezárul (applied)
+    """
+    logger.info(f"POST /api/stocktakes/{stocktake_id}/apply")
+    stocktake = _get_or_404(db, stocktake_id)
+    zero_missing = data.zero_missing if data else False
+    try:
+        result = await asyncio.to_thread(crud.apply_stocktake, db, stocktake, zero_missing)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+    logger.info(f"✅ Leltár #{stocktake_id} alkalmazva: {result['adjusted']} módosítás, {result['zeroed']} nullázás")
+    return result
+
+
+@router.delete("/{stocktake_id}", response_model=schemas.StocktakeResponse)
+async def cancel_stocktake(stocktake_id: int, db: Session = Depends(get_db)):
+    """
+    Nyitott leltár elvetése
+    """
+    stocktake = _get_or_404(db, stocktake_id)
+    try:
+        return crud.cancel_stocktake(db, stocktake)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
@@ -0,0 +1,173 @@
+"""
+Folytatható feltöltések API routes
+
+Folyamat:
+    1. POST   /api/uploads                     -> session (upload_id, offset=0)
+    2. PUT    /api/uploads/{id}?offset=N       -> nyers bájtok (a törzs), új offset
+       (megszakadás után: GET /api/uploads/{id} -> offset, és onnan folytatás)
+    3. POST   /api/uploads/{id}/finalize       -> feldolgozás, ugyanaz a válasz,
+       mint a /api/upload, /api/items/{id}/images vagy /api/items/{id}/documents végponté
+"""
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import JSONResponse
+from sqlalchemy.orm import Session
+from starlette.requests import ClientDisconnect
+import asyncio
+import logging
+
+from .. import crud, schemas
+from ..database import get_db
+from ..utils import image_handler, document_handler, upload_sessions
+from .images import attach_item_image
+
+router = APIRouter(prefix="/api/uploads", tags=["Resumable Uploads"])
+logger = logging.getLogger(__name__)
+
+
+def _session_or_404(upload_id: str):
+    try:
+        return upload_sessions.get_session(upload_id)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+
+@router.post("", response_model=schemas.UploadSessionResponse, status_code=201)
+async def create_upload(data: schemas.UploadSessionCreate, db: Session = Depends(get_db)):
+    """
+    Folytatható feltöltés indítása
+
+    target:
+    - image: önálló kép (mint a /api/upload)
+    - item_image: kép egy tárgyhoz (item_id, is_primary, rotation)
+    - document: dokumentum egy tárgyhoz (item_id, document_type, description)
+    """
+    logger.info(f"POST /api/uploads - file='{data.filename}', size={data.size}, target={data.target}")
+
+    if data.target in ("item_image", "document"):
+        if data.item_id is None:
+            raise HTTPException(status_code=400, detail="item_id megadása kötelező")
+        if not crud.get_item(db, data.item_id):
+            raise HTTPException(status_code=404, detail="Tárgy nem található")
+    if data.rotation not in image_handler.ALLOWED_ROTATIONS:
+        raise HTTPException(status_code=400, detail="Forgatás csak 0, 90, 180, 270 lehet")
+
+    params = {
+        "item_id": data.item_id,
+        "is_primary": data.is_primary,
+        "rotation": data.rotation,
+        "document_type": data.document_type,
+        "description": data.description,
+    }
+    try:
+        return upload_sessions.create_session(
+            data.target, data.filename, data.content_type, data.size, params, data.checksum
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/{upload_id}", response_model=schemas.UploadSessionResponse)
+async def get_upload(upload_id: str):
+    """
+    Feltöltés állapota - az offset megmondja, honnan kell folytatni
+    """
+    meta = _session_or_404(upload_id)
+    status = upload_sessions.session_status(meta)
+    return JSONResponse(
+        content=schemas.UploadSessionResponse(**status).model_dump(mode="json"),
+        headers={"Upload-Offset": str(status["offset"]), "Cache-Control": "no-store"}
+    )
+
+
+@router.put("/{upload_id}", response_model=schemas.UploadSessionResponse)
+async def upload_chunk(
+    upload_id: str,
+    request: Request,
+    offset: int = Query(..., ge=0, description="A darab első bájtjának helye a fájlban")
+):
+    """
+    Egy darab feltöltése (a kérés törzse nyers bájtok)
+
+    Ha az offset nem egyezik a szerver állapotával, 409-et adunk vissza a
+    helyes offsettel (Upload-Offset fejléc), a kliens onnan folytatja.
+    """
+    try:
+        status = await upload_sessions.append_chunk(upload_id, offset, request.stream())
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except upload_sessions.OffsetMismatch as e:
+        raise HTTPException(status_code=409, detail=str(e), headers={"Upload-Offset": str(e.offset)})
+    except ValueError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except ClientDisconnect:
+        logger.info(f"   ⚠️  Megszakadt darab: {upload_id} (folytatható: {upload_sessions.current_offset(upload_id)})")
+        raise HTTPException(status_code=400, detail="A kapcsolat megszakadt")
+
+    logger.debug(f"   📦 {upload_id}: {status['offset']} / {status['size']} bájt")
+    return JSONResponse(
+        content=schemas.UploadSessionResponse(**status).model_dump(mode="json"),
+        headers={"Upload-Offset": str(status["offset"])}
+    )
+
+
+@router.post("/{upload_id}/finalize")
+async def finalize_upload(upload_id: str, db: Session = Depends(get_db)):
+    """
+    Feltöltés lezárása: az összeállított fájl feldolgozása a cél szerint
+    """
+    logger.info(f"POST /api/uploads/{upload_id}/finalize")
+
+    try:
+        meta = await upload_sessions.open_completed(upload_id)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+    upload = meta["upload"]
+    params = meta["params"]
+    try:
+        if meta["target"] == "image":
+            response = await image_handler.save_uploaded_file(upload)
+
+        elif meta["target"] == "item_image":
+            item = crud.get_item(db, params["item_id"])
+            if not item:
+                raise HTTPException(status_code=404, detail="Tárgy nem található")
+            result = await image_handler.store_uploaded_file(upload)
+            db_image = attach_item_image(
+                db, item, result, meta["filename"], params.get("rotation") or 0,
+                params.get("is_primary", False)
+            )
+            response = schemas.ItemImageResponse.model_validate(db_image).model_dump(mode="json")
+
+        else:
+            if not crud.get_item(db, params["item_id"]):
+                raise HTTPException(status_code=404, detail="Tárgy nem található")
+            doc_data = await document_handler.save_document(
+                upload, params["item_id"], params.get("document_type"), params.get("description")
+            )
+            document = crud.create_document(db, doc_data)
+            response = schemas.DocumentResponse.model_validate(document).model_dump(mode="json")
+
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    finally:
+        await upload.close()
+
+    await asyncio.to_thread(upload_sessions.delete_session, upload_id)
+    logger.info(f"✅ Folytatható feltöltés lezárva: {upload_id} ({meta['filename']})")
+    return response
+
+
+@router.delete("/{upload_id}")
+async def abort_upload(upload_id: str):
+    """
+    Feltöltés megszakítása, a részleges fájl törlése
+    """
+    _session_or_404(upload_id)
+    upload_sessions.delete_session(upload_id)
+    return {"message": "Feltöltés megszakítva"}
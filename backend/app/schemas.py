@@ -5,18 +5,29 @@ JAVÍTVA: quantity és min_quantity mezők hozzáadva
 """
 
 from pydantic import BaseModel, Field, ConfigDict
-from typing import Optional, List
+from typing import Any, Dict, List, Literal, Optional
 from datetime import date, datetime
 
 
 # ============= ITEM SCHEMAS =============
 
 
+class ImageVariant(BaseModel):
+    """Reszponzív kép variáns (srcset elem)."""
+
+    width: int
+    height: int
+    filename: str
+    url: str
+    formats: List[str] = []  # elérhető alternatív formátumok, pl. ["avif", "webp"]
+
+
 class ItemImageBase(BaseModel):
     """Kép adatok tárgyhoz."""
 
     filename: str
     orientation: Optional[str] = None  # portrait | landscape | square
+    variants: Optional[List[ImageVariant]] = None
 
 
 class ItemImageCreate(ItemImageBase):
@@ -25,6 +36,14 @@ class ItemImageCreate(ItemImageBase):
 
 class ItemImageResponse(ItemImageBase):
     id: int
+    rotation: Optional[int] = 0
+    rotation_ready: bool = True  # False, amíg a háttér worker forgat
+    processing_status: Optional[str] = "ready"  # processing | ready | failed
+    job_id: Optional[int] = None  # a feltöltés / forgatás háttér feladata (GET /api/jobs/{id})
+    is_primary: Optional[bool] = False
+    url: str  # már elforgatott pixelek, kliens oldali transform nem kell
+    thumbnail_url: str
+    srcset: Optional[str] = None  # pl. "/uploads/variants/abc_w480.jpg 480w, ..."
     created_at: datetime
 
     model_config = ConfigDict(from_attributes=True)
@@ -42,7 +61,7 @@ class ItemBase(BaseModel):
     images: Optional[List[ItemImageCreate]] = []
     user_id: Optional[int] = None
     location_id: Optional[int] = None
-    quantity: int = Field(default=1, ge=1)  # JAVÍTVA: kötelező, min 1
+    quantity: int = Field(default=1, ge=0)  # kötelező; 0 = elfogyott (készletmozgás / leltár)
     min_quantity: Optional[int] = Field(None, ge=1)  # JAVÍTVA: minimum készlet
 
 
@@ -63,7 +82,7 @@ class ItemUpdate(BaseModel):
     images: Optional[List[ItemImageCreate]] = None
     user_id: Optional[int] = None
     location_id: Optional[int] = None
-    quantity: Optional[int] = Field(None, ge=1)  # JAVÍTVA
+    quantity: Optional[int] = Field(None, ge=0)  # JAVÍTVA
     min_quantity: Optional[int] = Field(None, ge=0)  # JAVÍTVA
 
 
@@ -79,6 +98,95 @@ class ItemResponse(ItemBase):
     model_config = ConfigDict(from_attributes=True)
 
 
+class BulkItemOperation(BaseModel):
+    """Tömeges művelet: create (item), update (id + changes) vagy delete (id)"""
+    op: Literal["create", "update", "delete"]
+    id: Optional[int] = None
+    item: Optional[ItemCreate] = None
+    changes: Optional[ItemUpdate] = None
+
+
+class BulkItemRequest(BaseModel):
+    operations: List[BulkItemOperation] = Field(..., min_length=1, max_length=5000)
+
+
+class BulkItemResult(BaseModel):
+    index: int
+    op: str
+    id: Optional[int] = None
+    status: str  # created | updated | deleted
+
+
+class BulkItemResponse(BaseModel):
+    created: int
+    updated: int
+    deleted: int
+    results: List[BulkItemResult]
+
+
+class StockAdjust(BaseModel):
+    """Készlet módosítás: pozitív delta bevét, negatív kivét"""
+    delta: int = Field(..., ge=-1_000_000, le=1_000_000)
+    reason: str = Field("adjust", min_length=1, max_length=30)  # pl. used, purchased
+
+
+class StockAdjustResponse(BaseModel):
+    item_id: int
+    quantity: int
+    previous_quantity: int
+    delta: int
+    min_quantity: Optional[int] = None
+    low_stock: bool
+    alert: Optional[str] = None  # LOW_STOCK | RESTOCKED, ha a módosítás átlépte a küszöböt
+
+
+class StockAlertResponse(BaseModel):
+    """Készlet küszöb átlépés"""
+    id: int
+    item_id: int
+    kind: str
+    quantity: int
+    min_quantity: int
+    created_at: datetime
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class StockForecastResponse(BaseModel):
+    """Várható kifogyás a tárolt fogyási rátából és a jelenlegi mennyiségből"""
+    item_id: int
+    item_name: str
+    quantity: int
+    min_quantity: Optional[int] = None
+    rate_per_day: float
+    days_left: float
+    runs_out_on: date
+    fitted: bool
+    computed_at: datetime
+
+
+class StockHistoryPoint(BaseModel):
+    """Egy szakasz: záró mennyiség, fogyás és bevételezés"""
+    at: datetime
+    quantity: Optional[int] = None
+    consumed: int
+    received: int
+
+
+class StockHistoryResponse(BaseModel):
+    """Mintavételezett készlet idősor"""
+    item_id: int
+    start: datetime
+    end: datetime
+    bucket_seconds: float
+    start_quantity: Optional[int] = None
+    end_quantity: Optional[int] = None
+    consumed: int
+    received: int
+    consumption_per_day: float
+    points: List[StockHistoryPoint]
+
+
 # ============= CATEGORY SCHEMAS =============
 
 class CategoryBase(BaseModel):
@@ -215,6 +323,25 @@ class QRCodeResponse(BaseModel):
     qr_code: str
     qr_url: str
     size: str
+    status: str = "ready"  # processing: a PNG renderelése háttér feladatként fut
+    job_id: Optional[int] = None
+
+
+class QRBatchRequest(BaseModel):
+    """Tömeges QR generálás: megadott tárgyak, vagy az összes QR kód nélküli"""
+    item_ids: Optional[List[int]] = Field(None, min_length=1, max_length=20000)
+    all_missing: bool = False
+    sizes: List[Literal["small", "medium", "large"]] = Field(["small", "medium", "large"], min_length=1)
+
+
+class QRSheetRequest(BaseModel):
+    """Címke ív: megadott tárgyak, vagy egy kategória (ill. az összes) tárgya"""
+    item_ids: Optional[List[int]] = Field(None, min_length=1, max_length=20000)
+    category: Optional[str] = None
+    layout: Literal["a4-3x8", "a4-2x7", "a4-5x13", "a4-4x6"] = "a4-3x8"
+    format: Literal["pdf", "png"] = "pdf"
+    page: Optional[int] = Field(None, ge=1)  # png: csak ez az oldal (különben ZIP)
+    skip: int = Field(0, ge=0)  # az első íven már felhasznált címkék
 
 
 # ============= STATISTICS SCHEMAS =============
@@ -245,3 +372,141 @@ class ImageUploadResponse(BaseModel):
     size: int
     content_type: str
     url: str
+    variants: List[ImageVariant] = []
+    srcset: Optional[str] = None
+
+
+# ============= RESUMABLE UPLOAD SCHEMAS =============
+
+class UploadSessionCreate(BaseModel):
+    """Folytatható feltöltés indítása"""
+    filename: str = Field(..., min_length=1, max_length=300)
+    content_type: str = Field(..., min_length=1, max_length=100)
+    size: int = Field(..., gt=0)
+    target: str = Field(..., pattern="^(image|item_image|document)$")  # /api/upload, tárgy kép, dokumentum
+    item_id: Optional[int] = None
+    is_primary: bool = False
+    rotation: int = 0
+    document_type: Optional[str] = None
+    description: Optional[str] = None
+    checksum: Optional[str] = Field(None, pattern="^[0-9a-f]{64}$")  # SHA-256 hex (opcionális ellenőrzés)
+
+
+class UploadSessionResponse(BaseModel):
+    """Folytatható feltöltés állapota"""
+    upload_id: str
+    target: str
+    filename: str
+    size: int
+    offset: int
+    expires_at: datetime
+    max_chunk_size: int
+
+
+# ============= JOB SCHEMAS =============
+
+class JobResponse(BaseModel):
+    """Háttér feladat állapota"""
+    id: int
+    kind: str
+    status: str  # queued | running | succeeded | failed
+    payload: Dict[str, Any]
+    attempts: int
+    max_attempts: int
+    run_after: datetime
+    last_error: Optional[str] = None
+    result: Optional[Dict[str, Any]] = None
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class JobStatsResponse(BaseModel):
+    """Feladatok száma állapotonként"""
+    queued: int
+    running: int
+    succeeded: int
+    failed: int
+    workers: int  # ebben a folyamatban futó worker szálak
+
+
+# ============= STOCKTAKE SCHEMAS =============
+
+class StocktakeCreate(BaseModel):
+    """Új leltár; helyszín / kategória megadásával a be nem olvasott tárgyak is látszanak"""
+    name: str = Field(..., min_length=1, max_length=200)
+    location_id: Optional[int] = None
+    category: Optional[str] = Field(None, max_length=100)
+
+
+class StocktakeResponse(BaseModel):
+    """Leltár munkamenet"""
+    id: int
+    name: str
+    status: str  # open | applied | cancelled
+    location_id: Optional[int] = None
+    category: Optional[str] = None
+    adjusted_count: Optional[int] = None
+    created_at: datetime
+    applied_at: Optional[datetime] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class StocktakeScan(BaseModel):
+    """Egy beolvasás: QR kód és a megszámolt darabszám"""
+    qr_code: str = Field(..., min_length=1, max_length=50)
+    quantity: int = Field(1, ge=0)
+
+
+class StocktakeScanBatch(BaseModel):
+    """Beolvasások kötege (mode: add - hozzáadás, set - felülírás)"""
+    scans: List[StocktakeScan] = Field(..., min_length=1, max_length=50000)
+    mode: Literal["add", "set"] = "add"
+
+
+class StocktakeScanResult(BaseModel):
+    received: int
+    codes: int  # különböző QR kódok a kötegben
+
+
+class StocktakeDiffLine(BaseModel):
+    qr_code: str
+    item_id: Optional[int] = None
+    name: Optional[str] = None
+    expected: Optional[int] = None
+    counted: int
+    delta: Optional[int] = None
+    status: str  # matched | over | under | unknown
+
+
+class StocktakeMissingItem(BaseModel):
+    item_id: int
+    name: str
+    qr_code: Optional[str] = None
+    expected: int
+
+
+class StocktakeDiffResponse(BaseModel):
+    """Eltérés jelentés a nyilvántartáshoz képest"""
+    stocktake_id: int
+    status: str
+    summary: Dict[str, int]
+    lines: List[StocktakeDiffLine]
+    not_scanned: List[StocktakeMissingItem]
+
+
+class StocktakeApplyRequest(BaseModel):
+    zero_missing: bool = False  # hatókörös leltárnál a be nem olvasott tárgyak 0 darabra
+
+
+class StocktakeApplyResponse(BaseModel):
+    stocktake_id: int
+    adjusted: int
+    zeroed: int
+    unknown: int
+
+
+# ItemResponse előre hivatkozik a DocumentResponse-ra
+ItemResponse.model_rebuild()
@@ -2,8 +2,14 @@
 Utils package - Backend utility funkciók
 """
 
+from . import blob_store
 from . import image_handler
 from . import qr_handler
 from . import document_handler
+from . import derivative_cache
+from . import orphan_gc
+from . import media_response
+from . import upload_sessions
+from . import job_queue
 
-__all__ = ["image_handler", "qr_handler", "document_handler"]
+__all__ = ["blob_store", "image_handler", "qr_handler", "document_handler", "derivative_cache", "orphan_gc", "media_response", "upload_sessions", "job_queue"]
@@ -0,0 +1,495 @@
+"""
+Teljes mentés: adatbázis pillanatkép + hivatkozott média egy tar archívumban
+
+Az adatbázisról az SQLite online backup API készít konzisztens másolatot,
+STEP_PAGES lapos lépésekben - a lépések között az írók dolgozhatnak. Ha
+közben írás történik, az SQLite újrakezdi a másolást; MAX_RESTARTS
+újrakezdés után egyetlen lépésben fejeződik be (csak ennyi ideig várnak az
+írók).
+
+A médiafájlok (képek, származékok, dokumentumok, QR kódok) közül a
+pillanatképben hivatkozottak kerülnek be (az orphan_gc szabályai szerint),
+így az adatbázis és a fájlok egymással konzisztensek. Az archívum streamelve
+készül: egy háttérszál írja a tar-t egy korlátos sorba, a válasz onnan
+olvas, a memóriahasználat így a mentés méretétől független.
+
+Minden mentés manifestje (fejléc + fájlonként útvonal, méret, mtime) az
+archívum végére és a BACKUP_DIR/manifests könyvtárba kerül. Inkrementális
+mentés (since=<mentés azonosító>): az adatbázis teljes, a fájlok közül csak
+az alap manifest óta újak / változottak kerülnek be; a manifest ilyenkor is
+a teljes aktuális fájllistát tartalmazza.
+
+Visszaállítás: restore_archive (RESTORE_BACKUP.py) - a teljes, majd sorban
+az inkrementális archívumok.
+"""
+
+import gzip
+import json
+import os
+import posixpath
+import queue
+import re
+import shutil
+import sqlite3
+import tarfile
+import tempfile
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Dict, Iterator, Optional, Tuple
+import logging
+
+try:
+    # zstd tömörítéshez (opcionális - nélküle gzip vagy tömörítetlen)
+    import zstandard
+except ImportError:
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+# Konstansok
+BACKUP_DIR = os.getenv("BACKUP_DIR", "backups")
+STEP_PAGES = int(os.getenv("BACKUP_STEP_PAGES", "1024"))  # 4 KB-os lapokkal 4 MB / lépés
+STEP_SLEEP = 0.01
+MAX_RESTARTS = int(os.getenv("BACKUP_MAX_RESTARTS", "5"))
+GZIP_LEVEL = int(os.getenv("BACKUP_GZIP_LEVEL", "1"))  # a képek már tömörítettek
+ZSTD_LEVEL = int(os.getenv("BACKUP_ZSTD_LEVEL", "3"))
+STREAM_CHUNK = 256 * 1024
+QUEUE_CHUNKS = 16  # legfeljebb ~4 MB vár a kliensre
+COPY_CHUNK = 1024 * 1024
+
+COMPRESSIONS = {
+    "none": (".tar", "application/x-tar"),
+    "gzip": (".tar.gz", "application/gzip"),
+    "zstd": (".tar.zst", "application/zstd"),
+}
+DATABASE_MEMBER = "database.db"
+MANIFEST_MEMBER = "manifest.ndjson"
+
+_BACKUP_ID = re.compile(r"^\d{8}-\d{6}-[0-9a-f]{6}$")
+_ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+
+class BackupCancelled(Exception):
+    """A kliens a streamelés közben bontotta a kapcsolatot"""
+
+
+class _TooManyRestarts(Exception):
+    pass
+
+
+def new_backup_id() -> str:
+    return f"{datetime.now():%Y%m%d-%H%M%S}-{uuid.uuid4().hex[:6]}"
+
+
+def manifest_dir() -> str:
+    return os.path.join(BACKUP_DIR, "manifests")
+
+
+def manifest_file(backup_id: str) -> str:
+    """
+    Raises:
+        ValueError: Érvénytelen mentés azonosító
+    """
+    if not _BACKUP_ID.match(backup_id or ""):
+        raise ValueError(f"Érvénytelen mentés azonosító: {backup_id}")
+    return os.path.join(manifest_dir(), f"{backup_id}.ndjson")
+
+
+def database_path() -> str:
+    """
+    Az élő adatbázis fájl abszolút útvonala (DATABASE_URL)
+    """
+    from .. import database
+
+    path = database.engine.url.database
+    if not path or path == ":memory:":
+        raise ValueError("Csak fájl alapú SQLite adatbázis menthető")
+    return os.path.abspath(path)
+
+
+def check_options(compression: str, since: Optional[str] = None) -> None:
+    """
+    Raises:
+        ValueError: Ismeretlen / nem elérhető tömörítés, érvénytelen azonosító
+        FileNotFoundError: Nincs ilyen alap mentés
+    """
+    if compression not in COMPRESSIONS:
+        raise ValueError(f"Ismeretlen tömörítés: {compression}")
+    if compression == "zstd" and zstandard is None:
+        raise ValueError("zstd tömörítéshez a zstandard csomag szükséges")
+    if since is not None and not os.path.exists(manifest_file(since)):
+        raise FileNotFoundError(f"Ismeretlen alap mentés: {since}")
+
+
+# ============= ADATBÁZIS PILLANATKÉP =============
+
+def snapshot_database(target: str) -> Dict:
+    """
+    Konzisztens másolat az élő adatbázisról (SQLite online backup API)
+
+    Returns:
+        Dict: restarts (újrakezdések), single_step (egy lépésben fejeződött-e be), seconds
+    """
+    from .. import database
+
+    started = time.monotonic()
+    restarts = 0
+    remaining_before = None
+
+    def progress(status, remaining, total):
+        nonlocal restarts, remaining_before
+        # Újrakezdés után a hátralévő lapok száma nő
+        if remaining_before is not None and remaining > remaining_before:
+            restarts += 1
+            if restarts > MAX_RESTARTS:
+                raise _TooManyRestarts()
+        remaining_before = remaining
+
+    source = database.engine.raw_connection()
+    try:
+        destination = sqlite3.connect(target)
+        try:
+            try:
+                source.driver_connection.backup(destination, pages=STEP_PAGES, progress=progress, sleep=STEP_SLEEP)
+                single_step = False
+            except _TooManyRestarts:
+                # Folyamatos írás mellett: befejezés egyetlen lépésben
+                source.driver_connection.backup(destination, pages=-1)
+                single_step = True
+        finally:
+            destination.close()
+    finally:
+        source.close()
+
+    return {"restarts": restarts, "single_step": single_step, "seconds": round(time.monotonic() - started, 2)}
+
+
+# ============= ARCHÍVUM =============
+
+class _ManifestIndex:
+    """
+    Az alap manifest fájllistája egy ideiglenes SQLite táblában (nem a memóriában)
+    """
+
+    def __init__(self, path: str, workdir: str):
+        self.conn = sqlite3.connect(os.path.join(workdir, "base_manifest.db"))
+        self.conn.execute("CREATE TABLE files (path TEXT PRIMARY KEY, size INTEGER, mtime INTEGER) WITHOUT ROWID")
+        with open(path, encoding="utf-8") as f:
+            next(f, None)  # fejléc
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO files VALUES (?, ?, ?)",
+                ((entry["path"], entry["size"], entry["mtime"]) for entry in map(json.loads, f))
+            )
+        self.conn.commit()
+
+    def changed(self, path: str, size: int, mtime: int) -> bool:
+        row = self.conn.execute("SELECT size, mtime FROM files WHERE path = ?", (path,)).fetchone()
+        return row != (size, mtime)
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+def _open_compressor(fileobj, compression: str):
+    if compression == "gzip":
+        return gzip.GzipFile(fileobj=fileobj, mode="wb", compresslevel=GZIP_LEVEL)
+    if compression == "zstd":
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).stream_writer(fileobj, closefd=False)
+    return None
+
+
+def write_archive(fileobj, backup_id: Optional[str] = None, compression: str = "gzip",
+                  since: Optional[str] = None) -> Dict:
+    """
+    Mentés archívum írása egy írható fájl objektumba (csak write() kell)
+
+    Tartalom: database.db (pillanatkép), a hivatkozott médiafájlok a backend
+    munkakönyvtárához képesti útvonalon (uploads/..., documents/...,
+    qr_codes/...), végül manifest.ndjson. A manifest csak sikeres írás után
+    kerül a BACKUP_DIR/manifests könyvtárba.
+
+    Returns:
+        Dict: backup, base, compression, files (hivatkozott), included (archívumban), bytes, database
+    """
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import Session
+    from . import orphan_gc
+
+    check_options(compression, since)
+    backup_id = backup_id or new_backup_id()
+    started = time.monotonic()
+    os.makedirs(manifest_dir(), exist_ok=True)
+    workdir = tempfile.mkdtemp(prefix=f"backup_{backup_id}_", dir=BACKUP_DIR)
+    snapshot = os.path.join(workdir, DATABASE_MEMBER)
+    manifest_path = os.path.join(workdir, MANIFEST_MEMBER)
+    summary = {"backup": backup_id, "base": since, "compression": compression, "files": 0, "included": 0, "bytes": 0}
+    base = None
+
+    try:
+        base = _ManifestIndex(manifest_file(since), workdir) if since else None
+        summary["database"] = snapshot_database(snapshot)
+
+        compressor = _open_compressor(fileobj, compression)
+        with tarfile.open(fileobj=compressor or fileobj, mode="w|") as tar:
+            tar.add(snapshot, arcname=DATABASE_MEMBER)
+
+            snapshot_engine = create_engine(f"sqlite:///{snapshot}")
+            try:
+                with Session(snapshot_engine) as db, open(manifest_path, "w", encoding="utf-8") as manifest:
+                    header = {"backup": backup_id, "base": since, "created_at": datetime.now().isoformat()}
+                    manifest.write(json.dumps(header) + "\n")
+                    for _, entry in orphan_gc.iter_referenced_files(db):
+                        arcname = os.path.relpath(entry.path).replace(os.sep, "/")
+                        if arcname.startswith("../"):
+                            logger.warning(f"⚠️  Munkakönyvtáron kívüli fájl kihagyva: {entry.path}")
+                            continue
+                        try:
+                            stat = entry.stat()
+                            if base is None or base.changed(arcname, stat.st_size, int(stat.st_mtime)):
+                                with open(entry.path, "rb") as f:
+                                    info = tar.gettarinfo(arcname=arcname, fileobj=f)
+                                    # Hard linkelt fájlok (pl. seed adatok) is önálló tartalommal:
+                                    # a visszaállítás csak a rendes fájlokat írja ki
+                                    info.type, info.linkname, info.size = tarfile.REGTYPE, "", stat.st_size
+                                    tar.addfile(info, f)
+                                summary["included"] += 1
+                                summary["bytes"] += stat.st_size
+                        except FileNotFoundError:
+                            continue  # közben törölték (GC)
+                        manifest.write(json.dumps({"path": arcname, "size": stat.st_size, "mtime": int(stat.st_mtime)}) + "\n")
+                        summary["files"] += 1
+            finally:
+                snapshot_engine.dispose()
+
+            tar.add(manifest_path, arcname=MANIFEST_MEMBER)
+        if compressor:
+            compressor.close()
+
+        os.replace(manifest_path, manifest_file(backup_id))
+    finally:
+        if base:
+            base.close()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    summary["seconds"] = round(time.monotonic() - started, 2)
+    logger.info(
+        f"💾 Mentés kész: {backup_id} ({summary['included']}/{summary['files']} fájl, "
+        f"{summary['bytes'] / 1024 / 1024:.1f} MB média, {summary['seconds']}s)"
+    )
+    return summary
+
+
+class _QueueWriter:
+    """
+    Fájlszerű író: STREAM_CHUNK méretű darabokat tesz egy korlátos sorba
+    (ha a kliens lassú, az író vár)
+    """
+
+    def __init__(self, chunks: queue.Queue, cancelled: threading.Event):
+        self.chunks = chunks
+        self.cancelled = cancelled
+        self.buffer = bytearray()
+
+    def write(self, data) -> int:
+        self.buffer += data
+        if len(self.buffer) >= STREAM_CHUNK:
+            self.flush()
+        return len(data)
+
+    def flush(self) -> None:
+        if self.buffer:
+            self.put(bytes(self.buffer))
+            self.buffer.clear()
+
+    def put(self, item) -> None:
+        while not self.cancelled.is_set():
+            try:
+                self.chunks.put(item, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+        raise BackupCancelled()
+
+
+def open_stream(compression: str = "gzip", since: Optional[str] = None) -> Tuple[str, Iterator[bytes]]:
+    """
+    Streamelt mentés: (mentés azonosító, byte darabok generátora)
+
+    A beállítások azonnal ellenőrződnek (a válasz elküldése előtt); az
+    archívumot egy háttérszál írja. Ha a kliens megszakítja a letöltést, a
+    szál leáll, és a manifest nem mentődik (nem lehet inkrementális alap).
+
+    Raises:
+        ValueError, FileNotFoundError: lásd check_options
+    """
+    check_options(compression, since)
+    backup_id = new_backup_id()
+    return backup_id, _stream(backup_id, compression, since)
+
+
+def _stream(backup_id: str, compression: str, since: Optional[str]) -> Iterator[bytes]:
+    chunks: queue.Queue = queue.Queue(maxsize=QUEUE_CHUNKS)
+    cancelled = threading.Event()
+    failure = []
+
+    def produce():
+        writer = _QueueWriter(chunks, cancelled)
+        try:
+            write_archive(writer, backup_id, compression, since)
+            writer.flush()
+        except BackupCancelled:
+            logger.warning(f"⚠️  Mentés megszakítva: {backup_id}")
+        except Exception as e:
+            logger.error(f"❌ Mentés hiba: {e}")
+            failure.append(e)
+        try:
+            writer.put(None)
+        except BackupCancelled:
+            pass
+
+    thread = threading.Thread(target=produce, name=f"backup-{backup_id}", daemon=True)
+    thread.start()
+    try:
+        while True:
+            chunk = chunks.get()
+            if chunk is None:
+                break
+            yield chunk
+    finally:
+        cancelled.set()
+        thread.join()
+    if failure:
+        # A válasz már úton van: a kapcsolat megszakad, a kliens csonka archívumot kap
+        raise failure[0]
+
+
+# ============= VISSZAÁLLÍTÁS =============
+
+def _member_name(member: tarfile.TarInfo) -> str:
+    name = posixpath.normpath(member.name)
+    if name.startswith(("/", "../")) or name == ".." or os.path.isabs(name):
+        raise ValueError(f"Nem biztonságos útvonal az archívumban: {member.name}")
+    return name
+
+
+def _extract(tar: tarfile.TarFile, member: tarfile.TarInfo, target: str) -> None:
+    os.makedirs(os.path.dirname(target) or ".", exist_ok=True)
+    partial = target + ".tmp"
+    with tar.extractfile(member) as source, open(partial, "wb") as destination:
+        shutil.copyfileobj(source, destination, COPY_CHUNK)
+    os.utime(partial, (member.mtime, member.mtime))
+    os.replace(partial, target)
+
+
+def _same_file(path: str, member: tarfile.TarInfo) -> bool:
+    # Azonos méret és (másodpercre kerekített) mtime - a helyben, azonos méretre írt fájl is eltér
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return False
+    return stat.st_size == member.size and int(stat.st_mtime) == int(member.mtime)
+
+
+def _link_existing(source: str, target: str, member: tarfile.TarInfo) -> bool:
+    # Azonos fájl egy meglévő példányban (pl. éles média ugyanazon a lemezen): hard link
+    try:
+        if not _same_file(source, member):
+            return False
+        os.makedirs(os.path.dirname(target) or ".", exist_ok=True)
+        os.link(source, target)
+        return True
+    except OSError:
+        return False
+
+
+def _check_database(path: str) -> None:
+    conn = sqlite3.connect(path)
+    try:
+        result = conn.execute("PRAGMA quick_check").fetchone()[0]
+    finally:
+        conn.close()
+    if result != "ok":
+        raise ValueError(f"Sérült adatbázis az archívumban: {result}")
+
+
+def _replace_database(source: str, target: str) -> None:
+    # Az előző adatbázis (és naplófájljai) <db>.before-restore néven megmaradnak
+    for suffix in ("", "-journal", "-wal", "-shm"):
+        if os.path.exists(target + suffix):
+            os.replace(target + suffix, f"{target}.before-restore{suffix}")
+    os.replace(source, target)
+
+
+def restore_archive(path: str, media_dir: str = ".", database_target: Optional[str] = None,
+                    overwrite: bool = False, link_from: Optional[str] = None) -> Dict:
+    """
+    Mentés archívum visszaállítása - leállított backend mellett futtatandó
+
+    - database.db -> database_target (alapértelmezés: a DATABASE_URL fájlja),
+      gyors integritás ellenőrzés után, atomikus cserével;
+    - médiafájlok media_dir alá (a már meglévő, azonos méretű és mtime-ú fájl
+      kimarad, az eltérő felülíródik); link_from: egy meglévő média könyvtár
+      (pl. az éles példány), ahonnan az azonos méretű és mtime-ú fájlok hard
+      linkkel kerülnek át kicsomagolás helyett;
+    - manifest -> BACKUP_DIR/manifests (további inkrementális mentések alapja).
+    Inkrementális archívumot a teljes után, sorrendben kell visszaállítani.
+
+    Raises:
+        FileExistsError: Létező adatbázis overwrite nélkül
+        ValueError: Nem biztonságos útvonal, sérült adatbázis, zstd csomag hiánya
+    """
+    database_target = os.path.abspath(database_target or database_path())
+    if os.path.exists(database_target) and not overwrite:
+        raise FileExistsError(f"Az adatbázis már létezik: {database_target}")
+
+    started = time.monotonic()
+    summary = {"backup": None, "base": None, "database": None, "files": 0, "linked": 0, "skipped": 0, "bytes": 0}
+    os.makedirs(manifest_dir(), exist_ok=True)
+
+    with open(path, "rb") as raw:
+        compressed_with_zstd = raw.read(4) == _ZSTD_MAGIC
+        raw.seek(0)
+        if compressed_with_zstd and zstandard is None:
+            raise ValueError("zstd archívumhoz a zstandard csomag szükséges")
+        source = zstandard.ZstdDecompressor().stream_reader(raw) if compressed_with_zstd else raw
+
+        with tarfile.open(fileobj=source, mode="r|*") as tar:
+            for member in tar:
+                name = _member_name(member)
+                if not member.isfile():
+                    continue
+
+                if name == DATABASE_MEMBER:
+                    partial = database_target + ".restore"
+                    _extract(tar, member, partial)
+                    _check_database(partial)
+                    _replace_database(partial, database_target)
+                    summary["database"] = database_target
+                elif name == MANIFEST_MEMBER:
+                    partial = os.path.join(manifest_dir(), f"restore_{uuid.uuid4().hex}.tmp")
+                    _extract(tar, member, partial)
+                    with open(partial, encoding="utf-8") as f:
+                        header = json.loads(f.readline())
+                    os.replace(partial, manifest_file(header["backup"]))
+                    summary["backup"], summary["base"] = header["backup"], header["base"]
+                else:
+                    parts = name.split("/")
+                    target = os.path.join(media_dir, *parts)
+                    if _same_file(target, member):
+                        summary["skipped"] += 1
+                        continue
+                    if link_from and _link_existing(os.path.join(link_from, *parts), target, member):
+                        summary["linked"] += 1
+                        continue
+                    _extract(tar, member, target)
+                    summary["files"] += 1
+                    summary["bytes"] += member.size
+
+    summary["seconds"] = round(time.monotonic() - started, 2)
+    logger.info(
+        f"♻️  Visszaállítva: {summary['backup']} ({summary['files']} fájl, {summary['linked']} linkelve, "
+        f"{summary['skipped']} már megvolt)"
+    )
+    return summary
@@ -0,0 +1,347 @@
+"""
+Tartalom alapú (content-addressed) blob tároló
+
+A feltöltött képek és dokumentumok nevét a tartalom SHA-256 hash-éből képezzük,
+így ugyanaz a fájl többszöri feltöltése egyetlen blobra mutat, és nem okoz
+újabb lemezírást. Minden fájl (a régi, nem tartalom alapú nevek is) kétszintű hash-előtag
+szerinti alkönyvtárba kerül (pl. uploads/ab/cd/abcd...jpg); a régi lapos
+elrendezésből a MIGRATE_SHARDS.py script költözteti át a fájlokat.
+
+Hivatkozás számlálás: a `blobs` tábla ref_count mezőjét az ItemImage, Document
+és Item.image_filename sorok ORM eseményei tartják karban (lásd models.py).
+A nulla hivatkozású blobokat csak türelmi idő után törli a GC.
+"""
+
+import hashlib
+import os
+import re
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Konstansok
+# Hivatkozás nélküli blob ennyi ideig marad meg (pl. /api/upload után még nincs tárgyhoz rendelve)
+GC_GRACE_PERIOD = timedelta(hours=int(os.getenv("BLOB_GC_GRACE_HOURS", "24")))
+
+# Tartalom alapú fájlnév: opcionális előtag + 64 hex karakter
+_CONTENT_NAME = re.compile(r"^(?:thumb_|doc_)?([0-9a-f]{64})")
+
+# Ez a fájl jelzi, hogy a könyvtárban már nincs lapos (shardolatlan) fájl
+MIGRATION_MARKER = ".sharded"
+_migrated_dirs = set()
+
+
+def compute_digest(content: bytes) -> str:
+    """
+    SHA-256 hash (hex)
+    """
+    return hashlib.sha256(content).hexdigest()
+
+
+def content_filename(digest: str, original_filename: str, prefix: str = "") -> str:
+    """
+    Tartalom alapú fájlnév az eredeti kiterjesztéssel (pl. doc_<hash>.pdf)
+    """
+    ext = os.path.splitext(original_filename)[1].lower()
+    if ext == ".jpeg":
+        ext = ".jpg"
+    return f"{prefix}{digest}{ext}"
+
+
+def digest_from_filename(filename: Optional[str]) -> Optional[str]:
+    """
+    A fájlnévből kiolvasott hash, vagy None ha nem tartalom alapú név
+    """
+    if not filename:
+        return None
+    match = _CONTENT_NAME.match(filename)
+    return match.group(1) if match else None
+
+
+def is_content_addressed(filename: Optional[str]) -> bool:
+    return digest_from_filename(filename) is not None
+
+
+def shard_key(filename: str) -> str:
+    """
+    Shard kulcs: tartalom alapú neveknél a hash, egyébként a kiterjesztés nélküli
+    név MD5-je (így pl. a .jpg és .webp testvérfájlok egy könyvtárba kerülnek)
+    """
+    digest = digest_from_filename(filename)
+    if digest:
+        return digest
+    stem = os.path.splitext(filename)[0]
+    return hashlib.md5(stem.encode("utf-8")).hexdigest()
+
+
+def shard_relpath(filename: str) -> str:
+    """
+    Relatív, kétszintű hash-előtag szerint shardolt útvonal (ab/cd/filename)
+    """
+    key = shard_key(filename)
+    return os.path.join(key[:2], key[2:4], filename)
+
+
+def shard_path(base_dir: str, filename: str) -> str:
+    """
+    Teljes shardolt útvonal egy alap könyvtáron belül
+    """
+    return os.path.join(base_dir, shard_relpath(filename))
+
+
+def is_migrated(base_dir: str) -> bool:
+    """
+    A könyvtár migrációja befejeződött-e (nincs több lapos fájl)
+    """
+    if base_dir in _migrated_dirs:
+        return True
+    if os.path.exists(os.path.join(base_dir, MIGRATION_MARKER)):
+        _migrated_dirs.add(base_dir)
+        return True
+    return False
+
+
+def resolve_path(base_dir: str, filename: str) -> str:
+    """
+    Fájl útvonala a shardolt elrendezésben, átmeneti visszaeséssel a régi,
+    lapos elrendezésre (amíg a migráció nem végzett a könyvtárral).
+
+    Új fájl írásához is ezt használjuk: ha egyik helyen sincs meg, a shardolt
+    útvonalat adja vissza.
+    """
+    sharded = shard_path(base_dir, filename)
+    if os.path.exists(sharded) or is_migrated(base_dir):
+        return sharded
+    flat = os.path.join(base_dir, filename)
+    if os.path.exists(flat):
+        return flat
+    return sharded
+
+
+def ensure_parent_dir(path: str) -> None:
+    """
+    Shard alkönyvtár létrehozása írás előtt
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+
+def migrate_flat_files(base_dir: str, batch_size: int = 500, pause: float = 0.05) -> Dict:
+    """
+    Lapos elrendezésű fájlok átköltöztetése a shardolt helyükre, leállás nélkül.
+
+    Fájlonként atomikus os.replace (azonos fájlrendszeren belül), így egy
+    olvasó vagy a régi, vagy az új helyen mindig megtalálja. Minden batch
+    után `pause` másodperc szünet, hogy a futó szerver I/O-ját ne fojtsa el.
+    Ha a könyvtárban nem maradt lapos fájl, létrehozza a MIGRATION_MARKER-t,
+    ettől kezdve a resolve_path nem keres a régi helyen.
+
+    Returns:
+        {"moved", "skipped", "remaining"}
+    """
+    moved = 0
+    skipped = 0
+    batch = []
+
+    def flush_batch():
+        nonlocal moved, skipped
+        for name, source in batch:
+            target = shard_path(base_dir, name)
+            if os.path.exists(target):
+                # Már van shardolt példány (pl. közben újrageneráltuk) - a régi fölösleges
+                os.remove(source)
+                skipped += 1
+                continue
+            ensure_parent_dir(target)
+            os.replace(source, target)
+            moved += 1
+        batch.clear()
+        if pause:
+            time.sleep(pause)
+
+    if not os.path.isdir(base_dir):
+        return {"moved": 0, "skipped": 0, "remaining": 0}
+
+    with os.scandir(base_dir) as it:
+        for entry in it:
+            if not entry.is_file() or entry.name == MIGRATION_MARKER or entry.name.endswith(".tmp"):
+                continue
+            batch.append((entry.name, entry.path))
+            if len(batch) >= batch_size:
+                flush_batch()
+                logger.info(f"   📦 {base_dir}: {moved} fájl áthelyezve...")
+    flush_batch()
+
+    with os.scandir(base_dir) as it:
+        remaining = sum(
+            1 for entry in it
+            if entry.is_file() and entry.name != MIGRATION_MARKER and not entry.name.endswith(".tmp")
+        )
+
+    if remaining == 0:
+        with open(os.path.join(base_dir, MIGRATION_MARKER), "w") as marker:
+            marker.write(f"{datetime.now().isoformat()}\n")
+
+    logger.info(f"✅ {base_dir}: {moved} áthelyezve, {skipped} duplikátum törölve, {remaining} maradt")
+    return {"moved": moved, "skipped": skipped, "remaining": remaining}
+
+
+# ============= HIVATKOZÁS SZÁMLÁLÁS =============
+
+def claim(digest: str, kind: str, filename: str, size: int) -> Tuple[str, Optional[Dict]]:
+    """
+    Blob regisztrálása vagy meglévő "megérintése" feltöltéskor.
+
+    A DB írást a fájl létezésének ellenőrzése ELŐTT végezzük: a GC csak
+    türelmi időn túli released_at esetén töröl, így a frissen érintett blobot
+    nem törölheti ki a feltöltés alól.
+
+    Returns:
+        (használandó fájlnév, tárolt metaadat vagy None)
+    """
+    from sqlalchemy.exc import IntegrityError
+    from .. import database, models
+
+    db = database.SessionLocal()
+    try:
+        for _ in range(2):
+            blob = db.get(models.Blob, digest)
+            if blob is None:
+                blob = models.Blob(
+                    digest=digest,
+                    kind=kind,
+                    filename=filename,
+                    size=size,
+                    ref_count=0,
+                    released_at=datetime.now()
+                )
+                db.add(blob)
+            elif blob.ref_count <= 0:
+                blob.released_at = datetime.now()
+            try:
+                db.commit()
+                return blob.filename, blob.meta
+            except IntegrityError:
+                # Párhuzamos feltöltés már beszúrta - újraolvassuk
+                db.rollback()
+        raise ValueError(f"Blob regisztrálási hiba: {digest}")
+    finally:
+        db.close()
+
+
+def get_meta(digest: str) -> Optional[Dict]:
+    """
+    Tárolt feldolgozási metaadatok (None, ha a blob még feldolgozatlan)
+    """
+    from .. import database, models
+
+    db = database.SessionLocal()
+    try:
+        blob = db.get(models.Blob, digest)
+        return blob.meta if blob else None
+    finally:
+        db.close()
+
+
+def set_meta(digest: str, meta: Dict) -> None:
+    """
+    Feldolgozás utáni metaadatok mentése (újrafeltöltéskor ebből válaszolunk)
+    """
+    from .. import database, models
+
+    db = database.SessionLocal()
+    try:
+        blob = db.get(models.Blob, digest)
+        if blob:
+            blob.meta = meta
+            db.commit()
+    finally:
+        db.close()
+
+
+def adjust_refs(connection, filename: Optional[str], delta: int) -> None:
+    """
+    Hivatkozás számláló módosítása ORM eseményből (a flush saját kapcsolatán)
+    """
+    digest = digest_from_filename(filename)
+    if not digest:
+        return
+
+    from sqlalchemy import text
+
+    connection.execute(
+        text(
+            "UPDATE blobs SET ref_count = ref_count + :delta, "
+            "released_at = CASE WHEN ref_count + :delta <= 0 THEN :now ELSE NULL END "
+            "WHERE digest = :digest"
+        ),
+        {"delta": delta, "now": datetime.now(), "digest": digest}
+    )
+
+
+# ============= GARBAGE COLLECTION =============
+
+def _remove_blob_files(kind: str, filename: str) -> None:
+    from . import image_handler, document_handler
+
+    try:
+        if kind == "image":
+            image_handler.remove_image_files(filename)
+        else:
+            document_handler.remove_document_file(filename)
+    except FileNotFoundError:
+        logger.warning(f"   ⚠️  Blob fájl már nem létezett: {filename}")
+
+
+def collect_garbage(limit: int = 500) -> Dict:
+    """
+    Türelmi időn túl hivatkozás nélküli blobok törlése.
+
+    Blobonként: feltételes DB törlés (ref_count <= 0 és régi released_at),
+    majd a fájlok törlése, és csak utána commit. SQLite-on a DELETE írási
+    zárat tart, így egy közben érkező azonos feltöltés (claim) megvárja a
+    fájlok törlését, és utána újra feldolgozza a képet.
+    """
+    from sqlalchemy import text
+    from .. import database
+
+    cutoff = datetime.now() - GC_GRACE_PERIOD
+    removed = 0
+    reclaimed = 0
+
+    db = database.SessionLocal()
+    try:
+        candidates = db.execute(
+            text(
+                "SELECT digest, kind, filename, size FROM blobs "
+                "WHERE ref_count <= 0 AND released_at < :cutoff LIMIT :limit"
+            ),
+            {"cutoff": cutoff, "limit": limit}
+        ).all()
+
+        for digest, kind, filename, size in candidates:
+            result = db.execute(
+                text(
+                    "DELETE FROM blobs WHERE digest = :digest "
+                    "AND ref_count <= 0 AND released_at < :cutoff"
+                ),
+                {"digest": digest, "cutoff": cutoff}
+            )
+            if result.rowcount != 1:
+                db.rollback()
+                continue
+
+            _remove_blob_files(kind, filename)
+            db.commit()
+            removed += 1
+            reclaimed += size or 0
+
+    finally:
+        db.close()
+
+    if removed:
+        logger.info(f"🧹 Blob GC: {removed} blob törölve ({reclaimed / 1024:.1f} KB)")
+
+    return {"removed": removed, "reclaimed_bytes": reclaimed}
@@ -0,0 +1,365 @@
+"""
+Nagy adathalmazok gyors betöltése (staging, terheléses teszt)
+
+Szintetikus háztartások generálása egy új adatbázisba:
+- a séma a modellekből jön létre, de a másodlagos indexek csak a betöltés
+  UTÁN épülnek fel (egy rendezett index építés sokkal olcsóbb, mint soronként
+  karbantartani);
+- a betöltés egyetlen tranzakció, tömeges betöltésre hangolt PRAGMA-kkal
+  (nincs napló, nincs fsync, kizárólagos zár, nagy lap cache);
+- táblánként egy executemany, generátorból - a sorok nem gyűlnek listába,
+  az ID-k a betöltési sorrendből adódnak (nincs RETURNING).
+
+A kép- és dokumentumfájlok egy kis minta készletből hard linkkel (ha nem
+lehet: másolással) készülnek, párhuzamos szálakon. A fájlnevek nem tartalom
+alapúak (seed_<n>.jpg), így minden ItemImage sornak saját fájlja van, a
+blob nyilvántartást nem érintik.
+"""
+
+import math
+import os
+import random
+import shutil
+import sqlite3
+import tempfile
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Konstansok
+CACHE_MB = int(os.getenv("BULK_LOAD_CACHE_MB", "256"))
+FILE_WORKERS = int(os.getenv("BULK_LOAD_FILE_WORKERS", str(min(32, (os.cpu_count() or 1) * 4))))
+FILE_BATCH = 1000
+MAX_LINKS_PER_FILE = 30000  # ext4: legfeljebb 65000 hard link / inode
+BULK_PRAGMAS = (
+    "PRAGMA journal_mode = OFF",
+    "PRAGMA synchronous = OFF",
+    "PRAGMA locking_mode = EXCLUSIVE",
+    "PRAGMA temp_store = MEMORY",
+    f"PRAGMA cache_size = -{CACHE_MB * 1024}",
+)
+
+CATEGORIES = [
+    ("Konyha", "🍳"), ("Szerszám", "🔧"), ("Elektronika", "💻"), ("Bútor", "🛋️"), ("Kert", "🌱"),
+    ("Fürdőszoba", "🛁"), ("Ruházat", "👕"), ("Könyv", "📚"), ("Sport", "⚽"), ("Játék", "🧸"),
+    ("Tisztítószer", "🧴"), ("Élelmiszer", "🥫"),
+]
+NOUNS = ["bögre", "fazék", "fúró", "lámpa", "szék", "asztal", "laptop", "kábel", "törölköző", "kabát",
+         "regény", "labda", "kisautó", "mosogatószer", "konzerv", "olló", "serpenyő", "csavarhúzó"]
+ADJECTIVES = ["piros", "kék", "régi", "új", "nagy", "kicsi", "fa", "fém", "üveg", "tartalék", "vezeték nélküli"]
+FIRST_NAMES = ["Anna", "Béla", "Csilla", "Dániel", "Eszter", "Ferenc", "Gábor", "Hajnalka", "István", "Judit"]
+LAST_NAMES = ["Kovács", "Szabó", "Tóth", "Nagy", "Horváth", "Varga", "Kiss", "Molnár", "Németh", "Farkas"]
+CITIES = ["Budapest", "Debrecen", "Szeged", "Pécs", "Győr", "Miskolc", "Eger", "Sopron"]
+DOCUMENT_TYPES = ["számla", "garancia", "kézikönyv"]
+
+_MINIMAL_PDF = (
+    b"%PDF-1.4\n1 0 obj<</Type/Catalog/Pages 2 0 R>>endobj\n"
+    b"2 0 obj<</Type/Pages/Kids[3 0 R]/Count 1>>endobj\n"
+    b"3 0 obj<</Type/Page/Parent 2 0 R/MediaBox[0 0 595 842]>>endobj\n"
+    b"trailer<</Root 1 0 R>>\n%%EOF\n"
+)
+
+
+def _sql_datetime(value: datetime) -> str:
+    # Az SQLAlchemy SQLite DateTime tárolási formátuma
+    return value.isoformat(sep=" ", timespec="microseconds")
+
+
+def _spread(index: int, rate: float) -> int:
+    """Az index. tárgyra jutó darabszám, hogy összesen pontosan darab * rate legyen"""
+    return math.floor((index + 1) * rate) - math.floor(index * rate)
+
+
+# ============= ADATBÁZIS =============
+
+@contextmanager
+def bulk_loader(path: str) -> Iterator[sqlite3.Connection]:
+    """
+    Új adatbázis fájl tömeges betöltésre: a blokk a táblákat tölti, a végén
+    commit, utána az indexek felépítése és a normál naplózás visszaállítása.
+    Hiba esetén a félkész fájl törlődik.
+
+    Raises:
+        FileExistsError: A cél fájl már létezik
+    """
+    from sqlalchemy import create_engine
+    from sqlalchemy.schema import CreateIndex
+    from ..database import Base
+    from .. import models  # noqa: F401  (táblák regisztrálása)
+
+    if os.path.exists(path):
+        raise FileExistsError(f"Az adatbázis már létezik: {path}")
+
+    engine = create_engine(f"sqlite:///{path}")
+    try:
+        Base.metadata.create_all(bind=engine)
+        indexes = [index for table in Base.metadata.sorted_tables for index in table.indexes]
+        index_ddl = [str(CreateIndex(index).compile(dialect=engine.dialect)) for index in indexes]
+        for index in indexes:
+            index.drop(bind=engine)
+    finally:
+        engine.dispose()
+
+    conn = sqlite3.connect(path, isolation_level=None)
+    try:
+        for pragma in BULK_PRAGMAS:
+            conn.execute(pragma)
+        conn.execute("BEGIN")
+        yield conn
+        conn.execute("COMMIT")
+
+        started = time.monotonic()
+        for statement in index_ddl:
+            conn.execute(statement)
+        logger.info(f"   🗂️  {len(index_ddl)} index felépítve ({time.monotonic() - started:.1f}s)")
+        conn.execute("PRAGMA journal_mode = DELETE")
+        conn.close()
+    except BaseException:
+        conn.close()
+        for suffix in ("", "-journal"):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+        raise
+
+
+def insert_rows(conn: sqlite3.Connection, table: str, columns: List[str], rows: Iterable[tuple]) -> int:
+    """
+    Sorok beszúrása egy executemany-vel, generátorból (nem listából)
+    """
+    counter = [0]
+
+    def counted():
+        for row in rows:
+            counter[0] += 1
+            yield row
+
+    placeholders = ", ".join("?" * len(columns))
+    conn.executemany(f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})", counted())
+    return counter[0]
+
+
+# ============= FÁJLOK =============
+
+def _place_batch(pairs: List[Tuple[str, str]], link: bool) -> Tuple[int, int]:
+    linked = copied = 0
+    for source, target in pairs:
+        if link:
+            try:
+                os.link(source, target)
+                linked += 1
+                continue
+            except FileExistsError:
+                continue
+            except OSError:
+                pass  # más fájlrendszer / link limit: másolás
+        shutil.copyfile(source, target)
+        copied += 1
+    return linked, copied
+
+
+def materialize_files(pairs: Iterable[Tuple[str, str]], link: bool = True,
+                      workers: Optional[int] = None) -> Dict:
+    """
+    (forrás, cél) párok hard linkelése vagy másolása párhuzamosan,
+    FILE_BATCH méretű feladatokban; a cél könyvtárak előre létrejönnek
+
+    Returns:
+        Dict: linked, copied, seconds
+    """
+    started = time.monotonic()
+    created_dirs = set()
+    linked = copied = 0
+    iterator = iter(pairs)
+
+    def batches():
+        while True:
+            batch = list(islice(iterator, FILE_BATCH))
+            if not batch:
+                return
+            for _, target in batch:
+                parent = os.path.dirname(target)
+                if parent not in created_dirs:
+                    os.makedirs(parent, exist_ok=True)
+                    created_dirs.add(parent)
+            yield batch
+
+    workers = workers or FILE_WORKERS
+    pending = deque()
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bulk-files") as executor:
+        # Korlátos számú várakozó köteg (az executor.map az egész bemenetet előre beolvasná)
+        for batch in batches():
+            pending.append(executor.submit(_place_batch, batch, link))
+            while len(pending) > workers * 2 or (pending and pending[0].done()):
+                batch_linked, batch_copied = pending.popleft().result()
+                linked += batch_linked
+                copied += batch_copied
+        for future in pending:
+            batch_linked, batch_copied = future.result()
+            linked += batch_linked
+            copied += batch_copied
+
+    return {"linked": linked, "copied": copied, "seconds": round(time.monotonic() - started, 2)}
+
+
+def _build_pool(pool_dir: str, images: int, documents: int) -> Dict[str, List[str]]:
+    """
+    Minta fájlok: JPEG képek + thumbnailek (Pillow) és egy minimális PDF
+    """
+    from PIL import Image, ImageDraw
+
+    pool = {"images": [], "thumbnails": [], "documents": []}
+    for n in range(images):
+        color = tuple(random.Random(n).randrange(40, 220) for _ in range(3))
+        img = Image.new("RGB", (1200, 900), color)
+        ImageDraw.Draw(img).rectangle((300, 225, 900, 675), fill=tuple(255 - c for c in color))
+        path = os.path.join(pool_dir, f"pool_{n}.jpg")
+        img.save(path, "JPEG", quality=80)
+        img.thumbnail((300, 300))
+        thumb = os.path.join(pool_dir, f"pool_{n}_thumb.jpg")
+        img.save(thumb, "JPEG", quality=80)
+        pool["images"].append(path)
+        pool["thumbnails"].append(thumb)
+
+    for n in range(documents):
+        document = os.path.join(pool_dir, f"pool_{n}.pdf")
+        with open(document, "wb") as f:
+            f.write(_MINIMAL_PDF)
+        pool["documents"].append(document)
+    return pool
+
+
+# ============= SZINTETIKUS HÁZTARTÁSOK =============
+
+def seed_households(database_path: str, households: int, items: int, images_per_item: float = 0.5,
+                    documents_per_item: float = 0.1, link: bool = True, workers: Optional[int] = None,
+                    seed: int = 42) -> Dict:
+    """
+    Új adatbázis szintetikus háztartásokkal és a hozzájuk tartozó fájlokkal
+
+    Háztartásonként 1-3 felhasználó és 1-2 helyszín; a tárgyak egyenletesen
+    oszlanak el a háztartások között, mindegyikhez kezdő készletmozgás
+    ("initial"). A fájlok az image_handler / document_handler könyvtáraiba
+    (a munkakönyvtárhoz képest) kerülnek.
+
+    Returns:
+        Dict: táblánkénti sorszámok, fájl statisztika, időtartamok
+    """
+    from . import blob_store, document_handler, image_handler
+
+    started = time.monotonic()
+    rng = random.Random(seed)
+    now = datetime.now()
+    households = max(1, min(households, items or 1))
+    summary: Dict = {"database": os.path.abspath(database_path)}
+
+    # Háztartásonkénti felhasználó / helyszín ID-k (a beszúrási sorrendből)
+    household_users, household_locations = [], []
+    next_user = next_location = 1
+    for household in range(households):
+        user_count, location_count = 1 + household % 3, 1 + household % 2
+        household_users.append(list(range(next_user, next_user + user_count)))
+        household_locations.append(list(range(next_location, next_location + location_count)))
+        next_user += user_count
+        next_location += location_count
+
+    def users():
+        for household, ids in enumerate(household_users):
+            last_name = LAST_NAMES[household % len(LAST_NAMES)]
+            for n, _ in enumerate(ids):
+                first_name = FIRST_NAMES[(household + n) % len(FIRST_NAMES)]
+                yield (f"user{household}_{n}", first_name, last_name, f"user{household}_{n}@example.hu", "#3498db", True, _sql_datetime(now))
+
+    def locations():
+        for household, ids in enumerate(household_locations):
+            for n, _ in enumerate(ids):
+                yield ("Magyarország", CITIES[(household + n) % len(CITIES)], f"Minta utca {household + 1}. {n + 1}", _sql_datetime(now))
+
+    def item_rows():
+        for index in range(items):
+            household = index % households
+            created = now - timedelta(days=rng.randrange(0, 3 * 365), seconds=rng.randrange(86400))
+            quantity = rng.randint(1, 10)
+            category = CATEGORIES[index % len(CATEGORIES)][0]
+            yield (
+                f"{rng.choice(ADJECTIVES)} {rng.choice(NOUNS)} #{index + 1}", category, "Generált tárgy",
+                quantity, 2 if index % 10 == 0 else None, float(rng.randrange(5, 5000) * 100),
+                (created - timedelta(days=rng.randrange(0, 30))).date().isoformat(),
+                rng.choice(household_users[household]), rng.choice(household_locations[household]),
+                _sql_datetime(created), _sql_datetime(created),
+            )
+
+    def image_rows():
+        number = 0
+        for index in range(items):
+            for order in range(_spread(index, images_per_item)):
+                yield (index + 1, f"seed_{number:08d}.jpg", "kep.jpg", "landscape", 0, 0, order, order == 0, "ready", _sql_datetime(now))
+                number += 1
+
+    def document_rows():
+        for number, index in enumerate(i for i in range(items) for _ in range(_spread(i, documents_per_item))):
+            yield (index + 1, f"seed_doc_{number:08d}.pdf", "szamla.pdf", len(_MINIMAL_PDF), "application/pdf",
+                   DOCUMENT_TYPES[number % len(DOCUMENT_TYPES)], _sql_datetime(now))
+
+    with bulk_loader(database_path) as conn:
+        load_started = time.monotonic()
+        summary["categories"] = insert_rows(conn, "categories", ["name", "icon", "created_at"],
+                                            ((name, icon, _sql_datetime(now)) for name, icon in CATEGORIES))
+        summary["users"] = insert_rows(conn, "users", ["username", "first_name", "last_name", "email", "avatar_color", "is_active", "created_at"], users())
+        summary["locations"] = insert_rows(conn, "locations", ["country", "city", "address", "created_at"], locations())
+        summary["items"] = insert_rows(conn, "items", [
+            "name", "category", "description", "quantity", "min_quantity", "purchase_price", "purchase_date",
+            "user_id", "location_id", "created_at", "updated_at",
+        ], item_rows())
+        summary["images"] = insert_rows(conn, "item_images", [
+            "item_id", "filename", "original_filename", "orientation", "rotation", "rendered_rotation",
+            "order_index", "is_primary", "processing_status", "created_at",
+        ], image_rows())
+        summary["documents"] = insert_rows(conn, "documents", [
+            "item_id", "filename", "original_filename", "file_size", "mime_type", "document_type", "created_at",
+        ], document_rows())
+        # Kezdő készletmozgás tárgyanként, közvetlenül a betöltött tárgyakból
+        summary["stock_movements"] = conn.execute(
+            "INSERT INTO stock_movements (item_id, delta, quantity_after, reason, created_at) "
+            "SELECT id, quantity, quantity, 'initial', created_at FROM items"
+        ).rowcount
+        summary["load_seconds"] = round(time.monotonic() - load_started, 2)
+    summary["database_seconds"] = round(time.monotonic() - started, 2)
+
+    # Fájlok: minta készletből, inode-onként legfeljebb MAX_LINKS_PER_FILE link
+    # (a minta készlet a média mellé kerül: hard link csak fájlrendszeren belül működik)
+    pool_size = max(8, math.ceil(summary["images"] / MAX_LINKS_PER_FILE))
+    pool_dir = tempfile.mkdtemp(prefix="seed_pool_", dir=os.path.dirname(os.path.abspath(image_handler.UPLOAD_DIR)))
+    try:
+        pool = _build_pool(pool_dir, pool_size, max(1, math.ceil(summary["documents"] / MAX_LINKS_PER_FILE)))
+
+        def pairs():
+            for number in range(summary["images"]):
+                name = f"seed_{number:08d}.jpg"
+                yield pool["images"][number % pool_size], blob_store.shard_path(image_handler.UPLOAD_DIR, name)
+                yield pool["thumbnails"][number % pool_size], blob_store.shard_path(image_handler.THUMBNAIL_DIR, f"thumb_{name}")
+            for number in range(summary["documents"]):
+                source = pool["documents"][number % len(pool["documents"])]
+                yield source, blob_store.shard_path(document_handler.DOCUMENT_DIR, f"seed_doc_{number:08d}.pdf")
+
+        summary["files"] = materialize_files(pairs(), link=link, workers=workers)
+    finally:
+        shutil.rmtree(pool_dir, ignore_errors=True)
+
+    # Friss, shardolt könyvtárak: a régi lapos elrendezést nem kell keresni
+    for directory in (image_handler.UPLOAD_DIR, image_handler.THUMBNAIL_DIR, document_handler.DOCUMENT_DIR):
+        if os.path.isdir(directory) and not blob_store.is_migrated(directory):
+            blob_store.migrate_flat_files(directory, pause=0)
+
+    summary["seconds"] = round(time.monotonic() - started, 2)
+    logger.info(
+        f"🌱 Betöltve: {summary['items']} tárgy, {summary['images']} kép, {summary['documents']} dokumentum "
+        f"({summary['seconds']}s)"
+    )
+    return summary
@@ -0,0 +1,264 @@
+"""
+Igény szerinti kép származékok (átméretezés, forgatás) LRU lemez cache-sel
+
+A származékokat csak az első kéréskor rendereljük a tárolt eredetiből, majd egy
+méretkorláttal rendelkező könyvtárba mentjük. A memóriában tartott index
+(kulcs -> fájl, méret) LRU sorrendben van, így a kiszolgálás és a kilakoltatás
+sem igényel könyvtár listázást. Ugyanarra a származékra érkező párhuzamos
+kéréseket egyetlen renderelésbe vonjuk össze.
+"""
+
+import asyncio
+import hashlib
+import os
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+import logging
+
+from PIL import Image, ImageOps
+
+from . import image_handler
+
+logger = logging.getLogger(__name__)
+
+# Konstansok
+CACHE_DIR = os.getenv("DERIVATIVE_CACHE_DIR", "derivative_cache")
+MAX_CACHE_BYTES = int(os.getenv("DERIVATIVE_CACHE_MAX_MB", "512")) * 1024 * 1024
+ALLOWED_FITS = ("contain", "cover", "fill")
+OUTPUT_FORMATS = {
+    "jpeg": {"pil_format": "JPEG", "media_type": "image/jpeg", "ext": ".jpg", "params": {"quality": 82, "optimize": True}},
+    "webp": {"pil_format": "WEBP", "media_type": "image/webp", "ext": ".webp", "params": {"quality": 80, "method": 4}},
+}
+
+# LRU index: kulcs -> (útvonal, méret); a legrégebben használt elöl
+_index: "OrderedDict[str, Tuple[str, int]]" = OrderedDict()
+_total_bytes = 0
+_inflight: Dict[str, asyncio.Future] = {}
+
+
+def init_cache() -> None:
+    """
+    Cache könyvtár létrehozása és az index felépítése a meglévő fájlokból
+    (utolsó hozzáférés szerint rendezve)
+    """
+    global _total_bytes
+
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    _index.clear()
+    _total_bytes = 0
+
+    entries = []
+    with os.scandir(CACHE_DIR) as it:
+        for entry in it:
+            if entry.is_file() and not entry.name.endswith(".tmp"):
+                stat = entry.stat()
+                entries.append((stat.st_atime, entry.name, entry.path, stat.st_size))
+
+    for _, name, path, size in sorted(entries):
+        _index[os.path.splitext(name)[0]] = (path, size)
+        _total_bytes += size
+
+    _evict()
+    logger.info(f"✅ Származék cache: {len(_index)} fájl, {_total_bytes / 1024 / 1024:.1f} MB ({CACHE_DIR})")
+
+
+def cache_stats() -> Dict:
+    """
+    Cache állapot (monitorozáshoz)
+    """
+    return {
+        "entries": len(_index),
+        "bytes": _total_bytes,
+        "max_bytes": MAX_CACHE_BYTES,
+        "inflight": len(_inflight),
+    }
+
+
+def choose_format(accept: Optional[str]) -> str:
+    """
+    Kimeneti formátum az Accept fejléc alapján (WebP, ha kifejezetten kéri)
+    """
+    accepted = image_handler._parse_accept(accept)
+    if "webp" in image_handler.ENABLED_FORMATS and accepted.get("image/webp", 0) > 0:
+        return "webp"
+    return "jpeg"
+
+
+def media_type_for(fmt: str) -> str:
+    return OUTPUT_FORMATS[fmt]["media_type"]
+
+
+def _cache_key(filename: str, width: Optional[int], height: Optional[int], fit: str, rotate: int, fmt: str) -> str:
+    raw = f"{filename}|{width or 0}|{height or 0}|{fit}|{rotate}|{fmt}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def _target_size(src_size: Tuple[int, int], width: Optional[int], height: Optional[int], fit: str) -> Tuple[int, int]:
+    """
+    Cél méret: a hiányzó oldalt arányosan számoljuk, nagyítást nem végzünk
+    """
+    src_w, src_h = src_size
+    if not width and not height:
+        return src_w, src_h
+    if not height or not width:
+        # Csak az egyik oldal adott: arányos méretezés
+        scale = min(1.0, width / src_w) if width else min(1.0, height / src_h)
+        return max(1, round(src_w * scale)), max(1, round(src_h * scale))
+
+    if fit == "contain":
+        scale = min(width / src_w, height / src_h, 1.0)
+        return max(1, round(src_w * scale)), max(1, round(src_h * scale))
+
+    # cover/fill: a doboz méretét adjuk vissza (arányosan kicsinyítve, ha a forrásnál nagyobb)
+    scale = min(1.0, src_w / width, src_h / height)
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def _select_source(filename: str, width: Optional[int], height: Optional[int]) -> str:
+    """
+    Forrás kiválasztása: ha a kért doboz belefér a thumbnail méretbe,
+    a kis thumbnailt dekódoljuk a teljes kép helyett
+    """
+    thumb_w, thumb_h = image_handler.THUMBNAIL_SIZE
+    requested = max(width or 0, height or 0)
+    if requested and requested <= min(thumb_w, thumb_h) // 2:
+        thumb_path = image_handler.get_thumbnail_path(filename)
+        if os.path.exists(thumb_path):
+            return thumb_path
+    return image_handler.get_image_path(filename)
+
+
+def _render(source_path: str, target_path: str, width: Optional[int], height: Optional[int],
+            fit: str, rotate: int, fmt: str) -> int:
+    """
+    Származék renderelése és atomikus mentése; a fájl méretét adja vissza
+    """
+    with Image.open(source_path) as img:
+        # Elforgatás után a szélesség/magasság felcserélődik
+        box_w, box_h = (height, width) if rotate in (90, 270) else (width, height)
+        if box_w or box_h:
+            # JPEG esetén DCT skálázással eleve kisebb képet dekódolunk
+            img.draft("RGB", _target_size(img.size, box_w, box_h, fit))
+
+        if img.mode not in ("RGB", "L"):
+            img = img.convert("RGB")
+
+        target = _target_size(img.size, box_w, box_h, fit)
+        if fit == "cover" and target != img.size:
+            img = ImageOps.fit(img, target, Image.Resampling.LANCZOS)
+        elif target != img.size:
+            img = img.resize(target, Image.Resampling.LANCZOS)
+
+        if rotate:
+            img = img.transpose(image_handler.ROTATION_TRANSPOSE[rotate])
+
+        config = OUTPUT_FORMATS[fmt]
+        temp_path = f"{target_path}.tmp"
+        img.save(temp_path, config["pil_format"], **config["params"])
+
+    os.replace(temp_path, target_path)
+    return os.path.getsize(target_path)
+
+
+def _evict() -> None:
+    """
+    Legrégebben használt bejegyzések törlése a méretkorlátig
+    """
+    global _total_bytes
+
+    while _total_bytes > MAX_CACHE_BYTES and _index:
+        _, (path, size) = _index.popitem(last=False)
+        _total_bytes -= size
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        logger.debug(f"   🧹 Származék kilakoltatva: {path}")
+
+
+def _remember(key: str, path: str, size: int) -> None:
+    global _total_bytes
+
+    previous = _index.pop(key, None)
+    if previous:
+        _total_bytes -= previous[1]
+    _index[key] = (path, size)
+    _total_bytes += size
+    _evict()
+
+
+def invalidate(filename: str) -> int:
+    """
+    Egy forráskép összes cache-elt származékának törlése (a kép fizikai törlésekor)
+
+    A cache kulcsok a forrás fájlnév hash-ének előtagjával kezdődnek.
+    """
+    global _total_bytes
+
+    prefix = _source_prefix(filename)
+    removed = 0
+    for key in [k for k in _index if k.startswith(prefix)]:
+        path, size = _index.pop(key)
+        _total_bytes -= size
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        removed += 1
+    return removed
+
+
+def _source_prefix(filename: str) -> str:
+    return hashlib.sha1(filename.encode("utf-8")).hexdigest()[:8]
+
+
+async def get_derivative(filename: str, width: Optional[int] = None, height: Optional[int] = None,
+                         fit: str = "contain", rotate: int = 0, fmt: str = "jpeg") -> str:
+    """
+    Származék útvonala; ha még nincs a cache-ben, legenerálja.
+
+    Raises:
+        ValueError: Érvénytelen paraméterek
+        FileNotFoundError: Ha a forráskép nem létezik
+    """
+    if fit not in ALLOWED_FITS:
+        raise ValueError(f"Érvénytelen fit: {fit}. Lehetséges: {', '.join(ALLOWED_FITS)}")
+    if rotate not in image_handler.ALLOWED_ROTATIONS:
+        raise ValueError("Forgatás csak 0, 90, 180, 270 lehet")
+    for value in (width, height):
+        if value is not None and not 1 <= value <= image_handler.MAX_DIMENSION:
+            raise ValueError(f"A méret 1 és {image_handler.MAX_DIMENSION} között lehet")
+
+    key = _source_prefix(filename) + _cache_key(filename, width, height, fit, rotate, fmt)
+
+    cached = _index.get(key)
+    if cached:
+        _index.move_to_end(key)
+        return cached[0]
+
+    # Párhuzamos kérések összevonása: aki másodikként érkezik, az első eredményére vár
+    pending = _inflight.get(key)
+    if pending:
+        return await asyncio.shield(pending)
+
+    source_path = _select_source(filename, width, height)
+    if not os.path.exists(source_path):
+        raise FileNotFoundError(f"Kép nem található: {filename}")
+
+    target_path = os.path.join(CACHE_DIR, key + OUTPUT_FORMATS[fmt]["ext"])
+    future = asyncio.get_running_loop().create_future()
+    _inflight[key] = future
+
+    try:
+        size = await asyncio.to_thread(_render, source_path, target_path, width, height, fit, rotate, fmt)
+        _remember(key, target_path, size)
+        future.set_result(target_path)
+        logger.info(f"   🖼️  Származék renderelve: {filename} w={width} h={height} fit={fit} rotate={rotate} ({fmt})")
+        return target_path
+    except Exception as e:
+        future.set_exception(e)
+        # Ha senki más nem várt rá, ne maradjon "Future exception was never retrieved"
+        future.exception()
+        raise
+    finally:
+        _inflight.pop(key, None)
@@ -5,10 +5,13 @@ Backend Developer: Maria Rodriguez
 
 import os
 import uuid
+import asyncio
 from fastapi import UploadFile
 from typing import Dict, Optional
 import logging
 
+from . import blob_store
+
 logger = logging.getLogger(__name__)
 
 # Konstansok
@@ -124,17 +127,26 @@ async def save_document(
                 f"Jelenlegi: {file_size / 1024 / 1024:.1f}MB"
             )
         
-        # Egyedi fájlnév
-        new_filename = generate_document_filename(file.filename)
-        file_path = os.path.join(DOCUMENT_DIR, new_filename)
-        
-        # Mentés
-        logger.info(f"   Mentés: {file_path}")
-        
-        with open(file_path, "wb") as f:
-            f.write(content)
+        # Tartalom alapú fájlnév - azonos dokumentum csak egyszer kerül lemezre
+        digest = blob_store.compute_digest(content)
+        new_filename, _ = await asyncio.to_thread(
+            blob_store.claim, digest, "document", blob_store.content_filename(digest, file.filename, prefix="doc_"), file_size
+        )
+        file_path = get_document_path(new_filename)
         
-        logger.info(f"✅ Dokumentum mentve: {new_filename} ({file_size / 1024:.1f} KB)")
+        if os.path.exists(file_path):
+            logger.info(f"♻️  Már tárolt dokumentum, újrafelhasználva: {new_filename}")
+        else:
+            # Mentés (temp fájlon át, hogy félkész fájl ne legyen látható)
+            logger.info(f"   Mentés: {file_path}")
+            
+            blob_store.ensure_parent_dir(file_path)
+            temp_path = f"{file_path}.{uuid.uuid4().hex[:8]}.tmp"
+            with open(temp_path, "wb") as f:
+                f.write(content)
+            os.replace(temp_path, file_path)
+            
+            logger.info(f"✅ Dokumentum mentve: {new_filename} ({file_size / 1024:.1f} KB)")
         
         return {
             "item_id": item_id,
@@ -159,15 +171,34 @@ def delete_document(filename: str) -> None:
     """
     Dokumentum törlése
     
+    Tartalom alapú (megosztott) blobot nem törlünk azonnal, azt a GC végzi,
+    ha már egy Document sor sem hivatkozik rá.
+    
     Args:
         filename: Fájlnév
         
+    Raises:
+        FileNotFoundError: Ha a fájl nem létezik
+    """
+    if blob_store.is_content_addressed(filename):
+        if not os.path.exists(get_document_path(filename)):
+            raise FileNotFoundError(f"Dokumentum nem található: {filename}")
+        logger.info(f"🗑️  Megosztott blob, törlést a GC végzi: {filename}")
+        return
+    
+    remove_document_file(filename)
+
+
+def remove_document_file(filename: str) -> None:
+    """
+    Dokumentum fájl fizikai törlése
+    
     Raises:
         FileNotFoundError: Ha a fájl nem létezik
     """
     logger.info(f"🗑️  Dokumentum törlése: {filename}")
     
-    file_path = os.path.join(DOCUMENT_DIR, filename)
+    file_path = get_document_path(filename)
     
     if os.path.exists(file_path):
         os.remove(file_path)
@@ -179,6 +210,6 @@ def delete_document(filename: str) -> None:
 
 def get_document_path(filename: str) -> str:
     """
-    Dokumentum teljes elérési útja
+    Dokumentum teljes elérési útja (shardolt)
     """
-    return os.path.join(DOCUMENT_DIR, filename)
+    return blob_store.resolve_path(DOCUMENT_DIR, filename)
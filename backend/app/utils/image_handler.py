@@ -7,11 +7,20 @@ import os
 import uuid
 import shutil
 import asyncio
-from PIL import Image
+import subprocess
+from PIL import Image, ImageOps
 from fastapi import UploadFile
-from typing import Dict
+from typing import Collection, Dict, Iterable, List, Optional, Tuple
 import logging
 
+from . import blob_store
+
+try:
+    # AVIF támogatás régebbi Pillow verziókhoz (opcionális plugin)
+    import pillow_avif  # noqa: F401
+except ImportError:
+    pass
+
 logger = logging.getLogger(__name__)
 
 # Konstansok
@@ -22,6 +31,60 @@ ALLOWED_EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp", ".gif"}
 MAX_DIMENSION = 1920
 THUMBNAIL_SIZE = (300, 300)
 
+# Reszponzív (srcset) variánsok
+VARIANT_DIR = os.path.join(UPLOAD_DIR, "variants")
+VARIANT_QUALITY = 82
+
+
+def _parse_variant_widths(value: str) -> Tuple[int, ...]:
+    """
+    Variáns szélességek beolvasása (pl. "96,240,480,960,1920")
+    """
+    widths = {int(part) for part in value.split(",") if part.strip()}
+    return tuple(sorted(w for w in widths if w > 0))
+
+
+# Felülírható az IMAGE_VARIANT_WIDTHS környezeti változóval
+VARIANT_WIDTHS = _parse_variant_widths(os.getenv("IMAGE_VARIANT_WIDTHS", "96,240,480,960,1920"))
+
+# Háttér feldolgozásra váró eredeti feltöltések (nem kiszolgált könyvtár)
+PENDING_DIR = os.path.join(UPLOAD_DIR, "pending")
+
+# Szerver oldalon elforgatott képek (ItemImage.rotation)
+ROTATED_DIR = os.path.join(UPLOAD_DIR, "rotated")
+ALLOWED_ROTATIONS = (0, 90, 180, 270)
+# Forgatás óramutató szerint -> PIL transzpozíció
+ROTATION_TRANSPOSE = {
+    90: Image.Transpose.ROTATE_270,
+    180: Image.Transpose.ROTATE_180,
+    270: Image.Transpose.ROTATE_90,
+}
+# Veszteségmentes JPEG forgatás, ha a jpegtran elérhető
+JPEGTRAN = shutil.which("jpegtran")
+
+# Alternatív kimeneti formátumok a JPEG mellé (Accept alapú kiszolgáláshoz)
+ALTERNATE_FORMATS = {
+    "avif": {"pil_format": "AVIF", "media_type": "image/avif", "params": {"quality": 60}},
+    "webp": {"pil_format": "WEBP", "media_type": "image/webp", "params": {"quality": 80, "method": 4}},
+}
+# Kiszolgálási preferencia: a legkisebb formátum előre
+FORMAT_PREFERENCE = ("avif", "webp")
+
+
+def _enabled_formats() -> Tuple[str, ...]:
+    """
+    Engedélyezett és a helyi Pillow build által támogatott alternatív formátumok
+    """
+    requested = [f.strip().lower() for f in os.getenv("IMAGE_ALTERNATE_FORMATS", "webp,avif").split(",")]
+    Image.init()
+    return tuple(
+        fmt for fmt in FORMAT_PREFERENCE
+        if fmt in requested and ALTERNATE_FORMATS[fmt]["pil_format"] in Image.SAVE
+    )
+
+
+ENABLED_FORMATS = _enabled_formats()
+
 
 def create_upload_dir():
     """
@@ -29,14 +92,24 @@ def create_upload_dir():
     """
     os.makedirs(UPLOAD_DIR, exist_ok=True)
     os.makedirs(THUMBNAIL_DIR, exist_ok=True)
+    os.makedirs(VARIANT_DIR, exist_ok=True)
+    os.makedirs(ROTATED_DIR, exist_ok=True)
+    os.makedirs(PENDING_DIR, exist_ok=True)
     logger.info(f"✅ Upload könyvtárak létrehozva: {UPLOAD_DIR}")
 
 
 def get_image_path(filename: str) -> str:
     """
-    Teljes elérési út egy képhez
+    Teljes elérési út egy képhez (shardolt)
     """
-    return os.path.join(UPLOAD_DIR, filename)
+    return blob_store.resolve_path(UPLOAD_DIR, filename)
+
+
+def get_pending_path(filename: str) -> str:
+    """
+    Feldolgozásra váró eredeti feltöltés helye
+    """
+    return os.path.join(PENDING_DIR, filename)
 
 
 def get_thumbnail_path(filename: str) -> str:
@@ -44,7 +117,182 @@ def get_thumbnail_path(filename: str) -> str:
     Thumbnail elérési útja
     """
     thumb_filename = f"thumb_{filename}"
-    return os.path.join(THUMBNAIL_DIR, thumb_filename)
+    return blob_store.resolve_path(THUMBNAIL_DIR, thumb_filename)
+
+
+def get_variant_filename(filename: str, width: int) -> str:
+    """
+    Variáns fájlnév (pl. abc123_w480.jpg)
+    """
+    stem = os.path.splitext(filename)[0]
+    return f"{stem}_w{width}.jpg"
+
+
+def get_variant_path(filename: str, width: int) -> str:
+    """
+    Variáns elérési útja
+    """
+    return blob_store.resolve_path(VARIANT_DIR, get_variant_filename(filename, width))
+
+
+def get_rotated_filename(filename: str, rotation: int) -> str:
+    """
+    Elforgatott kép fájlneve (pl. abc123_r90.jpg)
+    """
+    stem = os.path.splitext(filename)[0]
+    return f"{stem}_r{rotation}.jpg"
+
+
+def get_rotated_path(filename: str, rotation: int) -> str:
+    """
+    Elforgatott fő kép elérési útja
+    """
+    return blob_store.resolve_path(ROTATED_DIR, get_rotated_filename(filename, rotation))
+
+
+def get_rotated_thumbnail_path(filename: str, rotation: int) -> str:
+    """
+    Elforgatott thumbnail elérési útja
+    """
+    return get_thumbnail_path(get_rotated_filename(filename, rotation))
+
+
+def get_alternate_path(path: str, fmt: str) -> str:
+    """
+    Alternatív formátumú testvérfájl útvonala (pl. abc.jpg -> abc.webp)
+    """
+    return f"{os.path.splitext(path)[0]}.{fmt}"
+
+
+def _save_atomic(img: Image.Image, path: str, pil_format: str, **params) -> None:
+    """
+    Mentés temp fájlba ugyanabban a könyvtárban, majd os.replace: a kiszolgált
+    (immutable cache fejléces) útvonalon soha nem látszik félkész fájl
+    """
+    temp_path = f"{path}.{uuid.uuid4().hex[:8]}.tmp"
+    try:
+        img.save(temp_path, pil_format, **params)
+        os.replace(temp_path, path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+def _save_with_alternates(img: Image.Image, path: str, quality: int) -> List[str]:
+    """
+    JPEG mentése és az engedélyezett alternatív formátumok mellé írása
+
+    Returns:
+        List[str]: A sikeresen elkészült alternatív formátumok
+    """
+    blob_store.ensure_parent_dir(path)
+    _save_atomic(img, path, 'JPEG', quality=quality, optimize=True)
+
+    formats = []
+    for fmt in ENABLED_FORMATS:
+        config = ALTERNATE_FORMATS[fmt]
+        if get_alternate_path(path, fmt) == path:
+            # pl. .webp kiterjesztésű feltöltés: a fő fájlt nem írjuk felül
+            continue
+        try:
+            _save_atomic(img, get_alternate_path(path, fmt), config["pil_format"], **config["params"])
+            formats.append(fmt)
+        except Exception as e:
+            logger.warning(f"   ⚠️  {fmt.upper()} mentési hiba ({path}): {e}")
+    return formats
+
+
+def _parse_accept(accept: Optional[str]) -> Dict[str, float]:
+    """
+    Accept fejléc feldolgozása: media type -> q érték
+    """
+    accepted = {}
+    for part in (accept or "").split(","):
+        fields = [f.strip() for f in part.split(";")]
+        media_type = fields[0].lower()
+        if not media_type:
+            continue
+        q = 1.0
+        for param in fields[1:]:
+            if param.startswith("q="):
+                try:
+                    q = float(param[2:])
+                except ValueError:
+                    q = 0.0
+        accepted[media_type] = q
+    return accepted
+
+
+def negotiate_image(path: str, accept: Optional[str]) -> Tuple[str, Optional[str]]:
+    """
+    A kliens Accept fejléce alapján a legkisebb elérhető formátum kiválasztása.
+
+    Csak a kifejezetten felsorolt típusokat vesszük figyelembe (image/* és */*
+    nem jelenti az AVIF/WebP támogatását). Ha nincs megfelelő testvérfájl,
+    az eredeti JPEG útvonalat adjuk vissza.
+
+    Returns:
+        (útvonal, media type) - a media type None, ha az eredetit szolgáljuk ki
+    """
+    accepted = _parse_accept(accept)
+    for fmt in FORMAT_PREFERENCE:
+        media_type = ALTERNATE_FORMATS[fmt]["media_type"]
+        if accepted.get(media_type, 0) <= 0:
+            continue
+        alternate = get_alternate_path(path, fmt)
+        if os.path.exists(alternate):
+            return alternate, media_type
+    return path, None
+
+
+def build_srcset(variants: List[Dict]) -> str:
+    """
+    srcset attribútum összeállítása a variáns listából (kicsitől a nagyig)
+    """
+    ordered = sorted(variants, key=lambda v: v["width"])
+    return ", ".join(f"{v['url']} {v['width']}w" for v in ordered)
+
+
+def _generate_variants(img: Image.Image, filename: str, main_formats: List[str]) -> List[Dict]:
+    """
+    Variáns létra generálása egyetlen dekódolt képből.
+
+    A nagyobb variánsból kicsinyítünk tovább, így a forrást csak egyszer
+    kell dekódolni. A fő képnél nem kisebb szélességeket kihagyjuk, a fő kép
+    maga lesz a létra legfelső eleme.
+    """
+    variants = []
+    current = img
+
+    for width in sorted(VARIANT_WIDTHS, reverse=True):
+        if width >= img.width:
+            continue
+
+        height = max(1, round(current.height * width / current.width))
+        current = current.resize((width, height), Image.Resampling.LANCZOS)
+
+        variant_filename = get_variant_filename(filename, width)
+        formats = _save_with_alternates(current, get_variant_path(filename, width), VARIANT_QUALITY)
+
+        variants.append({
+            "width": width,
+            "height": height,
+            "filename": variant_filename,
+            "url": f"/uploads/variants/{variant_filename}",
+            "formats": formats
+        })
+
+    variants.append({
+        "width": img.width,
+        "height": img.height,
+        "filename": filename,
+        "url": f"/uploads/{filename}",
+        "formats": main_formats
+    })
+
+    variants.sort(key=lambda v: v["width"])
+    logger.info(f"   ✅ {len(variants)} variáns mentve: {[v['width'] for v in variants]}")
+    return variants
 
 
 def generate_unique_filename(original_filename: str) -> str:
@@ -73,6 +321,117 @@ def validate_image_file(file: UploadFile) -> None:
         raise ValueError(f"Nem támogatott fájl kiterjesztés: {ext}. Engedélyezett: {', '.join(ALLOWED_EXTENSIONS)}")
 
 
+def _upload_result(filename: str, original_filename: str, meta: Dict) -> Dict:
+    """
+    Feltöltés válasz összeállítása a (tárolt vagy friss) metaadatokból
+    """
+    variants = meta.get("variants") or []
+    return {
+        "filename": filename,
+        "original_filename": original_filename,
+        "size": meta["size"],
+        "content_type": "image/jpeg",
+        "url": f"/uploads/{filename}",
+        "orientation": meta.get("orientation"),
+        "width": meta.get("width", 0),
+        "height": meta.get("height", 0),
+        "variants": variants,
+        "srcset": build_srcset(variants) if variants else None
+    }
+
+
+def process_image(source_path: str, filename: str) -> Dict:
+    """
+    Képfeldolgozás: EXIF normalizálás, átméretezés, alternatív formátumok,
+    variáns létra és thumbnail a forrás fájlból a végleges (shardolt) helyekre
+
+    Blokkoló művelet - thread-ből vagy háttér workerből hívandó.
+
+    Returns:
+        Dict: A blob metaadatai (size, orientation, width, height, variants)
+    """
+    file_path = get_image_path(filename)
+    logger.info("   Feldolgozás...")
+
+    orientation = None
+    original_size = (0, 0)
+    variants = []
+
+    try:
+        with Image.open(source_path) as img:
+            # EXIF Orientation normalizálása: a pixeleket forgatjuk, a tag eltűnik
+            img = ImageOps.exif_transpose(img)
+            original_size = img.size
+            if img.width > img.height:
+                orientation = "landscape"
+            elif img.height > img.width:
+                orientation = "portrait"
+            else:
+                orientation = "square"
+
+            if img.mode in ('RGBA', 'LA', 'P'):
+                rgb_img = Image.new('RGB', img.size, (255, 255, 255))
+                if img.mode == 'P':
+                    img = img.convert('RGBA')
+                rgb_img.paste(img, mask=img.split()[-1] if img.mode in ('RGBA', 'LA') else None)
+                img = rgb_img
+
+            if img.width > MAX_DIMENSION or img.height > MAX_DIMENSION:
+                img.thumbnail((MAX_DIMENSION, MAX_DIMENSION), Image.Resampling.LANCZOS)
+                logger.info(f"   Átméretezve: {img.size}")
+
+            main_formats = _save_with_alternates(img, file_path, 85)
+            logger.info(f"   ✅ Kép mentve: {file_path} (+{', '.join(main_formats) or '-'})")
+
+            variants = _generate_variants(img, filename, main_formats)
+
+            img.thumbnail(THUMBNAIL_SIZE, Image.Resampling.LANCZOS)
+            thumb_path = get_thumbnail_path(filename)
+            _save_with_alternates(img, thumb_path, 80)
+            logger.info(f"   ✅ Thumbnail mentve: {thumb_path}")
+
+    except Exception as e:
+        logger.error(f"   ❌ PIL hiba: {e}")
+        blob_store.ensure_parent_dir(file_path)
+        shutil.copy(source_path, file_path)
+        logger.warning("   ⚠️  Kép feldolgozás kihagyva, eredeti mentve")
+
+    return {
+        "size": os.path.getsize(file_path),
+        "orientation": orientation,
+        "width": original_size[0],
+        "height": original_size[1],
+        "variants": variants
+    }
+
+
+async def _receive_upload(file: UploadFile) -> Tuple[bytes, str, str, Optional[Dict]]:
+    """
+    Feltöltés validálása, beolvasása és a blob regisztrálása
+
+    Returns:
+        (tartalom, digest, tartalom alapú fájlnév, tárolt metaadat vagy None)
+
+    Raises:
+        ValueError: Ha a fájl nem megfelelő
+    """
+    validate_image_file(file)
+
+    content = await file.read()
+    file_size = len(content)
+
+    if file_size > MAX_IMAGE_SIZE:
+        raise ValueError(
+            f"A fájl túl nagy! Maximum {MAX_IMAGE_SIZE / 1024 / 1024:.1f}MB méretű lehet. Jelenlegi: {file_size / 1024 / 1024:.1f}MB"
+        )
+
+    digest = blob_store.compute_digest(content)
+    new_filename, stored_meta = await asyncio.to_thread(
+        blob_store.claim, digest, "image", blob_store.content_filename(digest, file.filename), file_size
+    )
+    return content, digest, new_filename, stored_meta
+
+
 async def save_uploaded_file(file: UploadFile) -> Dict:
     """
     Feltöltött kép mentése és feldolgozása
@@ -80,91 +439,87 @@ async def save_uploaded_file(file: UploadFile) -> Dict:
     A PIL-es képfeldolgozás blokkoló műveleteit külön thread-ben futtatjuk,
     így elkerüljük az "event loop is already running" típusú hibákat és a
     runtime warningokat.
+
+    A fájlnév a tartalom SHA-256 hash-e: ha ugyanez a kép már fel van
+    dolgozva, a tárolt metaadatokkal válaszolunk, lemezírás nélkül.
     """
 
     logger.info(f"📸 Kép feltöltés: {file.filename} ({file.content_type})")
 
     try:
-        validate_image_file(file)
-
-        new_filename = generate_unique_filename(file.filename)
+        content, digest, new_filename, stored_meta = await _receive_upload(file)
         file_path = get_image_path(new_filename)
-        temp_path = f"{file_path}.tmp"
 
-        logger.info(f"   Mentés: {temp_path}")
+        if stored_meta and os.path.exists(file_path):
+            logger.info(f"♻️  Már tárolt kép, újrafelhasználva: {new_filename}")
+            return _upload_result(new_filename, file.filename, stored_meta)
 
-        content = await file.read()
-        file_size = len(content)
+        temp_path = f"{file_path}.{uuid.uuid4().hex[:8]}.tmp"
 
-        if file_size > MAX_IMAGE_SIZE:
-            raise ValueError(
-                f"A fájl túl nagy! Maximum {MAX_IMAGE_SIZE / 1024 / 1024:.1f}MB méretű lehet. Jelenlegi: {file_size / 1024 / 1024:.1f}MB"
-            )
+        logger.info(f"   Mentés: {temp_path}")
 
         def _process_image():
             # Mentés temp fájlba
+            blob_store.ensure_parent_dir(temp_path)
             with open(temp_path, "wb") as f:
                 f.write(content)
-
-            logger.info("   Feldolgozás...")
-
-            orientation = None
-            original_size = (0, 0)
-
             try:
-                with Image.open(temp_path) as img:
-                    original_size = img.size
-                    if img.width > img.height:
-                        orientation = "landscape"
-                    elif img.height > img.width:
-                        orientation = "portrait"
-                    else:
-                        orientation = "square"
-
-                    if img.mode in ('RGBA', 'LA', 'P'):
-                        rgb_img = Image.new('RGB', img.size, (255, 255, 255))
-                        if img.mode == 'P':
-                            img = img.convert('RGBA')
-                        rgb_img.paste(img, mask=img.split()[-1] if img.mode in ('RGBA', 'LA') else None)
-                        img = rgb_img
-
-                    if img.width > MAX_DIMENSION or img.height > MAX_DIMENSION:
-                        img.thumbnail((MAX_DIMENSION, MAX_DIMENSION), Image.Resampling.LANCZOS)
-                        logger.info(f"   Átméretezve: {img.size}")
-
-                    img.save(file_path, 'JPEG', quality=85, optimize=True)
-                    logger.info(f"   ✅ Kép mentve: {file_path}")
-
-                    img.thumbnail(THUMBNAIL_SIZE, Image.Resampling.LANCZOS)
-                    thumb_path = get_thumbnail_path(new_filename)
-                    img.save(thumb_path, 'JPEG', quality=80)
-                    logger.info(f"   ✅ Thumbnail mentve: {thumb_path}")
-
-            except Exception as e:
-                logger.error(f"   ❌ PIL hiba: {e}")
-                shutil.copy(temp_path, file_path)
-                logger.warning("   ⚠️  Kép feldolgozás kihagyva, eredeti mentve")
-
+                return process_image(temp_path, new_filename)
             finally:
                 if os.path.exists(temp_path):
                     os.remove(temp_path)
 
-            return os.path.getsize(file_path), orientation, original_size
+        meta = await asyncio.to_thread(_process_image)
+        await asyncio.to_thread(blob_store.set_meta, digest, meta)
 
-        final_size, orientation, original_size = await asyncio.to_thread(_process_image)
+        logger.info(f"✅ Kép feltöltve: {new_filename} ({meta['size'] / 1024:.1f} KB)")
 
-        logger.info(f"✅ Kép feltöltve: {new_filename} ({final_size / 1024:.1f} KB)")
+        return _upload_result(new_filename, file.filename, meta)
 
-        return {
-            "filename": new_filename,
-            "original_filename": file.filename,
-            "size": final_size,
-            "content_type": "image/jpeg",
-            "url": f"/uploads/{new_filename}",
-            "orientation": orientation,
-            "width": original_size[0],
-            "height": original_size[1]
-        }
+    except ValueError as e:
+        logger.error(f"❌ Validációs hiba: {e}")
+        raise
+
+    except Exception as e:
+        logger.error(f"❌ Általános hiba: {e}")
+        raise ValueError(f"Kép feltöltési hiba: {str(e)}")
+
+
+async def store_uploaded_file(file: UploadFile) -> Dict:
+    """
+    Feltöltött kép átvétele feldolgozás nélkül (háttér feladatnak)
+
+    Az eredeti bájtok a PENDING_DIR-be kerülnek, a végleges (immutable
+    cache-elt) helyre csak a process_pending_image() ír. Ha a kép már
+    feldolgozott blob, "ready" állapottal azonnal válaszolunk.
+
+    Returns:
+        Dict: Mint save_uploaded_file(), plusz "status": "ready" | "processing"
+    """
+    logger.info(f"📸 Kép átvétele: {file.filename} ({file.content_type})")
+
+    try:
+        content, digest, new_filename, stored_meta = await _receive_upload(file)
+
+        if stored_meta and os.path.exists(get_image_path(new_filename)):
+            logger.info(f"♻️  Már tárolt kép, újrafelhasználva: {new_filename}")
+            return {**_upload_result(new_filename, file.filename, stored_meta), "status": "ready"}
+
+        pending_path = get_pending_path(new_filename)
+
+        def _write_pending():
+            if os.path.exists(pending_path):
+                return  # párhuzamos azonos feltöltés már vár feldolgozásra
+            os.makedirs(PENDING_DIR, exist_ok=True)
+            temp_path = f"{pending_path}.{uuid.uuid4().hex[:8]}.tmp"
+            with open(temp_path, "wb") as f:
+                f.write(content)
+            os.replace(temp_path, pending_path)
+
+        await asyncio.to_thread(_write_pending)
+        logger.info(f"⏳ Kép feldolgozásra vár: {new_filename} ({len(content) / 1024:.1f} KB)")
+
+        return {**_upload_result(new_filename, file.filename, {"size": len(content)}), "status": "processing"}
 
     except ValueError as e:
         logger.error(f"❌ Validációs hiba: {e}")
@@ -175,9 +530,136 @@ async def save_uploaded_file(file: UploadFile) -> Dict:
         raise ValueError(f"Kép feltöltési hiba: {str(e)}")
 
 
+def process_pending_image(filename: str) -> Dict:
+    """
+    Várakozó (store_uploaded_file által átvett) kép feldolgozása
+
+    Idempotens: ha a kép már feldolgozott, a tárolt metaadatokat adja vissza,
+    így a feladat újrapróbálása biztonságos. Blokkoló - háttér workerből hívandó.
+
+    Raises:
+        FileNotFoundError: Ha sem a várakozó, sem a feldolgozott kép nem létezik
+    """
+    digest = blob_store.digest_from_filename(filename)
+    pending_path = get_pending_path(filename)
+
+    if not os.path.exists(pending_path):
+        meta = blob_store.get_meta(digest) if digest else None
+        if meta and os.path.exists(get_image_path(filename)):
+            return meta
+        raise FileNotFoundError(f"Feldolgozásra váró kép nem található: {filename}")
+
+    logger.info(f"⚙️  Háttér képfeldolgozás: {filename}")
+    meta = process_image(pending_path, filename)
+    if digest:
+        blob_store.set_meta(digest, meta)
+    os.remove(pending_path)
+
+    logger.info(f"✅ Kép feldolgozva: {filename} ({meta['size'] / 1024:.1f} KB)")
+    return meta
+
+
+def _is_jpeg(path: str) -> bool:
+    with open(path, "rb") as f:
+        return f.read(2) == b"\xff\xd8"
+
+
+def _rotate_file(source_path: str, target_path: str, rotation: int, quality: int) -> str:
+    """
+    Egy kép elforgatása: jpegtran-nal veszteségmentesen, ha lehet,
+    egyébként PIL transzpozíció + újrakódolás
+
+    Returns:
+        str: "lossless" vagy "reencoded"
+    """
+    temp_path = f"{target_path}.{uuid.uuid4().hex[:8]}.tmp"
+    blob_store.ensure_parent_dir(target_path)
+
+    if JPEGTRAN and _is_jpeg(source_path):
+        # -perfect: hiba, ha a méret nem MCU többszörös (ekkor nem vágunk le szélt)
+        result = subprocess.run(
+            [JPEGTRAN, "-rotate", str(rotation), "-perfect", "-copy", "none", "-optimize",
+             "-outfile", temp_path, source_path],
+            capture_output=True
+        )
+        if result.returncode == 0:
+            os.replace(temp_path, target_path)
+            return "lossless"
+        logger.info(f"   ℹ️  jpegtran nem tud veszteségmentesen forgatni: {source_path}")
+
+    with Image.open(source_path) as img:
+        rotated = img.transpose(ROTATION_TRANSPOSE[rotation])
+        if rotated.mode not in ("RGB", "L"):
+            rotated = rotated.convert("RGB")
+        rotated.save(temp_path, "JPEG", quality=quality, optimize=True)
+    os.replace(temp_path, target_path)
+    return "reencoded"
+
+
+def render_rotation(filename: str, rotation: int, keep: Iterable[int] = ()) -> Dict:
+    """
+    Elforgatott fő kép és thumbnail (valamint alternatív formátumaik) előállítása
+    a tárolt eredetiből. A korábbi forgatásokhoz tartozó fájlokat törli, kivéve
+    a keep forgatásokat (megosztott blob: más ItemImage sorok még ezeket szolgálják ki).
+
+    Blokkoló művelet - háttér workerből hívandó.
+
+    Raises:
+        ValueError: Érvénytelen forgatás
+        FileNotFoundError: Ha az eredeti kép nem létezik
+    """
+    if rotation not in ALLOWED_ROTATIONS:
+        raise ValueError("Forgatás csak 0, 90, 180, 270 lehet")
+
+    image_path = get_image_path(filename)
+    if not os.path.exists(image_path):
+        raise FileNotFoundError(f"Kép nem található: {filename}")
+
+    logger.info(f"🔄 Forgatás renderelése: {filename} ({rotation}°)")
+
+    modes = {}
+    if rotation:
+        targets = [
+            (image_path, get_rotated_path(filename, rotation), 85),
+            (get_thumbnail_path(filename), get_rotated_thumbnail_path(filename, rotation), 80),
+        ]
+        for source, target, quality in targets:
+            if not os.path.exists(source):
+                continue
+            modes[target] = _rotate_file(source, target, rotation, quality)
+            for fmt in ENABLED_FORMATS:
+                with Image.open(target) as rotated:
+                    config = ALTERNATE_FORMATS[fmt]
+                    _save_atomic(rotated, get_alternate_path(target, fmt), config["pil_format"], **config["params"])
+            logger.info(f"   ✅ {target} ({modes[target]})")
+
+    delete_rotations(filename, keep={rotation, *keep})
+
+    return {"filename": filename, "rotation": rotation, "modes": modes}
+
+
+def delete_rotations(filename: str, keep: Collection[int] = ()) -> int:
+    """
+    Elforgatott fájlok törlése (a keep forgatások kivételével)
+    """
+    deleted = 0
+    for rotation in ALLOWED_ROTATIONS[1:]:
+        if rotation in keep:
+            continue
+        for path in (get_rotated_path(filename, rotation), get_rotated_thumbnail_path(filename, rotation)):
+            for candidate in [path] + [get_alternate_path(path, fmt) for fmt in ALTERNATE_FORMATS]:
+                if os.path.exists(candidate):
+                    os.remove(candidate)
+                    deleted += 1
+    return deleted
+
+
 def delete_image(filename: str) -> None:
     """
-    Kép és thumbnail törlése
+    Kép törlése
+    
+    Tartalom alapú (megosztott) blobot nem törlünk azonnal: más tárgyak is
+    hivatkozhatnak rá, a hivatkozás nélküli blobokat a GC takarítja el.
     
     Args:
         filename: Fájlnév
@@ -185,7 +667,34 @@ def delete_image(filename: str) -> None:
     Raises:
         FileNotFoundError: Ha a fájl nem létezik
     """
-    logger.info(f"🗑️  Kép törlése: {filename}")
+    if blob_store.is_content_addressed(filename):
+        if not os.path.exists(get_image_path(filename)):
+            raise FileNotFoundError(f"Kép nem található: {filename}")
+        logger.info(f"🗑️  Megosztott blob, törlést a GC végzi: {filename}")
+        return
+
+    remove_image_files(filename)
+
+
+def remove_image_files(filename: str) -> None:
+    """
+    Kép, thumbnail, variánsok és származékok fizikai törlése
+    
+    Args:
+        filename: Fájlnév
+        
+    Raises:
+        FileNotFoundError: Ha a fájl nem létezik
+    """
+    logger.info(f"🗑️  Kép fájlok törlése: {filename}")
+    
+    # Még fel nem dolgozott eredeti
+    pending_path = get_pending_path(filename)
+    if os.path.exists(pending_path):
+        os.remove(pending_path)
+        logger.info(f"   ✅ Várakozó kép törölve: {pending_path}")
+        if not os.path.exists(get_image_path(filename)):
+            return
     
     # Fő kép
     image_path = get_image_path(filename)
@@ -203,3 +712,20 @@ def delete_image(filename: str) -> None:
         logger.info(f"   ✅ Thumbnail törölve: {thumb_path}")
     else:
         logger.warning(f"   ⚠️  Thumbnail nem található: {thumb_path}")
+
+    # Variánsok és alternatív formátumok
+    derived = [image_path, thumb_path] + [get_variant_path(filename, w) for w in VARIANT_WIDTHS]
+    for path in derived:
+        candidates = [get_alternate_path(path, fmt) for fmt in ALTERNATE_FORMATS]
+        if path not in (image_path, thumb_path):
+            candidates.append(path)
+        for candidate in candidates:
+            if os.path.exists(candidate):
+                os.remove(candidate)
+                logger.info(f"   ✅ Származtatott fájl törölve: {candidate}")
+
+    delete_rotations(filename)
+
+    # Igény szerinti származékok (körkörös import elkerülése: itt töltjük be)
+    from . import derivative_cache
+    derivative_cache.invalidate(filename)
@@ -0,0 +1,156 @@
+"""
+Teljes leltár export NDJSON / CSV formátumban, streamelve
+
+A tárgyak id szerinti kulcsos lapozással (WHERE id > utolsó ORDER BY id
+LIMIT n - nincs OFFSET) BATCH_SIZE soronként olvasódnak, a felhasználó, a
+helyszín és a képek ugyanabban a lekérdezésben (JOIN + tárgyankénti index
+keresés, a képek order_index, id sorrendben), így nincs N+1 lekérdezés.
+Egyszerre csak egy lap van a memóriában, ami rögtön szöveggé (és
+opcionálisan gzip-pé) alakul.
+
+Laponként rövid lekérdezés fut: SQLite-on nincs valódi szerver oldali
+kurzor, egy a letöltés végéig nyitva tartott kurzor pedig a lassú kliens
+ideje alatt is zárolná az írókat.
+
+A CSV fejléc az /api/import által ismert oszlopneveket használja, így az
+export visszatölthető.
+"""
+
+import csv
+import io
+import json
+import os
+import zlib
+from datetime import date, datetime
+from typing import Iterator, Optional
+import logging
+
+from sqlalchemy import func, select
+
+logger = logging.getLogger(__name__)
+
+# Konstansok
+BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "5000"))
+GZIP_LEVEL = int(os.getenv("EXPORT_GZIP_LEVEL", "6"))
+CSV_DELIMITER = ";"  # magyar Excel alapértelmezés
+IMAGE_SEPARATOR = "|"
+FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv; charset=utf-8"}
+
+FIELDS = [
+    "id", "name", "category", "description", "quantity", "min_quantity",
+    "purchase_price", "purchase_date", "notes", "user_id", "user",
+    "location_id", "location", "qr_code", "image_filename", "images",
+    "created_at", "updated_at",
+]
+# A CSV-ből az ID hivatkozások kimaradnak: importkor név / címke alapján oldódnak fel
+CSV_FIELDS = [field for field in FIELDS if field not in ("user_id", "location_id")]
+_CSV_INDEXES = [FIELDS.index(field) for field in CSV_FIELDS]
+
+
+def _statement():
+    from .. import models
+
+    Item, ItemImage, Location = models.Item, models.ItemImage, models.Location
+    # A group_concat sorrendje csak rendezett al-lekérdezésből garantált
+    ordered = (
+        select(ItemImage.filename)
+        .where(ItemImage.item_id == Item.id)
+        .order_by(ItemImage.order_index, ItemImage.id)
+        .correlate(Item)
+        .subquery()
+    )
+    images = select(func.group_concat(ordered.c.filename, IMAGE_SEPARATOR)).scalar_subquery()
+    # Ugyanaz a "Város, cím" címke, amit az import feloldásnál vár
+    location = Location.city + func.coalesce(", " + func.nullif(Location.address, ""), "")
+    return (
+        select(
+            Item.id, Item.name, Item.category, Item.description, Item.quantity, Item.min_quantity,
+            Item.purchase_price, Item.purchase_date, Item.notes, Item.user_id, models.User.username,
+            Item.location_id, location, Item.qr_code, Item.image_filename, images,
+            Item.created_at, Item.updated_at,
+        )
+        .outerjoin(models.User, models.User.id == Item.user_id)
+        .outerjoin(Location, Location.id == Item.location_id)
+        .order_by(Item.id)
+    )
+
+
+def iter_batches(batch_size: Optional[int] = None) -> Iterator[list]:
+    """
+    Tárgyak lapokban (FIELDS sorrendű sorok), laponként külön rövid lekérdezéssel
+    """
+    from .. import database, models
+
+    batch_size = batch_size or BATCH_SIZE
+    statement = _statement().limit(batch_size)
+    last_id = 0
+    while True:
+        with database.engine.connect() as conn:
+            rows = conn.execute(statement.where(models.Item.id > last_id)).all()
+        if not rows:
+            return
+        yield rows
+        last_id = rows[-1][0]
+
+
+def _value(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+def _ndjson(rows: list) -> str:
+    lines = []
+    for row in rows:
+        record = dict(zip(FIELDS, map(_value, row)))
+        record["images"] = record["images"].split(IMAGE_SEPARATOR) if record["images"] else []
+        lines.append(json.dumps(record, ensure_ascii=False))
+    lines.append("")
+    return "\n".join(lines)
+
+
+def _csv_writer():
+    buffer = io.StringIO()
+    return buffer, csv.writer(buffer, delimiter=CSV_DELIMITER, lineterminator="\r\n")
+
+
+def _csv(rows: list, buffer: io.StringIO, writer) -> str:
+    buffer.seek(0)
+    buffer.truncate()
+    writer.writerows([_value(row[index]) for index in _CSV_INDEXES] for row in rows)
+    return buffer.getvalue()
+
+
+def stream(fmt: str = "ndjson", gzip: bool = False, batch_size: Optional[int] = None) -> Iterator[bytes]:
+    """
+    Export byte darabok (laponként egy), opcionálisan gzip tömörítve
+
+    CSV esetén UTF-8 BOM + fejléc az elején (Excel így ismeri fel a kódolást).
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Nem támogatott formátum: {fmt}")
+
+    compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31) if gzip else None
+
+    def encode(text: str) -> bytes:
+        data = text.encode("utf-8")
+        return compressor.compress(data) if compressor else data
+
+    exported = 0
+    if fmt == "csv":
+        buffer, writer = _csv_writer()
+        writer.writerow(CSV_FIELDS)
+        chunk = encode("\ufeff" + buffer.getvalue())
+        if chunk:
+            yield chunk
+
+    for rows in iter_batches(batch_size):
+        text = _ndjson(rows) if fmt == "ndjson" else _csv(rows, buffer, writer)
+        exported += len(rows)
+        chunk = encode(text)
+        if chunk:
+            yield chunk
+
+    if compressor:
+        yield compressor.flush()
+    logger.info(f"📤 Export kész: {exported} tárgy ({fmt}{', gzip' if gzip else ''})")
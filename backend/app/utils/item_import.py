@@ -0,0 +1,349 @@
+"""
+Tárgyak importálása CSV / XLSX táblázatból
+
+A fájl soronként, folyamatosan olvasódik (a CSV szöveges stream, az XLSX az
+openpyxl read-only módjával), így a memóriahasználat a fájl méretétől
+független. A sorok BATCH_SIZE méretű darabokban validálódnak a
+schemas.ItemCreate ellen, a hivatkozott kategóriák / felhasználók /
+helyszínek egy induláskor betöltött memóriabeli táblából oldódnak fel (nem
+soronkénti lekérdezéssel), a helyes sorok darabonként egy többsoros
+INSERT-tel és egy commit-tal kerülnek be.
+
+Az eredmény események sorozata (haladás, soronkénti hibák, összesítés),
+amit az /api/import végpont NDJSON-ként streamel.
+"""
+
+import codecs
+import csv
+import io
+import json
+import os
+import re
+import time
+import unicodedata
+from datetime import date, datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+import logging
+
+from pydantic import ValidationError
+
+try:
+    # XLSX importhoz (opcionális - nélküle csak CSV)
+    import openpyxl
+except ImportError:
+    openpyxl = None
+
+logger = logging.getLogger(__name__)
+
+# Konstansok
+BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "2000"))
+MAX_REPORTED_ERRORS = int(os.getenv("IMPORT_MAX_REPORTED_ERRORS", "1000"))
+FORMATS = {
+    "csv": {"text/csv", "application/csv", "text/plain", "application/vnd.ms-excel"},
+    "xlsx": {"application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"},
+}
+
+# Fejléc -> mező (ékezet és kis/nagybetű független)
+HEADER_ALIASES = {
+    "name": "name", "nev": "name", "megnevezes": "name", "targy": "name",
+    "category": "category", "kategoria": "category",
+    "description": "description", "leiras": "description",
+    "quantity": "quantity", "mennyiseg": "quantity", "db": "quantity",
+    "min quantity": "min_quantity", "minimum mennyiseg": "min_quantity", "min mennyiseg": "min_quantity",
+    "purchase price": "purchase_price", "price": "purchase_price", "ar": "purchase_price", "beszerzesi ar": "purchase_price",
+    "purchase date": "purchase_date", "vasarlas datuma": "purchase_date", "vasarlas": "purchase_date", "beszerzes datuma": "purchase_date",
+    "notes": "notes", "megjegyzes": "notes",
+    "user": "user", "felhasznalo": "user", "tulajdonos": "user",
+    "user id": "user_id",
+    "location": "location", "helyszin": "location", "hely": "location",
+    "location id": "location_id",
+}
+
+_HU_DATE = re.compile(r"^(\d{4})\.\s*(\d{1,2})\.\s*(\d{1,2})\.?$")
+
+
+def _normalize_header(value) -> str:
+    text = unicodedata.normalize("NFKD", str(value or "")).encode("ascii", "ignore").decode()
+    return " ".join(re.sub(r"[_\-.]+", " ", text).lower().split())
+
+
+def _key(value: str) -> str:
+    return " ".join(str(value).lower().split())
+
+
+def detect_format(filename: Optional[str], content_type: Optional[str]) -> str:
+    """
+    Formátum a kiterjesztésből (ill. a content type-ból)
+
+    Raises:
+        ValueError: Nem támogatott formátum, vagy XLSX openpyxl nélkül
+    """
+    extension = os.path.splitext(filename or "")[1].lower().lstrip(".")
+    fmt = extension if extension in FORMATS else next(
+        (name for name, types in FORMATS.items() if content_type in types), None
+    )
+    if fmt is None:
+        raise ValueError("Nem támogatott formátum (csv vagy xlsx)")
+    if fmt == "xlsx" and openpyxl is None:
+        raise ValueError("XLSX importhoz az openpyxl csomag szükséges")
+    return fmt
+
+
+# ============= OLVASÁS =============
+
+def _iter_csv(binary) -> Iterator[list]:
+    sample = binary.read(64 * 1024)
+    binary.seek(0)
+    try:
+        sample.decode("utf-8-sig")
+        encoding = "utf-8-sig"
+    except UnicodeDecodeError as e:
+        # A minta végén elvágott többbájtos karakter nem számít; különben Excel (Windows-1250) export
+        encoding = "utf-8-sig" if e.start >= len(sample) - 3 else "cp1250"
+
+    text = io.TextIOWrapper(binary, encoding=encoding, newline="")
+    try:
+        head = codecs.decode(sample, encoding, errors="ignore")
+        dialect = csv.Sniffer().sniff(head.split("\n", 1)[0], delimiters=",;\t")
+    except csv.Error:
+        dialect = csv.excel
+    try:
+        yield from csv.reader(text, dialect)
+    finally:
+        text.detach()
+
+
+def _iter_xlsx(binary) -> Iterator[tuple]:
+    workbook = openpyxl.load_workbook(binary, read_only=True, data_only=True)
+    try:
+        yield from workbook.active.iter_rows(values_only=True)
+    finally:
+        workbook.close()
+
+
+def iter_records(binary, fmt: str) -> Iterator[Tuple[int, Dict]]:
+    """
+    (sorszám, {mező: érték}) párok; az első nem üres sor a fejléc
+
+    Raises:
+        ValueError: Hiányzó kötelező oszlop (név, kategória)
+    """
+    rows = _iter_csv(binary) if fmt == "csv" else _iter_xlsx(binary)
+    columns = None
+    for row_number, row in enumerate(rows, start=1):
+        if not any(value not in (None, "") for value in row):
+            continue
+        if columns is None:
+            columns = [HEADER_ALIASES.get(_normalize_header(value)) for value in row]
+            missing = {"name", "category"} - set(columns)
+            if missing:
+                raise ValueError(f"Hiányzó oszlop a fejlécben: {', '.join(sorted(missing))}")
+            continue
+        yield row_number, {field: value for field, value in zip(columns, row) if field}
+
+
+# ============= FELOLDÁS ÉS ÁTALAKÍTÁS =============
+
+class Lookups:
+    """
+    Kategóriák, felhasználók, helyszínek memóriában - importonként egyszer betöltve
+    """
+
+    def __init__(self, db):
+        from .. import models
+
+        self.categories = {_key(name): name for (name,) in db.query(models.Category.name)}
+        self.new_categories: Dict[str, str] = {}
+        self.users: Dict[str, int] = {}
+        self.user_ids = set()
+        for user in db.query(models.User.id, models.User.username, models.User.first_name, models.User.last_name):
+            self.user_ids.add(user.id)
+            for key in (user.username, f"{user.last_name} {user.first_name}", f"{user.first_name} {user.last_name}"):
+                self.users.setdefault(_key(key), user.id)
+        self.locations: Dict[str, int] = {}
+        self.location_ids = set()
+        for location in db.query(models.Location.id, models.Location.city, models.Location.address):
+            self.location_ids.add(location.id)
+            self.locations.setdefault(_key(", ".join(filter(None, (location.city, location.address)))), location.id)
+
+    def category(self, name: str) -> str:
+        key = _key(name)
+        return self.categories.get(key) or self.new_categories.get(key) or name
+
+    def register_category(self, name: str) -> None:
+        # Csak validált sor kategóriája jön létre
+        key = _key(name)
+        if key not in self.categories:
+            self.new_categories.setdefault(key, name)
+
+
+def _clean(value):
+    if isinstance(value, str):
+        value = value.strip()
+        return value or None
+    return value
+
+
+def _number(value):
+    if isinstance(value, str):
+        value = re.sub(r"\s|Ft$|HUF$", "", value, flags=re.IGNORECASE).replace(",", ".")
+    return value
+
+
+def _date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, str):
+        match = _HU_DATE.match(value)
+        if match:
+            return date(*(int(part) for part in match.groups()))
+    return value
+
+
+def _identifier(value) -> Optional[int]:
+    # Egész szám (xlsx-ben float is lehet); a nem számot a séma validálás jelzi
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return int(number) if number.is_integer() else None
+
+
+def prepare_row(record: Dict, lookups: Lookups) -> Tuple[Optional[Dict], List[str]]:
+    """
+    Nyers sor -> ItemCreate bemenet (feloldott hivatkozásokkal), vagy hibák
+    """
+    data = {field: _clean(value) for field, value in record.items()}
+    errors = []
+
+    for field in ("quantity", "min_quantity", "user_id", "location_id"):
+        if isinstance(data.get(field), str):
+            data[field] = _number(data[field])
+    if data.get("purchase_price") is not None:
+        data["purchase_price"] = _number(data["purchase_price"])
+    if data.get("purchase_date") is not None:
+        data["purchase_date"] = _date(data["purchase_date"])
+    if data.get("quantity") is None:
+        data.pop("quantity", None)
+    if data.get("category") is not None:
+        data["category"] = lookups.category(str(data["category"]))
+
+    user = data.pop("user", None)
+    if user is not None:
+        data["user_id"] = lookups.users.get(_key(user))
+        if data["user_id"] is None:
+            errors.append(f"Ismeretlen felhasználó: {user}")
+    location = data.pop("location", None)
+    if location is not None:
+        data["location_id"] = lookups.locations.get(_key(location))
+        if data["location_id"] is None:
+            errors.append(f"Ismeretlen helyszín: {location}")
+
+    # Közvetlen azonosítók: csak létező felhasználóra / helyszínre mutathatnak
+    for field, known, label in (("user_id", lookups.user_ids, "felhasználó"),
+                                ("location_id", lookups.location_ids, "helyszín")):
+        value = _identifier(data.get(field))
+        if value is not None and value not in known:
+            errors.append(f"Ismeretlen {label} azonosító: {data[field]}")
+        elif value is not None:
+            data[field] = value
+
+    return data, errors
+
+
+# ============= FELDOLGOZÁS =============
+
+def _flush_categories(db, lookups: Lookups) -> int:
+    from .. import models
+
+    if not lookups.new_categories:
+        return 0
+    names = list(lookups.new_categories.values())
+    db.bulk_insert_mappings(models.Category, [{"name": name} for name in names])
+    lookups.categories.update(lookups.new_categories)
+    lookups.new_categories.clear()
+    return len(names)
+
+
+def run_import(db, records: Iterator[Tuple[int, Dict]], dry_run: bool = False,
+               batch_size: Optional[int] = None) -> Iterator[Dict]:
+    """
+    Import események: {"event": "error" | "progress" | "done", ...}
+
+    Darabonként: validálás, helyes sorok beszúrása, commit, haladás esemény.
+    dry_run esetén csak validál, semmi nem íródik.
+    """
+    from .. import crud, schemas
+
+    batch_size = batch_size or BATCH_SIZE
+    started = time.perf_counter()
+    lookups = Lookups(db)
+    totals = {"rows": 0, "imported": 0, "failed": 0, "categories_created": 0}
+    reported = 0
+
+    def chunks():
+        chunk = []
+        for record in records:
+            chunk.append(record)
+            if len(chunk) >= batch_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    for chunk in chunks():
+        valid = []
+        for row_number, record in chunk:
+            data, errors = prepare_row(record, lookups)
+            if not errors:
+                try:
+                    valid.append(schemas.ItemCreate(**data))
+                    lookups.register_category(valid[-1].category)
+                except ValidationError as e:
+                    errors = [f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" for error in e.errors()]
+            if errors:
+                totals["failed"] += 1
+                if reported < MAX_REPORTED_ERRORS:
+                    reported += 1
+                    yield {"event": "error", "row": row_number, "errors": errors}
+
+        totals["rows"] += len(chunk)
+        if valid and not dry_run:
+            try:
+                totals["categories_created"] += _flush_categories(db, lookups)
+                crud.insert_items(db, valid)
+                db.commit()
+            except Exception:
+                db.rollback()
+                raise
+        totals["imported"] += len(valid)
+        yield {"event": "progress", **totals, "seconds": round(time.perf_counter() - started, 2)}
+
+    if dry_run:
+        totals["categories_created"] = len(lookups.new_categories)
+    seconds = round(time.perf_counter() - started, 2)
+    logger.info(f"📥 Import kész: {totals['imported']} tárgy, {totals['failed']} hibás sor ({seconds}s)")
+    yield {"event": "done", **totals, "dry_run": dry_run, "seconds": seconds}
+
+
+def stream_ndjson(path: str, fmt: str, dry_run: bool = False) -> Iterator[str]:
+    """
+    Import egy (ideiglenes) fájlból NDJSON eseményekként; a végén a fájl törlődik
+    """
+    from .. import database
+
+    db = database.SessionLocal()
+    try:
+        with open(path, "rb") as binary:
+            try:
+                for event in run_import(db, iter_records(binary, fmt), dry_run):
+                    yield json.dumps(event, ensure_ascii=False) + "\n"
+            except Exception as e:
+                logger.error(f"❌ Import hiba: {e}")
+                yield json.dumps({"event": "failed", "error": str(e)}, ensure_ascii=False) + "\n"
+    finally:
+        db.close()
+        try:
+            os.remove(path)
+        except OSError:
+            pass
@@ -0,0 +1,327 @@
+"""
+Tartós háttér feladat sor (SQLite "jobs" tábla) és worker pool
+
+A kérés csak beír egy sort a jobs táblába (enqueue) és azonnal válaszol; a
+workerek (az alkalmazás folyamatán belüli szálak, vagy a külön RUN_WORKER.py
+folyamat) egyetlen atomi UPDATE ... RETURNING utasítással foglalnak le egy
+esedékes feladatot, így több worker / több folyamat sem kapja meg ugyanazt.
+Az azonos lock_key-ű feladatok (pl. ugyanannak a képfájlnak a feldolgozása
+és forgatása) ugyanebben a foglalásban sorosítódnak: amíg egy ilyen fut
+(élő foglalással), a többi nem foglalható le - folyamatok között is.
+
+Hiba esetén a feladat exponenciális várakozással (RETRY_BASE_SECONDS * 2^n)
+újra sorba kerül, max_attempts próbálkozás után "failed" lesz. Ha egy worker
+futás közben leáll, a feladat foglalása LEASE idő után lejár, és egy másik
+worker újra felveszi - a handlereknek ezért idempotensnek kell lenniük.
+
+A feladat típusokat (kind) a handler() dekorátorral lehet regisztrálni
+(lásd app/jobs.py).
+"""
+
+import os
+import socket
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Konstansok
+WORKERS = int(os.getenv("JOB_WORKERS", "2"))  # 0: csak külön worker folyamat dolgozik
+POLL_INTERVAL = float(os.getenv("JOB_POLL_SECONDS", "1"))
+LEASE = timedelta(seconds=int(os.getenv("JOB_LEASE_SECONDS", "300")))
+RETRY_BASE_SECONDS = float(os.getenv("JOB_RETRY_BASE_SECONDS", "5"))
+MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+KEEP_FINISHED = timedelta(days=int(os.getenv("JOB_KEEP_DAYS", "7")))
+STATUSES = ("queued", "running", "succeeded", "failed")
+
+# kind -> {"run": payload -> eredmény, "on_failure": (payload, hiba) -> None}
+HANDLERS: Dict[str, Dict[str, Optional[Callable]]] = {}
+
+_wakeup = threading.Event()
+_stop = threading.Event()
+_threads: List[threading.Thread] = []
+
+
+def handler(kind: str, on_failure: Optional[Callable] = None):
+    """
+    Feladat típus regisztrálása
+
+    A handler a payload dict-et kapja, és JSON-ba írható eredményt (vagy None-t)
+    ad vissza. Kivétel esetén a feladat újrapróbálásra kerül; az on_failure a
+    végleges (utolsó próbálkozás utáni) hibánál fut le.
+    """
+    def decorator(func: Callable) -> Callable:
+        HANDLERS[kind] = {"run": func, "on_failure": on_failure}
+        return func
+    return decorator
+
+
+def enqueue(db, kind: str, payload: Dict, dedupe_key: Optional[str] = None,
+            max_attempts: int = MAX_ATTEMPTS, lock_key: Optional[str] = None):
+    """
+    Feladat sorba állítása (commitol)
+
+    Ha dedupe_key-jel már vár (queued) egy feladat, azt adja vissza új sor
+    helyett - pl. többszöri gyors forgatásnál elég egyszer renderelni. A már
+    futó feladat nem számít: az új sor utána fut, a friss állapottal.
+
+    lock_key: az azonos kulcsú feladatok nem futnak egyszerre (alapértelmezés:
+    a dedupe_key)
+
+    Returns:
+        models.Job
+    """
+    from .. import models
+
+    if dedupe_key:
+        existing = db.query(models.Job).filter(
+            models.Job.dedupe_key == dedupe_key,
+            models.Job.status == "queued"
+        ).first()
+        if existing:
+            return existing
+
+    now = datetime.now()
+    job = models.Job(
+        kind=kind,
+        payload=payload,
+        dedupe_key=dedupe_key,
+        lock_key=lock_key or dedupe_key,
+        status="queued",
+        attempts=0,
+        max_attempts=max_attempts,
+        run_after=now,
+        created_at=now
+    )
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+
+    logger.info(f"📥 Feladat sorban: #{job.id} {kind}")
+    _wakeup.set()
+    return job
+
+
+def claim_next(worker_id: str) -> Optional[Dict]:
+    """
+    Egy esedékes (vagy lejárt foglalású) feladat atomi lefoglalása
+
+    Az a feladat kimarad, amelynek lock_key-jét egy másik, élő foglalású
+    futó feladat tartja - egyetlen UPDATE, így folyamatok között is atomi.
+
+    Returns:
+        {"id", "kind", "payload", "attempts", "max_attempts"} vagy None
+    """
+    from sqlalchemy import and_, or_, select, update
+    from sqlalchemy.orm import aliased
+    from .. import database, models
+
+    Job = models.Job
+    Holder = aliased(Job)
+    now = datetime.now()
+    held = select(Holder.lock_key).where(
+        Holder.status == "running",
+        Holder.locked_at >= now - LEASE,
+        Holder.lock_key.isnot(None),
+    )
+    next_id = (
+        select(Job.id)
+        .where(or_(
+            and_(Job.status == "queued", Job.run_after <= now),
+            and_(Job.status == "running", Job.locked_at < now - LEASE),
+        ))
+        .where(or_(Job.lock_key.is_(None), Job.lock_key.not_in(held)))
+        .order_by(Job.run_after, Job.id)
+        .limit(1)
+        .scalar_subquery()
+    )
+    statement = (
+        update(Job)
+        .where(Job.id == next_id)
+        .values(status="running", locked_by=worker_id, locked_at=now, attempts=Job.attempts + 1)
+        .returning(Job.id, Job.kind, Job.payload, Job.attempts, Job.max_attempts)
+    )
+
+    with database.engine.begin() as conn:
+        row = conn.execute(statement).first()
+    return dict(row._mapping) if row else None
+
+
+def _finish(job: Dict, worker_id: str, values: Dict) -> None:
+    from sqlalchemy import update
+    from .. import database, models
+
+    Job = models.Job
+    with database.engine.begin() as conn:
+        # Csak a saját foglalást zárjuk le (lejárt lease után más worker viheti)
+        conn.execute(
+            update(Job)
+            .where(Job.id == job["id"], Job.locked_by == worker_id)
+            .values(locked_by=None, locked_at=None, **values)
+        )
+
+
+def run_job(job: Dict, worker_id: str) -> bool:
+    """
+    Egy lefoglalt feladat futtatása és az eredmény / hiba rögzítése
+
+    Returns:
+        bool: Sikeres volt-e
+    """
+    registered = HANDLERS.get(job["kind"])
+    started = time.perf_counter()
+
+    try:
+        if registered is None:
+            raise ValueError(f"Ismeretlen feladat típus: {job['kind']}")
+        result = registered["run"](job["payload"] or {})
+    except Exception as e:
+        final = job["attempts"] >= job["max_attempts"] or registered is None
+        if final:
+            logger.error(f"❌ Feladat végleg sikertelen: #{job['id']} {job['kind']} ({job['attempts']}. próba): {e}")
+            _finish(job, worker_id, {"status": "failed", "last_error": str(e), "finished_at": datetime.now()})
+            if registered and registered["on_failure"]:
+                try:
+                    registered["on_failure"](job["payload"] or {}, e)
+                except Exception as hook_error:
+                    logger.error(f"❌ on_failure hiba (#{job['id']}): {hook_error}")
+        else:
+            delay = RETRY_BASE_SECONDS * 2 ** (job["attempts"] - 1)
+            logger.warning(f"⚠️  Feladat hiba: #{job['id']} {job['kind']}, újrapróbálás {delay:.0f}s múlva: {e}")
+            _finish(job, worker_id, {
+                "status": "queued",
+                "last_error": str(e),
+                "run_after": datetime.now() + timedelta(seconds=delay)
+            })
+        return False
+
+    _finish(job, worker_id, {"status": "succeeded", "result": result, "last_error": None, "finished_at": datetime.now()})
+    logger.info(f"✅ Feladat kész: #{job['id']} {job['kind']} ({(time.perf_counter() - started) * 1000:.0f} ms)")
+    return True
+
+
+def run_pending(worker_id: str = "inline", limit: Optional[int] = None) -> int:
+    """
+    Esedékes feladatok futtatása a hívó szálon, amíg van (vagy limit-ig)
+
+    Returns:
+        int: Lefuttatott feladatok száma
+    """
+    done = 0
+    while limit is None or done < limit:
+        job = claim_next(worker_id)
+        if job is None:
+            break
+        run_job(job, worker_id)
+        done += 1
+    return done
+
+
+def _worker_loop(worker_id: str) -> None:
+    logger.info(f"👷 Worker elindult: {worker_id}")
+    while not _stop.is_set():
+        try:
+            job = claim_next(worker_id)
+        except Exception as e:
+            logger.error(f"❌ Feladat foglalási hiba ({worker_id}): {e}")
+            job = None
+
+        if job is not None:
+            run_job(job, worker_id)
+            continue
+
+        _wakeup.wait(POLL_INTERVAL)
+        _wakeup.clear()
+
+
+def start_workers(count: int = WORKERS) -> List[threading.Thread]:
+    """
+    Worker szálak indítása (daemon szálak, a folyamattal együtt állnak le)
+    """
+    _stop.clear()
+    prefix = f"{socket.gethostname()}:{os.getpid()}"
+    for _ in range(count):
+        thread = threading.Thread(
+            target=_worker_loop, args=(f"{prefix}:{len(_threads) + 1}",),
+            name=f"job-worker-{len(_threads) + 1}", daemon=True
+        )
+        thread.start()
+        _threads.append(thread)
+    return list(_threads)
+
+
+def worker_count() -> int:
+    """
+    Ebben a folyamatban futó worker szálak száma
+    """
+    return sum(1 for thread in _threads if thread.is_alive())
+
+
+def stop_workers(timeout: float = 10.0) -> None:
+    """
+    Workerek leállítása: a futó feladatot még befejezik
+    """
+    _stop.set()
+    _wakeup.set()
+    for thread in _threads:
+        thread.join(timeout)
+    _threads.clear()
+
+
+def retry(db, job_id: int):
+    """
+    Sikertelen feladat újra sorba állítása (a próbálkozás számláló nullázódik)
+
+    Raises:
+        LookupError: Ha nincs ilyen feladat
+        ValueError: Ha a feladat nem "failed" állapotú
+    """
+    from .. import models
+
+    job = db.get(models.Job, job_id)
+    if job is None:
+        raise LookupError(f"Feladat nem található: {job_id}")
+    if job.status != "failed":
+        raise ValueError(f"Csak sikertelen feladat indítható újra (állapot: {job.status})")
+
+    job.status = "queued"
+    job.attempts = 0
+    job.run_after = datetime.now()
+    job.finished_at = None
+    db.commit()
+    db.refresh(job)
+    _wakeup.set()
+    return job
+
+
+def stats(db) -> Dict:
+    """
+    Feladatok száma állapotonként
+    """
+    from sqlalchemy import func
+    from .. import models
+
+    counts = dict(
+        db.query(models.Job.status, func.count(models.Job.id)).group_by(models.Job.status).all()
+    )
+    return {status: counts.get(status, 0) for status in STATUSES}
+
+
+def prune_finished(older_than: timedelta = KEEP_FINISHED) -> int:
+    """
+    Régi sikeres feladatok törlése (a sikerteleneket megtartjuk vizsgálatra)
+    """
+    from sqlalchemy import delete
+    from .. import database, models
+
+    cutoff = datetime.now() - older_than
+    with database.engine.begin() as conn:
+        result = conn.execute(
+            delete(models.Job).where(models.Job.status == "succeeded", models.Job.finished_at < cutoff)
+        )
+    if result.rowcount:
+        logger.info(f"🧹 {result.rowcount} régi feladat törölve")
+    return result.rowcount
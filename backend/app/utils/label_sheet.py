@@ -0,0 +1,308 @@
+"""
+Nyomtatható QR címke ívek (A4 / etikett ívek) PDF vagy PNG oldalakként
+
+Az ív oldalanként készül: egy oldal képét megrajzoljuk, kódoljuk és azonnal
+kiadjuk (PDF objektumként vagy ZIP bejegyzésként), így egy több ezer címkés
+nyomtatás sem tartja az összes oldalt a memóriában. A QR mátrixok a
+qr_handler cache-éből jönnek, címkénként csak a kirajzolás történik meg.
+"""
+
+import functools
+import io
+import os
+import zipfile
+import zlib
+import logging
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from PIL import Image, ImageDraw, ImageFont
+
+from . import qr_handler
+
+logger = logging.getLogger(__name__)
+
+# Konstansok
+DPI = int(os.getenv("LABEL_SHEET_DPI", "300"))
+FONT_PATH = os.getenv("LABEL_FONT_PATH", "")  # üres: az első elérhető rendszer betűtípus
+# Ékezetes (ő, ű) karaktereket is tartalmazó rendszer betűtípusok (Linux, Windows, macOS);
+# a Pillow beépített betűtípusa csak végső tartalék, abban nincsenek meg ezek a karakterek
+SYSTEM_FONTS = ("DejaVuSans.ttf", "LiberationSans-Regular.ttf", "arial.ttf", "Arial.ttf", "NotoSans-Regular.ttf")
+QR_BORDER = 2  # csendes zóna modulokban (mint a letölthető QR képeknél)
+PADDING_MM = 2.0
+
+# Ív elrendezések (mm): oldal, rács, címke méret, bal felső sarok, osztás
+LAYOUTS: Dict[str, Dict] = {
+    "a4-3x8": {"page": (210, 297), "cols": 3, "rows": 8, "label": (70, 37), "origin": (0, 0.5), "pitch": (70, 37)},
+    "a4-2x7": {"page": (210, 297), "cols": 2, "rows": 7, "label": (99.1, 38.1), "origin": (4.65, 15.15), "pitch": (101.6, 38.1)},
+    "a4-5x13": {"page": (210, 297), "cols": 5, "rows": 13, "label": (38.1, 21.2), "origin": (4.75, 10.7), "pitch": (40.6, 21.2)},
+    "a4-4x6": {"page": (210, 297), "cols": 4, "rows": 6, "label": (47.5, 46), "origin": (10, 10.5), "pitch": (47.5, 46)},
+}
+FORMATS = {"pdf": "application/pdf", "png": "image/png", "zip": "application/zip"}
+
+_POINTS_PER_MM = 72 / 25.4
+_fallback_warned = False
+
+
+def _px(mm: float) -> int:
+    return round(mm / 25.4 * DPI)
+
+
+@functools.lru_cache(maxsize=32)
+def _font(size_px: int) -> ImageFont.FreeTypeFont:
+    global _fallback_warned
+    if FONT_PATH:
+        return ImageFont.truetype(FONT_PATH, size_px)
+    for name in SYSTEM_FONTS:
+        try:
+            return ImageFont.truetype(name, size_px)
+        except OSError:
+            continue
+    if not _fallback_warned:
+        _fallback_warned = True
+        logger.warning("⚠️  Címke ív: nincs ékezetes betűtípus, a beépített lesz használva (LABEL_FONT_PATH)")
+    return ImageFont.load_default(size=size_px)
+
+
+def labels_per_page(layout: str) -> int:
+    config = LAYOUTS[layout]
+    return config["cols"] * config["rows"]
+
+
+def page_count(label_count: int, layout: str, skip: int = 0) -> int:
+    """
+    Oldalak száma (skip: az első íven már felhasznált címkék száma)
+    """
+    if label_count == 0:
+        return 0
+    per_page = labels_per_page(layout)
+    return (skip % per_page + label_count + per_page - 1) // per_page
+
+
+# ============= RAJZOLÁS =============
+
+def _wrap(draw: ImageDraw.ImageDraw, text: str, font, width: int, max_lines: int) -> List[str]:
+    """
+    Szöveg tördelése a megadott szélességre; ami nem fér el, "…"-vel levágjuk
+    """
+    lines: List[str] = []
+    current = ""
+    for word in text.split():
+        candidate = f"{current} {word}".strip()
+        if draw.textlength(candidate, font=font) <= width:
+            current = candidate
+            continue
+        if current:
+            lines.append(current)
+        current = word
+        if len(lines) == max_lines:
+            break
+    if current and len(lines) < max_lines:
+        lines.append(current)
+
+    if len(lines) == max_lines and " ".join(lines) != " ".join(text.split()):
+        last = lines[-1]
+        while last and draw.textlength(last + "…", font=font) > width:
+            last = last[:-1]
+        lines[-1] = last.rstrip() + "…"
+    return lines
+
+
+def _draw_label(page: Image.Image, draw: ImageDraw.ImageDraw, box: Tuple[int, int, int, int], qr_code: str, name: str) -> None:
+    left, top, width, height = box
+    pad = _px(PADDING_MM)
+    matrix = qr_handler.qr_matrix(qr_code)
+    modules = len(matrix) + 2 * QR_BORDER
+
+    # Fekvő címkén a QR balra, a szöveg jobbra; álló / négyzetes címkén a szöveg alul
+    landscape = width >= 1.6 * height
+    if landscape:
+        qr_space = height - 2 * pad
+    else:
+        qr_space = min(width - 2 * pad, int((height - 2 * pad) * 0.72))
+    box_size = max(qr_space // modules, 1)
+    qr_image = qr_handler.matrix_image(matrix, QR_BORDER, box_size)
+    qr_side = qr_image.width
+
+    if landscape:
+        qr_pos = (left + pad, top + (height - qr_side) // 2)
+        text_left, text_top = qr_pos[0] + qr_side + pad, top + pad
+        text_width, text_height = width - qr_side - 3 * pad, height - 2 * pad
+    else:
+        qr_pos = (left + (width - qr_side) // 2, top + pad)
+        text_left, text_top = left + pad, qr_pos[1] + qr_side
+        text_width, text_height = width - 2 * pad, top + height - pad - text_top
+    page.paste(qr_image, qr_pos)
+
+    if text_width <= 0 or text_height <= 0:
+        return
+    name_font = _font(max(min(text_height // 5, _px(3.5)), 6))
+    code_font = _font(max(int(name_font.size * 0.75), 6))
+    line_height = int(name_font.size * 1.15)
+    code_height = int(code_font.size * 1.2)
+    max_lines = max((text_height - code_height) // line_height, 1)
+
+    y = text_top
+    for line in _wrap(draw, name, name_font, text_width, max_lines):
+        draw.text((text_left, y), line, fill=0, font=name_font)
+        y += line_height
+    if y + code_height <= text_top + text_height or not landscape:
+        draw.text((text_left, y), qr_code, fill=0, font=code_font)
+
+
+def iter_pages(labels: List[Tuple[str, str]], layout: str, skip: int = 0) -> Iterator[Image.Image]:
+    """
+    Ív oldalak egyenként ("L" módú képek, DPI felbontásban)
+
+    Args:
+        labels: [(qr_code, név), ...] a nyomtatási sorrendben
+        skip: Az első íven kihagyott (már felhasznált) címkehelyek száma
+    """
+    config = LAYOUTS[layout]
+    per_page = labels_per_page(layout)
+    page_size = (_px(config["page"][0]), _px(config["page"][1]))
+    label_size = (_px(config["label"][0]), _px(config["label"][1]))
+
+    slot = skip % per_page
+    index = 0
+    while index < len(labels):
+        page = Image.new("L", page_size, 255)
+        draw = ImageDraw.Draw(page)
+        while slot < per_page and index < len(labels):
+            row, col = divmod(slot, config["cols"])
+            left = _px(config["origin"][0] + col * config["pitch"][0])
+            top = _px(config["origin"][1] + row * config["pitch"][1])
+            qr_code, name = labels[index]
+            _draw_label(page, draw, (left, top, *label_size), qr_code, name)
+            slot += 1
+            index += 1
+        yield page
+        slot = 0
+
+
+def _png_bytes(page: Image.Image) -> bytes:
+    buffer = io.BytesIO()
+    page.save(buffer, "PNG", dpi=(DPI, DPI))
+    return buffer.getvalue()
+
+
+def render_png_page(labels: List[Tuple[str, str]], layout: str, page: int, skip: int = 0) -> Optional[bytes]:
+    """
+    Egyetlen oldal PNG-ként (1-től számozva); None, ha nincs ilyen oldal
+    """
+    per_page = labels_per_page(layout)
+    first_slot = skip % per_page
+    if page < 1 or page > page_count(len(labels), layout, skip):
+        return None
+    # Csak a kért oldal címkéit rajzoljuk meg
+    start = 0 if page == 1 else (page - 1) * per_page - first_slot
+    end = per_page - first_slot if page == 1 else start + per_page
+    return _png_bytes(next(iter_pages(labels[start:end], layout, first_slot if page == 1 else 0)))
+
+
+# ============= KIMENETI STREAMEK =============
+
+class _PdfStream:
+    """
+    Minimális PDF író, amely az objektumokat a keletkezésük sorrendjében adja ki
+
+    Oldalanként egy Flate tömörített szürkeárnyalatos kép objektum, egy
+    tartalom stream és egy Page objektum készül; a Pages fa és az xref tábla
+    a végén kerül kiírásra (a Pages objektum száma előre le van foglalva).
+    """
+
+    def __init__(self, page_mm: Tuple[float, float]):
+        self.width_pt = page_mm[0] * _POINTS_PER_MM
+        self.height_pt = page_mm[1] * _POINTS_PER_MM
+        self.offsets: Dict[int, int] = {}
+        self.position = 0
+        self.next_id = 3  # 1: Catalog, 2: Pages
+        self.kids: List[int] = []
+
+    def _object(self, obj_id: int, body: bytes) -> bytes:
+        data = f"{obj_id} 0 obj\n".encode() + body + b"\nendobj\n"
+        self.offsets[obj_id] = self.position
+        self.position += len(data)
+        return data
+
+    def _stream(self, obj_id: int, attributes: str, data: bytes) -> bytes:
+        return self._object(obj_id, f"<< {attributes} /Length {len(data)} >>\nstream\n".encode() + data + b"\nendstream")
+
+    def start(self) -> bytes:
+        header = b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n"
+        self.position = len(header)
+        return header + self._object(1, b"<< /Type /Catalog /Pages 2 0 R >>")
+
+    def page(self, image: Image.Image) -> bytes:
+        image_id, content_id, page_id = self.next_id, self.next_id + 1, self.next_id + 2
+        self.next_id += 3
+        self.kids.append(page_id)
+
+        size = f"{self.width_pt:.2f} 0 0 {self.height_pt:.2f}"
+        return b"".join([
+            self._stream(
+                image_id,
+                f"/Type /XObject /Subtype /Image /Width {image.width} /Height {image.height} "
+                f"/ColorSpace /DeviceGray /BitsPerComponent 8 /Filter /FlateDecode",
+                zlib.compress(image.tobytes(), 6)
+            ),
+            self._stream(content_id, "", f"q {size} 0 0 cm /Im0 Do Q".encode()),
+            self._object(
+                page_id,
+                f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {self.width_pt:.2f} {self.height_pt:.2f}] "
+                f"/Resources << /XObject << /Im0 {image_id} 0 R >> >> /Contents {content_id} 0 R >>".encode()
+            ),
+        ])
+
+    def finish(self) -> bytes:
+        kids = " ".join(f"{kid} 0 R" for kid in self.kids)
+        data = self._object(2, f"<< /Type /Pages /Kids [{kids}] /Count {len(self.kids)} >>".encode())
+
+        xref_offset = self.position
+        size = self.next_id
+        xref = [f"xref\n0 {size}\n", "0000000000 65535 f \n"]
+        xref.extend(f"{self.offsets[obj_id]:010d} 00000 n \n" for obj_id in range(1, size))
+        xref.append(f"trailer\n<< /Size {size} /Root 1 0 R >>\nstartxref\n{xref_offset}\n%%EOF\n")
+        return data + "".join(xref).encode()
+
+
+def iter_pdf(labels: List[Tuple[str, str]], layout: str, skip: int = 0) -> Iterator[bytes]:
+    """
+    PDF ív stream: a fejléc után oldalanként egy darab, végül a lezárás (xref)
+    """
+    pdf = _PdfStream(LAYOUTS[layout]["page"])
+    head = pdf.start()
+    for page in iter_pages(labels, layout, skip):
+        yield head + pdf.page(page)
+        head = b""
+    yield head + pdf.finish()
+
+
+class _ChunkWriter(io.RawIOBase):
+    """Nem kereshető (seek nélküli) cél a zipfile-nak: a kiírt bájtokat gyűjti"""
+
+    def __init__(self):
+        self.buffer = bytearray()
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self.buffer.extend(data)
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = bytes(self.buffer)
+        self.buffer.clear()
+        return data
+
+
+def iter_png_zip(labels: List[Tuple[str, str]], layout: str, skip: int = 0) -> Iterator[bytes]:
+    """
+    PNG oldalak ZIP streamben (page-001.png, ...), oldalanként kiadva
+    """
+    writer = _ChunkWriter()
+    with zipfile.ZipFile(writer, "w", compression=zipfile.ZIP_STORED) as archive:
+        for number, page in enumerate(iter_pages(labels, layout, skip), start=1):
+            archive.writestr(f"page-{number:03d}.png", _png_bytes(page))
+            yield writer.drain()
+    yield writer.drain()
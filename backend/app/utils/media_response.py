@@ -0,0 +1,458 @@
+"""
+Fájl válaszok a média végpontokhoz (képek, dokumentumok, QR kódok)
+
+Gyorsítótárazás: a tartalom alapú fájlok (a név a tartalom SHA-256 hash-e,
+feltöltéskor számoljuk) soha nem változnak, ezért egy évig "immutable"
+Cache-Control-lal és a fájlnévből képzett erős ETag-gel szolgáljuk ki őket -
+kérésenkénti stat vagy hash számítás nélkül. A QR kódok ugyanazon a néven
+újragenerálódhatnak, ezért azoknál Last-Modified alapú újraellenőrzést kérünk.
+
+Részleges letöltés: Range / If-Range (egy vagy több tartomány, utóbbi
+multipart/byteranges válaszként), így a böngésző PDF nézője progresszívan
+tölthet, a megszakadt letöltés pedig folytatható. Ha az ASGI szerver
+támogatja a "http.response.zerocopy" kiterjesztést, a bájtokat sendfile-lal
+küldjük, különben darabolva olvassuk.
+
+Alapesetben a Python folyamat küldi a bájtokat.
+X_ACCEL_REDIRECT=true esetén a végpont csak az adatbázis ellenőrzést és az
+útvonal feloldást végzi, a fájlt az előtte álló nginx szolgálja ki egy
+belső (internal) location-ből - így a worker nem foglalódik le a
+letöltés idejére. A hozzá tartozó nginx konfiguráció: frontend/nginx.conf.
+"""
+
+import os
+import re
+import uuid
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Dict, List, Mapping, Optional, Tuple
+from urllib.parse import quote
+import logging
+
+import anyio
+from fastapi.responses import FileResponse, Response
+from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers
+from starlette.types import Receive, Scope, Send
+
+from . import blob_store, image_handler, document_handler, qr_handler, derivative_cache
+
+logger = logging.getLogger(__name__)
+
+# Konstansok
+ACCEL_ENABLED = os.getenv("X_ACCEL_REDIRECT", "false").lower() in ("1", "true", "yes")
+ACCEL_PREFIX = os.getenv("X_ACCEL_PREFIX", "/_protected").rstrip("/")
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "no-cache"  # tárolható, de minden használat előtt ellenőrizni kell
+LEGACY_CACHE_CONTROL = "public, max-age=86400"  # régi, véletlen nevű (nem tartalom alapú) fájlok
+
+# A 304 válaszban is továbbadandó fejlécek
+_NOT_MODIFIED_HEADERS = ("cache-control", "etag", "last-modified", "vary", "expires")
+
+# Range: ennél több (összevonás utáni) tartomány esetén a teljes fájlt küldjük
+MAX_RANGES = 16
+CHUNK_SIZE = 64 * 1024
+_RANGE_SPEC = re.compile(r"^\s*(\d*)\s*-\s*(\d*)\s*$")
+
+
+def etag_for(name: str) -> str:
+    """
+    Erős ETag egy változatlan reprezentációhoz: maga a fájlnév
+    (tartalom alapú nevekben benne van a feltöltéskor számolt hash)
+    """
+    return f'"{name}"'
+
+
+def cache_headers(name: str) -> Dict[str, str]:
+    """
+    Cache fejlécek egy fájlnévhez: tartalom alapú névnél immutable + ETag,
+    egyébként üres (a hívó dönt, pl. a FileResponse stat alapú fejlécei)
+    """
+    if blob_store.is_content_addressed(name):
+        return {"Cache-Control": IMMUTABLE_CACHE_CONTROL, "ETag": etag_for(name)}
+    return {}
+
+
+def is_not_modified(request_headers: Mapping[str, str], response_headers: Mapping[str, str]) -> bool:
+    """
+    Feltételes kérés kiértékelése (RFC 9110): ha van If-None-Match, csak azt
+    nézzük (gyenge összehasonlítással), különben az If-Modified-Since-t
+    """
+    if_none_match = request_headers.get("if-none-match")
+    if if_none_match is not None:
+        etag = response_headers.get("etag")
+        if not etag:
+            return False
+        if if_none_match.strip() == "*":
+            return True
+        candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return etag.removeprefix("W/") in candidates
+
+    if_modified_since = request_headers.get("if-modified-since")
+    last_modified = response_headers.get("last-modified")
+    if if_modified_since and last_modified:
+        try:
+            return parsedate_to_datetime(if_modified_since) >= parsedate_to_datetime(last_modified)
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def not_modified_response(headers: Mapping[str, str]) -> Response:
+    """
+    304 Not Modified a validátor és cache fejlécekkel, törzs nélkül
+    """
+    kept = {k: v for k, v in headers.items() if k.lower() in _NOT_MODIFIED_HEADERS}
+    return Response(status_code=304, headers=kept)
+
+
+# ============= RANGE KÉRÉSEK =============
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def parse_range(header: str, size: int) -> Optional[List[Tuple[int, int]]]:
+    """
+    Range fejléc feldolgozása (RFC 9110 14.2)
+
+    Returns:
+        Rendezett, összevont (kezdet, vég) bájt tartományok (zárt intervallum),
+        vagy None ha a fejléc érvénytelen / túl sok tartományt kér (ilyenkor
+        a teljes fájlt küldjük)
+
+    Raises:
+        RangeNotSatisfiable: Ha egyik tartomány sem esik a fájlba (416)
+    """
+    unit, _, specs = header.partition("=")
+    if unit.strip().lower() != "bytes" or not specs:
+        return None
+
+    ranges = []
+    for spec in specs.split(","):
+        match = _RANGE_SPEC.match(spec)
+        if not match or (not match.group(1) and not match.group(2)):
+            return None
+        first, last = match.group(1), match.group(2)
+        if first:
+            start = int(first)
+            end = int(last) if last else size - 1
+            if last and end < start:
+                return None
+            if start >= size:
+                continue
+        else:
+            # Utótag tartomány: az utolsó N bájt
+            suffix = int(last)
+            if suffix == 0:
+                continue
+            start, end = max(0, size - suffix), size - 1
+        ranges.append((start, min(end, size - 1)))
+
+    if not ranges:
+        raise RangeNotSatisfiable()
+
+    # Átfedő / szomszédos tartományok összevonása
+    ranges.sort()
+    merged = [ranges[0]]
+    for start, end in ranges[1:]:
+        last_start, last_end = merged[-1]
+        if start <= last_end + 1:
+            merged[-1] = (last_start, max(last_end, end))
+        else:
+            merged.append((start, end))
+
+    if len(merged) > MAX_RANGES:
+        return None
+    return merged
+
+
+def if_range_matches(if_range: Optional[str], etag: Optional[str], last_modified: Optional[str]) -> bool:
+    """
+    If-Range: a részleges választ csak változatlan reprezentációra adjuk
+    (erős ETag egyezés vagy pontos Last-Modified egyezés)
+    """
+    if not if_range:
+        return True
+    if_range = if_range.strip()
+    if if_range.startswith('"') or if_range.startswith("W/"):
+        return bool(etag) and not if_range.startswith("W/") and if_range == etag
+    return bool(last_modified) and if_range == last_modified
+
+
+class RangeFileResponse(FileResponse):
+    """
+    FileResponse Range / If-Range támogatással és zero-copy küldéssel
+    """
+
+    def __init__(self, path, *args, range_header: Optional[str] = None,
+                 if_range: Optional[str] = None, **kwargs):
+        super().__init__(path, *args, **kwargs)
+        self.range_header = range_header
+        self.if_range = if_range
+        self.headers.setdefault("accept-ranges", "bytes")
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if self.stat_result is None:
+            try:
+                self.stat_result = await anyio.to_thread.run_sync(os.stat, self.path)
+            except FileNotFoundError:
+                raise RuntimeError(f"File at path {self.path} does not exist.")
+            self.set_stat_headers(self.stat_result)
+
+        size = self.stat_result.st_size
+        ranges = None
+        if self.range_header and self.status_code == 200 and if_range_matches(
+            self.if_range, self.headers.get("etag"), self.headers.get("last-modified")
+        ):
+            try:
+                ranges = parse_range(self.range_header, size)
+            except RangeNotSatisfiable:
+                await send({
+                    "type": "http.response.start",
+                    "status": 416,
+                    "headers": [
+                        (b"content-range", f"bytes */{size}".encode("latin-1")),
+                        (b"content-length", b"0"),
+                        (b"accept-ranges", b"bytes"),
+                    ],
+                })
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+                return
+
+        parts: List[Tuple[bytes, int, int]] = []
+        trailer = b""
+        if ranges is None:
+            status = self.status_code
+            if size:
+                parts.append((b"", 0, size))
+        elif len(ranges) == 1:
+            status = 206
+            start, end = ranges[0]
+            self.headers["content-range"] = f"bytes {start}-{end}/{size}"
+            self.headers["content-length"] = str(end - start + 1)
+            parts.append((b"", start, end - start + 1))
+        else:
+            status = 206
+            boundary = uuid.uuid4().hex
+            part_type = self.media_type or "application/octet-stream"
+            for start, end in ranges:
+                part_header = (
+                    f"\r\n--{boundary}\r\n"
+                    f"Content-Type: {part_type}\r\n"
+                    f"Content-Range: bytes {start}-{end}/{size}\r\n\r\n"
+                ).encode("latin-1")
+                parts.append((part_header, start, end - start + 1))
+            trailer = f"\r\n--{boundary}--\r\n".encode("latin-1")
+            self.headers["content-type"] = f"multipart/byteranges; boundary={boundary}"
+            self.headers["content-length"] = str(sum(len(h) + n for h, _, n in parts) + len(trailer))
+
+        await send({"type": "http.response.start", "status": status, "headers": self.raw_headers})
+
+        if self.send_header_only:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+        else:
+            await self._send_parts(scope, send, parts, trailer)
+
+        if self.background is not None:
+            await self.background()
+
+    async def _send_parts(self, scope: Scope, send: Send, parts: List[Tuple[bytes, int, int]], trailer: bytes) -> None:
+        zerocopy = "http.response.zerocopy" in scope.get("extensions", {})
+
+        if zerocopy:
+            # sendfile: a kernel másol közvetlenül a fájlból a socketbe
+            with open(self.path, "rb") as file:
+                for index, (part_header, offset, count) in enumerate(parts):
+                    if part_header:
+                        await send({"type": "http.response.body", "body": part_header, "more_body": True})
+                    await send({
+                        "type": "http.response.zerocopy",
+                        "file": file,
+                        "offset": offset,
+                        "count": count,
+                        "more_body": bool(trailer) or index < len(parts) - 1,
+                    })
+        else:
+            async with await anyio.open_file(self.path, mode="rb") as file:
+                for part_header, offset, count in parts:
+                    if part_header:
+                        await send({"type": "http.response.body", "body": part_header, "more_body": True})
+                    await file.seek(offset)
+                    remaining = count
+                    while remaining > 0:
+                        chunk = await file.read(min(CHUNK_SIZE, remaining))
+                        if not chunk:
+                            break
+                        remaining -= len(chunk)
+                        await send({"type": "http.response.body", "body": chunk, "more_body": True})
+
+        if trailer or not zerocopy or not parts:
+            await send({"type": "http.response.body", "body": trailer, "more_body": False})
+
+
+def accel_roots() -> Dict[str, str]:
+    """
+    Kiszolgálható gyökér könyvtárak -> belső nginx location név
+    (futásidőben olvassuk, hogy a könyvtár konstansok felülírhatók legyenek)
+    """
+    return {
+        image_handler.UPLOAD_DIR: "uploads",
+        document_handler.DOCUMENT_DIR: "documents",
+        qr_handler.QR_DIR: "qr_codes",
+        derivative_cache.CACHE_DIR: "derivative_cache",
+    }
+
+
+def accel_uri(path: str) -> Optional[str]:
+    """
+    Belső nginx URI egy fájlhoz, vagy None ha nem engedélyezett gyökér alatt van
+    """
+    real_path = os.path.realpath(path)
+    for root, location in accel_roots().items():
+        real_root = os.path.realpath(root)
+        if real_path.startswith(real_root + os.sep):
+            relative = os.path.relpath(real_path, real_root).replace(os.sep, "/")
+            return f"{ACCEL_PREFIX}/{location}/{quote(relative)}"
+    return None
+
+
+def content_disposition(filename: str) -> str:
+    """
+    Letöltési fejléc (ugyanaz a formátum, mint a FileResponse-é; RFC 5987 nem ASCII nevekre)
+    """
+    quoted = quote(filename)
+    if quoted != filename:
+        return f"attachment; filename*=utf-8''{quoted}"
+    return f'attachment; filename="{filename}"'
+
+
+def file_response(
+    path: str,
+    media_type: Optional[str] = None,
+    filename: Optional[str] = None,
+    headers: Optional[Dict[str, str]] = None,
+    request_headers: Optional[Mapping[str, str]] = None,
+    cache: Optional[str] = None
+) -> Response:
+    """
+    Fájl válasz: X-Accel-Redirect (ha be van kapcsolva) vagy Range támogató FileResponse
+
+    Args:
+        path: A fájl útvonala (a hívó már ellenőrizte, hogy létezik)
+        media_type: Content-Type
+        filename: Letöltési név (Content-Disposition: attachment)
+        headers: További fejlécek (pl. Vary)
+        request_headers: A kérés fejlécei (feltételes 304 válasz, Range / If-Range)
+        cache: "immutable" - változatlan tartalom, ETag a fájlnévből (stat nélkül);
+               "revalidate" - változó fájl, Last-Modified + no-cache;
+               None - nincs külön cache kezelés
+    """
+    response_headers = dict(headers or {})
+    stat_result = None
+
+    if cache == "immutable":
+        response_headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+        response_headers["ETag"] = etag_for(os.path.basename(path))
+    elif cache == "revalidate":
+        stat_result = os.stat(path)
+        response_headers["Cache-Control"] = REVALIDATE_CACHE_CONTROL
+        response_headers["Last-Modified"] = formatdate(stat_result.st_mtime, usegmt=True)
+
+    if request_headers is not None and cache and is_not_modified(request_headers, Headers(response_headers)):
+        return not_modified_response(response_headers)
+
+    if ACCEL_ENABLED:
+        uri = accel_uri(path)
+        if uri:
+            response_headers["X-Accel-Redirect"] = uri
+            if filename:
+                response_headers["Content-Disposition"] = content_disposition(filename)
+            return Response(status_code=200, media_type=media_type, headers=response_headers)
+        logger.warning(f"⚠️  X-Accel-Redirect: nem engedélyezett útvonal, Python szolgálja ki: {path}")
+
+    request_headers = request_headers or {}
+    return RangeFileResponse(
+        path,
+        media_type=media_type,
+        filename=filename,
+        headers=response_headers,
+        stat_result=stat_result,
+        range_header=request_headers.get("range"),
+        if_range=request_headers.get("if-range")
+    )
+
+
+def bytes_response(
+    content: bytes,
+    media_type: str,
+    etag: str,
+    filename: Optional[str] = None,
+    headers: Optional[Dict[str, str]] = None,
+    request_headers: Optional[Mapping[str, str]] = None,
+    cache: str = "revalidate"
+) -> Response:
+    """
+    Memóriában előállított tartalom kiszolgálása (lemez nélkül) ETag-gel
+
+    Args:
+        content: A válasz törzse
+        etag: Erős ETag (a tartalom bemeneteiből képezve)
+        cache: "immutable" - a URL tartalma sosem változik; "revalidate" - no-cache
+    """
+    response_headers = dict(headers or {})
+    response_headers["ETag"] = etag
+    response_headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL if cache == "immutable" else REVALIDATE_CACHE_CONTROL
+
+    if request_headers is not None and is_not_modified(request_headers, Headers(response_headers)):
+        return not_modified_response(response_headers)
+
+    if filename:
+        response_headers["Content-Disposition"] = content_disposition(filename)
+    return Response(content=content, media_type=media_type, headers=response_headers)
+
+
+# ============= STATIKUS KISZOLGÁLÁS =============
+
+class ShardedStaticFiles(StaticFiles):
+    """
+    StaticFiles, amely a lapos URL-eket (/uploads/<név>.jpg) a shardolt
+    útvonalra oldja fel, így a kliensek URL-jei nem változnak. A még át nem
+    költöztetett fájlokat a régi helyükön is megtalálja.
+
+    Tartalom alapú neveknél immutable Cache-Control és a névből képzett ETag;
+    a többi fájlnál a `cache_control` paraméter és a stat alapú validátorok.
+    """
+
+    def __init__(self, *args, cache_control: str = LEGACY_CACHE_CONTROL, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.cache_control = cache_control
+
+    def lookup_path(self, path: str):
+        head, name = os.path.split(path)
+        sharded = os.path.join(head, blob_store.shard_relpath(name))
+        full_path, stat_result = super().lookup_path(sharded)
+        if stat_result:
+            return full_path, stat_result
+        # Régi, lapos elrendezés (migráció előtt vagy közben)
+        full_path, stat_result = super().lookup_path(path)
+        if stat_result:
+            return full_path, stat_result
+        # A migráció épp a két ellenőrzés között mozgathatta át
+        return super().lookup_path(sharded)
+
+    def file_response(self, full_path, stat_result, scope, status_code: int = 200) -> Response:
+        request_headers = Headers(scope=scope)
+        headers = cache_headers(os.path.basename(full_path)) or {"Cache-Control": self.cache_control}
+        response = RangeFileResponse(
+            full_path,
+            status_code=status_code,
+            headers=headers,
+            stat_result=stat_result,
+            method=scope["method"],
+            range_header=request_headers.get("range"),
+            if_range=request_headers.get("if-range")
+        )
+        if is_not_modified(request_headers, response.headers):
+            return not_modified_response(response.headers)
+        return response
@@ -0,0 +1,307 @@
+"""
+Árva fájlok takarítása (garbage collection)
+
+A tárgy törlésekor az adatbázis cascade törli az ItemImage és Document
+sorokat, de a mögöttük lévő régi (nem tartalom alapú) fájlok, a származékok
+(thumbnail, variánsok, elforgatott képek) és a soha tárgyhoz nem rendelt
+/api/upload feltöltések a lemezen maradnak. Ez a modul a könyvtárak
+listázását összeveti a hivatkozott fájlnevek halmazával, és a türelmi időnél
+régebbi árva fájlokat törli.
+
+Inkrementális működés: a munkaegység egy alap könyvtár egy shard
+alkönyvtára (pl. uploads/ab) vagy a lapos gyökere. Egy futás legfeljebb
+UNITS_PER_RUN egységet dolgoz fel, a következő futás onnan folytatja.
+A tartalom alapú blobokat (blobs tábla) a blob_store GC kezeli, azokat itt
+nem érintjük.
+"""
+
+import asyncio
+import os
+import re
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+import logging
+
+from . import blob_store, image_handler, document_handler, qr_handler, upload_sessions, job_queue
+
+logger = logging.getLogger(__name__)
+
+# Konstansok
+GRACE_PERIOD = timedelta(hours=int(os.getenv("ORPHAN_GC_GRACE_HOURS", "24")))
+INTERVAL_SECONDS = int(os.getenv("ORPHAN_GC_INTERVAL_MINUTES", "10")) * 60
+UNITS_PER_RUN = int(os.getenv("ORPHAN_GC_UNITS_PER_RUN", "64"))
+MAX_DELETES_PER_SECOND = float(os.getenv("ORPHAN_GC_MAX_DELETES_PER_SECOND", "50"))
+ENABLED = os.getenv("ORPHAN_GC_ENABLED", "true").lower() not in ("0", "false", "no")
+
+# Gyökér (lapos, migráció előtti fájlok) + 256 kétjegyű hex shard
+SHARD_UNITS = [""] + [f"{i:02x}" for i in range(256)]
+
+# Származék nevek: thumb_ előtag, _w480 (variáns) vagy _r90 (forgatás) utótag
+_DERIVED_SUFFIX = re.compile(r"_(?:w\d+|r(?:90|180|270))$")
+_QR_NAME = re.compile(r"^item_(\d+)_qr_")
+
+_lock = threading.Lock()
+_cursor = 0
+_last_report: Optional[Dict] = None
+_totals = {"runs": 0, "removed": 0, "reclaimed_bytes": 0}
+
+
+def gc_directories() -> List[Tuple[str, str]]:
+    """
+    Takarítandó könyvtárak: (fajta, útvonal)
+    """
+    return [
+        ("image", image_handler.UPLOAD_DIR),
+        ("image", image_handler.THUMBNAIL_DIR),
+        ("image", image_handler.VARIANT_DIR),
+        ("image", image_handler.ROTATED_DIR),
+        ("document", document_handler.DOCUMENT_DIR),
+        ("qr", qr_handler.QR_DIR),
+    ]
+
+
+def owner_stem(filename: str) -> str:
+    """
+    A fájlt "birtokló" eredeti fájl kiterjesztés nélküli neve
+    (thumb_abc_r90.webp -> abc)
+    """
+    stem = os.path.splitext(filename)[0]
+    if stem.startswith("thumb_"):
+        stem = stem[len("thumb_"):]
+    return _DERIVED_SUFFIX.sub("", stem)
+
+
+def load_references(db) -> Dict[str, Set]:
+    """
+    Hivatkozott nevek halmazai, soronként streamelve (nem tölt be ORM objektumokat)
+    """
+    from .. import models
+
+    stems: Set[str] = set()
+    queries = [
+        db.query(models.ItemImage.filename),
+        db.query(models.Item.image_filename).filter(models.Item.image_filename.isnot(None)),
+        db.query(models.Document.filename),
+    ]
+    for query in queries:
+        for (filename,) in query.yield_per(1000):
+            stems.add(os.path.splitext(filename)[0])
+
+    item_ids = {item_id for (item_id,) in db.query(models.Item.id).yield_per(1000)}
+    digests = {digest for (digest,) in db.query(models.Blob.digest).yield_per(1000)}
+
+    return {"stems": stems, "item_ids": item_ids, "digests": digests}
+
+
+def _is_referenced(kind: str, filename: str, refs: Dict[str, Set]) -> bool:
+    if filename == blob_store.MIGRATION_MARKER or filename.endswith(".tmp"):
+        return True
+    if kind == "qr":
+        match = _QR_NAME.match(filename)
+        return bool(match) and int(match.group(1)) in refs["item_ids"]
+    digest = blob_store.digest_from_filename(filename)
+    if digest and digest in refs["digests"]:
+        # A blob életciklusát a blob_store GC kezeli
+        return True
+    return owner_stem(filename) in refs["stems"]
+
+
+def _still_orphan(db, kind: str, filename: str) -> bool:
+    """
+    Törlés előtti ellenőrzés az adatbázisban: a hivatkozás halmaz a futás
+    elején készült, közben egy régebbi feltöltést tárgyhoz rendelhettek
+    """
+    from .. import models
+
+    if kind == "qr":
+        match = _QR_NAME.match(filename)
+        return not match or db.get(models.Item, int(match.group(1))) is None
+
+    pattern = owner_stem(filename) + ".%"
+    checks = [
+        db.query(models.ItemImage.id).filter(models.ItemImage.filename.like(pattern)),
+        db.query(models.Item.id).filter(models.Item.image_filename.like(pattern)),
+        db.query(models.Document.id).filter(models.Document.filename.like(pattern)),
+    ]
+    return not any(db.query(query.exists()).scalar() for query in checks)
+
+
+def _iter_unit_files(base_dir: str, unit: str) -> Iterator[os.DirEntry]:
+    """
+    Egy munkaegység fájljai: a gyökér lapos fájljai vagy egy shard teljes
+    (kétszintű) alkönyvtára
+    """
+    if not unit:
+        if not os.path.isdir(base_dir):
+            return
+        with os.scandir(base_dir) as it:
+            for entry in it:
+                if entry.is_file(follow_symlinks=False):
+                    yield entry
+        return
+
+    shard_dir = os.path.join(base_dir, unit)
+    if not os.path.isdir(shard_dir):
+        return
+    with os.scandir(shard_dir) as level1:
+        for sub in level1:
+            if not sub.is_dir(follow_symlinks=False) or len(sub.name) != 2:
+                continue
+            with os.scandir(sub.path) as level2:
+                for entry in level2:
+                    if entry.is_file(follow_symlinks=False):
+                        yield entry
+
+
+def iter_referenced_files(db) -> Iterator[Tuple[str, os.DirEntry]]:
+    """
+    Az összes hivatkozott (nem árva) fájl: (fajta, bejegyzés) - a GC-vel
+    azonos szabályok szerint, könyvtáranként és shardonként sorban (mentéshez)
+    """
+    refs = load_references(db)
+    for kind, base_dir in gc_directories():
+        for unit in SHARD_UNITS:
+            for entry in _iter_unit_files(base_dir, unit):
+                if not entry.name.endswith(".tmp") and _is_referenced(kind, entry.name, refs):
+                    yield kind, entry
+
+
+def run_once(db, max_units: Optional[int] = None, grace: Optional[timedelta] = None) -> Dict:
+    """
+    Egy inkrementális GC futás a kurzortól kezdve.
+
+    Args:
+        db: Adatbázis session (a hivatkozások betöltéséhez)
+        max_units: Feldolgozandó munkaegységek száma (None: UNITS_PER_RUN)
+        grace: Türelmi idő (None: GRACE_PERIOD)
+
+    Returns:
+        Dict: scanned, removed, reclaimed_bytes, units, cursor, cycle_complete
+    """
+    global _cursor, _last_report
+
+    if not _lock.acquire(blocking=False):
+        return {"status": "busy"}
+
+    try:
+        started = time.monotonic()
+        cutoff = time.time() - (grace if grace is not None else GRACE_PERIOD).total_seconds()
+        min_delete_interval = 1.0 / MAX_DELETES_PER_SECOND if MAX_DELETES_PER_SECOND > 0 else 0
+
+        refs = load_references(db)
+        directories = gc_directories()
+        total_units = len(directories) * len(SHARD_UNITS)
+        units = min(max_units or UNITS_PER_RUN, total_units)
+
+        scanned = removed = reclaimed = 0
+        cycle_complete = False
+        last_delete = 0.0
+
+        for _ in range(units):
+            kind, base_dir = directories[_cursor // len(SHARD_UNITS)]
+            unit = SHARD_UNITS[_cursor % len(SHARD_UNITS)]
+
+            for entry in _iter_unit_files(base_dir, unit):
+                scanned += 1
+                if _is_referenced(kind, entry.name, refs):
+                    continue
+                try:
+                    stat = entry.stat(follow_symlinks=False)
+                except FileNotFoundError:
+                    continue
+                if stat.st_mtime >= cutoff or not _still_orphan(db, kind, entry.name):
+                    continue
+
+                # Sebességkorlát: a törlések ne terheljék túl a lemezt
+                wait = min_delete_interval - (time.monotonic() - last_delete)
+                if wait > 0:
+                    time.sleep(wait)
+                try:
+                    os.remove(entry.path)
+                except FileNotFoundError:
+                    continue
+                last_delete = time.monotonic()
+                removed += 1
+                reclaimed += stat.st_size
+                logger.debug(f"   🗑️  Árva fájl törölve: {entry.path}")
+
+            _cursor = (_cursor + 1) % total_units
+            if _cursor == 0:
+                cycle_complete = True
+
+        report = {
+            "status": "ok",
+            "scanned": scanned,
+            "removed": removed,
+            "reclaimed_bytes": reclaimed,
+            "units": units,
+            "cursor": _cursor,
+            "total_units": total_units,
+            "cycle_complete": cycle_complete,
+            "duration_ms": round((time.monotonic() - started) * 1000, 1),
+            "finished_at": datetime.now().isoformat(),
+        }
+        _last_report = report
+        _totals["runs"] += 1
+        _totals["removed"] += removed
+        _totals["reclaimed_bytes"] += reclaimed
+
+        if removed:
+            logger.info(f"🧹 Árva fájl GC: {removed} fájl törölve ({reclaimed / 1024:.1f} KB), {scanned} vizsgálva")
+        return report
+
+    finally:
+        _lock.release()
+
+
+def run_full_cycle(db, grace: Optional[timedelta] = None) -> Dict:
+    """
+    Teljes kör: minden könyvtár minden shardja (a kurzort nullázva)
+    """
+    global _cursor
+    _cursor = 0
+    return run_once(db, max_units=len(gc_directories()) * len(SHARD_UNITS), grace=grace)
+
+
+def status() -> Dict:
+    """
+    Utolsó futás jelentése és összesítők
+    """
+    return {
+        "enabled": ENABLED,
+        "interval_seconds": INTERVAL_SECONDS,
+        "grace_hours": GRACE_PERIOD.total_seconds() / 3600,
+        "last_run": _last_report,
+        "totals": dict(_totals),
+    }
+
+
+def _collect_once() -> Dict:
+    from .. import database
+
+    blob_report = blob_store.collect_garbage()
+    db = database.SessionLocal()
+    try:
+        report = run_once(db)
+    finally:
+        db.close()
+    report["blobs"] = blob_report
+    report["upload_sessions"] = upload_sessions.expire_sessions()
+    report["pruned_jobs"] = job_queue.prune_finished()
+    return report
+
+
+async def run_forever() -> None:
+    """
+    Háttér ciklus: INTERVAL_SECONDS-onként egy inkrementális futás
+    (blob GC + árva fájlok), külön szálon, hogy az event loop ne blokkolódjon
+    """
+    logger.info(f"🧹 Árva fájl GC elindítva ({INTERVAL_SECONDS // 60} percenként, {UNITS_PER_RUN} egység/futás)")
+    while True:
+        await asyncio.sleep(INTERVAL_SECONDS)
+        try:
+            await asyncio.to_thread(_collect_once)
+        except Exception as e:
+            logger.error(f"❌ GC hiba: {e}")
@@ -3,11 +3,23 @@ QR kód kezelés utils - TELJES JAVÍTOTT VERZIÓ
 Backend Developer: Maria Rodriguez
 """
 
+import io
 import os
+import uuid
+import asyncio
+import hashlib
+import functools
+import threading
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 import qrcode
-from typing import Dict, Tuple
+from PIL import Image
+from typing import AsyncIterator, Dict, List, Tuple
 import logging
 
+from . import blob_store
+
 logger = logging.getLogger(__name__)
 
 # Konstansok
@@ -20,6 +32,26 @@ QR_SIZES = {
     "large": {"cm": 8, "pixels": 945, "box_size": 25, "border": 2}    # 8x8 cm (300 DPI)
 }
 
+# Tömeges renderelés: folyamatok száma és tárgyak száma pool feladatonként
+RENDER_PROCESSES = int(os.getenv("QR_RENDER_PROCESSES", str(os.cpu_count() or 1)))
+BATCH_CHUNK_SIZE = int(os.getenv("QR_BATCH_CHUNK_SIZE", "50"))
+
+# Renderelt QR cache: memória LRU a kódolt bájtokra (méret korláttal),
+# opcionálisan lemezre is perzisztálva (QR_CACHE_DIR), és LRU a mátrixokra
+CACHE_MAX_BYTES = int(os.getenv("QR_CACHE_MAX_MB", "32")) * 1024 * 1024
+CACHE_DIR = os.getenv("QR_CACHE_DIR", "")
+MATRIX_CACHE_SIZE = int(os.getenv("QR_MATRIX_CACHE_SIZE", "4096"))
+FORMATS = {"png": "image/png", "svg": "image/svg+xml"}
+RENDER_VERSION = 1  # a kimenet változásakor növelendő (ETag és perzisztens kulcs része)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+_cache: "OrderedDict[Tuple[str, str, str], bytes]" = OrderedDict()
+_cache_bytes = 0
+_cache_lock = threading.Lock()
+_cache_stats = {"hits": 0, "misses": 0}
+
 
 def create_qr_dir():
     """
@@ -29,19 +61,223 @@ def create_qr_dir():
     logger.info(f"✅ QR könyvtár létrehozva: {QR_DIR}")
 
 
-def get_qr_filename(item_id: int, size: str) -> str:
+def get_qr_filename(item_id: int, size: str, fmt: str = "png") -> str:
     """
     QR fájlnév generálása
     """
-    return f"item_{item_id}_qr_{size}.png"
+    return f"item_{item_id}_qr_{size}.{fmt}"
 
 
 def get_qr_path(item_id: int, size: str) -> str:
     """
-    QR fájl teljes útvonala
+    QR fájl teljes útvonala (shardolt)
     """
     filename = get_qr_filename(item_id, size)
-    return os.path.join(QR_DIR, filename)
+    return blob_store.resolve_path(QR_DIR, filename)
+
+
+def new_code_string() -> str:
+    """
+    Új QR kód string (pl. "ITM-1A2B3C4D")
+    """
+    return f"ITM-{uuid.uuid4().hex[:8].upper()}"
+
+
+@functools.lru_cache(maxsize=MATRIX_CACHE_SIZE)
+def qr_matrix(qr_code_str: str) -> Tuple[Tuple[bool, ...], ...]:
+    """
+    QR mátrix (keret nélkül) - a költséges rész (verzió választás, H hibajavítás),
+    méretenként és formátumonként csak a kirajzolás különbözik
+    """
+    qr = qrcode.QRCode(
+        version=None,  # Automatikus méret
+        error_correction=qrcode.constants.ERROR_CORRECT_H,  # Magas hibajavítás (30%)
+        border=0,
+    )
+    qr.add_data(qr_code_str)
+    qr.make(fit=True)
+    return tuple(tuple(row) for row in qr.modules)
+
+
+def matrix_image(matrix: Tuple[Tuple[bool, ...], ...], border: int, box_size: int) -> Image.Image:
+    """
+    Fekete-fehér ("1" módú) kép a mátrixból: modulonként box_size pixel, border modul kerettel
+    """
+    side = len(matrix) + 2 * border
+
+    # Modulonként egy pixel, majd egész számú (NEAREST) nagyítás a box_size-ra
+    img = Image.new("1", (side, side), 1)
+    pixels = img.load()
+    for y, row in enumerate(matrix):
+        for x, dark in enumerate(row):
+            if dark:
+                pixels[x + border, y + border] = 0
+    return img.resize((side * box_size, side * box_size), Image.Resampling.NEAREST)
+
+
+def _render_png(matrix: Tuple[Tuple[bool, ...], ...], size: str) -> bytes:
+    config = QR_SIZES[size]
+    img = matrix_image(matrix, config["border"], config["box_size"])
+
+    buffer = io.BytesIO()
+    img.save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+def _render_svg(matrix: Tuple[Tuple[bool, ...], ...], size: str) -> bytes:
+    config = QR_SIZES[size]
+    border = config["border"]
+    side = len(matrix) + 2 * border
+
+    # Soronként összevont sötét szakaszok egyetlen path-ban
+    segments = []
+    for y, row in enumerate(matrix):
+        x = 0
+        while x < len(row):
+            if not row[x]:
+                x += 1
+                continue
+            start = x
+            while x < len(row) and row[x]:
+                x += 1
+            segments.append(f"M{start + border} {y + border}h{x - start}v1h-{x - start}z")
+
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{config["cm"]}cm" height="{config["cm"]}cm" '
+        f'viewBox="0 0 {side} {side}" shape-rendering="crispEdges">'
+        f'<rect width="{side}" height="{side}" fill="#fff"/>'
+        f'<path fill="#000" d="{"".join(segments)}"/></svg>'
+    ).encode()
+
+
+_RENDERERS = {"png": _render_png, "svg": _render_svg}
+
+
+def _cache_key_digest(qr_code_str: str, size: str, fmt: str) -> str:
+    return hashlib.sha256(f"{RENDER_VERSION}:{qr_code_str}:{size}:{fmt}".encode()).hexdigest()
+
+
+def render_etag(qr_code_str: str, size: str, fmt: str = "png") -> str:
+    """
+    Erős ETag a renderelt bájtokhoz (a kimenet a bemenetek tiszta függvénye)
+    """
+    return f'"qr-{_cache_key_digest(qr_code_str, size, fmt)[:32]}"'
+
+
+def _cache_put(key: Tuple[str, str, str], data: bytes) -> None:
+    global _cache_bytes
+    with _cache_lock:
+        if key in _cache:
+            return
+        _cache[key] = data
+        _cache_bytes += len(data)
+        while _cache_bytes > CACHE_MAX_BYTES and _cache:
+            _, evicted = _cache.popitem(last=False)
+            _cache_bytes -= len(evicted)
+
+
+def render_qr(qr_code_str: str, size: str = "medium", fmt: str = "png") -> bytes:
+    """
+    QR kód renderelése: (qr_code, size, fmt) tiszta függvénye
+
+    Sorrend: memória LRU (kódolt bájtok) -> QR_CACHE_DIR (ha be van állítva)
+    -> renderelés a (szintén cache-elt) mátrixból.
+
+    Raises:
+        ValueError: Érvénytelen méret vagy formátum
+    """
+    if size not in QR_SIZES:
+        raise ValueError(f"Érvénytelen méret: {size}. Lehetséges: {', '.join(QR_SIZES.keys())}")
+    if fmt not in FORMATS:
+        raise ValueError(f"Érvénytelen formátum: {fmt}. Lehetséges: {', '.join(FORMATS)}")
+
+    key = (qr_code_str, size, fmt)
+    with _cache_lock:
+        data = _cache.get(key)
+        if data is not None:
+            _cache.move_to_end(key)
+            _cache_stats["hits"] += 1
+            return data
+        _cache_stats["misses"] += 1
+
+    persisted_path = None
+    if CACHE_DIR:
+        persisted_path = os.path.join(CACHE_DIR, f"{_cache_key_digest(qr_code_str, size, fmt)}.{fmt}")
+        try:
+            with open(persisted_path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            data = None
+
+    if data is None:
+        data = _RENDERERS[fmt](qr_matrix(qr_code_str), size)
+        if persisted_path:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            temp_path = f"{persisted_path}.{uuid.uuid4().hex[:8]}.tmp"
+            with open(temp_path, "wb") as f:
+                f.write(data)
+            os.replace(temp_path, persisted_path)
+
+    _cache_put(key, data)
+    return data
+
+
+def cache_stats() -> Dict:
+    """
+    Render cache állapota (memória LRU és mátrix cache)
+    """
+    with _cache_lock:
+        return {
+            "entries": len(_cache),
+            "bytes": _cache_bytes,
+            "max_bytes": CACHE_MAX_BYTES,
+            "hits": _cache_stats["hits"],
+            "misses": _cache_stats["misses"],
+            "matrices": qr_matrix.cache_info().currsize,
+        }
+
+
+def clear_cache() -> None:
+    global _cache_bytes
+    with _cache_lock:
+        _cache.clear()
+        _cache_bytes = 0
+        _cache_stats.update(hits=0, misses=0)
+    qr_matrix.cache_clear()
+
+
+def _save_size(item_id: int, qr_code_str: str, size: str) -> str:
+    """
+    Renderelt PNG mentése a /qr_codes/ statikus URL-hez; változatlan kódnál nem ír
+    """
+    data = render_qr(qr_code_str, size, "png")
+    qr_path = get_qr_path(item_id, size)
+    try:
+        with open(qr_path, "rb") as f:
+            if f.read() == data:
+                return qr_path
+    except FileNotFoundError:
+        pass
+
+    blob_store.ensure_parent_dir(qr_path)
+    temp_path = f"{qr_path}.{uuid.uuid4().hex[:8]}.tmp"
+    with open(temp_path, "wb") as f:
+        f.write(data)
+    os.replace(temp_path, qr_path)
+    return qr_path
+
+
+def _qr_info(item_id: int, qr_code_str: str, size: str, qr_path: str) -> Dict:
+    return {
+        "item_id": item_id,
+        "qr_code": qr_code_str,
+        "size": size,
+        "size_cm": QR_SIZES[size]["cm"],
+        "filename": get_qr_filename(item_id, size),
+        "path": qr_path,
+        "file_size": os.path.getsize(qr_path),
+        "url": f"/qr_codes/{get_qr_filename(item_id, size)}"
+    }
 
 
 def generate_qr_code(item_id: int, qr_code_str: str, size: str = "medium") -> Dict:
@@ -65,43 +301,11 @@ def generate_qr_code(item_id: int, qr_code_str: str, size: str = "medium") -> Di
         raise ValueError(f"Érvénytelen méret: {size}. Lehetséges: {', '.join(QR_SIZES.keys())}")
     
     try:
-        # QR kód paraméterek
-        qr_config = QR_SIZES[size]
-        
-        # QR objektum létrehozása
-        qr = qrcode.QRCode(
-            version=None,  # Automatikus méret
-            error_correction=qrcode.constants.ERROR_CORRECT_H,  # Magas hibajavítás (30%)
-            box_size=qr_config["box_size"],
-            border=qr_config["border"],
-        )
-        
-        # Adat hozzáadása
-        qr.add_data(qr_code_str)
-        qr.make(fit=True)
-        
-        # Kép generálása
-        img = qr.make_image(fill_color="black", back_color="white")
+        info = _qr_info(item_id, qr_code_str, size, _save_size(item_id, qr_code_str, size))
         
-        # Mentés
-        qr_path = get_qr_path(item_id, size)
-        img.save(qr_path)
-        
-        # Fájl méret
-        file_size = os.path.getsize(qr_path)
-        
-        logger.info(f"✅ QR kód generálva: {qr_path} ({file_size / 1024:.1f} KB)")
+        logger.info(f"✅ QR kód generálva: {info['path']} ({info['file_size'] / 1024:.1f} KB)")
         
-        return {
-            "item_id": item_id,
-            "qr_code": qr_code_str,
-            "size": size,
-            "size_cm": qr_config["cm"],
-            "filename": get_qr_filename(item_id, size),
-            "path": qr_path,
-            "file_size": file_size,
-            "url": f"/qr_codes/{get_qr_filename(item_id, size)}"
-        }
+        return info
     
     except Exception as e:
         logger.error(f"❌ QR generálási hiba: {e}")
@@ -110,7 +314,7 @@ def generate_qr_code(item_id: int, qr_code_str: str, size: str = "medium") -> Di
 
 def generate_all_sizes(item_id: int, qr_code_str: str) -> Dict[str, Dict]:
     """
-    Mind a 3 méretű QR kód generálása
+    Mind a 3 méretű QR kód generálása (a mátrix cache-ből, egyszer épül fel)
     
     Args:
         item_id: Tárgy ID
@@ -123,9 +327,9 @@ def generate_all_sizes(item_id: int, qr_code_str: str) -> Dict[str, Dict]:
     
     results = {}
     
-    for size in ["small", "medium", "large"]:
+    for size in QR_SIZES:
         try:
-            results[size] = generate_qr_code(item_id, qr_code_str, size)
+            results[size] = _qr_info(item_id, qr_code_str, size, _save_size(item_id, qr_code_str, size))
         except Exception as e:
             logger.error(f"❌ Hiba {size} QR generálásakor: {e}")
             results[size] = {"error": str(e)}
@@ -135,6 +339,83 @@ def generate_all_sizes(item_id: int, qr_code_str: str) -> Dict[str, Dict]:
     return results
 
 
+def render_items(entries: List[Tuple[int, str]], sizes: List[str], qr_dir: str) -> List[Dict]:
+    """
+    Tömeges renderelés egy darabja - a process pool workerében fut
+    (modul szintű függvény, hogy pickle-özhető legyen)
+    
+    Args:
+        entries: [(item_id, qr_code), ...]
+        sizes: Renderelendő méretek
+        qr_dir: A szülő folyamat QR_DIR-je
+        
+    Returns:
+        List[Dict]: Tárgyanként {"item_id", "error" (ha sikertelen)}
+    """
+    global QR_DIR
+    QR_DIR = qr_dir
+    
+    results = []
+    for item_id, qr_code_str in entries:
+        try:
+            for size in sizes:
+                _save_size(item_id, qr_code_str, size)
+            results.append({"item_id": item_id})
+        except Exception as e:
+            results.append({"item_id": item_id, "error": str(e)})
+    return results
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn: a szülő folyamat szálai (workerek, event loop) nem öröklődnek
+            _pool = ProcessPoolExecutor(
+                max_workers=RENDER_PROCESSES,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+            logger.info(f"🔲 QR render pool elindítva ({RENDER_PROCESSES} folyamat)")
+        return _pool
+
+
+def shutdown_pool() -> None:
+    """
+    Render pool leállítása (alkalmazás leállításkor)
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+async def render_batch(entries: List[Tuple[int, str]], sizes: List[str] = None,
+                       processes: int = None) -> AsyncIterator[List[Dict]]:
+    """
+    Sok tárgy QR kódjainak renderelése párhuzamosan
+
+    BATCH_CHUNK_SIZE tárgyanként egy feladat kerül a process poolba (egy
+    folyamat-hívás költsége így sok tárgyon oszlik el); a kész darabok
+    eredményeit befejezési sorrendben adja vissza, így a hívó haladást
+    tud jelenteni. processes <= 1 esetén szálon, pool nélkül renderel.
+
+    Yields:
+        List[Dict]: Egy kész darab render_items() eredménye
+    """
+    sizes = list(sizes or QR_SIZES)
+    processes = RENDER_PROCESSES if processes is None else processes
+    executor = _get_pool() if processes > 1 else None
+    loop = asyncio.get_running_loop()
+
+    futures = [
+        loop.run_in_executor(executor, render_items, entries[start:start + BATCH_CHUNK_SIZE], sizes, QR_DIR)
+        for start in range(0, len(entries), BATCH_CHUNK_SIZE)
+    ]
+    for future in asyncio.as_completed(futures):
+        yield await future
+
+
 def delete_qr_files(item_id: int) -> int:
     """
     Összes QR kód fájl törlése egy tárgyhoz
@@ -149,7 +430,7 @@ def delete_qr_files(item_id: int) -> int:
     
     deleted = 0
     
-    for size in ["small", "medium", "large"]:
+    for size in QR_SIZES:
         qr_path = get_qr_path(item_id, size)
         
         if os.path.exists(qr_path):
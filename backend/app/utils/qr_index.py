@@ -0,0 +1,212 @@
+"""
+Memóriában tartott QR kód -> tárgy index a beolvasásokhoz
+
+Leltározáskor a szkenner sorozatban küldi a /api/qr/scan kéréseket; ezeket egy
+folyamaton belüli dict szolgálja ki (qr_code -> id, név, helyszín) adatbázis
+lekérdezés nélkül. Az indexet induláskor töltjük be, utána az Item / Location
+ORM események (lásd models.py) jegyzik fel a session-ben az érintett sorokat,
+és sikeres commit után ezeket egyetlen lekérdezéssel frissítjük. Rollbacknél a
+feljegyzések elvesznek, így az index sosem tartalmaz commitolatlan adatot.
+
+Más folyamat (pl. RUN_WORKER.py) írásai nem jutnak el ide: ismeretlen kódnál
+az adatbázisból olvasunk és az eredményt felvesszük az indexbe.
+"""
+
+import threading
+import time
+from typing import Dict, Iterable, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+# qr_code -> (item_id, név, location_id); item_id -> qr_code; location_id -> megnevezés
+_entries: Dict[str, Tuple[int, str, Optional[int]]] = {}
+_codes_by_item: Dict[int, str] = {}
+_locations: Dict[int, str] = {}
+_loaded = False
+_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0, "refreshes": 0}
+
+_SESSION_KEY = "qr_index_pending"
+
+
+def _location_name(city: str, address: Optional[str]) -> str:
+    # Ugyanaz, mint a Location.name property
+    return f"{city}, {address}" if address else city
+
+
+def load(bind=None) -> int:
+    """
+    Teljes index betöltése (induláskor, ill. ha egy tömeges módosítás érintett
+    sorait nem lehet azonosítani)
+
+    Returns:
+        Az indexelt QR kódok száma
+    """
+    from sqlalchemy import select
+    from .. import database, models
+
+    global _entries, _codes_by_item, _locations, _loaded
+    started = time.perf_counter()
+    with (bind or database.engine).connect() as conn:
+        items = conn.execute(
+            select(models.Item.id, models.Item.qr_code, models.Item.name, models.Item.location_id)
+            .where(models.Item.qr_code.isnot(None))
+        ).all()
+        locations = conn.execute(select(models.Location.id, models.Location.city, models.Location.address)).all()
+
+    entries = {qr_code: (item_id, name, location_id) for item_id, qr_code, name, location_id in items}
+    with _lock:
+        _entries = entries
+        _codes_by_item = {item_id: qr_code for qr_code, (item_id, _, _) in entries.items()}
+        _locations = {location_id: _location_name(city, address) for location_id, city, address in locations}
+        _loaded = True
+
+    logger.info(f"🔎 QR index betöltve: {len(entries)} kód ({(time.perf_counter() - started) * 1000:.0f} ms)")
+    return len(entries)
+
+
+def reset() -> None:
+    """
+    Index kiürítése; betöltésig minden beolvasás az adatbázisból dolgozik
+    """
+    global _entries, _codes_by_item, _locations, _loaded
+    with _lock:
+        _entries, _codes_by_item, _locations = {}, {}, {}
+        _loaded = False
+        _stats.update(hits=0, misses=0, refreshes=0)
+
+
+def _compact(qr_code: str, entry: Tuple[int, str, Optional[int]]) -> Dict:
+    item_id, name, location_id = entry
+    return {
+        "id": item_id,
+        "name": name,
+        "qr_code": qr_code,
+        "location_id": location_id,
+        "location": _locations.get(location_id) if location_id is not None else None,
+    }
+
+
+def lookup(qr_code: str) -> Optional[Dict]:
+    """
+    QR kód feloldása: {"id", "name", "qr_code", "location_id", "location"} vagy None
+
+    Index találat esetén nincs adatbázis művelet; ismeretlen kódnál (vagy
+    betöltetlen indexnél) az adatbázisból olvasunk.
+    """
+    entry = _entries.get(qr_code)
+    if entry is not None:
+        _stats["hits"] += 1
+        return _compact(qr_code, entry)
+
+    _stats["misses"] += 1
+    from sqlalchemy import select
+    from .. import database, models
+
+    with database.engine.connect() as conn:
+        row = conn.execute(
+            select(models.Item.id, models.Item.name, models.Item.location_id, models.Location.city, models.Location.address)
+            .outerjoin(models.Location, models.Location.id == models.Item.location_id)
+            .where(models.Item.qr_code == qr_code)
+        ).first()
+    if row is None:
+        return None
+
+    item_id, name, location_id, city, address = row
+    entry = (item_id, name, location_id)
+    if _loaded:
+        with _lock:
+            _entries[qr_code] = entry
+            _codes_by_item[item_id] = qr_code
+            if location_id is not None:
+                _locations[location_id] = _location_name(city, address)
+    result = _compact(qr_code, entry)
+    if location_id is not None:
+        result["location"] = _location_name(city, address)
+    return result
+
+
+def stats() -> Dict:
+    return {"loaded": _loaded, "codes": len(_entries), "locations": len(_locations), **_stats}
+
+
+# ============= KARBANTARTÁS (ORM események) =============
+
+def _pending(session) -> Dict:
+    return session.info.setdefault(_SESSION_KEY, {"items": set(), "locations": set(), "reload": False})
+
+
+def mark_items(session, item_ids: Iterable[int]) -> None:
+    """
+    Tárgyak feljegyzése frissítésre a session következő commitjakor
+    """
+    if session is not None:
+        _pending(session)["items"].update(item_ids)
+
+
+def mark_location(session, location_id: int) -> None:
+    if session is not None:
+        _pending(session)["locations"].add(location_id)
+
+
+def mark_reload(session) -> None:
+    """
+    Azonosíthatatlan tömeges módosítás: commit után teljes újratöltés
+    """
+    if session is not None:
+        _pending(session)["reload"] = True
+
+
+def discard(session) -> None:
+    session.info.pop(_SESSION_KEY, None)
+
+
+def apply_committed(session) -> None:
+    """
+    Commit után: a feljegyzett tárgyak / helyszínek újraolvasása egy lekérdezéssel
+    """
+    pending = session.info.pop(_SESSION_KEY, None)
+    if not pending or not _loaded:
+        return
+
+    from sqlalchemy import select
+    from .. import models
+
+    bind = session.get_bind(mapper=models.Item)
+    if pending["reload"]:
+        load(bind)
+        return
+
+    item_ids = list(pending["items"])
+    location_ids = set(pending["locations"])
+    with bind.connect() as conn:
+        items = conn.execute(
+            select(models.Item.id, models.Item.qr_code, models.Item.name, models.Item.location_id)
+            .where(models.Item.id.in_(item_ids))
+        ).all() if item_ids else []
+        # Az indexben még nem szereplő helyszínre (pl. más folyamat hozta létre) mutató tárgyak
+        location_ids.update(
+            location_id for _, _, _, location_id in items
+            if location_id is not None and location_id not in _locations
+        )
+        locations = conn.execute(
+            select(models.Location.id, models.Location.city, models.Location.address)
+            .where(models.Location.id.in_(location_ids))
+        ).all() if location_ids else []
+
+    with _lock:
+        # Törölt vagy kódot vesztett tárgyak régi kódja kikerül, a többi felülíródik
+        for item_id in item_ids:
+            old_code = _codes_by_item.pop(item_id, None)
+            if old_code is not None:
+                _entries.pop(old_code, None)
+        for item_id, qr_code, name, location_id in items:
+            if qr_code:
+                _entries[qr_code] = (item_id, name, location_id)
+                _codes_by_item[item_id] = qr_code
+        for location_id in location_ids:
+            _locations.pop(location_id, None)
+        for location_id, city, address in locations:
+            _locations[location_id] = _location_name(city, address)
+        _stats["refreshes"] += 1
@@ -0,0 +1,193 @@
+"""
+Készlet előrejelzés: "N nap múlva fogy el" minden fogyóeszközre
+
+Kötegelt számítás: az ablakon belüli fogyás mozgások (stock_movements,
+delta < 0) oszloponként, NumPy tömbökbe töltődnek, és minden tárgy rátája
+egyetlen vektorizált lépésben illesztődik (bincount alapú csoportos
+összegek) - nincs tárgyankénti Python ciklus vagy lekérdezés.
+
+Ráta: a kumulált fogyás legkisebb négyzetes meredeksége az idő függvényében,
+ha elég mozgás van és elég hosszú időszakra; különben a megfigyelt időszak
+átlaga. Az eredmény a stock_forecasts táblába kerül, a /api/notifications
+innen, a jelenlegi mennyiséggel osztva szolgál ki.
+"""
+
+import asyncio
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Konstansok
+WINDOW_DAYS = int(os.getenv("STOCK_FORECAST_WINDOW_DAYS", "90"))
+HORIZON_DAYS = int(os.getenv("STOCK_FORECAST_HORIZON_DAYS", "14"))  # ennyin belüli kifogyás értesítés
+INTERVAL_SECONDS = int(os.getenv("STOCK_FORECAST_INTERVAL_HOURS", "6")) * 3600
+ENABLED = os.getenv("STOCK_FORECAST_ENABLED", "true").lower() not in ("0", "false", "no")
+MIN_FIT_POINTS = 3
+MIN_FIT_SPAN_DAYS = 7.0
+FETCH_CHUNK = 100_000
+
+_MOVEMENT_DTYPE = np.dtype([("item_id", np.int64), ("days_ago", np.float64), ("amount", np.float64)])
+_ITEM_DTYPE = np.dtype([("item_id", np.int64), ("age_days", np.float64)])
+
+
+def _sql_datetime(value: datetime) -> str:
+    # Az SQLAlchemy SQLite DateTime tárolási formátuma (mindig mikroszekundummal)
+    return value.isoformat(sep=" ", timespec="microseconds")
+
+
+def _load_columns(conn, sql: str, params: tuple, dtype: np.dtype) -> np.ndarray:
+    """
+    Lekérdezés eredménye strukturált NumPy tömbként, közvetlenül a DBAPI
+    kurzorból (Row objektumok nélkül), FETCH_CHUNK soronként töltve
+    """
+    cursor = conn.connection.cursor()
+    try:
+        cursor.execute(sql, params)
+        chunks = []
+        while True:
+            rows = cursor.fetchmany(FETCH_CHUNK)
+            if not rows:
+                break
+            chunks.append(np.fromiter(rows, dtype=dtype, count=len(rows)))
+    finally:
+        cursor.close()
+    return np.concatenate(chunks) if chunks else np.empty(0, dtype=dtype)
+
+
+def fit_rates(movement_item_ids: np.ndarray, days_ago: np.ndarray, amounts: np.ndarray,
+              item_ids: np.ndarray, observed_days: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Tárgyankénti fogyási ráta (db/nap) egy vektorizált lépésben
+
+    Args:
+        movement_item_ids, days_ago, amounts: fogyás mozgásonként, item_id
+            szerint csoportosítva, csoporton belül időrendben
+        item_ids: a tárgyak növekvő sorrendben
+        observed_days: tárgyanként a megfigyelt időszak hossza (átlag ráta)
+
+    Returns:
+        {"rate", "movements", "fitted"} tömbök az item_ids sorrendjében
+    """
+    count = len(item_ids)
+    index = np.searchsorted(item_ids, movement_item_ids)
+    known = index < count
+    known[known] = item_ids[index[known]] == movement_item_ids[known]
+    index, x, amounts = index[known], -days_ago[known], amounts[known]
+
+    n = np.bincount(index, minlength=count).astype(np.float64)
+    total = np.bincount(index, weights=amounts, minlength=count)
+
+    # Kumulált fogyás csoportonként: teljes cumsum mínusz a csoport előtti összeg
+    cumulative = np.cumsum(amounts)
+    starts = np.flatnonzero(np.r_[True, index[1:] != index[:-1]]) if len(index) else np.empty(0, dtype=np.int64)
+    before = (cumulative - amounts)[starts]
+    y = cumulative - np.repeat(before, np.diff(np.r_[starts, len(index)]))
+
+    sx = np.bincount(index, weights=x, minlength=count)
+    sy = np.bincount(index, weights=y, minlength=count)
+    sxx = np.bincount(index, weights=x * x, minlength=count)
+    sxy = np.bincount(index, weights=x * y, minlength=count)
+    span = np.zeros(count)
+    if len(index):
+        span[index[starts]] = np.maximum.reduceat(x, starts) - np.minimum.reduceat(x, starts)
+
+    denominator = n * sxx - sx * sx
+    fitted = (n >= MIN_FIT_POINTS) & (span >= MIN_FIT_SPAN_DAYS) & (denominator > 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        slope = np.where(fitted, (n * sxy - sx * sy) / denominator, 0.0)
+    average = total / np.maximum(observed_days, 1.0)
+
+    return {
+        "rate": np.maximum(np.where(fitted, slope, average), 0.0),
+        "movements": n.astype(np.int64),
+        "fitted": fitted,
+    }
+
+
+def compute(window_days: int = WINDOW_DAYS, now: Optional[datetime] = None) -> Dict:
+    """
+    Teljes előrejelzés újraszámolása és a stock_forecasts tábla cseréje egy tranzakcióban
+    """
+    from .. import database, models
+
+    now = now or datetime.now()
+    since = now - timedelta(days=window_days)
+    started = time.perf_counter()
+
+    with database.engine.begin() as conn:
+        # Időablak a fedő indexen (ix_stock_movements_time); a csoportosítás NumPy-ban
+        movements = _load_columns(conn, (
+            f"SELECT item_id, julianday(?) - julianday(created_at), -delta "
+            f"FROM {models.StockMovement.__tablename__} WHERE created_at >= ? AND delta < 0"
+        ), (_sql_datetime(now), _sql_datetime(since)), _MOVEMENT_DTYPE)
+        movements = movements[np.lexsort((-movements["days_ago"], movements["item_id"]))]
+
+        items = _load_columns(conn, (
+            f"SELECT id, coalesce(julianday(?) - julianday(created_at), ?) FROM {models.Item.__tablename__} ORDER BY id"
+        ), (_sql_datetime(now), window_days), _ITEM_DTYPE)
+        items = items[np.isin(items["item_id"], movements["item_id"])]
+
+        result = fit_rates(
+            movements["item_id"], movements["days_ago"], movements["amount"],
+            items["item_id"], np.minimum(items["age_days"], window_days)
+        )
+
+        # Csak a fogyóeszközök (van fogyás mozgásuk); írás is közvetlenül a kurzoron
+        stored = result["movements"] > 0
+        rows = list(zip(
+            items["item_id"][stored].tolist(), result["rate"][stored].tolist(),
+            result["movements"][stored].tolist(), result["fitted"][stored].astype(int).tolist(),
+            [_sql_datetime(now)] * int(stored.sum())
+        ))
+        conn.execute(models.StockForecast.__table__.delete())
+        cursor = conn.connection.cursor()
+        try:
+            cursor.executemany(
+                f"INSERT INTO {models.StockForecast.__tablename__} "
+                f"(item_id, rate_per_day, movements, fitted, computed_at) VALUES (?, ?, ?, ?, ?)",
+                rows
+            )
+        finally:
+            cursor.close()
+
+    elapsed = time.perf_counter() - started
+    logger.info(f"📈 Készlet előrejelzés: {len(rows)} tárgy, {len(movements)} mozgás ({elapsed:.2f}s)")
+    return {"items": len(rows), "movements": int(len(movements)), "seconds": round(elapsed, 3)}
+
+
+def due_soon(db, within_days: float = HORIZON_DAYS, limit: Optional[int] = None):
+    """
+    Tárgyak, amelyek a jelenlegi mennyiség és a tárolt ráta alapján within_days
+    napon belül elfogynak: [(Item, StockForecast, days_left)], a legsürgősebb elöl
+    """
+    from .. import models
+
+    days_left = (models.Item.quantity / models.StockForecast.rate_per_day).label("days_left")
+    query = db.query(models.Item, models.StockForecast, days_left).join(
+        models.StockForecast, models.StockForecast.item_id == models.Item.id
+    ).filter(
+        models.StockForecast.rate_per_day > 0,
+        models.Item.quantity <= models.StockForecast.rate_per_day * within_days
+    ).order_by(days_left, models.Item.id)
+    if limit:
+        query = query.limit(limit)
+    return query.all()
+
+
+async def run_forever() -> None:
+    """
+    Háttér ciklus: indításkor, majd INTERVAL_SECONDS-onként újraszámolás külön szálon
+    """
+    logger.info(f"📈 Készlet előrejelzés elindítva ({INTERVAL_SECONDS // 3600} óránként, {WINDOW_DAYS} napos ablak)")
+    while True:
+        try:
+            await asyncio.to_thread(compute)
+        except Exception as e:
+            logger.error(f"❌ Készlet előrejelzés hiba: {e}")
+        await asyncio.sleep(INTERVAL_SECONDS)
@@ -0,0 +1,337 @@
+"""
+Készletmozgás napló (stock_movements) és időszakos pillanatképek
+
+Minden mennyiség változás egy csak hozzáfűzött sort kap (tárgy, delta, ok,
+időpont, az utána lévő mennyiség). Az ORM úton történő változásokat (tárgy
+létrehozás, PUT /api/items) a models.py eseményei, a közvetlen SQL
+módosításokat (POST /api/items/{id}/stock, leltár alkalmazás, tömeges
+módosítás) a hívó rögzíti - mindig ugyanabban a tranzakcióban, mint maga a
+módosítás. Ha egy mozgás átlépi a tárgy min_quantity küszöbét, ugyanitt
+StockAlert sor is keletkezik, így a riasztás minden módosítási úton megjelenik.
+
+A pillanatképek (stock_snapshots) tárgyanként a kumulált fogyást és bevételezést
+tárolják egy adott mozgásig. Így az "X időpontbeli mennyiség" és a fogyási ráta
+egy index kereséssel + a legutóbbi pillanatkép utáni rövid szakasszal
+számolható, nem kell a teljes naplót végigolvasni. A pillanatképeket saját
+háttér ciklus (run_forever) készíti, a fájl GC-től függetlenül.
+"""
+
+import asyncio
+import os
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+import logging
+
+from sqlalchemy import DateTime, Integer, bindparam, case, cast, func, insert, select
+
+logger = logging.getLogger(__name__)
+
+# Konstansok
+# Ennyi új mozgás után kap a tárgy új pillanatképet (a pillanatkép ciklusban)
+SNAPSHOT_MIN_MOVEMENTS = int(os.getenv("STOCK_SNAPSHOT_MIN_MOVEMENTS", "50"))
+SNAPSHOT_INTERVAL_SECONDS = int(os.getenv("STOCK_SNAPSHOT_INTERVAL_MINUTES", "60")) * 60
+SNAPSHOT_ENABLED = os.getenv("STOCK_SNAPSHOT_ENABLED", "true").lower() not in ("0", "false", "no")
+MAX_HISTORY_POINTS = 1000
+ALERT_LOOKUP_CHUNK = 500  # min_quantity lekérdezés IN listánként
+
+
+def threshold_alert(previous: int, quantity: int, min_quantity: Optional[int]) -> Optional[str]:
+    """
+    LOW_STOCK, ha a mennyiség a küszöbre / alá csökkent; RESTOCKED, ha fölé nőtt
+    """
+    if min_quantity is None:
+        return None
+    if previous > min_quantity >= quantity:
+        return "LOW_STOCK"
+    if previous <= min_quantity < quantity:
+        return "RESTOCKED"
+    return None
+
+
+def record(connection, item_id: int, delta: int, quantity_after: int, reason: str,
+           min_quantity: Optional[int] = None) -> None:
+    """
+    Egy mozgás rögzítése a hívó kapcsolatán / tranzakciójában (delta == 0 esetén nincs sor)
+
+    min_quantity: ha a hívó már ismeri (pl. RETURNING), nem kérdezzük le újra
+    """
+    min_quantities = {item_id: min_quantity} if min_quantity is not None else None
+    record_many(connection, [(item_id, delta, quantity_after)], reason, min_quantities)
+
+
+def record_many(connection, movements: Iterable[Tuple[int, int, int]], reason: str,
+                min_quantities: Optional[Dict[int, int]] = None) -> int:
+    """
+    Több mozgás rögzítése egy utasítással: [(item_id, delta, quantity_after), ...]
+
+    A küszöböt átlépő mozgásokhoz StockAlert sorok is keletkeznek (a kezdő
+    készlethez nem). min_quantities hiányában a tárgyak aktuális
+    (már módosított) min_quantity értékét olvassuk.
+    """
+    from .. import models
+
+    now = datetime.now()
+    rows = [
+        {"item_id": item_id, "delta": delta, "quantity_after": quantity_after, "reason": reason, "created_at": now}
+        for item_id, delta, quantity_after in movements if delta
+    ]
+    if rows:
+        connection.execute(insert(models.StockMovement), rows)
+        if reason != "initial":
+            _record_alerts(connection, rows, min_quantities)
+    return len(rows)
+
+
+def _record_alerts(connection, rows: List[Dict], min_quantities: Optional[Dict[int, int]]) -> None:
+    from .. import models
+
+    if min_quantities is None:
+        item_ids = list({row["item_id"] for row in rows})
+        min_quantities = {}
+        for start in range(0, len(item_ids), ALERT_LOOKUP_CHUNK):
+            min_quantities.update(connection.execute(
+                select(models.Item.id, models.Item.min_quantity).where(
+                    models.Item.id.in_(item_ids[start:start + ALERT_LOOKUP_CHUNK]),
+                    models.Item.min_quantity.isnot(None),
+                )
+            ).all())
+
+    alerts = []
+    for row in rows:
+        min_quantity = min_quantities.get(row["item_id"])
+        kind = threshold_alert(row["quantity_after"] - row["delta"], row["quantity_after"], min_quantity)
+        if kind:
+            alerts.append({
+                "item_id": row["item_id"], "kind": kind, "quantity": row["quantity_after"],
+                "min_quantity": min_quantity, "created_at": row["created_at"],
+            })
+    if alerts:
+        connection.execute(insert(models.StockAlert), alerts)
+
+
+def delete_item_history(connection, item_ids: Iterable[int]) -> None:
+    """
+    Törölt tárgyak naplójának és pillanatképeinek törlése (flush-onként egyszer)
+    """
+    from .. import models
+
+    item_ids = list(item_ids)
+    connection.execute(models.StockMovement.__table__.delete().where(models.StockMovement.item_id.in_(item_ids)))
+    connection.execute(models.StockSnapshot.__table__.delete().where(models.StockSnapshot.item_id.in_(item_ids)))
+
+
+# ============= PILLANATKÉPEK =============
+
+def take_snapshots(min_movements: Optional[int] = None) -> Dict:
+    """
+    Pillanatkép azoknak a tárgyaknak, amelyeknek legalább min_movements új
+    mozgása van az utolsó pillanatképük óta (egy aggregáló lekérdezéssel)
+    """
+    from .. import database, models
+
+    min_movements = SNAPSHOT_MIN_MOVEMENTS if min_movements is None else min_movements
+    movement = models.StockMovement
+    snapshot = models.StockSnapshot
+
+    with database.engine.begin() as conn:
+        last = (
+            select(snapshot.item_id, func.max(snapshot.movement_id).label("movement_id"))
+            .group_by(snapshot.item_id)
+            .subquery()
+        )
+        tails = conn.execute(
+            select(
+                movement.item_id,
+                func.max(movement.id),
+                func.sum(case((movement.delta < 0, -movement.delta), else_=0)),
+                func.sum(case((movement.delta > 0, movement.delta), else_=0)),
+            )
+            .outerjoin(last, last.c.item_id == movement.item_id)
+            .where(movement.id > func.coalesce(last.c.movement_id, 0))
+            .group_by(movement.item_id)
+            .having(func.count() >= max(min_movements, 1))
+        ).all()
+        if not tails:
+            return {"created": 0}
+
+        item_ids = [item_id for item_id, *_ in tails]
+        previous = {
+            row.item_id: row for row in conn.execute(
+                select(snapshot.item_id, snapshot.consumed, snapshot.received)
+                .join(last, (last.c.item_id == snapshot.item_id) & (last.c.movement_id == snapshot.movement_id))
+                .where(snapshot.item_id.in_(item_ids))
+            )
+        }
+        ends = {
+            row.id: row for row in conn.execute(
+                select(movement.id, movement.quantity_after, movement.created_at)
+                .where(movement.id.in_([last_id for _, last_id, _, _ in tails]))
+            )
+        }
+
+        rows = []
+        for item_id, last_id, consumed, received in tails:
+            before = previous.get(item_id)
+            rows.append({
+                "item_id": item_id,
+                "movement_id": last_id,
+                "taken_at": ends[last_id].created_at,
+                "quantity": ends[last_id].quantity_after,
+                "consumed": (before.consumed if before else 0) + consumed,
+                "received": (before.received if before else 0) + received,
+            })
+        conn.execute(insert(snapshot), rows)
+
+    logger.info(f"📸 Készlet pillanatkép: {len(rows)} tárgy")
+    return {"created": len(rows)}
+
+
+def position_at(db, item_id: int, at: datetime) -> Dict:
+    """
+    Állapot egy időpontban: mennyiség, valamint kumulált fogyás / bevételezés
+
+    Legutóbbi pillanatkép (index keresés) + az utána következő mozgások az
+    időpontig; a szakasz hossza a pillanatkép gyakoriságával korlátos.
+    """
+    from .. import models
+
+    movement = models.StockMovement
+    snapshot = db.query(models.StockSnapshot).filter(
+        models.StockSnapshot.item_id == item_id,
+        models.StockSnapshot.taken_at <= at
+    ).order_by(models.StockSnapshot.taken_at.desc(), models.StockSnapshot.movement_id.desc()).first()
+
+    tail = db.query(
+        func.max(movement.id),
+        func.coalesce(func.sum(case((movement.delta < 0, -movement.delta), else_=0)), 0),
+        func.coalesce(func.sum(case((movement.delta > 0, movement.delta), else_=0)), 0),
+    ).filter(
+        movement.item_id == item_id,
+        movement.created_at <= at,
+        movement.id > (snapshot.movement_id if snapshot else 0),
+        movement.created_at >= (snapshot.taken_at if snapshot else datetime.min)
+    ).one()
+    last_id, consumed, received = tail
+
+    if last_id is not None:
+        quantity = db.query(movement.quantity_after).filter(movement.id == last_id).scalar()
+    elif snapshot:
+        quantity = snapshot.quantity
+    else:
+        # Az időpont előtt nincs mozgás: az első későbbi mozgás előtti mennyiség,
+        # ill. napló nélküli (régi) tárgynál a jelenlegi
+        first = db.query(movement.quantity_after, movement.delta).filter(
+            movement.item_id == item_id,
+            movement.created_at > at
+        ).order_by(movement.created_at, movement.id).first()
+        if first:
+            quantity = first.quantity_after - first.delta
+        else:
+            quantity = db.query(models.Item.quantity).filter(models.Item.id == item_id).scalar()
+
+    return {
+        "quantity": quantity,
+        "consumed": (snapshot.consumed if snapshot else 0) + consumed,
+        "received": (snapshot.received if snapshot else 0) + received,
+    }
+
+
+async def run_forever() -> None:
+    """
+    Háttér ciklus: SNAPSHOT_INTERVAL_SECONDS-onként pillanatképek külön szálon
+    """
+    logger.info(f"📸 Készlet pillanatképek elindítva ({SNAPSHOT_INTERVAL_SECONDS // 60} percenként)")
+    while True:
+        await asyncio.sleep(SNAPSHOT_INTERVAL_SECONDS)
+        try:
+            result = await asyncio.to_thread(take_snapshots)
+            if result["created"]:
+                logger.info(f"📸 {result['created']} új készlet pillanatkép")
+        except Exception as e:
+            logger.error(f"❌ Készlet pillanatkép hiba: {e}")
+
+
+# ============= IDŐSOR =============
+
+def history(db, item_id: int, start: Optional[datetime] = None, end: Optional[datetime] = None, points: int = 100) -> Dict:
+    """
+    Mintavételezett készlet idősor: [start, end] egyenlő szakaszokra osztva,
+    szakaszonként a záró mennyiség és a fogyás / bevételezés
+
+    A szakaszokat egy GROUP BY lekérdezés képzi; üres szakaszban a mennyiség
+    az előzőből öröklődik. A teljes időszak fogyása pillanatképekből számolódik.
+    """
+    from .. import models
+
+    movement = models.StockMovement
+    # A napló helyi (naiv) időt tárol; időzónás paramétert helyi időre váltunk
+    start, end = [value.astimezone().replace(tzinfo=None) if value and value.tzinfo else value for value in (start, end)]
+    end = end or datetime.now()
+    if start is None:
+        first = db.query(func.min(movement.created_at)).filter(movement.item_id == item_id).scalar()
+        created = db.query(models.Item.created_at).filter(models.Item.id == item_id).scalar()
+        start = first or created or end - timedelta(days=30)
+        start = start - timedelta(seconds=1)
+    if end <= start:
+        raise ValueError("Az időszak vége nem lehet a kezdete előtt")
+    points = max(1, min(points, MAX_HISTORY_POINTS))
+    width = (end - start).total_seconds() / points
+
+    opening = position_at(db, item_id, start)
+    closing = position_at(db, item_id, end)
+
+    bucket = cast(
+        (func.julianday(movement.created_at) - func.julianday(bindparam("start", start, type_=DateTime))) * 86400.0 / width,
+        Integer
+    )
+    # SQLite: MAX() mellett a "csupasz" oszlop (quantity_after) a legnagyobb id-jú sorból jön
+    rows = db.query(
+        bucket.label("bucket"),
+        func.max(movement.id),
+        movement.quantity_after,
+        func.sum(case((movement.delta < 0, -movement.delta), else_=0)),
+        func.sum(case((movement.delta > 0, movement.delta), else_=0)),
+    ).filter(
+        movement.item_id == item_id,
+        movement.created_at > start,
+        movement.created_at <= end
+    ).group_by("bucket").all()
+    by_bucket = {}
+    for index, last_id, quantity_after, consumed, received in rows:
+        # A pontosan az időszak végére eső mozgás az utolsó szakaszhoz tartozik
+        index = min(int(index), points - 1)
+        if index in by_bucket:
+            other = by_bucket[index]
+            newer = (last_id, quantity_after) if last_id > other[1] else (other[1], other[2])
+            consumed, received = consumed + other[3], received + other[4]
+            last_id, quantity_after = newer
+        by_bucket[index] = (index, last_id, quantity_after, consumed, received)
+
+    series: List[Dict] = []
+    quantity = opening["quantity"]
+    for index in range(points):
+        row = by_bucket.get(index)
+        consumed = received = 0
+        if row:
+            _, _, quantity, consumed, received = row
+        series.append({
+            "at": start + timedelta(seconds=width * (index + 1)),
+            "quantity": quantity,
+            "consumed": consumed,
+            "received": received,
+        })
+
+    consumed = closing["consumed"] - opening["consumed"]
+    days = (end - start).total_seconds() / 86400
+    return {
+        "item_id": item_id,
+        "start": start,
+        "end": end,
+        "bucket_seconds": width,
+        "start_quantity": opening["quantity"],
+        "end_quantity": closing["quantity"],
+        "consumed": consumed,
+        "received": closing["received"] - opening["received"],
+        "consumption_per_day": consumed / days if days else 0.0,
+        "points": series,
+    }
@@ -0,0 +1,306 @@
+"""
+Folytatható (darabolt) feltöltések
+
+A kliens létrehoz egy feltöltési sessiont (név, típus, teljes méret), majd a
+fájlt tetszőleges méretű darabokban küldi, mindegyiknél megadva, hogy hányadik
+bájttól folytatja. A darabok a szerveren egy .part fájlhoz fűződnek; a session
+aktuális offsetje maga a .part fájl mérete, így szerver újraindítás és
+megszakadt darab után is pontosan onnan lehet folytatni, ameddig a bájtok
+lemezre kerültek. Lezáráskor az összeállított fájlt a meglévő
+image_handler / document_handler feldolgozás kapja meg.
+
+Az elhagyott sessionöket (lejárat: utolsó aktivitás + SESSION_TTL) az
+expire_sessions() takarítja (a háttér GC ciklusból és induláskor).
+"""
+
+import asyncio
+import hashlib
+import io
+import json
+import os
+import re
+import uuid
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Dict, List, Optional
+import logging
+
+from starlette.datastructures import Headers, UploadFile
+
+from . import image_handler, document_handler
+
+logger = logging.getLogger(__name__)
+
+# Konstansok
+SESSION_DIR = os.getenv("UPLOAD_SESSION_DIR", "upload_sessions")
+SESSION_TTL = timedelta(hours=int(os.getenv("UPLOAD_SESSION_TTL_HOURS", "24")))
+MAX_CHUNK_SIZE = int(os.getenv("UPLOAD_MAX_CHUNK_MB", "8")) * 1024 * 1024
+WRITE_BUFFER_SIZE = 1024 * 1024
+TARGETS = ("image", "item_image", "document")
+
+_SESSION_ID = re.compile(r"^[0-9a-f]{32}$")
+_locks: Dict[str, asyncio.Lock] = {}
+
+
+class OffsetMismatch(Exception):
+    """
+    A kliens rossz offsettől küldte a darabot (pl. egy korábbi darab csak
+    részben ért be); a helyes offset az `offset` attribútumban
+    """
+
+    def __init__(self, offset: int):
+        super().__init__(f"Érvénytelen offset, a feltöltés itt tart: {offset}")
+        self.offset = offset
+
+
+def init_sessions() -> None:
+    """
+    Session könyvtár létrehozása és a lejárt sessionök takarítása
+    """
+    os.makedirs(SESSION_DIR, exist_ok=True)
+    expire_sessions()
+
+
+def _meta_path(upload_id: str) -> str:
+    return os.path.join(SESSION_DIR, f"{upload_id}.json")
+
+
+def _part_path(upload_id: str) -> str:
+    return os.path.join(SESSION_DIR, f"{upload_id}.part")
+
+
+def _write_meta(meta: Dict) -> None:
+    temp_path = _meta_path(meta["upload_id"]) + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+    os.replace(temp_path, _meta_path(meta["upload_id"]))
+
+
+def _upload_file(file, filename: str, content_type: str) -> UploadFile:
+    return UploadFile(file=file, filename=filename, headers=Headers({"content-type": content_type}))
+
+
+def _max_size(target: str) -> int:
+    return document_handler.MAX_DOCUMENT_SIZE if target == "document" else image_handler.MAX_IMAGE_SIZE
+
+
+def create_session(target: str, filename: str, content_type: str, size: int,
+                   params: Optional[Dict] = None, checksum: Optional[str] = None) -> Dict:
+    """
+    Új feltöltési session
+
+    A típus / kiterjesztés / méret ellenőrzését már itt elvégezzük, hogy a
+    kliens ne töltsön fel feleslegesen egy elutasításra kerülő fájlt.
+
+    Raises:
+        ValueError: Validációs hiba esetén
+    """
+    if target not in TARGETS:
+        raise ValueError(f"Érvénytelen cél: {target}. Lehetséges: {', '.join(TARGETS)}")
+
+    probe = _upload_file(io.BytesIO(), filename, content_type)
+    if target == "document":
+        document_handler.validate_document_file(probe)
+    else:
+        image_handler.validate_image_file(probe)
+
+    max_size = _max_size(target)
+    if size > max_size:
+        raise ValueError(
+            f"A fájl túl nagy! Maximum {max_size / 1024 / 1024:.0f}MB méretű lehet. "
+            f"Jelenlegi: {size / 1024 / 1024:.1f}MB"
+        )
+
+    os.makedirs(SESSION_DIR, exist_ok=True)
+    upload_id = uuid.uuid4().hex
+    meta = {
+        "upload_id": upload_id,
+        "target": target,
+        "filename": filename,
+        "content_type": content_type,
+        "size": size,
+        "params": params or {},
+        "checksum": checksum,
+        "created_at": datetime.now().isoformat(),
+        "expires_at": (datetime.now() + SESSION_TTL).isoformat(),
+    }
+    open(_part_path(upload_id), "wb").close()
+    _write_meta(meta)
+
+    logger.info(f"📤 Feltöltési session létrehozva: {upload_id} ({filename}, {size / 1024:.1f} KB, {target})")
+    return session_status(meta)
+
+
+def get_session(upload_id: str) -> Dict:
+    """
+    Session metaadatai
+
+    Raises:
+        FileNotFoundError: Ha nem létezik vagy lejárt
+    """
+    if not _SESSION_ID.match(upload_id):
+        raise FileNotFoundError(f"Feltöltési session nem található: {upload_id}")
+    try:
+        with open(_meta_path(upload_id), encoding="utf-8") as f:
+            meta = json.load(f)
+    except FileNotFoundError:
+        raise FileNotFoundError(f"Feltöltési session nem található: {upload_id}")
+
+    if datetime.fromisoformat(meta["expires_at"]) < datetime.now():
+        delete_session(upload_id)
+        raise FileNotFoundError(f"Feltöltési session lejárt: {upload_id}")
+    return meta
+
+
+def current_offset(upload_id: str) -> int:
+    try:
+        return os.path.getsize(_part_path(upload_id))
+    except FileNotFoundError:
+        return 0
+
+
+def session_status(meta: Dict) -> Dict:
+    """
+    Kliensnek küldött állapot (UploadSessionResponse)
+    """
+    return {
+        "upload_id": meta["upload_id"],
+        "target": meta["target"],
+        "filename": meta["filename"],
+        "size": meta["size"],
+        "offset": current_offset(meta["upload_id"]),
+        "expires_at": meta["expires_at"],
+        "max_chunk_size": MAX_CHUNK_SIZE,
+    }
+
+
+async def append_chunk(upload_id: str, offset: int, chunks: AsyncIterator[bytes]) -> Dict:
+    """
+    Darab hozzáfűzése a megadott offsettől
+
+    A bájtokat pufferelve, folyamatosan írjuk ki: ha a kapcsolat a darab
+    közepén megszakad, a már lemezre került rész megmarad, és a kliens az
+    offset lekérdezése után onnan folytathatja.
+
+    Raises:
+        FileNotFoundError: Ismeretlen / lejárt session
+        OffsetMismatch: Az offset nem egyezik a szerver állapotával
+        ValueError: Túl nagy darab, vagy a deklarált méret túllépése
+    """
+    meta = get_session(upload_id)
+    lock = _locks.setdefault(upload_id, asyncio.Lock())
+
+    async with lock:
+        current = current_offset(upload_id)
+        if offset != current:
+            raise OffsetMismatch(current)
+
+        received = 0
+        buffer: List[bytes] = []
+        buffered = 0
+
+        with open(_part_path(upload_id), "ab") as part:
+            try:
+                async for chunk in chunks:
+                    if not chunk:
+                        continue
+                    received += len(chunk)
+                    if received > MAX_CHUNK_SIZE:
+                        raise ValueError(f"A darab túl nagy! Maximum {MAX_CHUNK_SIZE / 1024 / 1024:.0f}MB")
+                    if current + received > meta["size"]:
+                        raise ValueError("A feltöltés túllépi a deklarált fájlméretet")
+                    buffer.append(chunk)
+                    buffered += len(chunk)
+                    if buffered >= WRITE_BUFFER_SIZE:
+                        await asyncio.to_thread(part.write, b"".join(buffer))
+                        buffer, buffered = [], 0
+            finally:
+                # Megszakadt vagy elutasított darab: a hibátlanul beérkezett bájtok maradnak
+                if buffer:
+                    await asyncio.to_thread(part.write, b"".join(buffer))
+                part.flush()
+
+        meta["expires_at"] = (datetime.now() + SESSION_TTL).isoformat()
+        _write_meta(meta)
+
+    return session_status(meta)
+
+
+def _file_digest(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(WRITE_BUFFER_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+async def open_completed(upload_id: str) -> Dict:
+    """
+    Lezárás előtti ellenőrzés: minden bájt megérkezett-e, egyezik-e a checksum
+
+    Returns:
+        A session metaadatai és egy, a feldolgozóknak átadható UploadFile ("upload")
+
+    Raises:
+        FileNotFoundError: Ismeretlen / lejárt session
+        ValueError: Hiányos feltöltés vagy checksum eltérés
+    """
+    meta = get_session(upload_id)
+    offset = current_offset(upload_id)
+    if offset != meta["size"]:
+        raise ValueError(f"A feltöltés még nem teljes: {offset} / {meta['size']} bájt")
+
+    part_path = _part_path(upload_id)
+    if meta.get("checksum"):
+        digest = await asyncio.to_thread(_file_digest, part_path)
+        if digest != meta["checksum"]:
+            raise ValueError("Checksum eltérés: a feltöltött fájl sérült, töltsd fel újra")
+
+    meta["upload"] = _upload_file(open(part_path, "rb"), meta["filename"], meta["content_type"])
+    return meta
+
+
+def delete_session(upload_id: str) -> None:
+    """
+    Session és a részleges fájl törlése
+    """
+    for path in (_part_path(upload_id), _meta_path(upload_id)):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+    _locks.pop(upload_id, None)
+
+
+def expire_sessions() -> Dict:
+    """
+    Lejárt (elhagyott) sessionök törlése
+
+    Returns:
+        {"expired", "reclaimed_bytes"}
+    """
+    if not os.path.isdir(SESSION_DIR):
+        return {"expired": 0, "reclaimed_bytes": 0}
+
+    now = datetime.now()
+    expired = 0
+    reclaimed = 0
+
+    with os.scandir(SESSION_DIR) as it:
+        metas = [entry.path for entry in it if entry.name.endswith(".json")]
+
+    for path in metas:
+        upload_id = os.path.basename(path)[:-len(".json")]
+        try:
+            with open(path, encoding="utf-8") as f:
+                expires_at = datetime.fromisoformat(json.load(f)["expires_at"])
+        except (OSError, ValueError, KeyError):
+            expires_at = now  # sérült metaadat: töröljük
+        if expires_at > now or upload_id in _locks and _locks[upload_id].locked():
+            continue
+        reclaimed += current_offset(upload_id)
+        delete_session(upload_id)
+        expired += 1
+
+    if expired:
+        logger.info(f"🧹 {expired} lejárt feltöltési session törölve ({reclaimed / 1024:.1f} KB)")
+    return {"expired": expired, "reclaimed_bytes": reclaimed}
@@ -0,0 +1,167 @@
+"""
+Online mentés - áteresztőképesség, memória és írói késleltetés
+
+Ideiglenes munkakönyvtárban --items tárgyat és --images darab --image-kb
+méretű képfájlt hoz létre, majd:
+  1. teljes mentés streamelve (GET /api/admin/backup útja) tömörítésenként,
+     a kimenet eldobva: idő, MB/s - közben egy író szál folyamatosan
+     commitol, mérve a leghosszabb commit időt;
+  2. inkrementális mentés --changed új kép után;
+  3. Python heap csúcs (tracemalloc) egy külön, író nélküli futásban;
+  4. összehasonlítás: a mai módszer (backend leállítása + DB és
+     könyvtárak másolása) - a leállás ideje = a másolás ideje.
+
+Használat (a backend mappából):
+    python benchmarks/bench_backup.py [--items 200000] [--images 5000] [--image-kb 64]
+"""
+
+import argparse
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+WORK_DIR = tempfile.mkdtemp(prefix="bench_backup_")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(WORK_DIR, 'home_inventory.db')}"
+os.environ["BACKUP_DIR"] = os.path.join(WORK_DIR, "backups")
+os.chdir(WORK_DIR)
+
+from sqlalchemy import text  # noqa: E402
+
+from app import database, models  # noqa: E402,F401  (models: táblák regisztrálása)
+from app.utils import backup, blob_store, image_handler  # noqa: E402
+
+logging.getLogger("app.utils.backup").setLevel(logging.WARNING)
+
+
+def seed(items: int, images: int, image_kb: int) -> None:
+    raw = database.engine.raw_connection()
+    try:
+        cursor = raw.cursor()
+        now = "2024-01-01 12:00:00.000000"
+        cursor.executemany(
+            "INSERT INTO items (name, category, description, quantity, image_filename, created_at, updated_at) "
+            "VALUES (?, 'Konyha', 'Benchmark tárgy leírása', 1, ?, ?, ?)",
+            ((f"Tárgy {i}", f"img_{i}.jpg" if i < images else None, now, now) for i in range(items))
+        )
+        raw.commit()
+    finally:
+        raw.close()
+
+    for i in range(images):
+        path = image_handler.get_image_path(f"img_{i}.jpg")
+        blob_store.ensure_parent_dir(path)
+        with open(path, "wb") as f:
+            f.write(os.urandom(image_kb * 1024))  # tömöríthetetlen, mint egy JPEG
+
+
+def add_images(start: int, count: int, image_kb: int) -> None:
+    with database.engine.begin() as conn:
+        for i in range(start, start + count):
+            conn.execute(text("UPDATE items SET image_filename = :f WHERE id = :id"), {"f": f"img_{i}.jpg", "id": i + 1})
+            path = image_handler.get_image_path(f"img_{i}.jpg")
+            blob_store.ensure_parent_dir(path)
+            with open(path, "wb") as f:
+                f.write(os.urandom(image_kb * 1024))
+
+
+class Writer(threading.Thread):
+    """Folyamatos kis írások (mint a futó backend), a leghosszabb commit idővel"""
+
+    def __init__(self):
+        super().__init__(daemon=True)
+        self.stop = threading.Event()
+        self.commits = 0
+        self.max_latency = 0.0
+        self.failures = 0
+
+    def run(self):
+        while not self.stop.is_set():
+            started = time.perf_counter()
+            try:
+                with database.engine.begin() as conn:
+                    conn.execute(text("UPDATE items SET quantity = quantity + 1 WHERE id = :id"), {"id": 1 + self.commits % 1000})
+                self.commits += 1
+            except Exception:
+                self.failures += 1
+            self.max_latency = max(self.max_latency, time.perf_counter() - started)
+            time.sleep(0.005)
+
+
+def run_backup(compression: str, since=None) -> dict:
+    writer = Writer()
+    writer.start()
+    started = time.perf_counter()
+    backup_id, chunks = backup.open_stream(compression, since)
+    size = sum(len(chunk) for chunk in chunks)
+    elapsed = time.perf_counter() - started
+    writer.stop.set()
+    writer.join()
+    return {"id": backup_id, "seconds": elapsed, "mb": size / 1024 / 1024, "writer": writer}
+
+
+def peak_memory() -> float:
+    # Külön futás: a tracemalloc többszörösére lassítja a mentést
+    tracemalloc.start()
+    for _ in backup.open_stream("none")[1]:
+        pass
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak / 1024 / 1024
+
+
+def offline_copy() -> float:
+    target = os.path.join(WORK_DIR, "offline_copy")
+    started = time.perf_counter()
+    os.makedirs(target)
+    shutil.copy2("home_inventory.db", target)
+    shutil.copytree("uploads", os.path.join(target, "uploads"))
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Online mentés benchmark")
+    parser.add_argument("--items", type=int, default=200_000)
+    parser.add_argument("--images", type=int, default=5000)
+    parser.add_argument("--image-kb", type=int, default=64)
+    parser.add_argument("--changed", type=int, default=100)
+    args = parser.parse_args()
+
+    database.init_db()
+    image_handler.create_upload_dir()
+    seed(args.items, args.images, args.image_kb)
+    db_mb = os.path.getsize("home_inventory.db") / 1024 / 1024
+    media_mb = args.images * args.image_kb / 1024
+    print(f"Adatbázis: {db_mb:.1f} MB ({args.items} tárgy), média: {media_mb:.0f} MB ({args.images} kép)\n")
+
+    runs = [(f"teljes ({compression})", run_backup(compression))
+            for compression in ("none", "gzip", "zstd") if compression != "zstd" or backup.zstandard]
+    add_images(args.images, args.changed, args.image_kb)
+    runs.append(("inkrementális (gzip)", run_backup("gzip", since=runs[0][1]["id"])))
+    peak = peak_memory()
+    downtime = offline_copy()
+
+    print(f"{'mód':<24}{'idő (s)':>9}{'méret (MB)':>12}{'MB/s':>8}{'író commit':>12}{'leghosszabb (ms)':>18}")
+    for label, result in runs:
+        writer = result["writer"]
+        print(f"{label:<24}{result['seconds']:>9.2f}{result['mb']:>12.1f}{(db_mb + media_mb) / result['seconds']:>8.0f}"
+              f"{writer.commits:>12}{writer.max_latency * 1000:>18.1f}")
+        if writer.failures:
+            print(f"   ⚠️  {writer.failures} sikertelen írás")
+    print(f"\nHeap csúcs a streamelés alatt: {peak:.1f} MB")
+    print(f"Mai módszer (leállítás + másolás): {downtime:.2f}s leállás, ennyi ideig nincs írás")
+
+    database.engine.dispose()
+    os.chdir(BACKEND_DIR)
+    shutil.rmtree(WORK_DIR, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Tömeges item műveletek - tárgyankénti CRUD vs POST /api/items/bulk
+
+Ideiglenes SQLite adatbázison N tárgyat hoz létre, átkategorizál és töröl:
+  1. "tárgyanként": crud.create_item / update_item / delete_item hívások
+     (mindegyik külön commit + refresh), ahogy N darab API kérés tenné.
+  2. "bulk": crud.bulk_item_operations --batch méretű kötegekben
+     (kötegenként egy tranzakció).
+
+Használat (a backend mappából):
+    python benchmarks/bench_bulk_items.py [--items 2000] [--batch 1000]
+"""
+
+import argparse
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+WORK_DIR = tempfile.mkdtemp(prefix="bench_bulk_items_")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(WORK_DIR, 'bench.db')}"
+
+from app import crud, database, models, schemas  # noqa: E402
+
+# Az update_item tárgyanként több sort logol - a mérésben ne a konzol legyen a szűk keresztmetszet
+logging.getLogger("app.crud").setLevel(logging.ERROR)
+
+
+def new_item(i: int) -> dict:
+    return {"name": f"Tárgy {i}", "category": "Egyéb", "quantity": 1 + i % 5, "description": "Benchmark"}
+
+
+def per_item(count: int) -> dict:
+    db = database.SessionLocal()
+    timings = {}
+
+    started = time.perf_counter()
+    ids = [crud.create_item(db, schemas.ItemCreate(**new_item(i))).id for i in range(count)]
+    timings["create"] = time.perf_counter() - started
+
+    mark = time.perf_counter()
+    for i, item_id in enumerate(ids):
+        crud.update_item(db, item_id, schemas.ItemUpdate(category="Konyha", quantity=2 + i % 5))
+    timings["update"] = time.perf_counter() - mark
+
+    mark = time.perf_counter()
+    for item_id in ids:
+        crud.delete_item(db, item_id)
+    timings["delete"] = time.perf_counter() - mark
+
+    timings["total"] = time.perf_counter() - started
+    db.close()
+    return timings
+
+
+def bulk(count: int, batch: int) -> dict:
+    db = database.SessionLocal()
+    timings = {}
+
+    def run(operations):
+        ids = []
+        for start in range(0, len(operations), batch):
+            chunk = schemas.BulkItemRequest(operations=operations[start:start + batch]).operations
+            result = crud.bulk_item_operations(db, chunk)
+            assert not result["errors"], result["errors"][:3]
+            ids += [r["id"] for r in result["results"]]
+        return ids
+
+    started = time.perf_counter()
+    ids = run([{"op": "create", "item": new_item(i)} for i in range(count)])
+    timings["create"] = time.perf_counter() - started
+
+    mark = time.perf_counter()
+    run([{"op": "update", "id": item_id, "changes": {"category": "Konyha", "quantity": 2 + i % 5}} for i, item_id in enumerate(ids)])
+    timings["update"] = time.perf_counter() - mark
+
+    mark = time.perf_counter()
+    run([{"op": "delete", "id": item_id} for item_id in ids])
+    timings["delete"] = time.perf_counter() - mark
+
+    timings["total"] = time.perf_counter() - started
+    db.close()
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tömeges item művelet benchmark")
+    parser.add_argument("--items", type=int, default=2000)
+    parser.add_argument("--batch", type=int, default=1000)
+    args = parser.parse_args()
+
+    database.init_db()
+    baseline = per_item(args.items)
+    result = bulk(args.items, args.batch)
+
+    db = database.SessionLocal()
+    assert db.query(models.Item).count() == 0
+    db.close()
+
+    print(f"Tárgyak: {args.items}, köteg: {args.batch}\n")
+    print(f"{'művelet':<12}{'tárgyanként (s)':>18}{'bulk (s)':>12}{'gyorsulás':>12}")
+    for phase in ("create", "update", "delete", "total"):
+        print(f"{phase:<12}{baseline[phase]:>18.2f}{result[phase]:>12.2f}{baseline[phase] / result[phase]:>11.0f}x")
+
+    database.engine.dispose()
+    shutil.rmtree(WORK_DIR, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Adathalmaz betöltés - szintetikus háztartások és visszaállítás
+
+Ideiglenes munkakönyvtárban:
+  1. seed: --items tárgy, --images-per-item kép / tárgy (alapértelmezés
+     1M tárgy, 500k kép + bélyegkép) a bulk_load úttal - adatbázis és fájl
+     idő külön;
+  2. összehasonlítás: ugyanez a séma indexekkel és soronkénti ORM írással
+     (crud.create_item, soronként commit) --baseline-sample tárgyon, N-re
+     vetítve;
+  3. restore: egy --restore-items méretű példány mentése, majd
+     visszaállítása kicsomagolással, illetve --link-from móddal.
+
+Használat (a backend mappából):
+    python benchmarks/bench_bulk_load.py [--items 1000000] [--images-per-item 0.5]
+                                         [--baseline-sample 2000] [--restore-items 20000]
+"""
+
+import argparse
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+WORK_DIR = tempfile.mkdtemp(prefix="bench_bulk_load_")
+SOURCE_DIR = os.path.join(WORK_DIR, "source")  # a mentett példány munkakönyvtára
+os.makedirs(SOURCE_DIR)
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(SOURCE_DIR, 'home_inventory.db')}"
+os.environ["BACKUP_DIR"] = os.path.join(WORK_DIR, "backups")
+
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from app import crud, models, schemas  # noqa: E402
+from app.utils import backup, bulk_load  # noqa: E402
+
+logging.getLogger("app.utils.backup").setLevel(logging.WARNING)
+logging.getLogger("app.utils.bulk_load").setLevel(logging.WARNING)
+
+
+def seed(items: int, images_per_item: float, workers: int) -> dict:
+    target = os.path.join(WORK_DIR, "seed")
+    os.makedirs(target)
+    os.chdir(target)
+    return bulk_load.seed_households(os.path.join(target, "home_inventory.db"), max(1, items // 20), items,
+                                     images_per_item=images_per_item, workers=workers)
+
+
+def per_row(sample: int) -> float:
+    engine = create_engine(f"sqlite:///{os.path.join(WORK_DIR, 'orm.db')}")
+    models.Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    started = time.perf_counter()
+    for i in range(sample):
+        category = bulk_load.CATEGORIES[i % len(bulk_load.CATEGORIES)][0]
+        crud.create_item(db, schemas.ItemCreate(name=f"Tárgy {i}", category=category, quantity=1 + i % 7))
+    elapsed = time.perf_counter() - started
+    db.close()
+    engine.dispose()
+    return elapsed
+
+
+def restore_runs(items: int, workers: int) -> list:
+    os.chdir(SOURCE_DIR)
+    bulk_load.seed_households(os.path.join(SOURCE_DIR, "home_inventory.db"), max(1, items // 20), items, workers=workers)
+    archive = os.path.join(WORK_DIR, "backup.tar")
+    with open(archive, "wb") as f:
+        backup.write_archive(f, compression="none")
+
+    runs = []
+    for label, options in (("kicsomagolás", {}), ("--link-from", {"link_from": SOURCE_DIR})):
+        target = os.path.join(WORK_DIR, f"restore_{len(runs)}")
+        result = backup.restore_archive(archive, target, os.path.join(target, "home_inventory.db"), **options)
+        runs.append((label, result))
+    return runs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Adathalmaz betöltés benchmark")
+    parser.add_argument("--items", type=int, default=1_000_000)
+    parser.add_argument("--images-per-item", type=float, default=0.5)
+    parser.add_argument("--workers", type=int, default=bulk_load.FILE_WORKERS)
+    parser.add_argument("--baseline-sample", type=int, default=2000)
+    parser.add_argument("--restore-items", type=int, default=20000)
+    args = parser.parse_args()
+
+    result = seed(args.items, args.images_per_item, args.workers)
+    files = result["files"]
+    db_mb = os.path.getsize(result["database"]) / 1024 / 1024
+    print(f"Seed: {result['items']} tárgy, {result['images']} kép, {result['documents']} dokumentum, "
+          f"{result['stock_movements']} készletmozgás ({db_mb:.0f} MB)")
+    print(f"   adatbázis: {result['database_seconds']:.1f}s (betöltés {result['load_seconds']:.1f}s, "
+          f"indexek {result['database_seconds'] - result['load_seconds']:.1f}s)")
+    print(f"   fájlok:    {files['seconds']:.1f}s ({files['linked']} link, {files['copied']} másolat, {args.workers} szál)")
+    print(f"   összesen:  {result['seconds']:.1f}s")
+
+    baseline = per_row(args.baseline_sample)
+    projected = baseline / args.baseline_sample * args.items
+    print(f"\nSoronkénti ORM (crud.create_item, vetítve {args.items} tárgyra, képek nélkül): {projected:.0f}s "
+          f"(minta: {args.baseline_sample}, {baseline:.2f}s) - gyorsulás: {projected / result['database_seconds']:.0f}x")
+
+    print(f"\nVisszaállítás ({args.restore_items} tárgyas mentésből):")
+    print(f"{'mód':<14}{'idő (s)':>9}{'kicsomagolt':>13}{'linkelt':>9}{'MB':>8}")
+    for label, run in restore_runs(args.restore_items, args.workers):
+        print(f"{label:<14}{run['seconds']:>9.2f}{run['files']:>13}{run['linked']:>9}{run['bytes'] / 1024 / 1024:>8.1f}")
+
+    os.chdir(BACKEND_DIR)
+    shutil.rmtree(WORK_DIR, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Leltár export - GET /api/export vs /api/items lapozás
+
+Ideiglenes SQLite adatbázisba --items tárgyat és minden második tárgyhoz egy
+képet tölt (közvetlen executemany), majd:
+  1. "export": item_export.stream NDJSON-ként (és gzip-pel), a kimenet
+     eldobva; idő, méret, és egy külön futásban a Python heap csúcsa
+     (tracemalloc) --items/10 és --items tárgyon.
+  2. "lapozás": a mai út - /api/items skip/limit=500 (OFFSET) +
+     ItemResponse szerializálás tárgyankénti kép / dokumentum betöltéssel;
+     a tábla elejéről, közepéről és végéről mintavételezett lapokból vetítve.
+
+Használat (a backend mappából):
+    python benchmarks/bench_export.py [--items 1000000] [--sample-pages 3]
+"""
+
+import argparse
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+WORK_DIR = tempfile.mkdtemp(prefix="bench_export_")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(WORK_DIR, 'bench.db')}"
+
+from app import crud, database, schemas  # noqa: E402
+from app.utils import item_export  # noqa: E402
+
+logging.getLogger("app.utils.item_export").setLevel(logging.WARNING)
+
+PAGE = 500
+
+
+def seed(count: int) -> None:
+    raw = database.engine.raw_connection()
+    try:
+        cursor = raw.cursor()
+        cursor.execute("INSERT INTO users (username, first_name, last_name) VALUES ('kata', 'Katalin', 'Kovács')")
+        cursor.execute("INSERT INTO locations (country, city, address) VALUES ('Magyarország', 'Budapest', 'Fő utca 1')")
+        now = "2024-01-01 12:00:00.000000"
+        cursor.executemany(
+            "INSERT INTO items (name, category, description, quantity, purchase_price, user_id, location_id, "
+            "created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            ((f"Tárgy {i}", "Konyha", "Benchmark tárgy leírása", 1 + i % 7, i % 500 * 100.0,
+              1 if i % 2 else None, 1 if i % 3 else None, now, now) for i in range(count))
+        )
+        cursor.executemany(
+            "INSERT INTO item_images (item_id, filename, original_filename, order_index, created_at) "
+            "VALUES (?, ?, ?, 0, ?)",
+            ((item_id, f"img_{item_id}.jpg", "kep.jpg", now) for item_id in range(1, count + 1, 2))
+        )
+        raw.commit()
+    finally:
+        raw.close()
+
+
+def export(limit_rows: int, gzip: bool = False, traced: bool = False) -> dict:
+    if traced:
+        tracemalloc.start()
+    started = time.perf_counter()
+    size = rows = 0
+    for chunk in item_export.stream("ndjson", gzip):
+        size += len(chunk)
+        rows += 0 if gzip else chunk.count(b"\n")
+        if not gzip and rows >= limit_rows:
+            break
+    elapsed = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1] / 1024 / 1024 if traced else None
+    if traced:
+        tracemalloc.stop()
+    return {"seconds": elapsed, "mb": size / 1024 / 1024, "peak_mb": peak}
+
+
+def paged(count: int, sample_pages: int) -> float:
+    db = database.SessionLocal()
+    offsets = [int((count - PAGE) * k / max(sample_pages - 1, 1)) for k in range(sample_pages)]
+    started = time.perf_counter()
+    for skip in offsets:
+        items = crud.get_items(db, skip=skip, limit=PAGE)
+        [schemas.ItemResponse.model_validate(item).model_dump_json() for item in items]
+        db.expunge_all()
+    elapsed = time.perf_counter() - started
+    db.close()
+    return elapsed / len(offsets) * (count / PAGE)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export benchmark")
+    parser.add_argument("--items", type=int, default=1_000_000)
+    parser.add_argument("--sample-pages", type=int, default=3)
+    args = parser.parse_args()
+
+    database.init_db()
+    started = time.perf_counter()
+    seed(args.items)
+    print(f"Adatbázis feltöltve: {args.items} tárgy, {(args.items + 1) // 2} kép ({time.perf_counter() - started:.1f}s)\n")
+
+    full = export(args.items)
+    gzipped = export(args.items, gzip=True)
+    peaks = [(rows, export(rows, traced=True)["peak_mb"]) for rows in (args.items // 10, args.items)]
+    baseline = paged(args.items, args.sample_pages)
+
+    print(f"{'mód':<28}{'idő (s)':>10}{'méret (MB)':>12}{'tárgy/s':>10}")
+    print(f"{'export ndjson':<28}{full['seconds']:>10.1f}{full['mb']:>12.1f}{args.items / full['seconds']:>10.0f}")
+    print(f"{'export ndjson + gzip':<28}{gzipped['seconds']:>10.1f}{gzipped['mb']:>12.1f}{args.items / gzipped['seconds']:>10.0f}")
+    print(f"{'/api/items lapozás (vetítve)':<28}{baseline:>10.1f}{'-':>12}{args.items / baseline:>10.0f}")
+    print()
+    for rows, peak in peaks:
+        print(f"Heap csúcs {rows:>8} tárgy exportjánál: {peak:.1f} MB")
+    print(f"Gyorsulás a lapozáshoz képest: {baseline / full['seconds']:.0f}x")
+
+    database.engine.dispose()
+    shutil.rmtree(WORK_DIR, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
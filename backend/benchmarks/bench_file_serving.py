@@ -0,0 +1,90 @@
+"""
+Fájl kiszolgálás összehasonlítás - FileResponse vs X-Accel-Redirect
+
+A media_response.file_response() által adott választ közvetlenül az ASGI
+interfészen hajtja meg (hálózat nélkül), és méri, mennyi ideig foglalja a
+Python workert egy letöltés, illetve hány bájtot pumpál át a folyamat.
+X-Accel-Redirect módban a bájtokat az nginx küldi, a worker csak a fejlécet.
+
+Használat (a backend mappából):
+    python benchmarks/bench_file_serving.py [--size-mb 5] [--requests 200] [--concurrency 16]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from app.utils import document_handler, media_response  # noqa: E402
+
+
+async def serve_once(path: str) -> int:
+    """
+    Egy válasz lefuttatása az ASGI interfészen; az elküldött body bájtok száma
+    """
+    scope = {"type": "http", "method": "GET", "headers": [], "path": "/", "query_string": b""}
+    sent = 0
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal sent
+        if message["type"] == "http.response.body":
+            sent += len(message.get("body", b""))
+
+    response = media_response.file_response(path, media_type="application/pdf", filename="szamla.pdf")
+    await response(scope, receive, send)
+    return sent
+
+
+async def run_mode(path: str, requests: int, concurrency: int) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    total_bytes = 0
+
+    async def one():
+        nonlocal total_bytes
+        async with semaphore:
+            sent = await serve_once(path)
+            total_bytes += sent
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    elapsed = time.perf_counter() - started
+    return {"seconds": elapsed, "rps": requests / elapsed, "bytes": total_bytes}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="FileResponse vs X-Accel-Redirect")
+    parser.add_argument("--size-mb", type=float, default=5.0)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        document_handler.DOCUMENT_DIR = tmp
+        path = os.path.join(tmp, "ab", "cd", "benchmark.pdf")
+        os.makedirs(os.path.dirname(path))
+        with open(path, "wb") as f:
+            f.write(os.urandom(int(args.size_mb * 1024 * 1024)))
+
+        print(f"Fájl: {args.size_mb} MB, {args.requests} kérés, párhuzamosság: {args.concurrency}\n")
+        print(f"{'mód':<18}{'idő (s)':>10}{'kérés/s':>12}{'Python által küldött':>24}")
+
+        results = {}
+        for mode, enabled in (("FileResponse", False), ("X-Accel-Redirect", True)):
+            media_response.ACCEL_ENABLED = enabled
+            results[mode] = result = asyncio.run(run_mode(path, args.requests, args.concurrency))
+            print(f"{mode:<18}{result['seconds']:>10.3f}{result['rps']:>12.1f}{result['bytes'] / 1024 / 1024:>21.1f} MB")
+
+        speedup = results["X-Accel-Redirect"]["rps"] / results["FileResponse"]["rps"]
+        print(f"\nWorker áteresztés X-Accel-Redirect módban: {speedup:.0f}x")
+
+
+if __name__ == "__main__":
+    main()
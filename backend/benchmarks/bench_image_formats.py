@@ -0,0 +1,113 @@
+"""
+Képformátum összehasonlítás - JPEG vs WebP vs AVIF
+
+A feltöltési pipeline beállításaival (fő kép + variáns létra) kódolja újra egy
+minta korpusz képeit, és kiírja formátumonként az összes bájtot, a JPEG-hez
+képesti megtakarítást és az átlagos kódolási időt.
+
+Használat (a backend mappából):
+    python benchmarks/bench_image_formats.py [kép_könyvtár] [--limit N]
+
+Ha nincs megadva könyvtár, szintetikus "fotó" korpuszt generál.
+"""
+
+import argparse
+import io
+import os
+import sys
+import time
+
+from PIL import Image, ImageDraw, ImageFilter
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from app.utils import image_handler  # noqa: E402
+
+
+def synthetic_corpus(count: int):
+    """
+    Fotószerű tesztképek: színátmenet + alakzatok + zaj, elmosva
+    """
+    for i in range(count):
+        width, height = (1920, 1440) if i % 2 == 0 else (1440, 1920)
+        img = Image.radial_gradient("L").resize((width, height)).convert("RGB")
+        draw = ImageDraw.Draw(img)
+        for j in range(12):
+            x, y = (i * 97 + j * 151) % width, (i * 53 + j * 211) % height
+            color = ((i * 40 + j * 23) % 256, (j * 61) % 256, (i * 17 + j * 7) % 256)
+            draw.ellipse((x, y, x + width // 5, y + height // 6), fill=color)
+        noise = Image.effect_noise((width, height), 24).convert("RGB")
+        img = Image.blend(img, noise, 0.15).filter(ImageFilter.GaussianBlur(1.2))
+        yield f"synthetic_{i}.png", img
+
+
+def directory_corpus(path: str, limit: int):
+    """
+    Képek beolvasása egy könyvtárból (pl. a meglévő uploads/)
+    """
+    names = sorted(
+        n for n in os.listdir(path)
+        if os.path.splitext(n)[1].lower() in image_handler.ALLOWED_EXTENSIONS
+    )[:limit]
+    for name in names:
+        with Image.open(os.path.join(path, name)) as img:
+            yield name, img.convert("RGB")
+
+
+def encode(img: Image.Image, fmt: str) -> tuple:
+    """
+    Egy kép kódolása; (bájtok, másodperc)
+    """
+    buffer = io.BytesIO()
+    started = time.perf_counter()
+    if fmt == "jpeg":
+        img.save(buffer, "JPEG", quality=85, optimize=True)
+    else:
+        config = image_handler.ALTERNATE_FORMATS[fmt]
+        img.save(buffer, config["pil_format"], **config["params"])
+    return buffer.tell(), time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("directory", nargs="?", help="Minta képek könyvtára")
+    parser.add_argument("--limit", type=int, default=20, help="Maximum képszám")
+    args = parser.parse_args()
+
+    formats = ["jpeg"] + list(image_handler.ENABLED_FORMATS)
+    totals = {fmt: {"bytes": 0, "seconds": 0.0, "encodes": 0} for fmt in formats}
+
+    corpus = directory_corpus(args.directory, args.limit) if args.directory else synthetic_corpus(args.limit)
+    images = 0
+
+    for _, img in corpus:
+        images += 1
+        img.thumbnail((image_handler.MAX_DIMENSION, image_handler.MAX_DIMENSION), Image.Resampling.LANCZOS)
+        ladder = [img] + [
+            img.resize((w, max(1, round(img.height * w / img.width))), Image.Resampling.LANCZOS)
+            for w in image_handler.VARIANT_WIDTHS if w < img.width
+        ]
+        for sized in ladder:
+            for fmt in formats:
+                size, seconds = encode(sized, fmt)
+                totals[fmt]["bytes"] += size
+                totals[fmt]["seconds"] += seconds
+                totals[fmt]["encodes"] += 1
+
+    jpeg_bytes = totals["jpeg"]["bytes"] or 1
+    print(f"Korpusz: {images} kép, létra: {image_handler.VARIANT_WIDTHS}")
+    print(f"{'formátum':<8} {'összesen':>12} {'megtakarítás':>13} {'átl. kódolás':>14}")
+    for fmt in formats:
+        data = totals[fmt]
+        saved = 100.0 * (1 - data["bytes"] / jpeg_bytes)
+        avg_ms = 1000.0 * data["seconds"] / max(1, data["encodes"])
+        print(f"{fmt:<8} {data['bytes'] / 1024:>9.0f} KB {saved:>12.1f}% {avg_ms:>11.1f} ms")
+
+    unsupported = [f for f in image_handler.FORMAT_PREFERENCE if f not in image_handler.ENABLED_FORMATS]
+    if unsupported:
+        print(f"Nem támogatott a helyi Pillow buildben: {', '.join(unsupported)}")
+
+
+if __name__ == "__main__":
+    main()
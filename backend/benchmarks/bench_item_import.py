@@ -0,0 +1,118 @@
+"""
+CSV import - áteresztőképesség és memória
+
+Ideiglenes SQLite adatbázisba --rows soros generált CSV-t importál az
+item_import csővezetékkel (ugyanaz, mint a POST /api/import), és méri az
+időt, valamint (külön, dry-run futásban) a Python heap csúcsát
+(tracemalloc). Összehasonlításként a --baseline-sample soron a soronkénti
+út fut (kategória lekérdezés + crud.create_item, soronként commit), N-re
+vetítve.
+
+Használat (a backend mappából):
+    python benchmarks/bench_item_import.py [--rows 100000] [--baseline-sample 500]
+"""
+
+import argparse
+import csv
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+WORK_DIR = tempfile.mkdtemp(prefix="bench_import_")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(WORK_DIR, 'bench.db')}"
+
+from app import crud, database, models, schemas  # noqa: E402
+from app.utils import item_import  # noqa: E402
+
+logging.getLogger("app.utils.item_import").setLevel(logging.WARNING)
+
+CATEGORIES = ["Konyha", "Szerszám", "Bútor", "Elektronika", "Kert", "Fürdő", "Ruha", "Könyv"]
+
+
+def write_csv(path: str, rows: int) -> None:
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f, delimiter=";")
+        writer.writerow(["Név", "Kategória", "Mennyiség", "Beszerzési ár", "Vásárlás dátuma", "Helyszín", "Megjegyzés"])
+        for i in range(rows):
+            writer.writerow([
+                f"Tárgy {i}", CATEGORIES[i % len(CATEGORIES)], 1 + i % 7, f"{(i % 500) * 100} Ft",
+                f"20{10 + i % 14}.{1 + i % 12:02d}.{1 + i % 28:02d}.",
+                "Budapest, Fő utca 1" if i % 3 else "", "Importált"
+            ])
+
+
+def pipeline(path: str, dry_run: bool = False) -> dict:
+    db = database.SessionLocal()
+    started = time.perf_counter()
+    with open(path, "rb") as binary:
+        events = [e for e in item_import.run_import(db, item_import.iter_records(binary, "csv"), dry_run) if e["event"] == "done"]
+    elapsed = time.perf_counter() - started
+    db.close()
+    return {"seconds": elapsed, **events[-1]}
+
+
+def peak_memory(path: str) -> float:
+    # Külön dry-run futás: a tracemalloc többszörösére lassítja a feldolgozást
+    tracemalloc.start()
+    pipeline(path, dry_run=True)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 1024 / 1024
+
+
+def per_row(path: str, sample: int) -> float:
+    db = database.SessionLocal()
+    started = time.perf_counter()
+    with open(path, encoding="utf-8", newline="") as f:
+        reader = csv.reader(f, delimiter=";")
+        next(reader)
+        for _, (name, category, quantity, *_rest) in zip(range(sample), reader):
+            if not db.query(models.Category).filter(models.Category.name == category).first():
+                crud.create_category(db, schemas.CategoryCreate(name=category))
+            crud.create_item(db, schemas.ItemCreate(name=name, category=category, quantity=int(quantity)))
+    elapsed = time.perf_counter() - started
+    db.close()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CSV import benchmark")
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--baseline-sample", type=int, default=500)
+    args = parser.parse_args()
+
+    database.init_db()
+    db = database.SessionLocal()
+    db.add(models.Location(city="Budapest", address="Fő utca 1"))
+    db.commit()
+    db.close()
+
+    results = []
+    for rows in sorted({args.rows // 10, args.rows}):
+        path = os.path.join(WORK_DIR, f"items_{rows}.csv")
+        write_csv(path, rows)
+        results.append((rows, os.path.getsize(path), {**pipeline(path), "peak_mb": peak_memory(path)}))
+
+    baseline = per_row(os.path.join(WORK_DIR, f"items_{args.rows}.csv"), args.baseline_sample)
+    projected = baseline / args.baseline_sample * args.rows
+
+    print(f"{'sorok':>8}{'fájl (MB)':>12}{'idő (s)':>10}{'sor/s':>10}{'heap csúcs (MB)':>18}{'hibás':>8}")
+    for rows, size, result in results:
+        print(f"{rows:>8}{size / 1024 / 1024:>12.1f}{result['seconds']:>10.2f}{rows / result['seconds']:>10.0f}"
+              f"{result['peak_mb']:>18.1f}{result['failed']:>8}")
+    print(f"\nSoronként (vetítve {args.rows} sorra): {projected:.1f}s "
+          f"(minta: {args.baseline_sample}, {baseline:.2f}s) - gyorsulás: {projected / results[-1][2]['seconds']:.0f}x")
+
+    database.engine.dispose()
+    shutil.rmtree(WORK_DIR, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Tömeges QR generálás - tárgyankénti kérések vs generate-batch
+
+Ideiglenes SQLite adatbázisba N tárgyat szúr be, majd:
+  1. "kérésenként": minden tárgyra és méretre külön kód kiosztás + commit és
+     külön generate_qr_code() hívás (ahogy a /api/qr/generate/{id} végpont
+     sorozata tenné). Ez a --baseline-sample tárgyon fut, és N-re vetítjük.
+  2. "batch": crud.assign_qr_codes() egy tranzakcióban + render_batch()
+     process poollal, tárgyanként egyszer épített mátrixszal.
+
+Használat (a backend mappából):
+    python benchmarks/bench_qr_batch.py [--items 5000] [--baseline-sample 300] [--processes 4]
+"""
+
+import argparse
+import asyncio
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+WORK_DIR = tempfile.mkdtemp(prefix="bench_qr_")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(WORK_DIR, 'bench.db')}"
+
+from app import crud, database, models  # noqa: E402
+from app.utils import qr_handler  # noqa: E402
+
+
+def seed(count: int) -> list:
+    database.init_db()
+    db = database.SessionLocal()
+    db.bulk_insert_mappings(models.Item, [
+        {"name": f"Tárgy {i}", "category": "Egyéb", "quantity": 1} for i in range(count)
+    ])
+    db.commit()
+    ids = [item_id for (item_id,) in db.query(models.Item.id).order_by(models.Item.id)]
+    db.close()
+    return ids
+
+
+def per_request(item_ids: list) -> float:
+    db = database.SessionLocal()
+    started = time.perf_counter()
+    for item_id in item_ids:
+        for size in qr_handler.QR_SIZES:
+            item = db.get(models.Item, item_id)
+            if not item.qr_code:
+                item.qr_code = qr_handler.new_code_string()
+                db.commit()
+            qr_handler.generate_qr_code(item_id, item.qr_code, size)
+    elapsed = time.perf_counter() - started
+    db.close()
+    return elapsed
+
+
+async def batch(item_ids: list, processes: int) -> dict:
+    db = database.SessionLocal()
+    started = time.perf_counter()
+    entries, assigned = crud.assign_qr_codes(db, item_ids)
+    assign_seconds = time.perf_counter() - started
+    db.close()
+
+    first_progress = None
+    async for _ in qr_handler.render_batch(entries, list(qr_handler.QR_SIZES), processes):
+        if first_progress is None:
+            first_progress = time.perf_counter() - started
+    return {
+        "seconds": time.perf_counter() - started,
+        "assign_seconds": assign_seconds,
+        "first_progress": first_progress,
+        "assigned": assigned,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tömeges QR generálás benchmark")
+    parser.add_argument("--items", type=int, default=5000)
+    parser.add_argument("--baseline-sample", type=int, default=300)
+    parser.add_argument("--processes", type=int, default=qr_handler.RENDER_PROCESSES)
+    args = parser.parse_args()
+
+    ids = seed(args.items)
+    sample = ids[:min(args.baseline_sample, len(ids))]
+
+    qr_handler.QR_DIR = os.path.join(WORK_DIR, "qr_per_request")
+    baseline = per_request(sample)
+    projected = baseline / len(sample) * len(ids)
+
+    # A mintában kiosztott kódokat visszavesszük, hogy a batch mind az N-t kiossza
+    db = database.SessionLocal()
+    db.query(models.Item).update({"qr_code": None})
+    db.commit()
+    db.close()
+
+    qr_handler.QR_DIR = os.path.join(WORK_DIR, "qr_batch")
+    result = asyncio.run(batch(ids, args.processes))
+    qr_handler.shutdown_pool()
+
+    files = len(ids) * len(qr_handler.QR_SIZES)
+    print(f"Tárgyak: {len(ids)}, PNG fájlok: {files}, folyamatok: {args.processes}\n")
+    print(f"{'mód':<22}{'idő (s)':>12}{'PNG/s':>12}")
+    print(f"{'kérésenként (vetítve)':<22}{projected:>12.1f}{files / projected:>12.0f}   "
+          f"(minta: {len(sample)} tárgy, {baseline:.1f}s)")
+    print(f"{'generate-batch':<22}{result['seconds']:>12.1f}{files / result['seconds']:>12.0f}   "
+          f"(kód kiosztás: {result['assign_seconds'] * 1000:.0f} ms, első haladás: {result['first_progress']:.2f}s)")
+    print(f"\nGyorsulás: {projected / result['seconds']:.1f}x")
+
+    database.engine.dispose()
+    shutil.rmtree(WORK_DIR, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+QR beolvasás - adatbázis lekérdezés + ItemResponse vs memória index
+
+Ideiglenes SQLite adatbázisba N QR kóddal ellátott tárgyat szúr be, majd:
+  1. "adatbázis": a régi /api/qr/scan út - lekérdezés qr_code alapján és
+     teljes ItemResponse szerializálás (a --db-sample kódon mérve)
+  2. "index": qr_index.lookup() + kompakt JSON (a compact=true válasz)
+
+Használat (a backend mappából):
+    python benchmarks/bench_qr_scan.py [--items 100000] [--db-sample 2000]
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+WORK_DIR = tempfile.mkdtemp(prefix="bench_scan_")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(WORK_DIR, 'bench.db')}"
+
+from app import database, models, schemas  # noqa: E402
+from app.utils import qr_index  # noqa: E402
+
+
+def seed(count: int) -> list:
+    database.init_db()
+    db = database.SessionLocal()
+    location = models.Location(city="Budapest", address="Fő utca 1")
+    db.add(location)
+    db.flush()
+    codes = [f"ITM-{i:08X}" for i in range(count)]
+    db.bulk_insert_mappings(models.Item, [
+        {"name": f"Tárgy {i}", "category": "Egyéb", "quantity": 1, "qr_code": code, "location_id": location.id}
+        for i, code in enumerate(codes)
+    ])
+    db.commit()
+    db.close()
+    return codes
+
+
+def per_scan_db(codes: list) -> float:
+    db = database.SessionLocal()
+    started = time.perf_counter()
+    for code in codes:
+        item = db.query(models.Item).filter(models.Item.qr_code == code).first()
+        schemas.ItemResponse.model_validate(item).model_dump_json()
+    elapsed = time.perf_counter() - started
+    db.close()
+    return elapsed / len(codes)
+
+
+def per_scan_index(codes: list) -> float:
+    started = time.perf_counter()
+    for code in codes:
+        json.dumps(qr_index.lookup(code), ensure_ascii=False)
+    return (time.perf_counter() - started) / len(codes)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="QR beolvasás benchmark")
+    parser.add_argument("--items", type=int, default=100000)
+    parser.add_argument("--db-sample", type=int, default=2000)
+    args = parser.parse_args()
+
+    codes = seed(args.items)
+    scans = random.Random(42).choices(codes, k=args.items)
+
+    db_seconds = per_scan_db(scans[:args.db_sample])
+
+    started = time.perf_counter()
+    qr_index.load()
+    load_seconds = time.perf_counter() - started
+    index_seconds = per_scan_index(scans)
+
+    print(f"Tárgyak: {args.items}, index betöltés: {load_seconds * 1000:.0f} ms\n")
+    print(f"{'mód':<32}{'µs / beolvasás':>16}")
+    print(f"{'adatbázis + ItemResponse':<32}{db_seconds * 1e6:>16.1f}")
+    print(f"{'index + kompakt JSON':<32}{index_seconds * 1e6:>16.1f}")
+    print(f"\nGyorsulás: {db_seconds / index_seconds:.0f}x")
+
+    database.engine.dispose()
+    shutil.rmtree(WORK_DIR, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
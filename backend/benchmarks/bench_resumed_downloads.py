@@ -0,0 +1,104 @@
+"""
+Megszakadt letöltések folytatása - újrakezdés vs Range
+
+Egy nagy dokumentum letöltését a megadott arányoknál "megszakítja", majd
+egyszer a teljes fájlt tölti le újra (Range nélkül), egyszer pedig
+`Range: bytes=<eddig megkapott>-` + If-Range fejléccel folytatja. A
+media_response.file_response() válaszát közvetlenül az ASGI interfészen
+hajtja meg, és kiírja az átvitt bájtokat és az időt.
+
+Használat (a backend mappából):
+    python benchmarks/bench_resumed_downloads.py [--size-mb 20] [--drops 0.25,0.5,0.75,0.9]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from app.utils import media_response  # noqa: E402
+
+
+class ConnectionDropped(Exception):
+    pass
+
+
+async def download(path: str, headers: dict, drop_after: int = None) -> int:
+    """
+    Egy letöltés; drop_after bájt után megszakítja. Az átvitt bájtok száma.
+    """
+    scope = {"type": "http", "method": "GET", "headers": [], "path": "/", "query_string": b""}
+    received = 0
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal received
+        if message["type"] == "http.response.body":
+            received += len(message.get("body", b""))
+            if drop_after is not None and received >= drop_after:
+                raise ConnectionDropped()
+
+    response = media_response.file_response(
+        path, media_type="application/pdf", request_headers=headers, cache="immutable"
+    )
+    try:
+        await response(scope, receive, send)
+    except ConnectionDropped:
+        pass
+    return received
+
+
+async def scenario(path: str, size: int, drop: float, resume: bool) -> int:
+    first = await download(path, {}, drop_after=int(size * drop))
+    if resume:
+        etag = media_response.etag_for(os.path.basename(path))
+        second = await download(path, {"range": f"bytes={first}-", "if-range": etag})
+    else:
+        second = await download(path, {})
+    return first + second
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Letöltés folytatás Range-dzsel vs újrakezdés")
+    parser.add_argument("--size-mb", type=float, default=20.0)
+    parser.add_argument("--drops", default="0.25,0.5,0.75,0.9")
+    args = parser.parse_args()
+
+    drops = [float(d) for d in args.drops.split(",")]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "ab" * 32 + ".pdf")
+        size = int(args.size_mb * 1024 * 1024)
+        with open(path, "wb") as f:
+            f.write(os.urandom(size))
+
+        print(f"Fájl: {args.size_mb} MB\n")
+        print(f"{'megszakadás':<14}{'újrakezdés (MB)':>18}{'Range (MB)':>14}{'megtakarítás':>15}{'idő újra/Range (ms)':>24}")
+
+        totals = {False: 0, True: 0}
+        for drop in drops:
+            row = {}
+            for resume in (False, True):
+                started = time.perf_counter()
+                transferred = asyncio.run(scenario(path, size, drop, resume))
+                row[resume] = (transferred, (time.perf_counter() - started) * 1000)
+                totals[resume] += transferred
+            saved = 1 - row[True][0] / row[False][0]
+            print(
+                f"{drop:<14.0%}{row[False][0] / 1024 / 1024:>18.1f}{row[True][0] / 1024 / 1024:>14.1f}"
+                f"{saved:>15.0%}{row[False][1]:>13.0f} / {row[True][1]:.0f}"
+            )
+
+        print(f"\nÖsszes átvitel: {totals[False] / 1024 / 1024:.1f} MB -> {totals[True] / 1024 / 1024:.1f} MB "
+              f"({1 - totals[True] / totals[False]:.0%} kevesebb)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+Készlet előrejelzés - tárgyankénti Python ciklus vs vektorizált köteg
+
+Ideiglenes SQLite adatbázisba N tárgyat és --days napnyi mozgásnaplót szúr
+be (tárgyanként átlagosan --every naponta egy fogyás, időnként feltöltés),
+majd a fogyási rátákat kétféleképpen számolja:
+  1. "tárgyanként": tárgyanként egy lekérdezés az ablak mozgásaira és
+     ugyanaz a legkisebb négyzetes illesztés tiszta Pythonban. A
+     --baseline-sample tárgyon fut, és N-re vetítjük.
+  2. "köteg": stock_forecast.compute() - oszlopos betöltés, egy NumPy lépés,
+     a stock_forecasts tábla cseréje.
+
+Használat (a backend mappából):
+    python benchmarks/bench_stock_forecast.py [--items 50000] [--days 730] [--every 7] [--baseline-sample 500]
+"""
+
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+WORK_DIR = tempfile.mkdtemp(prefix="bench_forecast_")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(WORK_DIR, 'bench.db')}"
+
+from sqlalchemy import select  # noqa: E402
+
+from app import database, models  # noqa: E402
+from app.utils import stock_forecast  # noqa: E402
+
+
+def seed(count: int, days: int, every: int, now: datetime) -> int:
+    database.init_db()
+    raw = database.engine.raw_connection()
+    cursor = raw.cursor()
+    cursor.executemany(
+        "INSERT INTO items (id, name, category, quantity, created_at) VALUES (?, ?, 'Fogyóeszköz', 20, ?)",
+        ((i, f"Tárgy {i}", str(now - timedelta(days=days))) for i in range(1, count + 1))
+    )
+
+    rng = random.Random(42)
+    stamps = [str(now - timedelta(days=day, minutes=rng.randint(0, 1439))) for day in range(days, 0, -1)]
+
+    def movements():
+        for item_id in range(1, count + 1):
+            quantity, day = 20, rng.randint(0, every)
+            while day < days:
+                if quantity <= 2:
+                    yield item_id, 20, quantity + 20, "purchased", stamps[day]
+                    quantity += 20
+                used = rng.randint(1, 3)
+                quantity -= used
+                yield item_id, -used, quantity, "used", stamps[day]
+                day += rng.randint(1, 2 * every - 1)
+
+    cursor.executemany(
+        "INSERT INTO stock_movements (item_id, delta, quantity_after, reason, created_at) VALUES (?, ?, ?, ?, ?)",
+        movements()
+    )
+    raw.commit()
+    total = cursor.execute("SELECT COUNT(*) FROM stock_movements").fetchone()[0]
+    raw.close()
+    return total
+
+
+def per_item(item_ids: list, now: datetime) -> float:
+    """Ugyanaz a számítás tárgyanként: egy lekérdezés + Python ciklus"""
+    since = now - timedelta(days=stock_forecast.WINDOW_DAYS)
+    movement = models.StockMovement
+    db = database.SessionLocal()
+    rates = {}
+    started = time.perf_counter()
+    for item_id in item_ids:
+        rows = db.execute(
+            select(movement.created_at, movement.delta)
+            .where(movement.item_id == item_id, movement.delta < 0, movement.created_at >= since)
+            .order_by(movement.created_at, movement.id)
+        ).all()
+        points, cumulative = [], 0
+        for created_at, delta in rows:
+            cumulative -= delta
+            points.append(((created_at - now).total_seconds() / 86400, cumulative))
+        n = len(points)
+        sx = sum(x for x, _ in points)
+        sy = sum(y for _, y in points)
+        sxx = sum(x * x for x, _ in points)
+        sxy = sum(x * y for x, y in points)
+        denominator = n * sxx - sx * sx
+        if n >= stock_forecast.MIN_FIT_POINTS and denominator > 0:
+            rate = (n * sxy - sx * sy) / denominator
+        else:
+            rate = cumulative / stock_forecast.WINDOW_DAYS
+        rates[item_id] = max(rate, 0.0)
+    elapsed = time.perf_counter() - started
+    db.close()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Készlet előrejelzés benchmark")
+    parser.add_argument("--items", type=int, default=50000)
+    parser.add_argument("--days", type=int, default=730)
+    parser.add_argument("--every", type=int, default=7, help="Átlagos napok két fogyás között")
+    parser.add_argument("--baseline-sample", type=int, default=500)
+    args = parser.parse_args()
+
+    now = datetime.now()
+    started = time.perf_counter()
+    total = seed(args.items, args.days, args.every, now)
+    print(f"Tárgyak: {args.items}, mozgások: {total} ({args.days} nap), feltöltés: {time.perf_counter() - started:.1f}s")
+    print(f"Ablak: {stock_forecast.WINDOW_DAYS} nap\n")
+
+    sample = random.Random(7).sample(range(1, args.items + 1), min(args.baseline_sample, args.items))
+    baseline = per_item(sample, now)
+    projected = baseline / len(sample) * args.items
+
+    result = stock_forecast.compute(now=now)
+
+    print(f"{'mód':<26}{'idő (s)':>10}")
+    print(f"{'tárgyanként (vetítve)':<26}{projected:>10.2f}   (minta: {len(sample)}, {baseline:.2f}s)")
+    print(f"{'köteg (NumPy)':<26}{result['seconds']:>10.2f}   ({result['movements']} mozgás, {result['items']} tárgy)")
+    print(f"\nGyorsulás: {projected / result['seconds']:.0f}x")
+
+    database.engine.dispose()
+    shutil.rmtree(WORK_DIR, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
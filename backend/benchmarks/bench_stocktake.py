@@ -0,0 +1,119 @@
+"""
+Leltár - tárgyankénti scan + PUT vs leltár munkamenet
+
+Ideiglenes SQLite adatbázisba N QR kódos tárgyat szúr be, majd N beolvasást
+dolgoz fel (minden tárgy megszámolva, kb. 10%-uk eltérő mennyiséggel):
+  1. "tárgyanként": QR kód lekérdezés + crud.update_item() (külön commit)
+     minden tárgyra, ahogy a /api/qr/scan + PUT /api/items/{id} pár tenné.
+     A --baseline-sample tárgyon fut, és N-re vetítjük.
+  2. "leltár": beolvasások --batch méretű kötegekben, eltérés jelentés
+     egyetlen joinnal, majd alkalmazás egy tranzakcióban.
+
+Használat (a backend mappából):
+    python benchmarks/bench_stocktake.py [--items 10000] [--batch 1000] [--baseline-sample 500]
+"""
+
+import argparse
+import logging
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+WORK_DIR = tempfile.mkdtemp(prefix="bench_stocktake_")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(WORK_DIR, 'bench.db')}"
+
+from app import crud, database, models, schemas  # noqa: E402
+
+# Az update_item tárgyanként figyelmeztetést logol - a mérésben ne a konzol legyen a szűk keresztmetszet
+logging.getLogger("app.crud").setLevel(logging.ERROR)
+
+
+def seed(count: int) -> list:
+    database.init_db()
+    db = database.SessionLocal()
+    db.bulk_insert_mappings(models.Item, [
+        {"name": f"Tárgy {i}", "category": "Egyéb", "quantity": 10, "qr_code": f"ITM-{i:08X}"}
+        for i in range(count)
+    ])
+    db.commit()
+    db.close()
+    rng = random.Random(42)
+    return [(f"ITM-{i:08X}", 10 if rng.random() > 0.1 else rng.randint(1, 20)) for i in range(count)]
+
+
+def per_item(counts: list) -> float:
+    db = database.SessionLocal()
+    started = time.perf_counter()
+    for qr_code, counted in counts:
+        item = db.query(models.Item).filter(models.Item.qr_code == qr_code).first()
+        if item.quantity != counted:
+            crud.update_item(db, item.id, schemas.ItemUpdate(quantity=counted))
+    elapsed = time.perf_counter() - started
+    db.close()
+    return elapsed
+
+
+def stocktake(counts: list, batch: int) -> dict:
+    db = database.SessionLocal()
+    timings = {}
+    started = time.perf_counter()
+    session = crud.create_stocktake(db, schemas.StocktakeCreate(name="Benchmark"))
+    for start in range(0, len(counts), batch):
+        scans = [schemas.StocktakeScan(qr_code=code, quantity=counted) for code, counted in counts[start:start + batch]]
+        crud.add_stocktake_scans(db, session, scans)
+    timings["scans"] = time.perf_counter() - started
+
+    mark = time.perf_counter()
+    report = crud.stocktake_diff(db, session)
+    timings["diff"] = time.perf_counter() - mark
+
+    mark = time.perf_counter()
+    result = crud.apply_stocktake(db, session)
+    timings["apply"] = time.perf_counter() - mark
+    timings["total"] = time.perf_counter() - started
+    timings["changed"] = report["summary"]["over"] + report["summary"]["under"]
+    timings["adjusted"] = result["adjusted"]
+    db.close()
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Leltár benchmark")
+    parser.add_argument("--items", type=int, default=10000)
+    parser.add_argument("--batch", type=int, default=1000)
+    parser.add_argument("--baseline-sample", type=int, default=500)
+    args = parser.parse_args()
+
+    counts = seed(args.items)
+    sample = counts[:min(args.baseline_sample, len(counts))]
+
+    baseline = per_item(sample)
+    projected = baseline / len(sample) * len(counts)
+
+    # A minta módosításait visszaállítjuk, hogy a leltár ugyanazt az eltérést lássa
+    db = database.SessionLocal()
+    db.query(models.Item).update({"quantity": 10})
+    db.commit()
+    db.close()
+
+    result = stocktake(counts, args.batch)
+
+    print(f"Beolvasások: {len(counts)}, eltérő: {result['changed']}, köteg: {args.batch}\n")
+    print(f"{'mód':<26}{'idő (s)':>10}")
+    print(f"{'tárgyanként (vetítve)':<26}{projected:>10.2f}   (minta: {len(sample)}, {baseline:.2f}s)")
+    print(f"{'leltár':<26}{result['total']:>10.2f}   "
+          f"(beolvasás: {result['scans']:.2f}s, jelentés: {result['diff']:.2f}s, alkalmazás: {result['apply']:.2f}s)")
+    print(f"\nGyorsulás: {projected / result['total']:.0f}x, módosított tárgyak: {result['adjusted']}")
+
+    database.engine.dispose()
+    shutil.rmtree(WORK_DIR, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+import sys
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from app import database, models  # noqa: F401  (models registers the tables)
+from app.utils import image_handler
+
+
+@pytest.fixture(autouse=True)
+def test_db(tmp_path, monkeypatch):
+    """Every test gets its own SQLite database (blob registry, items, images)."""
+
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'test.db'}",
+        connect_args={"check_same_thread": False},
+    )
+    database.Base.metadata.create_all(bind=engine)
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    monkeypatch.setattr(database, "engine", engine)
+    monkeypatch.setattr(database, "SessionLocal", session_factory)
+
+    yield session_factory
+
+    engine.dispose()
+
+
+@pytest.fixture
+def media_dirs(tmp_path, monkeypatch):
+    """Image handler directories (uploads, thumbnails, variants, rotated, pending) under tmp_path."""
+
+    upload_dir = tmp_path / "uploads"
+    monkeypatch.setattr(image_handler, "UPLOAD_DIR", str(upload_dir))
+    monkeypatch.setattr(image_handler, "THUMBNAIL_DIR", str(upload_dir / "thumbnails"))
+    monkeypatch.setattr(image_handler, "VARIANT_DIR", str(upload_dir / "variants"))
+    monkeypatch.setattr(image_handler, "ROTATED_DIR", str(upload_dir / "rotated"))
+    monkeypatch.setattr(image_handler, "PENDING_DIR", str(upload_dir / "pending"))
+    image_handler.create_upload_dir()
+    return upload_dir
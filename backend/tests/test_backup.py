@@ -0,0 +1,129 @@
+import io
+import os
+import sqlite3
+import tarfile
+
+import pytest
+
+from app import models
+from app.utils import backup, image_handler
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    # Archive member names are relative to the backend working directory
+    monkeypatch.chdir(tmp_path)
+    image_handler.create_upload_dir()
+    return tmp_path
+
+
+def add_item(session_factory, name, image):
+    path = image_handler.get_image_path(image)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(name.encode() * 100)
+    db = session_factory()
+    db.add(models.Item(name=name, category="Konyha", image_filename=image))
+    db.commit()
+    db.close()
+    return path
+
+
+def download(compression="gzip", since=None):
+    backup_id, chunks = backup.open_stream(compression, since)
+    return backup_id, b"".join(chunks)
+
+
+def members(data):
+    with tarfile.open(fileobj=io.BytesIO(data), mode="r:*") as tar:
+        return tar.getnames()
+
+
+def test_full_and_incremental_backup_restore(workdir, test_db):
+    first_image = add_item(test_db, "Bögre", "bogre.jpg")
+    with open(os.path.join(image_handler.UPLOAD_DIR, "orphan.jpg"), "wb") as f:
+        f.write(b"x")
+
+    full_id, full = download()
+    assert members(full) == ["database.db", first_image, "manifest.ndjson"]
+
+    second_image = add_item(test_db, "Fazék", "fazek.jpg")
+    inc_id, incremental = download("zstd" if backup.zstandard else "none", since=full_id)
+
+    archives = []
+    for name, data in (("full.tar.gz", full), ("inc.archive", incremental)):
+        archives.append(workdir / name)
+        archives[-1].write_bytes(data)
+
+    target = workdir / "restored"
+    database_file = target / "home_inventory.db"
+    # The live media tree is on the same filesystem: the full restore links instead of extracting
+    first = backup.restore_archive(str(archives[0]), str(target), str(database_file), link_from=str(workdir))
+    assert (first["files"], first["linked"]) == (0, 1)
+    result = backup.restore_archive(str(archives[1]), str(target), str(database_file), overwrite=True)
+
+    assert (result["backup"], result["base"], result["files"]) == (inc_id, full_id, 1)
+    assert (target / first_image).read_bytes() == b"B\xc3\xb6gre" * 100
+    assert (target / second_image).exists() and not (target / "uploads" / "orphan.jpg").exists()
+    names = [name for (name,) in sqlite3.connect(database_file).execute("SELECT name FROM items ORDER BY id")]
+    assert names == ["Bögre", "Fazék"]
+    assert (target / "home_inventory.db.before-restore").exists()
+
+
+def test_restore_refuses_existing_database_and_unsafe_paths(workdir, test_db):
+    existing = workdir / "live.db"
+    existing.write_bytes(b"")
+    with pytest.raises(FileExistsError):
+        backup.restore_archive("missing.tar", database_target=str(existing))
+
+    evil = workdir / "evil.tar"
+    with tarfile.open(evil, "w") as tar:
+        info = tarfile.TarInfo("../escape.txt")
+        info.size = 2
+        tar.addfile(info, io.BytesIO(b"hi"))
+    with pytest.raises(ValueError):
+        backup.restore_archive(str(evil), str(workdir / "target"), str(workdir / "new.db"))
+    assert not (workdir / "escape.txt").exists()
+
+    with pytest.raises(FileNotFoundError):
+        backup.open_stream("gzip", since="20240101-000000-abcdef")
+
+
+def test_hard_linked_media_restored_as_regular_files(workdir, test_db):
+    original = add_item(test_db, "Bögre", "bogre.jpg")
+    linked = image_handler.get_image_path("bogre2.jpg")
+    os.makedirs(os.path.dirname(linked), exist_ok=True)
+    os.link(original, linked)
+    db = test_db()
+    db.add(models.Item(name="Bögre 2", category="Konyha", image_filename="bogre2.jpg"))
+    db.commit()
+    db.close()
+
+    archive = workdir / "full.tar"
+    archive.write_bytes(download("none")[1])
+    target = workdir / "restored"
+    result = backup.restore_archive(str(archive), str(target), str(target / "home_inventory.db"))
+
+    assert result["files"] == 2
+    assert (target / original).read_bytes() == (target / linked).read_bytes() == b"B\xc3\xb6gre" * 100
+
+
+def test_restore_overwrites_same_size_file_with_different_mtime(workdir, test_db):
+    image = add_item(test_db, "Bögre", "bogre.jpg")
+    archive = workdir / "full.tar"
+    archive.write_bytes(download("none")[1])
+    target = workdir / "restored"
+    backup.restore_archive(str(archive), str(target), str(target / "home_inventory.db"))
+
+    # Edited in place at the same size: only the mtime tells it apart
+    restored = target / image
+    restored.write_bytes(b"X" * restored.stat().st_size)
+    os.utime(restored, (restored.stat().st_mtime + 60,) * 2)
+
+    result = backup.restore_archive(str(archive), str(target), str(target / "home_inventory.db"), overwrite=True)
+    assert (result["files"], result["skipped"]) == (1, 0)
+    assert restored.read_bytes() == b"B\xc3\xb6gre" * 100
+    assert int(restored.stat().st_mtime) == int(os.stat(image).st_mtime)
+
+    again = backup.restore_archive(str(archive), str(target), str(target / "home_inventory.db"), overwrite=True)
+    assert (again["files"], again["skipped"]) == (0, 1)
@@ -0,0 +1,158 @@
+import io
+import os
+from datetime import datetime, timedelta
+
+import pytest
+from PIL import Image
+from starlette.datastructures import UploadFile
+
+from app import models
+from app.utils import blob_store, image_handler, media_response
+
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+def _png_upload(name="photo.png", color="red"):
+    data = io.BytesIO()
+    with Image.new("RGB", (320, 200), color=color) as img:
+        img.save(data, format="PNG")
+    data.seek(0)
+    return UploadFile(filename=name, file=data, headers={"content-type": "image/png"})
+
+
+def _age_blob(session_factory, digest, hours):
+    db = session_factory()
+    blob = db.get(models.Blob, digest)
+    blob.released_at = datetime.now() - timedelta(hours=hours)
+    db.commit()
+    db.close()
+
+
+async def test_identical_upload_is_deduplicated(media_dirs, test_db, monkeypatch):
+    """Uploading the same bytes twice yields one sharded blob and skips reprocessing."""
+
+    first = await image_handler.save_uploaded_file(_png_upload("a.png"))
+    path = image_handler.get_image_path(first["filename"])
+    digest = blob_store.digest_from_filename(first["filename"])
+    assert path.endswith(os.path.join(digest[:2], digest[2:4], first["filename"]))
+    assert os.path.exists(path)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("duplicate upload must not be re-encoded")
+
+    monkeypatch.setattr(image_handler, "_generate_variants", fail)
+
+    second = await image_handler.save_uploaded_file(_png_upload("b.png"))
+    assert second["filename"] == first["filename"]
+    assert second["original_filename"] == "b.png"
+    assert second["variants"] == first["variants"]
+
+
+async def test_refcount_and_gc(media_dirs, test_db):
+    """Referenced blobs survive GC; unreferenced ones are removed only after the grace period."""
+
+    result = await image_handler.save_uploaded_file(_png_upload())
+    filename = result["filename"]
+    digest = blob_store.digest_from_filename(filename)
+
+    db = test_db()
+    item = models.Item(name="Lámpa", category="Egyéb", image_filename=filename)
+    db.add(item)
+    db.flush()
+    db.add(models.ItemImage(item_id=item.id, filename=filename, original_filename="photo.png"))
+    db.commit()
+    assert db.get(models.Blob, digest).ref_count == 2
+
+    _age_blob(test_db, digest, 48)
+    assert blob_store.collect_garbage()["removed"] == 0
+
+    item.image_filename = None
+    db.commit()
+    db.delete(db.query(models.ItemImage).one())
+    db.commit()
+    db.expire_all()
+    blob = db.get(models.Blob, digest)
+    assert blob.ref_count == 0 and blob.released_at is not None
+    db.close()
+
+    # Frissen felszabadult blob a türelmi időn belül megmarad
+    assert blob_store.collect_garbage()["removed"] == 0
+    assert os.path.exists(image_handler.get_image_path(filename))
+
+    _age_blob(test_db, digest, 48)
+    report = blob_store.collect_garbage()
+    assert report["removed"] == 1
+    assert report["reclaimed_bytes"] > 0
+    assert not os.path.exists(image_handler.get_image_path(filename))
+    assert not os.path.exists(image_handler.get_thumbnail_path(filename))
+
+
+async def test_rotating_one_row_keeps_rotations_of_rows_sharing_the_blob(media_dirs, test_db):
+    """Rendering a rotation for one ItemImage must not delete files another row still serves."""
+
+    from app import jobs
+
+    filename = (await image_handler.save_uploaded_file(_png_upload()))["filename"]
+    db = test_db()
+    item = models.Item(name="Lámpa", category="Egyéb")
+    db.add(item)
+    db.flush()
+    first, second = (models.ItemImage(item_id=item.id, filename=filename, original_filename="photo.png",
+                                      rotation=rotation, processing_status="ready") for rotation in (90, 180))
+    db.add_all([first, second])
+    db.commit()
+    ids = first.id, second.id
+    db.close()
+
+    for image_id in ids:
+        jobs.render_image_rotation(image_id)
+
+    assert os.path.exists(image_handler.get_rotated_path(filename, 90))
+    assert os.path.exists(image_handler.get_rotated_path(filename, 180))
+
+
+def test_sharded_static_files_resolves_flat_urls(tmp_path):
+    """Flat /uploads/<hash>.jpg URLs map onto the sharded layout; legacy flat files still resolve."""
+
+    digest = "ab" * 32
+    name = f"{digest}.jpg"
+    sharded = tmp_path / "ab" / "ab" / name
+    sharded.parent.mkdir(parents=True)
+    sharded.write_bytes(b"x")
+    (tmp_path / "legacy.jpg").write_bytes(b"y")
+
+    static = media_response.ShardedStaticFiles(directory=str(tmp_path))
+    full_path, stat = static.lookup_path(name)
+    assert stat is not None and full_path == str(sharded)
+    full_path, stat = static.lookup_path("legacy.jpg")
+    assert stat is not None and full_path.endswith("legacy.jpg")
+
+
+def test_migrate_flat_files_keeps_paths_resolvable(tmp_path):
+    """Legacy flat files resolve before, during and after the online migration."""
+
+    base = tmp_path / "qr_codes"
+    base.mkdir()
+    names = [f"item_{i}_qr_medium.png" for i in range(5)]
+    for name in names:
+        (base / name).write_bytes(name.encode())
+
+    assert blob_store.resolve_path(str(base), names[0]) == str(base / names[0])
+
+    result = blob_store.migrate_flat_files(str(base), batch_size=2, pause=0)
+    assert result == {"moved": 5, "skipped": 0, "remaining": 0}
+    assert (base / blob_store.MIGRATION_MARKER).exists()
+
+    static = media_response.ShardedStaticFiles(directory=str(base))
+    for name in names:
+        path = blob_store.resolve_path(str(base), name)
+        assert path == blob_store.shard_path(str(base), name)
+        with open(path, "rb") as f:
+            assert f.read() == name.encode()
+        assert static.lookup_path(name)[1] is not None
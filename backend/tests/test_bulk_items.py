@@ -0,0 +1,106 @@
+import pytest
+from sqlalchemy import event
+
+from app import crud, database, models, schemas
+from app.utils import qr_index
+
+
+@pytest.fixture
+def db(test_db):
+    session = test_db()
+    session.add_all([
+        models.Item(name="Fúró", category="Szerszám", quantity=2, qr_code="ITM-00000001"),
+        models.Item(name="Létra", category="Szerszám", quantity=1),
+        models.Item(name="Kanapé", category="Bútor", quantity=1),
+    ])
+    session.commit()
+    qr_index.load()
+    yield session
+    session.close()
+    qr_index.reset()
+
+
+def ops(*operations):
+    return schemas.BulkItemRequest(operations=list(operations)).operations
+
+
+def item_id(db, name):
+    return db.query(models.Item.id).filter_by(name=name).scalar()
+
+
+def test_mixed_batch_runs_in_one_transaction(db):
+    drill, ladder, sofa = item_id(db, "Fúró"), item_id(db, "Létra"), item_id(db, "Kanapé")
+    commits = []
+    event.listen(database.engine, "commit", lambda conn: commits.append(conn))
+
+    creates = [
+        {"op": "create", "item": {"name": f"Csavar {i}", "category": "Szerszám", "quantity": 10,
+                                  "images": [{"filename": f"csavar{i}.jpg"}]}}
+        for i in range(3)
+    ]
+    result = crud.bulk_item_operations(db, ops(
+        *creates,
+        {"op": "update", "id": drill, "changes": {"name": "Ütvefúró", "quantity": 5}},
+        {"op": "update", "id": ladder, "changes": {"category": "Kert"}},
+        {"op": "delete", "id": sofa},
+    ))
+
+    assert len(commits) == 1
+    assert (result["created"], result["updated"], result["deleted"], result["errors"]) == (3, 2, 1, [])
+    created = [r["id"] for r in result["results"][:3]]
+    assert [db.get(models.Item, i).name for i in created] == ["Csavar 0", "Csavar 1", "Csavar 2"]
+    assert [r["status"] for r in result["results"]] == ["created"] * 3 + ["updated", "updated", "deleted"]
+    assert db.query(models.ItemImage).filter(models.ItemImage.item_id.in_(created)).count() == 3
+    assert (db.get(models.Item, ladder).category, db.get(models.Item, sofa)) == ("Kert", None)
+
+    # Side effects of the ORM path are kept: stock ledger and QR index
+    assert db.query(models.StockMovement).filter_by(item_id=drill, reason="edit").one().delta == 3
+    assert db.query(models.StockMovement).filter_by(item_id=created[0], reason="initial").one().delta == 10
+    assert qr_index.lookup("ITM-00000001")["name"] == "Ütvefúró"
+
+
+def test_invalid_operation_rejects_the_whole_batch(db):
+    drill = item_id(db, "Fúró")
+
+    result = crud.bulk_item_operations(db, ops(
+        {"op": "create", "item": {"name": "Csavar", "category": "Szerszám"}},
+        {"op": "update", "id": drill, "changes": {"location_id": 999}},
+        {"op": "delete", "id": drill},
+        {"op": "delete", "id": 12345},
+        {"op": "update", "id": drill},
+    ))
+
+    assert [(e["index"], e["error"]) for e in result["errors"]] == [
+        (1, "Helyszín #999 nem található"),
+        (2, f"Item #{drill} többször szerepel a kötegben"),
+        (3, "Item #12345 nem található"),
+        (4, f"Item #{drill} többször szerepel a kötegben"),
+    ]
+    assert db.query(models.Item).count() == 3
+    assert db.query(models.Item).filter_by(name="Csavar").first() is None
+
+
+def test_bulk_writes_accept_zero_quantity(db):
+    ladder = item_id(db, "Létra")
+
+    result = crud.bulk_item_operations(db, ops(
+        {"op": "create", "item": {"name": "Csavar", "category": "Szerszám", "quantity": 0}},
+        {"op": "update", "id": ladder, "changes": {"quantity": 0}},
+    ))
+
+    assert result["errors"] == []
+    assert db.get(models.Item, result["results"][0]["id"]).quantity == 0
+    assert db.get(models.Item, ladder).quantity == 0
+
+
+def test_inserted_items_with_a_qr_code_reach_the_scan_index(db):
+    class ItemWithCode(schemas.ItemCreate):
+        qr_code: str
+
+    [new_id] = crud.insert_items(db, [ItemWithCode(name="Csavar", category="Szerszám", qr_code="ITM-00000009")])
+    db.commit()
+
+    # Indexed at commit time: the lookup is a hit, not a database fallback
+    misses = qr_index.stats()["misses"]
+    assert qr_index.lookup("ITM-00000009")["id"] == new_id
+    assert qr_index.stats()["misses"] == misses
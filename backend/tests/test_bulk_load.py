@@ -0,0 +1,61 @@
+import os
+import sqlite3
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app import models
+from app.utils import bulk_load, document_handler, image_handler, orphan_gc
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    # Media directories are relative to the backend working directory
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def test_seed_households_loads_rows_indexes_and_files(workdir):
+    target = workdir / "seed.db"
+    result = bulk_load.seed_households(str(target), households=5, items=40, images_per_item=0.5,
+                                       documents_per_item=0.25, workers=2)
+
+    assert (result["items"], result["stock_movements"]) == (40, 40)
+    assert result["images"] == 20 and result["documents"] == 10
+    assert result["files"]["linked"] + result["files"]["copied"] == 2 * 20 + 10
+
+    conn = sqlite3.connect(target)
+    indexes = {name for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL")}
+    expected = {index.name for table in models.Base.metadata.tables.values() for index in table.indexes}
+    assert expected <= indexes
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "delete"
+    assert conn.execute("PRAGMA integrity_check").fetchone()[0] == "ok"
+    assert conn.execute("SELECT COUNT(DISTINCT user_id) FROM items").fetchone()[0] > 1
+    conn.close()
+
+    # Every seeded file is referenced by a row, so orphan GC keeps them
+    engine = create_engine(f"sqlite:///{target}")
+    db = sessionmaker(bind=engine)()
+    try:
+        referenced = [entry.path for _, entry in orphan_gc.iter_referenced_files(db) if entry.name != ".sharded"]
+    finally:
+        db.close()
+        engine.dispose()
+    assert len(referenced) == 2 * 20 + 10
+    assert sum(path.startswith(document_handler.DOCUMENT_DIR) for path in referenced) == 10
+    assert os.path.isfile(os.path.join(image_handler.UPLOAD_DIR, ".sharded"))
+
+
+def test_bulk_loader_refuses_existing_and_removes_failed_database(workdir):
+    existing = workdir / "live.db"
+    existing.write_bytes(b"")
+    with pytest.raises(FileExistsError):
+        with bulk_load.bulk_loader(str(existing)):
+            pass
+
+    target = workdir / "broken.db"
+    with pytest.raises(sqlite3.IntegrityError):
+        with bulk_load.bulk_loader(str(target)) as conn:
+            bulk_load.insert_rows(conn, "categories", ["name"], [("Konyha",), ("Konyha",)])
+    assert not target.exists()
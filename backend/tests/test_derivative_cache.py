@@ -0,0 +1,98 @@
+import asyncio
+import os
+import sys
+from pathlib import Path
+
+import pytest
+from PIL import Image
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from app.utils import derivative_cache, image_handler
+
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+def cache_env(media_dirs, tmp_path, monkeypatch):
+    """Source image in a temp upload dir and an empty derivative cache."""
+
+    monkeypatch.setattr(derivative_cache, "CACHE_DIR", str(tmp_path / "cache"))
+    derivative_cache.init_cache()
+
+    with Image.new("RGB", (800, 400), color="green") as img:
+        # Legacy flat layout: also exercises the resolve_path fallback
+        img.save(os.path.join(image_handler.UPLOAD_DIR, "src.jpg"), "JPEG")
+    return tmp_path
+
+
+async def test_derivative_is_resized_rotated_and_cached(cache_env, monkeypatch):
+    """A rotated derivative honours the requested box and a second request is a cache hit."""
+
+    path = await derivative_cache.get_derivative("src.jpg", width=100, rotate=90)
+    with Image.open(path) as img:
+        assert img.size == (100, 200)
+
+    renders = []
+    monkeypatch.setattr(derivative_cache, "_render", lambda *args: renders.append(args))
+    assert await derivative_cache.get_derivative("src.jpg", width=100, rotate=90) == path
+    assert renders == []
+
+
+async def test_concurrent_requests_are_coalesced(cache_env, monkeypatch):
+    """Parallel requests for the same derivative trigger a single render."""
+
+    calls = []
+    original_render = derivative_cache._render
+
+    def counting_render(*args):
+        calls.append(args)
+        return original_render(*args)
+
+    monkeypatch.setattr(derivative_cache, "_render", counting_render)
+
+    paths = await asyncio.gather(*[
+        derivative_cache.get_derivative("src.jpg", width=200, height=200, fit="cover")
+        for _ in range(10)
+    ])
+
+    assert len(calls) == 1
+    assert len(set(paths)) == 1
+
+
+async def test_lru_eviction_respects_size_limit(cache_env, monkeypatch):
+    """When the cache exceeds its byte budget, the least recently used files go first."""
+
+    first = await derivative_cache.get_derivative("src.jpg", width=300)
+    monkeypatch.setattr(derivative_cache, "MAX_CACHE_BYTES", int(os.path.getsize(first) * 1.5))
+
+    second = await derivative_cache.get_derivative("src.jpg", width=310)
+
+    assert not os.path.exists(first)
+    assert os.path.exists(second)
+    assert derivative_cache.cache_stats()["entries"] == 1
+
+
+async def test_missing_source_raises(cache_env):
+    with pytest.raises(FileNotFoundError):
+        await derivative_cache.get_derivative("missing.jpg", width=100)
+
+
+async def test_fill_does_not_upscale_and_delete_invalidates(cache_env):
+    """fill keeps the box aspect ratio without upscaling; deleting the source drops its derivatives."""
+
+    path = await derivative_cache.get_derivative("src.jpg", width=1600, height=1600, fit="fill")
+    with Image.open(path) as img:
+        assert img.size == (400, 400)
+
+    image_handler.remove_image_files("src.jpg")
+    assert not os.path.exists(path)
+    assert derivative_cache.cache_stats()["entries"] == 0
@@ -22,18 +22,9 @@ def anyio_backend():
     return "asyncio"
 
 
-async def test_save_uploaded_file_creates_image_and_thumbnail(tmp_path, monkeypatch):
+async def test_save_uploaded_file_creates_image_and_thumbnail(media_dirs):
     """A small PNG upload should be saved and converted to JPEG with a thumbnail."""
 
-    upload_dir = tmp_path / "uploads"
-    thumb_dir = upload_dir / "thumbnails"
-
-    # Redirect image handler paths into the test temp directory
-    monkeypatch.setattr(image_handler, "UPLOAD_DIR", str(upload_dir))
-    monkeypatch.setattr(image_handler, "THUMBNAIL_DIR", str(thumb_dir))
-
-    image_handler.create_upload_dir()
-
     # Build a simple in-memory PNG for upload
     img_bytes = io.BytesIO()
     with Image.new("RGB", (640, 480), color="red") as img:
@@ -55,3 +46,121 @@ async def test_save_uploaded_file_creates_image_and_thumbnail(tmp_path, monkeypa
     assert os.path.exists(thumb_path)
     assert result["content_type"] == "image/jpeg"
     assert result["original_filename"] == "test.png"
+
+
+async def test_save_uploaded_file_generates_variant_ladder(media_dirs, monkeypatch):
+    """Only ladder widths below the main image width are generated; the main image tops the ladder."""
+
+    monkeypatch.setattr(image_handler, "VARIANT_WIDTHS", (96, 240, 480, 960))
+
+    img_bytes = io.BytesIO()
+    with Image.new("RGB", (640, 480), color="blue") as img:
+        img.save(img_bytes, format="PNG")
+    img_bytes.seek(0)
+
+    upload = UploadFile(
+        filename="ladder.png",
+        file=img_bytes,
+        headers={"content-type": "image/png"},
+    )
+
+    result = await image_handler.save_uploaded_file(upload)
+
+    widths = [v["width"] for v in result["variants"]]
+    assert widths == [96, 240, 480, 640]
+
+    for width in (96, 240, 480):
+        variant_path = image_handler.get_variant_path(result["filename"], width)
+        with Image.open(variant_path) as variant:
+            assert variant.width == width
+
+    assert result["srcset"].endswith(f"/uploads/{result['filename']} 640w")
+
+    image_handler.remove_image_files(result["filename"])
+    assert not os.path.exists(image_handler.get_variant_path(result["filename"], 96))
+
+
+def test_negotiate_image_prefers_explicitly_accepted_alternate(tmp_path):
+    """WebP is served only when explicitly accepted and present; JPEG is the fallback."""
+
+    main_path = tmp_path / "abc.jpg"
+    main_path.write_bytes(b"jpeg")
+    (tmp_path / "abc.webp").write_bytes(b"webp")
+
+    path, media_type = image_handler.negotiate_image(str(main_path), "image/webp,image/*,*/*;q=0.8")
+    assert path == str(tmp_path / "abc.webp")
+    assert media_type == "image/webp"
+
+    # AVIF nincs a lemezen, WebP-t tiltja a q=0
+    path, media_type = image_handler.negotiate_image(str(main_path), "image/avif,image/webp;q=0,*/*")
+    assert path == str(main_path)
+    assert media_type is None
+
+    path, media_type = image_handler.negotiate_image(str(main_path), None)
+    assert path == str(main_path)
+
+
+async def test_exif_orientation_is_applied_at_ingest(media_dirs):
+    """A JPEG tagged with Orientation=6 is stored upright, so clients never rotate it."""
+
+    img_bytes = io.BytesIO()
+    with Image.new("RGB", (800, 400), color="red") as img:
+        exif = img.getexif()
+        exif[0x0112] = 6  # 90° óramutató szerint
+        img.save(img_bytes, format="JPEG", exif=exif)
+    img_bytes.seek(0)
+
+    upload = UploadFile(filename="phone.jpg", file=img_bytes, headers={"content-type": "image/jpeg"})
+    result = await image_handler.save_uploaded_file(upload)
+
+    assert result["orientation"] == "portrait"
+    with Image.open(image_handler.get_image_path(result["filename"])) as saved:
+        assert saved.size == (400, 800)
+        assert saved.getexif().get(0x0112) is None
+
+
+def test_render_rotation_replaces_previous_rotation(media_dirs):
+    """Rotated main and thumbnail files follow the latest rotation only."""
+
+    with Image.new("RGB", (320, 160), color="red") as img:
+        img.save(os.path.join(image_handler.UPLOAD_DIR, "rot.jpg"), "JPEG")
+        img.save(os.path.join(image_handler.THUMBNAIL_DIR, "thumb_rot.jpg"), "JPEG")
+
+    image_handler.render_rotation("rot.jpg", 90)
+    with Image.open(image_handler.get_rotated_path("rot.jpg", 90)) as rotated:
+        assert rotated.size == (160, 320)
+    assert os.path.exists(image_handler.get_rotated_thumbnail_path("rot.jpg", 90))
+
+    image_handler.render_rotation("rot.jpg", 180)
+    assert not os.path.exists(image_handler.get_rotated_path("rot.jpg", 90))
+    assert os.path.exists(image_handler.get_rotated_path("rot.jpg", 180))
+
+    image_handler.render_rotation("rot.jpg", 0)
+    assert not os.path.exists(image_handler.get_rotated_path("rot.jpg", 180))
+
+
+async def test_served_files_are_written_through_temp_files(media_dirs, monkeypatch):
+    """Content-addressed files are cached as immutable, so they only appear once complete."""
+
+    saved = []
+    original_save = Image.Image.save
+
+    def recording_save(self, fp, *args, **kwargs):
+        saved.append(str(fp))
+        return original_save(self, fp, *args, **kwargs)
+
+    monkeypatch.setattr(Image.Image, "save", recording_save)
+
+    img_bytes = io.BytesIO()
+    with Image.new("RGB", (640, 480), color="red") as img:
+        original_save(img, img_bytes, format="PNG")
+    img_bytes.seek(0)
+    result = await image_handler.save_uploaded_file(
+        UploadFile(filename="atomic.png", file=img_bytes, headers={"content-type": "image/png"})
+    )
+    image_handler.render_rotation(result["filename"], 90)
+
+    assert saved and all(path.endswith(".tmp") for path in saved)
+    assert os.path.exists(image_handler.get_image_path(result["filename"]))
+    assert os.path.exists(image_handler.get_rotated_path(result["filename"], 90))
+    assert not list(media_dirs.rglob("*.tmp"))
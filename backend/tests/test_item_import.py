@@ -0,0 +1,100 @@
+import io
+from datetime import date, datetime
+
+import pytest
+
+from app import models
+from app.utils import item_import
+
+
+@pytest.fixture
+def db(test_db):
+    session = test_db()
+    session.add_all([
+        models.User(username="kata", first_name="Katalin", last_name="Kovács"),
+        models.Location(city="Budapest", address="Fő utca 1"),
+        models.Category(name="Konyha"),
+    ])
+    session.commit()
+    yield session
+    session.close()
+
+
+def run(db, binary, fmt="csv", **kwargs):
+    return list(item_import.run_import(db, item_import.iter_records(binary, fmt), **kwargs))
+
+
+def test_csv_rows_are_resolved_validated_and_inserted_in_batches(db):
+    csv_text = (
+        "Név;Kategória;Mennyiség;Beszerzési ár;Vásárlás dátuma;Felhasználó;Helyszín\n"
+        "Kávéfőző;konyha;1;12 990 Ft;2023.05.01.;Kovács Katalin;Budapest, Fő utca 1\n"
+        "Fúró;Szerszám;2;;;kata;\n"
+        ";Szerszám;1;;;;\n"
+        "Létra;Szerszám;-1;;;;\n"
+        "Lámpa;Világítás;1;;;Senki;\n"
+        "\n"
+        "Bögre;KONYHA;6;1 200,50;;;\n"
+    )
+
+    events = run(db, io.BytesIO(csv_text.encode("cp1250")), batch_size=3)
+
+    errors = {e["row"]: e["errors"] for e in events if e["event"] == "error"}
+    assert set(errors) == {4, 5, 6}
+    assert errors[6] == ["Ismeretlen felhasználó: Senki"]
+    assert [e["rows"] for e in events if e["event"] == "progress"] == [3, 6]
+    assert events[-1] == {**events[-1], "event": "done", "rows": 6, "imported": 3, "failed": 3, "categories_created": 1}
+
+    items = {item.name: item for item in db.query(models.Item)}
+    assert set(items) == {"Kávéfőző", "Fúró", "Bögre"}
+    assert (items["Kávéfőző"].category, items["Kávéfőző"].purchase_price) == ("Konyha", 12990)
+    assert items["Kávéfőző"].purchase_date == date(2023, 5, 1)
+    assert items["Kávéfőző"].location_id is not None and items["Fúró"].user_id == items["Kávéfőző"].user_id
+    assert (items["Bögre"].category, items["Bögre"].purchase_price) == ("Konyha", 1200.5)
+    # Only categories of accepted rows are created ("Világítás" row failed)
+    assert sorted(name for (name,) in db.query(models.Category.name)) == ["Konyha", "Szerszám"]
+    assert db.query(models.StockMovement).filter_by(reason="initial").count() == 3
+
+
+def test_xlsx_import_and_dry_run(db):
+    openpyxl = pytest.importorskip("openpyxl")
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.append(["name", "category", "quantity", "purchase_date"])
+    sheet.append(["Porszívó", "Takarítás", 1.0, datetime(2022, 3, 4)])
+    sheet.append(["Seprű", "Takarítás", "sok", None])
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+
+    buffer.seek(0)
+    dry = run(db, buffer, "xlsx", dry_run=True)
+    assert (dry[-1]["imported"], dry[-1]["failed"], dry[-1]["dry_run"]) == (1, 1, True)
+    assert db.query(models.Item).count() == 0
+
+    buffer.seek(0)
+    events = run(db, buffer, "xlsx")
+    assert events[0]["row"] == 3 and events[0]["errors"][0].startswith("quantity")
+    assert db.query(models.Item).one().purchase_date == date(2022, 3, 4)
+
+    with pytest.raises(ValueError):
+        run(db, io.BytesIO("Név,Ár\nKávé,100\n".encode()))
+
+
+def test_unknown_user_and_location_ids_are_row_errors(db):
+    user_id = db.query(models.User.id).scalar()
+    location_id = db.query(models.Location.id).scalar()
+    csv_text = (
+        "name,category,user id,location id\n"
+        f"Kávéfőző,Konyha,{user_id},{location_id}\n"
+        f"Fúró,Szerszám,{user_id + 100},\n"
+        f"Létra,Szerszám,,{location_id + 100}\n"
+    )
+
+    events = run(db, io.BytesIO(csv_text.encode()))
+
+    errors = {e["row"]: e["errors"] for e in events if e["event"] == "error"}
+    assert errors == {
+        3: [f"Ismeretlen felhasználó azonosító: {user_id + 100}"],
+        4: [f"Ismeretlen helyszín azonosító: {location_id + 100}"],
+    }
+    item = db.query(models.Item).one()
+    assert (item.name, item.user_id, item.location_id) == ("Kávéfőző", user_id, location_id)
@@ -0,0 +1,166 @@
+import io
+import os
+from datetime import datetime, timedelta
+
+import pytest
+from PIL import Image
+from starlette.datastructures import UploadFile
+
+from app import crud, jobs, models
+from app.utils import image_handler, job_queue
+
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    """Register throwaway job kinds that record their payloads."""
+
+    monkeypatch.setattr(job_queue, "HANDLERS", dict(job_queue.HANDLERS))
+    monkeypatch.setattr(job_queue, "RETRY_BASE_SECONDS", 0)
+    recorded = {"ok": [], "flaky": [], "failed": []}
+
+    @job_queue.handler("test.ok")
+    def ok(payload):
+        recorded["ok"].append(payload)
+        return {"echo": payload["n"]}
+
+    @job_queue.handler("test.flaky", on_failure=lambda payload, error: recorded["failed"].append(str(error)))
+    def flaky(payload):
+        recorded["flaky"].append(payload)
+        raise RuntimeError("boom")
+
+    return recorded
+
+
+def test_jobs_run_once_and_queued_duplicates_are_merged(test_db, calls):
+    db = test_db()
+    first = job_queue.enqueue(db, "test.ok", {"n": 1}, dedupe_key="same")
+    second = job_queue.enqueue(db, "test.ok", {"n": 1}, dedupe_key="same")
+    job_queue.enqueue(db, "test.ok", {"n": 2})
+
+    assert first.id == second.id
+    assert job_queue.run_pending() == 2
+    assert calls["ok"] == [{"n": 1}, {"n": 2}]
+
+    db.refresh(first)
+    assert (first.status, first.attempts, first.result) == ("succeeded", 1, {"echo": 1})
+    assert job_queue.stats(db)["succeeded"] == 2
+    db.close()
+
+
+def test_failing_job_is_retried_then_marked_failed(test_db, calls):
+    db = test_db()
+    job = job_queue.enqueue(db, "test.flaky", {"n": 1}, max_attempts=3)
+
+    assert job_queue.run_pending() == 3
+    db.refresh(job)
+    assert (job.status, job.attempts, job.last_error) == ("failed", 3, "boom")
+    assert calls["failed"] == ["boom"]
+
+    job_queue.retry(db, job.id)
+    db.refresh(job)
+    assert (job.status, job.attempts) == ("queued", 0)
+    db.close()
+
+
+def test_retry_waits_for_backoff(test_db, calls, monkeypatch):
+    monkeypatch.setattr(job_queue, "RETRY_BASE_SECONDS", 60)
+    db = test_db()
+    job = job_queue.enqueue(db, "test.flaky", {"n": 1})
+
+    assert job_queue.run_pending() == 1
+    db.refresh(job)
+    assert job.status == "queued"
+    assert job.run_after > datetime.now() + timedelta(seconds=50)
+    assert job_queue.claim_next("w") is None
+    db.close()
+
+
+def test_expired_lease_is_reclaimed_by_another_worker(test_db, calls):
+    db = test_db()
+    job = job_queue.enqueue(db, "test.ok", {"n": 7})
+
+    claimed = job_queue.claim_next("crashed-worker")
+    assert claimed["id"] == job.id
+    assert job_queue.claim_next("other") is None
+
+    db.query(models.Job).update({"locked_at": datetime.now() - job_queue.LEASE - timedelta(seconds=1)})
+    db.commit()
+
+    reclaimed = job_queue.claim_next("other")
+    assert (reclaimed["id"], reclaimed["attempts"]) == (job.id, 2)
+    assert job_queue.run_job(reclaimed, "other")
+
+    # The crashed worker's late result must not overwrite the new owner's
+    job_queue._finish(claimed, "crashed-worker", {"status": "failed"})
+    db.refresh(job)
+    assert job.status == "succeeded"
+    db.close()
+
+
+def test_jobs_sharing_a_lock_key_never_run_at_the_same_time(test_db):
+    db = test_db()
+    process = jobs.enqueue_image_processing(db, "abc.jpg")
+    rotate = jobs.enqueue_rotation(db, 1, "abc.jpg")
+    other = jobs.enqueue_rotation(db, 2, "other.jpg")
+
+    # Workers in different processes only share the jobs table
+    assert job_queue.claim_next("worker-a")["id"] == process.id
+    assert job_queue.claim_next("worker-b")["id"] == other.id
+    assert job_queue.claim_next("worker-b") is None
+
+    # A new request while the first one runs is queued behind it, not merged into it
+    again = jobs.enqueue_image_processing(db, "abc.jpg")
+    assert again.id != process.id
+    assert job_queue.claim_next("worker-b") is None
+
+    # An expired lease no longer holds the lock
+    db.query(models.Job).filter_by(id=process.id).update(
+        {"locked_at": datetime.now() - job_queue.LEASE - timedelta(seconds=1)}
+    )
+    db.commit()
+    assert job_queue.claim_next("worker-b")["id"] == process.id
+    job_queue._finish({"id": process.id}, "worker-b", {"status": "succeeded"})
+    assert job_queue.claim_next("worker-a")["id"] == rotate.id
+    db.close()
+
+
+async def test_uploaded_item_image_is_processed_by_job(test_db, media_dirs):
+    buffer = io.BytesIO()
+    with Image.new("RGB", (800, 600), color="green") as img:
+        img.save(buffer, format="PNG")
+    buffer.seek(0)
+    upload = UploadFile(filename="photo.png", file=buffer, headers={"content-type": "image/png"})
+
+    result = await image_handler.store_uploaded_file(upload)
+    filename = result["filename"]
+    assert result["status"] == "processing"
+    assert os.path.exists(image_handler.get_pending_path(filename))
+    assert not os.path.exists(image_handler.get_image_path(filename))
+
+    db = test_db()
+    item = models.Item(name="Lámpa", category="Egyéb")
+    db.add(item)
+    db.commit()
+    db_image = crud.create_item_image(db, item.id, filename, "photo.png", rotation=90)
+    crud.update_item_image(db, db_image.id, processing_status="processing")
+    jobs.enqueue_image_processing(db, filename)
+
+    assert job_queue.run_pending() == 1
+
+    db.refresh(db_image)
+    assert db_image.processing_status == "ready"
+    assert db_image.orientation == "landscape"
+    assert db_image.variants
+    assert db_image.rotation_ready
+    assert os.path.exists(image_handler.get_thumbnail_path(filename))
+    assert os.path.exists(image_handler.get_rotated_path(filename, 90))
+    assert not os.path.exists(image_handler.get_pending_path(filename))
+    db.close()
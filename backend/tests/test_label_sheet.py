@@ -0,0 +1,60 @@
+import io
+import re
+import zipfile
+
+import pytest
+from PIL import Image
+
+from app import crud, models
+from app.utils import label_sheet
+
+
+@pytest.fixture(autouse=True)
+def low_dpi(monkeypatch):
+    monkeypatch.setattr(label_sheet, "DPI", 60)
+
+
+def _labels(count):
+    return [(f"ITM-{i:08X}", f"Tárgy {i} hosszú nevű ütvefúró") for i in range(count)]
+
+
+def test_pdf_is_streamed_page_by_page_with_valid_xref():
+    labels = _labels(50)  # a4-3x8: 24 per page, 3 pages after skipping 5 slots
+    chunks = list(label_sheet.iter_pdf(labels, "a4-3x8", skip=5))
+    pdf = b"".join(chunks)
+
+    assert label_sheet.page_count(len(labels), "a4-3x8", skip=5) == 3
+    assert len(chunks) == 4
+    assert pdf.startswith(b"%PDF-1.4") and pdf.endswith(b"%%EOF\n")
+    assert b"/Count 3" in pdf
+
+    startxref = int(re.search(rb"startxref\n(\d+)", pdf).group(1))
+    entries = re.findall(rb"(\d{10}) 00000 n", pdf[startxref:])
+    for obj_id, offset in enumerate(entries, start=1):
+        assert pdf[int(offset):].startswith(f"{obj_id} 0 obj".encode())
+
+
+def test_single_png_page_matches_zip_page():
+    labels = _labels(30)  # a4-5x13: 65 per page
+    archive = zipfile.ZipFile(io.BytesIO(b"".join(label_sheet.iter_png_zip(labels, "a4-5x13", skip=60))))
+
+    assert archive.namelist() == ["page-001.png", "page-002.png"]
+    assert label_sheet.render_png_page(labels, "a4-5x13", 2, skip=60) == archive.read("page-002.png")
+    assert label_sheet.render_png_page(labels, "a4-5x13", 3, skip=60) is None
+    with Image.open(io.BytesIO(archive.read("page-001.png"))) as page:
+        assert page.size == (label_sheet._px(210), label_sheet._px(297))
+
+
+def test_qr_labels_keep_requested_order_and_assign_missing_codes(test_db):
+    db = test_db()
+    items = [models.Item(name=name, category="Szerszám") for name in ("Fúró", "Csavarhúzó", "Kalapács")]
+    items[1].qr_code = "ITM-EXISTING"
+    db.add_all(items)
+    db.commit()
+
+    labels = crud.get_qr_labels(db, [items[2].id, items[1].id, 999])
+
+    assert [name for _, name in labels] == ["Kalapács", "Csavarhúzó"]
+    assert labels[1][0] == "ITM-EXISTING" and labels[0][0].startswith("ITM-")
+    assert [name for _, name in crud.get_qr_labels(db, category="Szerszám")] == ["Csavarhúzó", "Fúró", "Kalapács"]
+    db.close()
@@ -0,0 +1,77 @@
+from fastapi.responses import FileResponse
+
+from app.utils import document_handler, media_response
+
+
+def test_accel_redirect_points_into_internal_location(tmp_path, monkeypatch):
+    """In X-Accel mode only headers are returned; the URI maps the sharded path under the prefix."""
+
+    monkeypatch.setattr(document_handler, "DOCUMENT_DIR", str(tmp_path / "documents"))
+    monkeypatch.setattr(media_response, "ACCEL_ENABLED", True)
+
+    path = tmp_path / "documents" / "ab" / "cd" / "doc_számla.pdf"
+    path.parent.mkdir(parents=True)
+    path.write_bytes(b"%PDF")
+
+    response = media_response.file_response(str(path), media_type="application/pdf", filename="számla.pdf")
+
+    assert not isinstance(response, FileResponse)
+    assert response.body == b""
+    assert response.headers["x-accel-redirect"] == "/_protected/documents/ab/cd/doc_sz%C3%A1mla.pdf"
+    assert response.headers["content-disposition"] == "attachment; filename*=utf-8''sz%C3%A1mla.pdf"
+    assert response.headers["content-type"] == "application/pdf"
+
+
+def test_paths_outside_served_roots_fall_back_to_file_response(tmp_path, monkeypatch):
+    """Disabled mode, or a path outside the allowed roots, is streamed by Python."""
+
+    monkeypatch.setattr(media_response, "ACCEL_ENABLED", True)
+    outside = tmp_path / "secret.db"
+    outside.write_bytes(b"x")
+
+    assert isinstance(media_response.file_response(str(outside)), FileResponse)
+
+    monkeypatch.setattr(media_response, "ACCEL_ENABLED", False)
+    monkeypatch.setattr(document_handler, "DOCUMENT_DIR", str(tmp_path))
+    assert isinstance(media_response.file_response(str(outside)), FileResponse)
+
+
+def test_immutable_files_revalidate_from_precomputed_etag_without_stat(tmp_path):
+    """Content-addressed files get immutable caching; a matching If-None-Match never touches the disk."""
+
+    name = "ab" * 32 + ".jpg"
+    missing_path = str(tmp_path / name)  # never created: a 304 must not stat it
+
+    response = media_response.file_response(
+        missing_path,
+        media_type="image/jpeg",
+        headers={"Vary": "Accept"},
+        request_headers={"if-none-match": f'W/"other", "{name}"'},
+        cache="immutable",
+    )
+
+    assert response.status_code == 304
+    assert response.headers["etag"] == f'"{name}"'
+    assert response.headers["cache-control"] == media_response.IMMUTABLE_CACHE_CONTROL
+    assert response.headers["vary"] == "Accept"
+
+
+def test_mutable_qr_files_use_last_modified(tmp_path):
+    """Regenerable files are served with no-cache + Last-Modified and honour If-Modified-Since."""
+
+    path = tmp_path / "item_1_qr_small.png"
+    path.write_bytes(b"png")
+
+    fresh = media_response.file_response(str(path), media_type="image/png", request_headers={}, cache="revalidate")
+    assert fresh.status_code == 200
+    assert fresh.headers["cache-control"] == "no-cache"
+    last_modified = fresh.headers["last-modified"]
+
+    cached = media_response.file_response(
+        str(path),
+        media_type="image/png",
+        request_headers={"if-modified-since": last_modified},
+        cache="revalidate",
+    )
+    assert cached.status_code == 304
+    assert cached.headers["last-modified"] == last_modified
@@ -0,0 +1,77 @@
+import os
+import time
+from datetime import timedelta
+
+import pytest
+
+from app import models
+from app.utils import blob_store, document_handler, image_handler, orphan_gc, qr_handler
+
+
+@pytest.fixture
+def gc_dirs(media_dirs, tmp_path, monkeypatch):
+    monkeypatch.setattr(document_handler, "DOCUMENT_DIR", str(tmp_path / "documents"))
+    monkeypatch.setattr(qr_handler, "QR_DIR", str(tmp_path / "qr_codes"))
+    monkeypatch.setattr(orphan_gc, "MAX_DELETES_PER_SECOND", 0)
+    monkeypatch.setattr(orphan_gc, "_cursor", 0)
+    return tmp_path
+
+
+def _write(path, age_hours=48, size=100):
+    blob_store.ensure_parent_dir(path)
+    with open(path, "wb") as f:
+        f.write(b"x" * size)
+    old = time.time() - age_hours * 3600
+    os.utime(path, (old, old))
+    return path
+
+
+def test_orphans_are_removed_after_grace_and_references_kept(gc_dirs, test_db):
+    """Unreferenced files (and their derivatives) older than the grace period are deleted."""
+
+    db = test_db()
+    item = models.Item(name="Fúró", category="Szerszám", image_filename="kept.jpg")
+    db.add(item)
+    db.commit()
+
+    kept = [
+        _write(image_handler.get_image_path("kept.jpg")),
+        _write(image_handler.get_thumbnail_path("kept.jpg")),
+        _write(image_handler.get_variant_path("kept.jpg", 96)),
+        _write(qr_handler.get_qr_path(item.id, "small")),
+        # Fresh upload not attached to an item yet
+        _write(image_handler.get_image_path("fresh.jpg"), age_hours=1),
+    ]
+    orphans = [
+        _write(image_handler.get_image_path("gone.jpg"), size=1000),
+        _write(os.path.join(image_handler.UPLOAD_DIR, "legacy.jpg"), size=1000),
+        _write(image_handler.get_thumbnail_path("gone.jpg")),
+        _write(image_handler.get_rotated_path("gone.jpg", 90)),
+        _write(document_handler.get_document_path("old_invoice.pdf")),
+        _write(qr_handler.get_qr_path(item.id + 1, "small")),
+    ]
+
+    report = orphan_gc.run_full_cycle(db, grace=timedelta(hours=24))
+    db.close()
+
+    assert report["cycle_complete"] is True
+    assert report["removed"] == len(orphans)
+    assert report["reclaimed_bytes"] == 2 * 1000 + 4 * 100
+    assert all(os.path.exists(p) for p in kept)
+    assert not any(os.path.exists(p) for p in orphans)
+    assert orphan_gc.status()["last_run"]["removed"] == len(orphans)
+
+
+def test_incremental_runs_advance_the_cursor(gc_dirs, test_db):
+    """Each run processes a bounded slice of shard units and resumes where the last stopped."""
+
+    db = test_db()
+    total = len(orphan_gc.gc_directories()) * len(orphan_gc.SHARD_UNITS)
+
+    first = orphan_gc.run_once(db, max_units=100)
+    second = orphan_gc.run_once(db, max_units=100)
+    assert (first["cursor"], second["cursor"]) == (100, 200)
+
+    rest = orphan_gc.run_once(db, max_units=total - 200)
+    assert rest["cursor"] == 0 and rest["cycle_complete"] is True
+    db.close()
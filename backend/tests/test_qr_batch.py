@@ -0,0 +1,77 @@
+import os
+
+import pytest
+from PIL import Image
+
+from app import crud, models
+from app.utils import qr_handler
+
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+def qr_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(qr_handler, "QR_DIR", str(tmp_path / "qr_codes"))
+    monkeypatch.setattr(qr_handler, "BATCH_CHUNK_SIZE", 2)
+    return tmp_path / "qr_codes"
+
+
+def _items(db, count, qr_codes=()):
+    items = [models.Item(name=f"Tárgy {i}", category="Egyéb") for i in range(count)]
+    for item, code in zip(items, qr_codes):
+        item.qr_code = code
+    db.add_all(items)
+    db.commit()
+    return [item.id for item in items]
+
+
+def test_assign_qr_codes_keeps_existing_and_fills_missing(test_db):
+    db = test_db()
+    ids = _items(db, 4, qr_codes=["ITM-EXISTING"])
+
+    entries, assigned = crud.assign_qr_codes(db, ids[:3])
+
+    assert assigned == 2
+    assert [item_id for item_id, _ in entries] == ids[:3]
+    assert entries[0][1] == "ITM-EXISTING"
+    assert len({code for _, code in entries}) == 3
+
+    # "All missing" mode only picks up the item left without a code
+    entries, assigned = crud.assign_qr_codes(db, None)
+    assert [item_id for item_id, _ in entries] == [ids[3]] and assigned == 1
+    assert db.query(models.Item).filter(models.Item.qr_code.is_(None)).count() == 0
+    db.close()
+
+
+@pytest.mark.parametrize("processes", [1, 2])
+async def test_render_batch_writes_every_size_and_reports_progress(qr_dir, processes):
+    entries = [(item_id, f"ITM-{item_id:08d}") for item_id in range(1, 6)]
+
+    chunks = [results async for results in qr_handler.render_batch(entries, ["small", "large"], processes)]
+
+    assert sorted(len(chunk) for chunk in chunks) == [1, 2, 2]
+    assert not any("error" in result for chunk in chunks for result in chunk)
+    for item_id, _ in entries:
+        with Image.open(qr_handler.get_qr_path(item_id, "small")) as small:
+            with Image.open(qr_handler.get_qr_path(item_id, "large")) as large:
+                assert large.width > small.width
+        assert not os.path.exists(qr_handler.get_qr_path(item_id, "medium"))
+    qr_handler.shutdown_pool()
+
+
+def test_generate_all_sizes_matches_single_size_render(qr_dir):
+    single = qr_handler.generate_qr_code(1, "ITM-ABCDEF12", "medium")
+    with open(single["path"], "rb") as f:
+        expected = f.read()
+
+    results = qr_handler.generate_all_sizes(1, "ITM-ABCDEF12")
+
+    assert set(results) == {"small", "medium", "large"}
+    with open(results["medium"]["path"], "rb") as f:
+        assert f.read() == expected
@@ -0,0 +1,91 @@
+import pytest
+from sqlalchemy import event, text
+
+from app import crud, database, models
+from app.utils import qr_index
+
+
+@pytest.fixture
+def db(test_db):
+    session = test_db()
+    location = models.Location(city="Budapest", address="Fő utca 1")
+    session.add(location)
+    session.add_all([
+        models.Item(name="Fúró", category="Szerszám", qr_code="ITM-00000001", location=location),
+        models.Item(name="Létra", category="Szerszám", qr_code="ITM-00000002"),
+    ])
+    session.commit()
+    qr_index.load()
+    yield session
+    session.close()
+    qr_index.reset()
+
+
+def test_indexed_scan_does_not_touch_the_database(db):
+    statements = []
+    event.listen(database.engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+    entry = qr_index.lookup("ITM-00000001")
+
+    assert statements == []
+    assert entry == {
+        "id": entry["id"], "name": "Fúró", "qr_code": "ITM-00000001",
+        "location_id": entry["location_id"], "location": "Budapest, Fő utca 1",
+    }
+    assert qr_index.lookup("ITM-00000002")["location"] is None
+
+
+def test_index_follows_committed_changes_only(db):
+    drill = db.query(models.Item).filter_by(name="Fúró").one()
+
+    drill.qr_code = "ITM-0000000A"
+    db.flush()
+    db.rollback()
+    assert qr_index.lookup("ITM-0000000A") is None
+    assert qr_index.lookup("ITM-00000001")["name"] == "Fúró"
+
+    drill.qr_code = "ITM-0000000A"
+    drill.name = "Ütvefúró"
+    drill.location.city = "Győr"
+    db.commit()
+    assert qr_index.stats()["codes"] == 2
+    assert "ITM-00000001" not in qr_index._entries
+    assert qr_index.lookup("ITM-0000000A")["location"] == "Győr, Fő utca 1"
+
+    db.delete(drill)
+    db.commit()
+    assert "ITM-0000000A" not in qr_index._entries
+
+    # Bulk code assignment bypasses mapper events
+    ladder_id = db.query(models.Item.id).filter_by(name="Létra").scalar()
+    item = models.Item(name="Kalapács", category="Szerszám")
+    db.add(item)
+    db.commit()
+    entries, assigned = crud.assign_qr_codes(db, [item.id, ladder_id])
+    assert assigned == 1
+    assert qr_index._entries[dict(entries)[item.id]][1] == "Kalapács"
+
+
+def test_codes_written_elsewhere_are_resolved_from_the_database(db):
+    with database.engine.begin() as conn:
+        conn.execute(text("INSERT INTO items (name, category, quantity, qr_code) VALUES ('Olló', 'Egyéb', 1, 'ITM-0000000F')"))
+
+    assert qr_index.lookup("ITM-0000000F")["name"] == "Olló"
+    assert qr_index.stats()["misses"] == 1
+    assert qr_index.lookup("ITM-0000000F")["name"] == "Olló"
+    assert qr_index.stats()["misses"] == 1
+    assert qr_index.lookup("ITM-DOESNOTEXIST") is None
+
+
+def test_item_moved_to_a_new_location_scans_with_its_name(db):
+    ladder = db.query(models.Item).filter_by(name="Létra").one()
+    ladder.location = models.Location(city="Pécs", address="Kert utca 2")
+    db.commit()
+    assert qr_index.lookup("ITM-00000002")["location"] == "Pécs, Kert utca 2"
+
+    # Location created outside this process: loaded when an item is refreshed onto it
+    with database.engine.begin() as conn:
+        conn.execute(text("INSERT INTO locations (id, country, city, address) VALUES (99, 'Magyarország', 'Eger', NULL)"))
+    ladder.location_id = 99
+    db.commit()
+    assert qr_index.lookup("ITM-00000002")["location"] == "Eger"
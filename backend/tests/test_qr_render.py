@@ -0,0 +1,74 @@
+import io
+import os
+import xml.etree.ElementTree as ET
+
+import pytest
+import qrcode
+from PIL import Image, ImageChops
+
+from app.utils import qr_handler
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache(monkeypatch):
+    monkeypatch.setattr(qr_handler, "CACHE_DIR", "")
+    qr_handler.clear_cache()
+    yield
+    qr_handler.clear_cache()
+
+
+@pytest.mark.parametrize("size", list(qr_handler.QR_SIZES))
+def test_png_matches_qrcode_library_output(size):
+    config = qr_handler.QR_SIZES[size]
+    qr = qrcode.QRCode(
+        error_correction=qrcode.constants.ERROR_CORRECT_H,
+        box_size=config["box_size"],
+        border=config["border"],
+    )
+    qr.add_data("ITM-ABCDEF12")
+    qr.make(fit=True)
+    expected = qr.make_image(fill_color="black", back_color="white").get_image().convert("L")
+
+    with Image.open(io.BytesIO(qr_handler.render_qr("ITM-ABCDEF12", size, "png"))) as rendered:
+        assert rendered.size == expected.size
+        assert ImageChops.difference(rendered.convert("L"), expected).getbbox() is None
+
+
+def test_repeated_renders_are_served_from_cache_and_bounded_by_bytes(monkeypatch):
+    first = qr_handler.render_qr("ITM-00000001", "small")
+    assert qr_handler.render_qr("ITM-00000001", "small") is first
+    stats = qr_handler.cache_stats()
+    assert (stats["hits"], stats["misses"]) == (1, 1)
+
+    # Room for roughly two entries: the least recently used one is evicted
+    monkeypatch.setattr(qr_handler, "CACHE_MAX_BYTES", len(first) * 2 + len(first) // 2)
+    qr_handler.render_qr("ITM-00000002", "small")
+    qr_handler.render_qr("ITM-00000001", "small")
+    qr_handler.render_qr("ITM-00000003", "small")
+
+    assert list(qr_handler._cache) == [("ITM-00000001", "small", "png"), ("ITM-00000003", "small", "png")]
+    assert qr_handler.cache_stats()["bytes"] <= qr_handler.CACHE_MAX_BYTES
+
+
+def test_svg_output_has_module_grid_viewbox():
+    side = len(qr_handler.qr_matrix("ITM-ABCDEF12")) + 2 * qr_handler.QR_SIZES["medium"]["border"]
+
+    root = ET.fromstring(qr_handler.render_qr("ITM-ABCDEF12", "medium", "svg"))
+
+    assert root.tag == "{http://www.w3.org/2000/svg}svg"
+    assert root.get("viewBox") == f"0 0 {side} {side}"
+    assert root.get("width") == "5cm"
+    assert root.find("{http://www.w3.org/2000/svg}path").get("d").startswith("M2 2h7")
+
+
+def test_persisted_renders_survive_memory_cache_reset(tmp_path, monkeypatch):
+    monkeypatch.setattr(qr_handler, "CACHE_DIR", str(tmp_path / "qr_cache"))
+    data = qr_handler.render_qr("ITM-ABCDEF12", "large")
+    assert len(os.listdir(tmp_path / "qr_cache")) == 1
+
+    qr_handler.clear_cache()
+    assert qr_handler.render_qr("ITM-ABCDEF12", "large") == data
+    assert qr_handler.cache_stats()["matrices"] == 0
+
+    with pytest.raises(ValueError):
+        qr_handler.render_qr("ITM-ABCDEF12", "huge")
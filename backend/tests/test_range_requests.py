@@ -0,0 +1,123 @@
+import pytest
+
+from app.utils import media_response
+
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+def pdf(tmp_path):
+    path = tmp_path / ("cd" * 32 + ".pdf")
+    path.write_bytes(bytes(range(256)) * 40)  # 10240 bytes
+    return path
+
+
+async def call_asgi(app, path="/", headers=None, method="GET", extensions=None):
+    """Drive an ASGI app (or response) directly and collect status, headers and body."""
+
+    scope = {
+        "type": "http",
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()],
+        "extensions": extensions or {},
+    }
+    result = {"body": b"", "zerocopy": []}
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            result["status"] = message["status"]
+            result["headers"] = {k.decode(): v.decode() for k, v in message["headers"]}
+        elif message["type"] == "http.response.body":
+            result["body"] += message.get("body", b"")
+        elif message["type"] == "http.response.zerocopy":
+            message["file"].seek(message["offset"])
+            result["body"] += message["file"].read(message["count"])
+            result["zerocopy"].append((message["offset"], message["count"]))
+
+    await app(scope, receive, send)
+    return result
+
+
+def respond(pdf, headers):
+    return media_response.file_response(
+        str(pdf), media_type="application/pdf", request_headers=headers, cache="immutable"
+    )
+
+
+async def test_single_and_suffix_ranges(pdf):
+    data = pdf.read_bytes()
+
+    result = await call_asgi(respond(pdf, {"range": "bytes=100-199"}))
+    assert result["status"] == 206
+    assert result["headers"]["content-range"] == f"bytes 100-199/{len(data)}"
+    assert result["headers"]["content-length"] == "100"
+    assert result["body"] == data[100:200]
+
+    result = await call_asgi(respond(pdf, {"range": "bytes=-50"}))
+    assert result["body"] == data[-50:]
+
+    result = await call_asgi(respond(pdf, {"range": "bytes=10000-"}))
+    assert result["body"] == data[10000:]
+
+
+async def test_multi_range_returns_multipart_byteranges(pdf):
+    data = pdf.read_bytes()
+
+    result = await call_asgi(respond(pdf, {"range": "bytes=0-9, 5000-5009, 8-12"}))
+    assert result["status"] == 206
+    content_type = result["headers"]["content-type"]
+    assert content_type.startswith("multipart/byteranges; boundary=")
+    boundary = content_type.split("boundary=")[1]
+    assert int(result["headers"]["content-length"]) == len(result["body"])
+
+    parts = result["body"].split(f"--{boundary}".encode())[1:-1]
+    bodies = [part.split(b"\r\n\r\n", 1)[1][:-2] for part in parts]
+    # 0-9 and 8-12 overlap and are coalesced
+    assert bodies == [data[0:13], data[5000:5010]]
+    assert b"Content-Range: bytes 5000-5009/10240" in parts[1]
+
+
+async def test_unsatisfiable_and_stale_if_range(pdf):
+    result = await call_asgi(respond(pdf, {"range": "bytes=20000-"}))
+    assert result["status"] == 416
+    assert result["headers"]["content-range"] == "bytes */10240"
+
+    # If-Range with a different validator: the full (current) representation is sent
+    result = await call_asgi(respond(pdf, {"range": "bytes=0-9", "if-range": '"outdated"'}))
+    assert result["status"] == 200
+    assert len(result["body"]) == 10240
+
+    etag = media_response.etag_for(pdf.name)
+    result = await call_asgi(respond(pdf, {"range": "bytes=0-9", "if-range": etag}))
+    assert result["status"] == 206
+
+
+async def test_static_mount_uses_zerocopy_when_server_supports_it(pdf):
+    data = pdf.read_bytes()
+    static = media_response.ShardedStaticFiles(directory=str(pdf.parent))
+
+    result = await call_asgi(
+        static,
+        path=f"/{pdf.name}",
+        headers={"range": "bytes=1024-2047"},
+        extensions={"http.response.zerocopy": {}},
+    )
+    assert result["status"] == 206
+    assert result["headers"]["accept-ranges"] == "bytes"
+    assert result["zerocopy"] == [(1024, 1024)]
+    assert result["body"] == data[1024:2048]
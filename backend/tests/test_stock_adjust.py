@@ -0,0 +1,103 @@
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import crud, models, schemas
+from app.main import app
+
+
+def run_parallel(session_factory, item_id, deltas):
+    """Each adjuster gets its own session and starts at the same moment."""
+
+    barrier = threading.Barrier(len(deltas))
+    results, rejected = [], []
+
+    def adjuster(delta):
+        db = session_factory()
+        try:
+            barrier.wait()
+            results.append(crud.adjust_stock(db, item_id, delta))
+        except ValueError:
+            rejected.append(delta)
+        finally:
+            db.close()
+
+    threads = [threading.Thread(target=adjuster, args=(delta,)) for delta in deltas]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, rejected
+
+
+@pytest.fixture
+def item_id(test_db):
+    db = test_db()
+    item = models.Item(name="Elem AA", category="Fogyóeszköz", quantity=50, min_quantity=10)
+    db.add(item)
+    db.commit()
+    yield item.id
+    db.close()
+
+
+def test_parallel_adjustments_are_not_lost(test_db, item_id):
+    results, rejected = run_parallel(test_db, item_id, [3, -1] * 50)
+
+    assert rejected == []
+    db = test_db()
+    assert db.get(models.Item, item_id).quantity == 50 + 50 * 3 - 50
+    # In commit order each movement starts where the previous one ended, and the
+    # pairs reported to the adjusters are exactly the links of that chain
+    movements = db.query(models.StockMovement).filter_by(item_id=item_id, reason="adjust").order_by(models.StockMovement.id).all()
+    chain = [(m.quantity_after - m.delta, m.quantity_after) for m in movements]
+    assert len(chain) == 100 and chain[0][0] == 50 and chain[-1][1] == 150
+    assert all(before == after for (_, after), (before, _) in zip(chain, chain[1:]))
+    assert sorted((r["previous_quantity"], r["quantity"]) for r in results) == sorted(chain)
+    db.close()
+
+
+def test_quantity_never_goes_negative_and_low_stock_fires_once(test_db, item_id):
+    results, rejected = run_parallel(test_db, item_id, [-1] * 100)
+
+    assert len(results) == 50 and len(rejected) == 50
+    db = test_db()
+    assert db.get(models.Item, item_id).quantity == 0
+    alerts = crud.get_stock_alerts(db)
+    assert [(a.kind, a.quantity) for a in alerts] == [("LOW_STOCK", 10)]
+    assert [r["alert"] for r in results].count("LOW_STOCK") == 1
+
+    restocked = crud.adjust_stock(db, item_id, 20)
+    assert (restocked["alert"], restocked["low_stock"]) == ("RESTOCKED", False)
+    assert [a.kind for a in crud.get_stock_alerts(db, after_id=alerts[-1].id)] == ["RESTOCKED"]
+    assert crud.adjust_stock(db, 999, 1) is None
+    db.close()
+
+
+def test_alerts_are_raised_on_every_quantity_change_path(test_db, item_id):
+    db = test_db()
+    crud.update_item(db, item_id, schemas.ItemUpdate(quantity=5))
+    crud.bulk_item_operations(db, [schemas.BulkItemOperation(op="update", id=item_id, changes=schemas.ItemUpdate(quantity=30))])
+
+    assert [(a.kind, a.quantity) for a in crud.get_stock_alerts(db)] == [("LOW_STOCK", 5), ("RESTOCKED", 30)]
+    db.close()
+
+
+def test_item_taken_to_zero_is_still_served_by_the_api(test_db):
+    db = test_db()
+    item = models.Item(name="Tej", category="Élelmiszer", quantity=2)
+    db.add(item)
+    db.commit()
+    item_id = item.id
+    db.close()
+    client = TestClient(app)
+
+    response = client.post(f"/api/items/{item_id}/stock", json={"delta": -2})
+    assert response.status_code == 200 and response.json()["quantity"] == 0
+    assert client.get(f"/api/items/{item_id}").json()["quantity"] == 0
+    assert [entry["quantity"] for entry in client.get("/api/items").json()] == [0]
+
+    # The same floor applies to edits, and stock still cannot go below it
+    assert client.put(f"/api/items/{item_id}", json={"quantity": 0}).status_code == 200
+    assert client.post(f"/api/items/{item_id}/stock", json={"delta": -1}).status_code == 409
+    assert client.put(f"/api/items/{item_id}", json={"quantity": -1}).status_code == 422
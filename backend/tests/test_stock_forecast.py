@@ -0,0 +1,54 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from app import models
+from app.utils import stock_forecast
+
+
+def test_vectorized_fit_matches_per_item_rates():
+    # Item 1: 2/day every day, item 2: too few points -> period average, item 4: no consumption
+    days_ago = np.r_[np.arange(30, 0, -1), [20.0, 5.0]]
+    movement_items = np.r_[np.full(30, 1), [2, 2]]
+    amounts = np.r_[np.full(30, 2.0), [3.0, 6.0]]
+    item_ids = np.array([1, 2, 4])
+
+    result = stock_forecast.fit_rates(movement_items, days_ago, amounts, item_ids, np.array([90.0, 30.0, 90.0]))
+
+    assert result["rate"] == pytest.approx([2.0, 0.3, 0.0])
+    assert result["fitted"].tolist() == [True, False, False]
+    assert result["movements"].tolist() == [30, 2, 0]
+
+
+def test_compute_stores_rates_and_notifications_use_current_quantity(test_db):
+    db = test_db()
+    now = datetime.now()
+    coffee = models.Item(name="Kávé", category="Konyha", quantity=10)
+    soap = models.Item(name="Szappan", category="Fürdő", quantity=50)
+    db.add_all([coffee, soap])
+    db.commit()
+    db.execute(models.StockMovement.__table__.insert(), [
+        {"item_id": item.id, "delta": -per_day, "quantity_after": 0, "reason": "used",
+         "created_at": now - timedelta(days=day)}
+        for item, per_day in ((coffee, 2), (soap, 1)) for day in range(60, 0, -1)
+    ])
+    db.commit()
+
+    assert stock_forecast.compute(now=now)["items"] == 2
+    forecasts = {f.item_id: f for f in db.query(models.StockForecast)}
+    assert forecasts[coffee.id].rate_per_day == pytest.approx(2.0)
+    assert forecasts[soap.id].fitted
+
+    due = stock_forecast.due_soon(db, within_days=14)
+    assert [(item.name, days_left) for item, _, days_left in due] == [("Kávé", pytest.approx(5.0))]
+
+    # The stored rate is reused with the current quantity: no recomputation needed
+    coffee.quantity = 100
+    db.commit()
+    assert stock_forecast.due_soon(db, within_days=14) == []
+
+    db.delete(coffee)
+    db.commit()
+    assert db.query(models.StockForecast).count() == 1
+    db.close()
@@ -0,0 +1,115 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import crud, models, schemas
+from app.utils import stock_ledger
+
+
+@pytest.fixture
+def db(test_db):
+    session = test_db()
+    yield session
+    session.close()
+
+
+def movements(db, item_id):
+    return [
+        (m.reason, m.delta, m.quantity_after)
+        for m in db.query(models.StockMovement).filter_by(item_id=item_id).order_by(models.StockMovement.id)
+    ]
+
+
+def test_every_quantity_change_is_logged(db):
+    item = crud.create_item(db, schemas.ItemCreate(name="Elem AA", category="Fogyóeszköz", quantity=10))
+    crud.update_item(db, item.id, schemas.ItemUpdate(quantity=12))
+    crud.update_item(db, item.id, schemas.ItemUpdate(name="Elem AA (4 db)"))
+    crud.adjust_stock(db, item.id, -5, "used")
+    with pytest.raises(ValueError):
+        crud.adjust_stock(db, item.id, -100)
+
+    item.qr_code = "ITM-000000AA"
+    db.commit()
+    stocktake = crud.create_stocktake(db, schemas.StocktakeCreate(name="Kamra"))
+    crud.add_stocktake_scans(db, stocktake, [schemas.StocktakeScan(qr_code="ITM-000000AA", quantity=4)])
+    crud.apply_stocktake(db, stocktake)
+
+    # Setting the quantity on an object expired by the last commit still logs the delta
+    item.quantity = 6
+    db.commit()
+
+    assert movements(db, item.id) == [
+        ("initial", 10, 10), ("edit", 2, 12), ("used", -5, 7), ("stocktake", -3, 4), ("edit", 2, 6)
+    ]
+
+    crud.delete_item(db, item.id)
+    assert db.query(models.StockMovement).count() == 0
+
+
+def test_snapshots_give_the_same_position_as_a_full_scan(db):
+    item = models.Item(name="Kávé", category="Konyha", quantity=0)
+    db.add(item)
+    db.commit()
+    start = datetime(2026, 1, 1)
+    rows, quantity = [], 0
+    for day in range(120):
+        delta = 7 if day % 10 == 0 else -1
+        quantity += delta
+        rows.append({"item_id": item.id, "delta": delta, "quantity_after": quantity,
+                     "reason": "adjust", "created_at": start + timedelta(days=day)})
+
+    # Snapshots after day 39 and day 79; the last 40 days stay a tail
+    for first in (0, 40, 80):
+        db.execute(models.StockMovement.__table__.insert(), rows[first:first + 40])
+        db.commit()
+        if first < 80:
+            assert stock_ledger.take_snapshots(min_movements=25) == {"created": 1}
+    assert stock_ledger.take_snapshots(min_movements=41) == {"created": 0}
+    assert [s.taken_at for s in db.query(models.StockSnapshot).order_by(models.StockSnapshot.id)] == [
+        rows[39]["created_at"], rows[79]["created_at"]
+    ]
+
+    def full_scan(at):
+        expected = [r for r in rows if r["created_at"] <= at]
+        return {
+            "quantity": expected[-1]["quantity_after"],
+            "consumed": sum(-r["delta"] for r in expected if r["delta"] < 0),
+            "received": sum(r["delta"] for r in expected if r["delta"] > 0),
+        }
+
+    for day in (20, 60, 95):
+        at = start + timedelta(days=day, hours=12)
+        assert stock_ledger.position_at(db, item.id, at) == full_scan(at)
+
+    history = stock_ledger.history(db, item.id, start, start + timedelta(days=120), points=12)
+    assert len(history["points"]) == 12
+    assert [p["quantity"] for p in history["points"]][:3] == [rows[9]["quantity_after"], rows[19]["quantity_after"], rows[29]["quantity_after"]]
+    assert sum(p["consumed"] for p in history["points"]) == history["consumed"] == 108
+    assert history["end_quantity"] == quantity
+    assert history["consumption_per_day"] == pytest.approx(108 / 120)
+
+    # Without the movements covered by the latest snapshot the position is still
+    # exact: the tail query starts after the snapshot's movement_id
+    latest = db.query(models.StockSnapshot).order_by(models.StockSnapshot.movement_id.desc()).first()
+    db.query(models.StockMovement).filter(models.StockMovement.id <= latest.movement_id).delete()
+    db.commit()
+    at = start + timedelta(days=95, hours=12)
+    assert stock_ledger.position_at(db, item.id, at) == full_scan(at)
+
+
+def test_snapshot_loop_runs_without_the_file_gc(db, monkeypatch):
+    monkeypatch.setattr(stock_ledger, "SNAPSHOT_INTERVAL_SECONDS", 0)
+    monkeypatch.setattr(stock_ledger, "SNAPSHOT_MIN_MOVEMENTS", 3)
+    item = crud.create_item(db, schemas.ItemCreate(name="Tej", category="Élelmiszer", quantity=10))
+    for _ in range(3):
+        crud.adjust_stock(db, item.id, -1, "used")
+
+    async def run_briefly():
+        task = asyncio.create_task(stock_ledger.run_forever())
+        while not db.query(models.StockSnapshot).count():
+            await asyncio.sleep(0.01)
+        task.cancel()
+
+    asyncio.run(asyncio.wait_for(run_briefly(), timeout=5))
+    assert db.query(models.StockSnapshot.quantity).scalar() == 7
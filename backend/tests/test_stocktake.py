@@ -0,0 +1,81 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app import crud, models, schemas
+from app.main import app
+
+
+def scans(*pairs):
+    return [schemas.StocktakeScan(qr_code=code, quantity=quantity) for code, quantity in pairs]
+
+
+@pytest.fixture
+def db(test_db):
+    session = test_db()
+    garage = models.Location(city="Budapest", address="Garázs")
+    session.add(garage)
+    session.add_all([
+        models.Item(name="Csavar", category="Szerszám", quantity=100, qr_code="ITM-00000001", location=garage),
+        models.Item(name="Fúró", category="Szerszám", quantity=2, qr_code="ITM-00000002", location=garage),
+        models.Item(name="Létra", category="Szerszám", quantity=1, qr_code="ITM-00000003", location=garage),
+        models.Item(name="Kanapé", category="Bútor", quantity=1, qr_code="ITM-00000004"),
+    ])
+    session.commit()
+    yield session
+    session.close()
+
+
+def quantities(db):
+    return dict(db.query(models.Item.name, models.Item.quantity))
+
+
+def test_scan_batches_are_merged_and_diffed_against_quantities(db):
+    stocktake = crud.create_stocktake(db, schemas.StocktakeCreate(name="Garázs", location_id=1))
+
+    # One scan per physical object, split over two batches, plus a bulk count
+    assert crud.add_stocktake_scans(db, stocktake, scans(("ITM-00000002", 1), ("ITM-00000002", 1), ("ITM-UNKNOWN", 1))) == 2
+    crud.add_stocktake_scans(db, stocktake, scans(("ITM-00000002", 1), ("ITM-00000001", 90)))
+    crud.add_stocktake_scans(db, stocktake, scans(("ITM-00000001", 95)), mode="set")
+
+    report = crud.stocktake_diff(db, stocktake)
+
+    lines = {line["qr_code"]: line for line in report["lines"]}
+    assert (lines["ITM-00000001"]["counted"], lines["ITM-00000001"]["delta"], lines["ITM-00000001"]["status"]) == (95, -5, "under")
+    assert (lines["ITM-00000002"]["counted"], lines["ITM-00000002"]["status"]) == (3, "over")
+    assert lines["ITM-UNKNOWN"]["status"] == "unknown"
+    assert [item["name"] for item in report["not_scanned"]] == ["Létra"]
+    assert report["summary"] == {"counted_codes": 3, "matched": 0, "over": 1, "under": 1, "unknown": 1, "not_scanned": 1}
+    assert db.query(models.StocktakeCount).filter_by(qr_code="ITM-00000002").one().scans == 3
+
+
+def test_apply_writes_all_adjustments_once(db):
+    stocktake = crud.create_stocktake(db, schemas.StocktakeCreate(name="Garázs", location_id=1))
+    crud.add_stocktake_scans(db, stocktake, scans(("ITM-00000001", 95), ("ITM-00000002", 2), ("ITM-UNKNOWN", 1)))
+
+    result = crud.apply_stocktake(db, stocktake, zero_missing=True)
+
+    assert result == {"stocktake_id": stocktake.id, "adjusted": 1, "zeroed": 1, "unknown": 1}
+    assert quantities(db) == {"Csavar": 95, "Fúró": 2, "Létra": 0, "Kanapé": 1}
+    assert (stocktake.status, stocktake.adjusted_count) == ("applied", 2)
+
+    with pytest.raises(ValueError):
+        crud.apply_stocktake(db, stocktake)
+    with pytest.raises(ValueError):
+        crud.add_stocktake_scans(db, stocktake, scans(("ITM-00000001", 1)))
+    assert quantities(db)["Csavar"] == 95
+
+
+def test_items_zeroed_by_a_stocktake_are_still_listed(db):
+    client = TestClient(app)
+    stocktake_id = client.post("/api/stocktakes", json={"name": "Garázs", "location_id": 1}).json()["id"]
+    # Counted to zero explicitly, plus "Létra" left unscanned
+    client.post(f"/api/stocktakes/{stocktake_id}/scans", json={"scans": [
+        {"qr_code": "ITM-00000001", "quantity": 100}, {"qr_code": "ITM-00000002", "quantity": 0},
+    ], "mode": "set"})
+
+    response = client.post(f"/api/stocktakes/{stocktake_id}/apply", json={"zero_missing": True})
+    assert response.status_code == 200 and response.json()["zeroed"] == 1
+
+    listed = {entry["name"]: entry["quantity"] for entry in client.get("/api/items").json()}
+    assert listed == {"Csavar": 100, "Fúró": 0, "Létra": 0, "Kanapé": 1}
+    assert client.get("/api/items/3").json()["quantity"] == 0
@@ -0,0 +1,117 @@
+import hashlib
+import io
+import json
+import os
+from datetime import datetime, timedelta
+
+import pytest
+from PIL import Image
+
+from app.utils import image_handler, upload_sessions
+
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture(autouse=True)
+def session_dirs(media_dirs, tmp_path, monkeypatch):
+    monkeypatch.setattr(upload_sessions, "SESSION_DIR", str(tmp_path / "sessions"))
+    upload_sessions.init_sessions()
+
+
+def png_bytes():
+    buffer = io.BytesIO()
+    with Image.new("RGB", (320, 240), color="blue") as img:
+        img.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+async def stream(*parts):
+    for part in parts:
+        yield part
+
+
+class Dropped(Exception):
+    pass
+
+
+async def dropping_stream(data, drop_after):
+    yield data[:drop_after]
+    raise Dropped()
+
+
+async def test_chunks_with_wrong_offset_are_rejected_with_current_offset():
+    data = png_bytes()
+    session = upload_sessions.create_session("image", "photo.png", "image/png", len(data))
+
+    status = await upload_sessions.append_chunk(session["upload_id"], 0, stream(data[:100]))
+    assert status["offset"] == 100
+
+    with pytest.raises(upload_sessions.OffsetMismatch) as excinfo:
+        await upload_sessions.append_chunk(session["upload_id"], 0, stream(data[:100]))
+    assert excinfo.value.offset == 100
+    assert upload_sessions.current_offset(session["upload_id"]) == 100
+
+
+async def test_interrupted_chunk_resumes_and_finalizes_into_image():
+    data = png_bytes()
+    checksum = hashlib.sha256(data).hexdigest()
+    session = upload_sessions.create_session("image", "photo.png", "image/png", len(data), checksum=checksum)
+    upload_id = session["upload_id"]
+
+    # The connection drops halfway through the chunk: received bytes are kept
+    with pytest.raises(Dropped):
+        await upload_sessions.append_chunk(upload_id, 0, dropping_stream(data, 500))
+    offset = upload_sessions.session_status(upload_sessions.get_session(upload_id))["offset"]
+    assert offset == 500
+
+    with pytest.raises(ValueError):
+        await upload_sessions.open_completed(upload_id)
+
+    await upload_sessions.append_chunk(upload_id, offset, stream(data[offset:]))
+    meta = await upload_sessions.open_completed(upload_id)
+    try:
+        result = await image_handler.save_uploaded_file(meta["upload"])
+    finally:
+        await meta["upload"].close()
+    upload_sessions.delete_session(upload_id)
+
+    assert result["original_filename"] == "photo.png"
+    assert os.path.exists(image_handler.get_image_path(result["filename"]))
+    assert os.listdir(upload_sessions.SESSION_DIR) == []
+
+
+async def test_chunk_beyond_declared_size_is_rejected():
+    session = upload_sessions.create_session("image", "photo.png", "image/png", 10)
+
+    with pytest.raises(ValueError):
+        await upload_sessions.append_chunk(session["upload_id"], 0, stream(b"x" * 11))
+
+
+def test_invalid_file_type_is_rejected_before_upload():
+    with pytest.raises(ValueError):
+        upload_sessions.create_session("image", "notes.txt", "text/plain", 10)
+
+
+def test_expired_sessions_are_removed():
+    active = upload_sessions.create_session("image", "a.png", "image/png", 10)
+    abandoned = upload_sessions.create_session("image", "b.png", "image/png", 10)
+
+    meta_path = os.path.join(upload_sessions.SESSION_DIR, f"{abandoned['upload_id']}.json")
+    with open(meta_path, encoding="utf-8") as f:
+        meta = json.load(f)
+    meta["expires_at"] = (datetime.now() - timedelta(minutes=1)).isoformat()
+    with open(meta_path, "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+
+    report = upload_sessions.expire_sessions()
+
+    assert report["expired"] == 1
+    assert upload_sessions.get_session(active["upload_id"])
+    with pytest.raises(FileNotFoundError):
+        upload_sessions.get_session(abandoned["upload_id"])
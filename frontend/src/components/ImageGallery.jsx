@@ -39,7 +39,7 @@ function ImageGallery({ images, onRotate, onSetPrimary, onDelete, readOnly = fal
   }
 
   const currentImage = images[currentIndex];
-  const imageUrl = imagesAPI.getImageUrl(currentImage.filename);
+  const imageUrl = imagesAPI.getItemImageUrl(currentImage);
 
   // Swipe handlers
   const handleTouchStart = (e) => {
@@ -85,7 +85,7 @@ function ImageGallery({ images, onRotate, onSetPrimary, onDelete, readOnly = fal
 
   const handleRotate = () => {
     if (onRotate) {
-      const newRotation = (currentImage.rotation + 90) % 360;
+      const newRotation = ((currentImage.rotation || 0) + 90) % 360;
       onRotate(currentImage.id, newRotation);
     }
   };
@@ -123,9 +123,7 @@ function ImageGallery({ images, onRotate, onSetPrimary, onDelete, readOnly = fal
             style={{
               maxWidth: '100%',
               maxHeight: '400px',
-              objectFit: 'contain',
-              transform: `rotate(${currentImage.rotation}deg)`,
-              transition: 'transform 0.3s ease'
+              objectFit: 'contain'
             }}
           />
 
@@ -315,13 +313,12 @@ function ImageGallery({ images, onRotate, onSetPrimary, onDelete, readOnly = fal
                 }}
               >
                 <img
-                  src={imagesAPI.getImageUrl(img.filename)}
+                  src={imagesAPI.getItemImageUrl(img)}
                   alt=""
                   style={{
                     width: '100%',
                     height: '100%',
-                    objectFit: 'cover',
-                    transform: `rotate(${img.rotation}deg)`
+                    objectFit: 'cover'
                   }}
                 />
                 {img.is_primary && (
@@ -370,7 +367,6 @@ function ImageGallery({ images, onRotate, onSetPrimary, onDelete, readOnly = fal
               maxWidth: '100%',
               maxHeight: '100%',
               objectFit: 'contain',
-              transform: `rotate(${currentImage.rotation || 0}deg)`,
               borderRadius: 'var(--radius-medium)',
               boxShadow: '0 0 50px rgba(0, 0, 0, 0.5)',
               pointerEvents: 'none'  // JAVÍTVA: ne blokkolja a gombokat
@@ -426,6 +426,19 @@ export const imagesAPI = {
     return `${baseURL}/uploads/${filename}`;
   },
 
+  // ItemImage kiszolgálási URL - a szerver már elforgatta a pixeleket
+  getItemImageUrl: (image) => {
+    if (!image) return null;
+    if (!image.url) return imagesAPI.getImageUrl(image.filename);
+    // HTTPS esetén relatív URL-t használunk (Vite proxy-n keresztül)
+    if (window.location.protocol === 'https:') {
+      return image.url;
+    }
+    // HTTP esetén teljes URL
+    const baseURL = API_BASE_URL.replace('/api', '');
+    return `${baseURL}${image.url}`;
+  },
+
   // Thumbnail URL generálás
   getThumbnailUrl: (filename) => {
     if (!filename) return null;